@@ -5,10 +5,11 @@ Supports Llama 3.3 8B (general), Qwen 2.5 Coder 7B (code), DeepSeek R1 7B (reaso
 """
 
 import os
+import json
 import time
 import logging
 import asyncio
-from typing import List, Dict, Optional, Any, Tuple
+from typing import AsyncIterator, List, Dict, Optional, Any, Tuple
 from dataclasses import dataclass
 
 import yaml
@@ -16,11 +17,124 @@ import httpx
 from prometheus_client import Counter, Histogram, Gauge, start_http_server
 
 from circuit_breaker import get_circuit_breaker, CircuitBreakerConfig, CircuitBreakerError
+from http_client_pool import HTTPClientPool
+from llm_response_cache import LLMResponseCache
 
 from intent_classifier import Intent, IntentClassifier
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_STOP_SEQUENCES = ['<|eot_id|>', '<|end_of_text|>']
+
+
+def parse_stream_line(line: str) -> Optional[str]:
+    """
+    Extract the text delta from one line of a streaming backend response.
+
+    Accepts SSE (``data: {...}``) and newline-delimited JSON framing, with
+    TGI-style ``{"token": {"text": ...}}`` events as well as OpenAI-style
+    ``choices[0].text`` / ``choices[0].delta.content`` payloads.
+
+    Returns:
+        Text delta, or None for keep-alives, special tokens and end markers
+    """
+    line = line.strip()
+    if not line or line.startswith(':'):
+        return None
+    if line.startswith('data:'):
+        line = line[len('data:'):].strip()
+    if not line or line == '[DONE]':
+        return None
+
+    try:
+        data = json.loads(line)
+    except ValueError:
+        return None
+    if not isinstance(data, dict):
+        return None
+
+    token = data.get('token')
+    if isinstance(token, dict):
+        if token.get('special'):
+            return None
+        return token.get('text') or None
+
+    choices = data.get('choices')
+    if isinstance(choices, list) and choices:
+        choice = choices[0] or {}
+        delta = choice.get('delta')
+        if isinstance(delta, dict):
+            return delta.get('content') or None
+        return choice.get('text') or None
+
+    text = data.get('text')
+    return text if isinstance(text, str) and text else None
+
+
+_STREAM_END = object()
+
+
+class ModelDeltaStream:
+    """
+    Iterate a model's delta generator from a single pump task.
+
+    The generator holds the backend HTTP stream open, so it must be stepped
+    and closed from one task. Consumers (including the circuit breaker, which
+    runs the first-token wait in a task of its own) read deltas through a
+    small queue instead of calling the generator directly. The pump starts on
+    the first read, so nothing is requested until then.
+    """
+
+    def __init__(self, deltas: AsyncIterator[str], buffer_size: int = 64):
+        self._deltas = deltas
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=buffer_size)
+        self._pump_task: Optional[asyncio.Task] = None
+        self._finished = False
+
+    async def _pump(self):
+        try:
+            async for text in self._deltas:
+                await self._queue.put(text)
+        except Exception as e:
+            await self._queue.put(e)
+        else:
+            await self._queue.put(_STREAM_END)
+        finally:
+            await self._deltas.aclose()
+
+    def __aiter__(self) -> "ModelDeltaStream":
+        return self
+
+    async def __anext__(self) -> str:
+        if self._finished:
+            raise StopAsyncIteration
+        if self._pump_task is None:
+            self._pump_task = asyncio.create_task(self._pump())
+        item = await self._queue.get()
+        if item is _STREAM_END:
+            self._finished = True
+            raise StopAsyncIteration
+        if isinstance(item, Exception):
+            self._finished = True
+            raise item
+        return item
+
+    async def first(self) -> str:
+        """Wait for the first delta; a stream that ends without text yields ''."""
+        try:
+            return await self.__anext__()
+        except StopAsyncIteration:
+            return ''
+
+    async def aclose(self):
+        """Stop the pump and close the backend stream."""
+        self._finished = True
+        if self._pump_task is None:
+            await self._deltas.aclose()
+            return
+        self._pump_task.cancel()
+        await asyncio.gather(self._pump_task, return_exceptions=True)
+
 
 @dataclass
 class ModelConfig:
@@ -122,6 +236,13 @@ class PrometheusMetrics:
             ['model', 'error_type']
         )
 
+        # Response cache outcomes (hit, redis_hit, coalesced, miss)
+        self.response_cache = Counter(
+            'agent_router_response_cache_total',
+            'Exact-match response cache lookups by outcome',
+            ['model', 'result']
+        )
+
 
 class IntentClassifier:
     """Classify user intent based on message content."""
@@ -184,10 +305,26 @@ class AgentRouter:
     Agent router with intent classification and model selection.
     Supports dynamic routing, fallback chains, and Prometheus metrics.
     """
+
+    response_cache: Optional[LLMResponseCache] = None
     
-    def __init__(self, config_path: str = "configs/agent-router.yaml"):
-        """Initialize agent router with configuration."""
+    def __init__(
+        self,
+        config_path: str = "configs/agent-router.yaml",
+        http_pool: Optional[HTTPClientPool] = None,
+        response_cache: Optional[LLMResponseCache] = None
+    ):
+        """
+        Initialize agent router with configuration.
+        
+        Args:
+            config_path: Path to the router YAML configuration
+            http_pool: Shared pooled HTTP clients for model endpoints (created if None)
+            response_cache: Exact-match response cache (configured from LLM_CACHE_* if None)
+        """
         self.config_path = config_path
+        self.http_pool = http_pool or HTTPClientPool("agent_router")
+        self.response_cache = response_cache or LLMResponseCache()
         self.models: Dict[str, ModelConfig] = {}
         self.routing_config: Optional[RoutingConfig] = None
         self.intent_classifier: Optional[IntentClassifier] = None
@@ -202,6 +339,7 @@ class AgentRouter:
         self._load_config()
         self._initialize_metrics()
         self._initialize_circuit_breakers()
+        self.http_pool.register(*(model.endpoint for model in self.models.values()))
     
     def _load_config(self):
         """Load configuration from YAML file."""
@@ -318,6 +456,11 @@ class AgentRouter:
             except asyncio.CancelledError:
                 pass
     
+    async def aclose(self):
+        """Stop health checks and close pooled HTTP clients."""
+        await self.stop_health_checks()
+        await self.http_pool.aclose()
+    
     async def _health_check_loop(self):
         """Periodic health check loop."""
         while True:
@@ -343,22 +486,22 @@ class AgentRouter:
         health_url = f"{model.endpoint}/health"
         
         try:
-            async with httpx.AsyncClient(timeout=self.routing_config.timeouts['health_check']) as client:
-                response = await client.get(health_url)
+            client = self.http_pool.get_client(model.endpoint)
+            response = await client.get(health_url, timeout=self.routing_config.timeouts['health_check'])
+            
+            if response.status_code == 200:
+                model.consecutive_successes += 1
+                model.consecutive_failures = 0
                 
-                if response.status_code == 200:
-                    model.consecutive_successes += 1
-                    model.consecutive_failures = 0
-                    
-                    if model.consecutive_successes >= self.healthy_threshold:
-                        if not model.health_status:
-                            logger.info(f"Model {model_id} is now healthy")
-                            model.health_status = True
-                            self.metrics.model_health.labels(model=model_id).set(1)
-                    
-                    return True
-                else:
-                    raise httpx.HTTPError(f"Unhealthy status code: {response.status_code}")
+                if model.consecutive_successes >= self.healthy_threshold:
+                    if not model.health_status:
+                        logger.info(f"Model {model_id} is now healthy")
+                        model.health_status = True
+                        self.metrics.model_health.labels(model=model_id).set(1)
+                
+                return True
+            else:
+                raise httpx.HTTPError(f"Unhealthy status code: {response.status_code}")
         
         except Exception as e:
             model.consecutive_failures += 1
@@ -443,6 +586,48 @@ class AgentRouter:
         """
         return self.routing_config.fallback_chains.get(model_id, [])
     
+    def _resolve_primary_model(self, intent: Intent, preferred_model: Optional[str]) -> Tuple[str, bool]:
+        """Return the primary model for an intent, honouring an explicit model request."""
+        if preferred_model:
+            resolved_model_id = self.resolve_model_identifier(preferred_model)
+            if resolved_model_id:
+                return resolved_model_id, True
+        return self.select_model(intent), False
+
+    def _record_fallback_attempt(self, primary_model_id: str, fallback_model_id: str):
+        """Record metrics for switching from the primary model to a fallback."""
+        self.metrics.fallback_requests.labels(
+            from_model=primary_model_id,
+            to_model=fallback_model_id
+        ).inc()
+
+        self.metrics.model_fallbacks.labels(
+            model=primary_model_id,
+            role='source'
+        ).inc()
+        self.metrics.model_fallbacks.labels(
+            model=fallback_model_id,
+            role='target'
+        ).inc()
+
+    def _build_payload(
+        self,
+        model: ModelConfig,
+        prompt: str,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        top_p: Optional[float] = None,
+        stop: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """Build the backend generation payload for a model."""
+        return {
+            'prompt': prompt,
+            'max_tokens': max_tokens or model.max_tokens,
+            'temperature': temperature if temperature is not None else model.temperature,
+            'top_p': top_p or 0.9,
+            'stop': stop or DEFAULT_STOP_SEQUENCES
+        }
+
     async def generate(
         self,
         messages: List[Dict[str, str]],
@@ -451,7 +636,8 @@ class AgentRouter:
         max_tokens: Optional[int] = None,
         temperature: Optional[float] = None,
         top_p: Optional[float] = None,
-        stop: Optional[List[str]] = None
+        stop: Optional[List[str]] = None,
+        cache: Optional[bool] = None
     ) -> Dict[str, Any]:
         """
         Generate response with automatic model selection and fallback.
@@ -463,6 +649,8 @@ class AgentRouter:
             temperature: Sampling temperature (optional)
             top_p: Nucleus sampling parameter (optional)
             stop: Stop sequences (optional)
+            cache: Response cache hint; True reuses identical earlier responses
+                even when sampling, False bypasses the cache (default: only at temperature 0)
         
         Returns:
             Generation result with metadata
@@ -473,23 +661,18 @@ class AgentRouter:
         intent, confidence = self.classify_intent(messages)
         
         # Select primary model
-        primary_model_id = self.select_model(intent)
-        explicit_model_used = False
-        if preferred_model:
-            resolved_model_id = self.resolve_model_identifier(preferred_model)
-            if resolved_model_id:
-                primary_model_id = resolved_model_id
-                explicit_model_used = True
+        primary_model_id, explicit_model_used = self._resolve_primary_model(intent, preferred_model)
         
         # Try primary model first
-        result = await self._try_model(
+        result = await self._try_model_cached(
             model_id=primary_model_id,
             prompt=prompt,
             intent=intent,
             max_tokens=max_tokens,
             temperature=temperature,
             top_p=top_p,
-            stop=stop
+            stop=stop,
+            cache=cache
         )
         
         if result['success']:
@@ -513,7 +696,8 @@ class AgentRouter:
                 'confidence': confidence,
                 'fallback_used': False,
                 'total_time_seconds': round(total_time, 3),
-                'explicit_model_used': explicit_model_used
+                'explicit_model_used': explicit_model_used,
+                'cache': result.get('cache', 'bypass')
             }
             
             return result
@@ -524,28 +708,17 @@ class AgentRouter:
         logger.warning(f"Primary model {primary_model_id} failed, trying fallback chain: {fallback_chain}")
         
         for fallback_model_id in fallback_chain:
-            self.metrics.fallback_requests.labels(
-                from_model=primary_model_id,
-                to_model=fallback_model_id
-            ).inc()
-
-            self.metrics.model_fallbacks.labels(
-                model=primary_model_id,
-                role='source'
-            ).inc()
-            self.metrics.model_fallbacks.labels(
-                model=fallback_model_id,
-                role='target'
-            ).inc()
+            self._record_fallback_attempt(primary_model_id, fallback_model_id)
             
-            result = await self._try_model(
+            result = await self._try_model_cached(
                 model_id=fallback_model_id,
                 prompt=prompt,
                 intent=intent,
                 max_tokens=max_tokens,
                 temperature=temperature,
                 top_p=top_p,
-                stop=stop
+                stop=stop,
+                cache=cache
             )
             
             if result['success']:
@@ -569,7 +742,8 @@ class AgentRouter:
                     'fallback_used': True,
                     'primary_model': primary_model_id,
                     'total_time_seconds': round(total_time, 3),
-                    'explicit_model_used': explicit_model_used
+                    'explicit_model_used': explicit_model_used,
+                    'cache': result.get('cache', 'bypass')
                 }
                 
                 logger.info(f"Fallback successful with model {fallback_model_id}")
@@ -598,6 +772,49 @@ class AgentRouter:
             }
         }
     
+    async def _try_model_cached(
+        self,
+        model_id: str,
+        prompt: str,
+        intent: Intent,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        top_p: Optional[float] = None,
+        stop: Optional[List[str]] = None,
+        cache: Optional[bool] = None
+    ) -> Dict[str, Any]:
+        """
+        Try a model through the exact-match response cache when the request qualifies.
+
+        The key covers the model id and the full backend payload (prompt and
+        sampling parameters after model defaults), so only identical requests
+        share a result. Concurrent identical requests share one backend call.
+
+        Returns:
+            Result dictionary from ``_try_model`` with a ``cache`` outcome
+        """
+        request_kwargs = dict(
+            model_id=model_id,
+            prompt=prompt,
+            intent=intent,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            top_p=top_p,
+            stop=stop
+        )
+        model = self.models[model_id]
+        payload = self._build_payload(model, prompt, max_tokens, temperature, top_p, stop)
+        if self.response_cache is None or not self.response_cache.applies_to(payload['temperature'], cache):
+            return await self._try_model(**request_kwargs)
+
+        key = self.response_cache.make_key(model_id, payload)
+        result, outcome = await self.response_cache.get_or_generate(
+            key,
+            lambda: self._try_model(**request_kwargs),
+        )
+        self.metrics.response_cache.labels(model=model_id, result=outcome).inc()
+        return {**result, 'cache': outcome}
+
     async def _try_model(
         self,
         model_id: str,
@@ -630,13 +847,7 @@ class AgentRouter:
         self.metrics.model_requests.labels(model=model_id).inc()
         
         # Prepare payload
-        payload = {
-            'prompt': prompt,
-            'max_tokens': max_tokens or model.max_tokens,
-            'temperature': temperature if temperature is not None else model.temperature,
-            'top_p': top_p or 0.9,
-            'stop': stop or ['<|eot_id|>', '<|end_of_text|>']
-        }
+        payload = self._build_payload(model, prompt, max_tokens, temperature, top_p, stop)
         
         # Try with retries and circuit breaker protection
         max_attempts = self.routing_config.retry['max_attempts']
@@ -645,10 +856,10 @@ class AgentRouter:
         async def make_request():
             """Inner function for circuit breaker."""
             generate_url = f"{model.endpoint}/generate"
-            async with httpx.AsyncClient() as client:
-                response = await client.post(generate_url, json=payload)
-                response.raise_for_status()
-                return response.json()
+            client = self.http_pool.get_client(model.endpoint)
+            response = await client.post(generate_url, json=payload)
+            response.raise_for_status()
+            return response.json()
         
         for attempt in range(max_attempts):
             try:
@@ -709,6 +920,255 @@ class AgentRouter:
         
         return {'success': False, 'error': 'All retry attempts failed'}
     
+    async def generate_stream(
+        self,
+        messages: List[Dict[str, str]],
+        prompt: str,
+        preferred_model: Optional[str] = None,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        top_p: Optional[float] = None,
+        stop: Optional[List[str]] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream a response token-by-token with automatic model selection and fallback.
+        
+        Fallback to the next model in the chain only happens before the first
+        token is received. Once output is flowing, a backend failure ends the
+        stream with an ``error`` event instead of switching models.
+        
+        Yields:
+            ``{'type': 'start', 'metadata': ...}`` once a model produced its first token,
+            ``{'type': 'delta', 'text': ...}`` for every text chunk, and a final
+            ``{'type': 'done', 'metadata': ...}`` or ``{'type': 'error', 'error': ..., 'metadata': ...}``
+        """
+        start_time = time.time()
+        
+        intent, confidence = self.classify_intent(messages)
+        primary_model_id, explicit_model_used = self._resolve_primary_model(intent, preferred_model)
+        fallback_chain = self.get_fallback_chain(primary_model_id)
+        
+        model_id = primary_model_id
+        stream = await self._try_model_stream(
+            model_id=primary_model_id,
+            prompt=prompt,
+            intent=intent,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            top_p=top_p,
+            stop=stop
+        )
+        self._update_fallback_rate(primary_model_id, used_fallback=not stream['success'])
+        
+        if not stream['success']:
+            logger.warning(f"Primary model {primary_model_id} failed to stream, trying fallback chain: {fallback_chain}")
+            for fallback_model_id in fallback_chain:
+                self._record_fallback_attempt(primary_model_id, fallback_model_id)
+                model_id = fallback_model_id
+                stream = await self._try_model_stream(
+                    model_id=fallback_model_id,
+                    prompt=prompt,
+                    intent=intent,
+                    max_tokens=max_tokens,
+                    temperature=temperature,
+                    top_p=top_p,
+                    stop=stop
+                )
+                if stream['success']:
+                    logger.info(f"Fallback stream started with model {fallback_model_id}")
+                    break
+        
+        if not stream['success']:
+            self.metrics.errors_total.labels(
+                model='all',
+                error_type='all_models_failed'
+            ).inc()
+            self.metrics.routed_requests.labels(
+                model='all',
+                intent=intent.value,
+                fallback_used='true',
+                status='failed'
+            ).inc()
+            
+            logger.error("All models failed to stream")
+            yield {
+                'type': 'error',
+                'error': 'All models failed',
+                'metadata': {
+                    'intent': intent.value,
+                    'confidence': confidence,
+                    'tried_models': [primary_model_id] + fallback_chain
+                }
+            }
+            return
+        
+        fallback_used = model_id != primary_model_id
+        metadata = {
+            'model_id': model_id,
+            'model_name': self.models[model_id].name,
+            'intent': intent.value,
+            'confidence': confidence,
+            'fallback_used': fallback_used,
+            'explicit_model_used': explicit_model_used,
+            'streamed': True,
+            'time_to_first_token_seconds': round(time.time() - start_time, 3)
+        }
+        if fallback_used:
+            metadata['primary_model'] = primary_model_id
+        
+        deltas = stream['deltas']
+        status = 'success'
+        error = None
+        try:
+            yield {'type': 'start', 'metadata': dict(metadata)}
+            if stream['first_text']:
+                yield {'type': 'delta', 'text': stream['first_text']}
+            
+            try:
+                async for text in deltas:
+                    yield {'type': 'delta', 'text': text}
+            except (httpx.HTTPError, asyncio.TimeoutError) as e:
+                # Tokens already reached the client, so switching models is no
+                # longer possible; surface the interruption instead.
+                status = 'failed'
+                error = f"Stream interrupted: {type(e).__name__}"
+                self.metrics.errors_total.labels(
+                    model=model_id,
+                    error_type='stream_interrupted'
+                ).inc()
+                logger.warning(f"Stream from {model_id} interrupted after first token: {e}")
+            
+            total_time = time.time() - start_time
+            self.metrics.latency_seconds.labels(
+                model=model_id,
+                intent=intent.value
+            ).observe(total_time)
+            self.metrics.routed_requests.labels(
+                model=model_id,
+                intent=intent.value,
+                fallback_used='true' if fallback_used else 'false',
+                status=status
+            ).inc()
+            
+            metadata['total_time_seconds'] = round(total_time, 3)
+            if error:
+                metadata['stream_interrupted'] = True
+                yield {'type': 'error', 'error': error, 'metadata': metadata}
+            else:
+                yield {'type': 'done', 'metadata': metadata}
+        finally:
+            await deltas.aclose()
+    
+    async def _try_model_stream(
+        self,
+        model_id: str,
+        prompt: str,
+        intent: Intent,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        top_p: Optional[float] = None,
+        stop: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """
+        Open a streaming generation on a model and wait for its first token.
+        
+        Only the phase up to the first token runs under circuit breaker and
+        retry protection; the remaining deltas are handed back as an iterator.
+        
+        Returns:
+            Result dictionary with success flag, ``first_text`` and ``deltas``
+        """
+        model = self.models[model_id]
+        circuit_breaker = self.circuit_breakers.get(model_id)
+        
+        if not model.health_status:
+            logger.warning(f"Skipping unhealthy model {model_id}")
+            self.metrics.errors_total.labels(
+                model=model_id,
+                error_type='unhealthy'
+            ).inc()
+            return {'success': False, 'error': 'Model unhealthy'}
+        
+        self.metrics.model_requests.labels(model=model_id).inc()
+        
+        payload = self._build_payload(model, prompt, max_tokens, temperature, top_p, stop)
+        payload['stream'] = True
+        
+        max_attempts = self.routing_config.retry['max_attempts']
+        backoff_factor = self.routing_config.retry['backoff_factor']
+        
+        for attempt in range(max_attempts):
+            deltas = ModelDeltaStream(self._iter_model_stream(model, payload))
+            try:
+                # An empty completion is still a successful generation, so the
+                # first step returns '' rather than raising StopAsyncIteration
+                if circuit_breaker:
+                    first_text = await circuit_breaker.call(deltas.first)
+                else:
+                    first_text = await deltas.first()
+            except CircuitBreakerError as e:
+                await deltas.aclose()
+                logger.warning(f"Circuit breaker open for {model_id}: {e}")
+                self.metrics.errors_total.labels(
+                    model=model_id,
+                    error_type='circuit_breaker_open'
+                ).inc()
+                return {'success': False, 'error': 'Circuit breaker open'}
+            except (httpx.HTTPError, asyncio.TimeoutError) as e:
+                await deltas.aclose()
+                self.metrics.errors_total.labels(
+                    model=model_id,
+                    error_type=type(e).__name__
+                ).inc()
+                
+                logger.warning(f"Stream attempt {attempt + 1}/{max_attempts} failed for {model_id}: {e}")
+                
+                if attempt < max_attempts - 1:
+                    await asyncio.sleep(backoff_factor ** attempt)
+                continue
+            except Exception as e:
+                await deltas.aclose()
+                self.metrics.errors_total.labels(
+                    model=model_id,
+                    error_type='unexpected'
+                ).inc()
+                
+                logger.error(f"Unexpected stream error for {model_id}: {e}", exc_info=True)
+                break
+            
+            self.metrics.requests_total.labels(
+                model=model_id,
+                intent=intent.value,
+                status='success'
+            ).inc()
+            
+            return {
+                'success': True,
+                'first_text': first_text,
+                'deltas': deltas,
+                'model_id': model_id
+            }
+        
+        self.metrics.requests_total.labels(
+            model=model_id,
+            intent=intent.value,
+            status='failed'
+        ).inc()
+        
+        return {'success': False, 'error': 'All retry attempts failed'}
+    
+    async def _iter_model_stream(self, model: ModelConfig, payload: Dict[str, Any]) -> AsyncIterator[str]:
+        """Yield text deltas from a model's streaming generate endpoint."""
+        generate_url = f"{model.endpoint}/generate"
+        timeout = self.routing_config.timeouts.get('request')
+        client = self.http_pool.get_client(model.endpoint)
+        async with client.stream('POST', generate_url, json=payload, timeout=timeout) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                text = parse_stream_line(line)
+                if text:
+                    yield text
+    
     def get_model_info(self, model_id: str) -> Optional[ModelConfig]:
         """Get model configuration."""
         return self.models.get(model_id)
@@ -16,7 +16,7 @@ import logging
 import asyncio
 import re
 from contextvars import ContextVar
-from typing import List, Dict, Optional, Any, Tuple, Union
+from typing import AsyncIterator, Awaitable, Callable, List, Dict, Optional, Any, Tuple, Union
 from datetime import datetime
 import uvicorn
 import signal
@@ -25,10 +25,10 @@ from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, Field
 import httpx
-from prometheus_client import Counter, Histogram, generate_latest, CONTENT_TYPE_LATEST
+from prometheus_client import Counter, Histogram, CollectorRegistry, REGISTRY, generate_latest, CONTENT_TYPE_LATEST
 from agent_router import AgentRouter, Intent
 from document_ingestion_service import DocumentIngestionService
-from rag_service import RAGIngestionService
+from rag_service import RAGIngestionService, warm_up_reranker
 from memory_service import MemoryService
 from memory_scoring_config import load_memory_scoring_config
 from graph_service import GraphService
@@ -37,6 +37,23 @@ from audit_service import AuditService
 from metering_service import MeteringService
 from workspace_service import WorkspaceService
 from circuit_breaker import get_all_circuit_breaker_stats
+from http_client_pool import HTTPClientPool
+from backend_executor import BackendExecutor
+from embedding_cache import EmbeddingCache, set_embedding_cache
+from semantic_response_cache import cache_scope, get_semantic_response_cache
+from single_flight import SingleFlight
+from memory_write_queue import MemoryWriteQueue
+from maintained_stats import MaintainedStats
+from hybrid_retrieval import text_terms
+from retrieval_orchestrator import (
+    RetrievalDeadlines,
+    RetrievalStage,
+    STAGE_ERROR,
+    StageResult,
+    fan_out_retrieval,
+    retrieval_timing_metadata,
+)
+from metrics_exporter import MetricsExporter
 from internal_mcp_client import InternalMCPGatewayClient
 from tool_policy_engine import ToolPolicyEngine, load_default_tool_policy_engine
 from security_heuristics import detect_prompt_injection_patterns
@@ -71,6 +88,8 @@ from safety_sanitizer import (
     sanitize_untrusted_context_text,
     wrap_rag_chunk_with_fence,
     RETRIEVED_CONTEXT_INSTRUCTION_FENCE,
+    PII_PATTERNS,
+    SECRET_PATTERNS,
 )
 
 # Configure logging
@@ -147,6 +166,10 @@ POSTGRES_PASSWORD = os.getenv("POSTGRES_PASSWORD", "ai_password")
 RAG_EMBEDDING_MODEL = os.getenv("RAG_EMBEDDING_MODEL", "nomic-ai/nomic-embed-text-v1.5")
 RAG_EMBEDDING_PROVIDER = os.getenv("RAG_EMBEDDING_PROVIDER", "local")
 RAG_EMBEDDING_SERVICE_URL = os.getenv("RAG_EMBEDDING_SERVICE_URL", "http://embedding-service:8003")
+# Memory fallback embedder: local (loaded once in-process) or service (HTTP embedding service serving
+# MEMORY_EMBEDDING_MODEL; the RAG embedding service serves a different model and dimension)
+MEMORY_EMBEDDING_PROVIDER = os.getenv("MEMORY_EMBEDDING_PROVIDER", "local")
+MEMORY_EMBEDDING_SERVICE_URL = os.getenv("MEMORY_EMBEDDING_SERVICE_URL", "")
 RAG_DEFAULT_WORKSPACE_ID = os.getenv("RAG_DEFAULT_WORKSPACE_ID", "default").strip() or "default"
 ESS_THRESHOLD_LOW = float(os.getenv("ESS_THRESHOLD_LOW", "0.35"))
 ESS_THRESHOLD_HIGH = float(os.getenv("ESS_THRESHOLD_HIGH", "0.60"))
@@ -202,6 +225,9 @@ PROMPT_OVERRIDE_PATTERNS = [
 
 SAFETY_GATEWAY_ENABLED = os.getenv("SAFETY_GATEWAY_ENABLED", "true").lower() == "true"
 SAFETY_MAX_TEXT_CHARS = int(os.getenv("SAFETY_MAX_TEXT_CHARS", "12000"))
+STREAM_GUARDRAIL_HOLDBACK_CHARS = int(os.getenv("STREAM_GUARDRAIL_HOLDBACK_CHARS", "64"))
+# Whitespace-free output longer than this is released without waiting for a boundary
+STREAM_GUARDRAIL_MAX_PENDING_CHARS = int(os.getenv("STREAM_GUARDRAIL_MAX_PENDING_CHARS", "512"))
 DEFAULT_SAFETY_WARN_TERMS = [
     "password",
     "token",
@@ -959,6 +985,10 @@ class ChatCompletionRequest(BaseModel):
     presence_penalty: Optional[float] = Field(0.0, ge=-2.0, le=2.0)
     frequency_penalty: Optional[float] = Field(0.0, ge=-2.0, le=2.0)
     user: Optional[str] = Field(None, description="Unique user identifier")
+    cache: Optional[bool] = Field(
+        None,
+        description="Reuse an identical earlier completion (default: only when temperature is 0; false bypasses the cache)"
+    )
     rag: Optional[ChatRAGOptions] = Field(None, description="Optional per-request RAG options")
     memory: Optional[ChatMemoryOptions] = Field(
         None,
@@ -1310,6 +1340,10 @@ class MemoryStatsResponse(BaseModel):
     redis_memories: int
     vector_dimension: int
     distance_metric: str
+    write_queue: Optional[Dict[str, Any]] = None
+    stats_updated_at: Optional[str] = None
+    stats_reconciled_at: Optional[str] = None
+    stats_age_seconds: Optional[float] = None
 class GraphProcessRequest(BaseModel):
     text: str = Field(..., description="Text to process for entity and relation extraction")
     document_id: Optional[str] = Field(None, description="Optional document identifier")
@@ -1347,6 +1381,9 @@ class GraphStatsResponse(BaseModel):
     total_relationships: int
     nodes_by_type: Dict[str, int]
     relationships_by_type: Dict[str, int]
+    stats_updated_at: Optional[str] = None
+    stats_reconciled_at: Optional[str] = None
+    stats_age_seconds: Optional[float] = None
 class FeedbackRequest(BaseModel):
     query: str = Field(..., description="Original user query")
     response: str = Field(..., description="Model response")
@@ -1810,6 +1847,8 @@ class MetricsStore:
         self.recovery_attempts = 0
         self.recovery_successes = 0
         self.unsupported_answer_events = 0
+        self.semantic_cache_lookups = 0
+        self.semantic_cache_hits = 0
 
     @staticmethod
     def _normalize_user_id(value: Optional[str]) -> Optional[str]:
@@ -1914,6 +1953,12 @@ class MetricsStore:
         """Track count of standardized missing-context responses."""
         self.missing_context_responses += 1
 
+    def record_semantic_cache_lookup(self, hit: bool):
+        """Track semantic answer cache lookups and hits."""
+        self.semantic_cache_lookups += 1
+        if hit:
+            self.semantic_cache_hits += 1
+
     def record_false_citation_event(self):
         """Track unsupported grounded answers downgraded to missing-context."""
         self.false_citation_events += 1
@@ -1999,6 +2044,13 @@ class MetricsStore:
 
     def get_stats(self) -> Dict[str, Any]:
         user_metering = self._build_user_metering_summary()
+        semantic_cache = {
+            "lookups": self.semantic_cache_lookups,
+            "hits": self.semantic_cache_hits,
+            "hit_rate": round(self.semantic_cache_hits / self.semantic_cache_lookups, 4)
+            if self.semantic_cache_lookups
+            else 0.0,
+        }
         memory_telemetry = {
             "memory_requests": self.memory_requests,
             "memory_hits": self.memory_hits,
@@ -2063,6 +2115,7 @@ class MetricsStore:
                 "p95_latency_ms": 0,
                 "p99_latency_ms": 0,
                 "memory_telemetry": memory_telemetry,
+                "semantic_cache": semantic_cache,
                 "metering": user_metering,
                 "tokens_generated": self.tokens_generated,
                 "tokens_per_second": self._tokens_per_second(self.tokens_generated, self.total_latency)
@@ -2094,6 +2147,7 @@ class MetricsStore:
             "p95_latency_ms": round(sorted_latencies[int(n * 0.95)], 2),
             "p99_latency_ms": round(sorted_latencies[int(n * 0.99)], 2),
             "memory_telemetry": memory_telemetry,
+            "semantic_cache": semantic_cache,
             "metering": user_metering,
             "tokens_generated": self.tokens_generated,
             "tokens_per_second": self._tokens_per_second(self.tokens_generated, self.total_latency)
@@ -2331,6 +2385,47 @@ learning_events_store = LearningEventsStore()
 retrieval_recipes_store = RetrievalRecipesStore()
 overlay_rules_store = OverlayRulesStore()
 usage_metering = UsageMeteringMetrics()
+# Private registry: MetricsExporter declares circuit breaker metrics that the
+# circuit_breaker module already registered globally, so only the families
+# below are published through the default /metrics registry.
+performance_metrics = MetricsExporter("api-server", registry=CollectorRegistry())
+performance_metrics.expose_in(REGISTRY, prefixes=("http_client_pool", "request_queue", "cache_", "single_flight", "memory_write"))
+model_http_pool = HTTPClientPool("model_backends", metrics_exporter=performance_metrics)
+# Blocking Qdrant/Redis/Neo4j calls run here so they never stall the event loop.
+backend_executor = BackendExecutor(metrics_exporter=performance_metrics)
+retrieval_deadlines = RetrievalDeadlines.from_env()
+# Shared by the RAG and memory services so a chat turn embeds its query once.
+embedding_cache = EmbeddingCache.from_env(metrics_exporter=performance_metrics)
+set_embedding_cache(embedding_cache)
+# Grounded answers reused across semantically equivalent queries in a workspace.
+semantic_response_cache = get_semantic_response_cache()
+
+
+async def _write_memory_batch(items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Persist queued chat turns on the memory backend executor."""
+    return await backend_executor.run("memory", get_memory_service().add_memories, items)
+
+
+# Chat turns are persisted to memory off the response path (write-behind).
+memory_write_queue = MemoryWriteQueue(_write_memory_batch, metrics_exporter=performance_metrics)
+# Background reconciliations of maintained stats (kept referenced until done)
+stats_reconcile_tasks = set()
+
+
+async def _reconcile_stats(stats: MaintainedStats, backend: str):
+    try:
+        await backend_executor.run(backend, stats.reconcile, claimed=True)
+    except Exception as exc:
+        logger.warning("Reconciling %s stats failed: %s", stats.name, exc)
+
+
+def schedule_stats_reconcile(stats: Optional[MaintainedStats], backend: str):
+    """Recount maintained stats in the background when due; the caller serves cached values."""
+    if stats is None or not stats.needs_reconcile() or not stats.try_begin_reconcile():
+        return
+    task = asyncio.create_task(_reconcile_stats(stats, backend))
+    stats_reconcile_tasks.add(task)
+    task.add_done_callback(stats_reconcile_tasks.discard)
 # Initialize services (lazy loading)
 agent_router = None
 rag_service = None
@@ -2409,12 +2504,125 @@ def apply_output_guardrails(generated_text: str) -> tuple[str, Optional[Dict[str
     return generated_text, None
 
 
+class StreamingOutputGuard:
+    """
+    Apply output guardrails and secret redaction to streamed text incrementally.
+
+    The most recent ``holdback_chars`` of output are withheld so destructive
+    commands are matched before any part of them reaches the client. Text is
+    released at whitespace boundaries that no secret or PII match in the held
+    window crosses, so redaction sees the context a pattern needs (e.g.
+    ``password: <value>``). A whitespace-free run is cut once the window
+    exceeds ``max_pending_chars`` so buffering stays bounded.
+    Once a guardrail trips, nothing further is forwarded except the warning.
+    """
+
+    REDACTION_PATTERNS = [*SECRET_PATTERNS, *PII_PATTERNS]
+    _LEADING_RUN = re.compile(r"\S*")
+
+    def __init__(
+        self,
+        holdback_chars: int = STREAM_GUARDRAIL_HOLDBACK_CHARS,
+        max_pending_chars: int = STREAM_GUARDRAIL_MAX_PENDING_CHARS,
+    ):
+        self.holdback_chars = max(0, holdback_chars)
+        self.max_pending_chars = max(self.holdback_chars + 1, max_pending_chars)
+        self.blocked = False
+        self.guardrail_metadata: Optional[Dict[str, Any]] = None
+        self.redaction_stats: Dict[str, int] = {"secret_redactions": 0, "pii_redactions": 0}
+        self._pending = ""
+        self._emitted: List[str] = []
+        # Set when a forced cut released a secret that may still be streaming
+        self._dropping_run = False
+
+    @property
+    def text(self) -> str:
+        """Full text released to the client so far."""
+        return "".join(self._emitted)
+
+    def feed(self, delta: str) -> str:
+        """Buffer a model delta and return the text that is safe to forward now."""
+        if self.blocked or not delta:
+            return ""
+        if self._dropping_run:
+            # Swallow the rest of the redacted run up to the next whitespace
+            delta = delta[self._LEADING_RUN.match(delta).end():]
+            if not delta:
+                return ""
+            self._dropping_run = False
+
+        self._pending += delta
+        guarded_text, guardrail_metadata = apply_output_guardrails(self._pending)
+        if guardrail_metadata and guardrail_metadata.get("blocked"):
+            self.blocked = True
+            self.guardrail_metadata = guardrail_metadata
+            self._pending = ""
+            warning = f"\n\n{guarded_text}" if self._emitted else guarded_text
+            self._emitted.append(warning)
+            return warning
+
+        cut = self._cut_point()
+        if cut <= 0:
+            return ""
+
+        released, self._pending = self._pending[:cut], self._pending[cut:]
+        return self._release(released)
+
+    def _cut_point(self) -> int:
+        """Return how much of the window can be released, 0 to keep holding it."""
+        limit = len(self._pending) - self.holdback_chars
+        if limit <= 0:
+            return 0
+        forced = len(self._pending) > self.max_pending_chars
+
+        cut = limit - self._LEADING_RUN.match(self._pending[limit - 1::-1]).end()
+        if cut == 0:
+            if not forced:
+                return 0
+            cut = limit
+
+        # Never split a match found in the whole window; redaction runs on the released part only
+        spans = [match.span() for pattern in self.REDACTION_PATTERNS for match in pattern.finditer(self._pending)]
+        moved = True
+        while moved:
+            moved = False
+            for start, end in spans:
+                if start < cut < end:
+                    cut, moved = start, True
+
+        if cut == 0 and forced:
+            # A match fills the oversized window: release through its end, redacted
+            cut = limit
+            moved = True
+            while moved:
+                moved = False
+                for start, end in spans:
+                    if start < cut < end:
+                        cut, moved = end, True
+            self._dropping_run = cut == len(self._pending)
+        return cut
+
+    def flush(self) -> str:
+        """Release whatever is still held back once the model stream has ended."""
+        if self.blocked or not self._pending:
+            return ""
+        released, self._pending = self._pending, ""
+        return self._release(released)
+
+    def _release(self, text: str) -> str:
+        redacted_text, stats = redact_secrets_in_response(text)
+        for key, count in stats.items():
+            self.redaction_stats[key] = self.redaction_stats.get(key, 0) + count
+        self._emitted.append(redacted_text)
+        return redacted_text
+
+
 def get_agent_router() -> AgentRouter:
     """Get or initialize Agent Router."""
     global agent_router
     if agent_router is None:
         logger.info("Initializing Agent Router...")
-        agent_router = AgentRouter(config_path=AGENT_ROUTER_CONFIG)
+        agent_router = AgentRouter(config_path=AGENT_ROUTER_CONFIG, http_pool=model_http_pool)
         logger.info("Agent Router initialized")
     return agent_router
 def get_rag_service() -> RAGIngestionService:
@@ -2440,7 +2648,13 @@ def get_rag_service() -> RAGIngestionService:
             embedding_model=RAG_EMBEDDING_MODEL,
             embedding_provider=RAG_EMBEDDING_PROVIDER,
             embedding_service_url=RAG_EMBEDDING_SERVICE_URL,
-            graph_service=graph_svc
+            graph_service=graph_svc,
+            embedding_cache=embedding_cache,
+            search_flight=SingleFlight.from_env(
+                "rag_search",
+                metrics_exporter=performance_metrics,
+                wait_timeout_seconds=retrieval_deadlines.rag_seconds,
+            )
         )
         logger.info("RAG Ingestion Service initialized")
     return rag_service
@@ -2471,7 +2685,15 @@ def get_memory_service() -> MemoryService:
             embedding_model="sentence-transformers/all-MiniLM-L6-v2",
             temporal_decay_factor=scoring_config["temporal_decay_factor"],
             cosine_weight=scoring_config["cosine_weight"],
-            temporal_weight=scoring_config["temporal_weight"]
+            temporal_weight=scoring_config["temporal_weight"],
+            embedding_cache=embedding_cache,
+            search_flight=SingleFlight.from_env(
+                "memory_search",
+                metrics_exporter=performance_metrics,
+                wait_timeout_seconds=retrieval_deadlines.memory_seconds,
+            ),
+            embedding_provider=MEMORY_EMBEDDING_PROVIDER,
+            embedding_service_url=MEMORY_EMBEDDING_SERVICE_URL
         )
         logger.info("Memory Service initialized")
     return memory_service
@@ -3032,22 +3254,33 @@ def rag_context_is_insufficient(
     return not rag_results or not rag_sources
 
 
+_SUPPORT_STOPWORDS = frozenset({"the","a","an","and","or","to","of","in","for","on","with","is","are","was","were","be","this","that","it","as","at","by","from"})
+
+
+def _is_support_token(token: str) -> bool:
+    return len(token) >= 4 and token not in _SUPPORT_STOPWORDS
+
+
 def _tokenize_support_text(text: str) -> set[str]:
-    tokens = re.findall(r"[a-z0-9]+", (text or "").lower())
-    stop = {"the","a","an","and","or","to","of","in","for","on","with","is","are","was","were","be","this","that","it","as","at","by","from"}
-    return {t for t in tokens if len(t) >= 4 and t not in stop}
+    return {t for t in text_terms(text or "") if _is_support_token(t)}
 
 
 def answer_supported_by_context(answer: str, rag_results: List[Dict[str, Any]], *, min_overlap_ratio: float = 0.12) -> bool:
     """Cheap support-check: answer must overlap with retrieved context tokens."""
     if not answer or not rag_results:
         return False
-    context_text = "\n".join(str(item.get("text", "")) for item in rag_results if isinstance(item, dict))
-    context_tokens = _tokenize_support_text(context_text)
+    # Tokenize each chunk once instead of re-tokenizing the joined context
+    context_term_sets = [
+        text_terms(str(item.get("text", "")))
+        for item in rag_results
+        if isinstance(item, dict)
+    ]
+    if not any(any(_is_support_token(t) for t in terms) for terms in context_term_sets):
+        return False
     answer_tokens = _tokenize_support_text(answer)
-    if not answer_tokens or not context_tokens:
+    if not answer_tokens:
         return False
-    overlap = len(answer_tokens.intersection(context_tokens))
+    overlap = sum(1 for token in answer_tokens if any(token in terms for terms in context_term_sets))
     ratio = overlap / max(1, len(answer_tokens))
     return ratio >= max(0.01, float(min_overlap_ratio))
 
@@ -3087,6 +3320,56 @@ def append_rag_citations_and_guidance(
     if not normalized_text:
         return suffix
     return f"{normalized_text}\n\n{suffix}"
+async def lookup_semantic_answer(
+    service: Any,
+    *,
+    workspace_id: str,
+    scope: str,
+    query: str,
+) -> Tuple[Optional[List[float]], Optional[Dict[str, Any]]]:
+    """Embed ``query`` and look up a cached grounded answer; returns (query_vector, hit)."""
+    if not semantic_response_cache.enabled:
+        return None, None
+    try:
+        query_vector = await backend_executor.run("rag", service.embed_query, query)
+        # Lookups read the workspace version from Redis when configured
+        cached = await backend_executor.run("rag", semantic_response_cache.lookup, workspace_id, scope, query_vector)
+    except Exception as exc:
+        logger.warning("Semantic cache lookup failed: %s", exc)
+        return None, None
+    metrics.record_semantic_cache_lookup(hit=cached is not None)
+    return query_vector, cached
+
+
+def semantic_cache_question_key(rag_query: Optional[str], latest_user_message: Optional[str]) -> Optional[str]:
+    """
+    Hash of the question a chat answer responds to when the cache is keyed on another text.
+
+    The semantic cache embeds the retrieval query. When ``rag.query`` steers
+    retrieval away from the user message, different questions share that
+    embedding, so the message itself has to be part of the cache scope.
+    """
+    if not rag_query or not latest_user_message or rag_query == latest_user_message:
+        return None
+    return hashlib.sha256(latest_user_message.encode("utf-8")).hexdigest()
+
+
+def answer_is_cacheable(
+    *,
+    ess_score: float,
+    context_insufficient: bool,
+    response_mode: Optional[str],
+    sources: Optional[List[Any]],
+) -> bool:
+    """Only cited answers that cleared the grounding and ESS gates are reused."""
+    return (
+        bool(sources)
+        and not context_insufficient
+        and response_mode != "missing_context"
+        and ess_score >= ESS_THRESHOLD_HIGH
+    )
+
+
 def record_learning_event(*, workspace_id: str, event: Dict[str, Any]) -> None:
     """Persist workspace-scoped learning event with redaction."""
     try:
@@ -3758,57 +4041,127 @@ async def audit_request_middleware(request: Request, call_next):
             logger.error("Failed to persist request audit event: %s", audit_exc)
 
 
-async def stream_chat_completion_response(
+def _chat_completion_chunk(
     completion_id: str,
     created: int,
     model: str,
-    content: str,
-    finish_reason: str = "stop"
-):
-    """
-    Stream an OpenAI-compatible chat completion response over SSE.
-    This yields an initial role chunk, a content chunk, and a final stop chunk,
-    followed by the standard [DONE] marker.
-    """
-    role_chunk = {
+    delta: Dict[str, Any],
+    finish_reason: Optional[str] = None,
+) -> str:
+    """Serialize one OpenAI-compatible chat completion chunk as an SSE event."""
+    chunk = {
         "id": completion_id,
         "object": "chat.completion.chunk",
         "created": created,
         "model": model,
         "choices": [{
             "index": 0,
-            "delta": {"role": "assistant"},
-            "finish_reason": None
+            "delta": delta,
+            "finish_reason": finish_reason
         }]
     }
-    yield f"data: {json.dumps(role_chunk)}\n\n"
-    if content:
-        content_chunk = {
+    return f"data: {json.dumps(chunk)}\n\n"
+
+
+# Post-stream usage/memory recording (kept referenced until done)
+stream_record_tasks = set()
+
+
+async def _record_streamed_completion(
+    record: Callable[[str, Dict[str, Any]], Awaitable[None]],
+    final_text: str,
+    routing_metadata: Dict[str, Any],
+):
+    try:
+        await record(final_text, routing_metadata)
+    except Exception as exc:
+        logger.error(f"Failed to record streamed chat completion: {exc}", exc_info=True)
+
+
+async def stream_chat_completion_response(
+    completion_id: str,
+    created: int,
+    model: str,
+    router_events: AsyncIterator[Dict[str, Any]],
+    routing_metadata: Dict[str, Any],
+    output_guard: StreamingOutputGuard,
+    finalize: Callable[[str, Dict[str, Any]], Awaitable[str]],
+    record: Callable[[str, Dict[str, Any]], Awaitable[None]],
+):
+    """
+    Stream an OpenAI-compatible chat completion response over SSE as it is generated.
+    Router deltas pass through the output guard before being forwarded. Once the
+    model stream ends, ``finalize`` receives the streamed text and returns trailing
+    content (citations, missing-context guidance) sent ahead of the stop chunk,
+    which carries the final routing metadata, followed by the [DONE] marker.
+
+    ``record`` (usage metering, memory auto-store) is scheduled from ``finally`` so
+    it also runs when the client disconnects mid-stream; it then receives the text
+    already sent and ``stream_interrupted`` is set in the metadata.
+    """
+    finish_reason = "stop"
+    final_text = None
+    try:
+        yield _chat_completion_chunk(completion_id, created, model, {"role": "assistant"})
+
+        try:
+            async for event in router_events:
+                if event["type"] == "delta":
+                    content = output_guard.feed(event["text"])
+                    if content:
+                        yield _chat_completion_chunk(completion_id, created, model, {"content": content})
+                    if output_guard.blocked:
+                        finish_reason = "content_filter"
+                        break
+                else:
+                    routing_metadata.update(event.get("metadata") or {})
+                    if event["type"] == "error":
+                        routing_metadata["stream_error"] = event.get("error")
+                        finish_reason = "error"
+        finally:
+            await router_events.aclose()
+
+        content = output_guard.flush()
+        if content:
+            yield _chat_completion_chunk(completion_id, created, model, {"content": content})
+        if output_guard.guardrail_metadata:
+            routing_metadata["output_guardrail"] = output_guard.guardrail_metadata
+
+        try:
+            trailing_text = await finalize(output_guard.text, routing_metadata)
+        except Exception as exc:
+            logger.error(f"Failed to finalize streamed chat completion: {exc}", exc_info=True)
+            trailing_text = ""
+        final_text = output_guard.text + trailing_text
+        if trailing_text:
+            yield _chat_completion_chunk(completion_id, created, model, {"content": trailing_text})
+
+        final_chunk = {
             "id": completion_id,
             "object": "chat.completion.chunk",
             "created": created,
             "model": model,
             "choices": [{
                 "index": 0,
-                "delta": {"content": content},
-                "finish_reason": None
-            }]
+                "delta": {},
+                "finish_reason": finish_reason
+            }],
+            "x-routing-metadata": routing_metadata,
         }
-        yield f"data: {json.dumps(content_chunk)}\n\n"
-    final_chunk = {
-        "id": completion_id,
-        "object": "chat.completion.chunk",
-        "created": created,
-        "model": model,
-        "choices": [{
-            "index": 0,
-            "delta": {},
-            "finish_reason": finish_reason
-        }]
-    }
-    yield f"data: {json.dumps(final_chunk)}\n\n"
-    await asyncio.sleep(0)
-    yield "data: [DONE]\n\n"
+        yield f"data: {json.dumps(final_chunk, default=str)}\n\n"
+        await asyncio.sleep(0)
+        yield "data: [DONE]\n\n"
+    finally:
+        if final_text is None:
+            routing_metadata["stream_interrupted"] = True
+            final_text = output_guard.text
+        # A task rather than an await: a disconnected client closes or cancels
+        # this generator, and awaiting here would be cancelled with it.
+        task = asyncio.create_task(_record_streamed_completion(record, final_text, routing_metadata))
+        stream_record_tasks.add(task)
+        task.add_done_callback(stream_record_tasks.discard)
+
+
 async def generate_with_router(
     messages: List[ChatMessage],
     prompt: str,
@@ -3827,7 +4180,8 @@ async def generate_with_router(
         max_tokens=params.get("max_tokens"),
         temperature=params.get("temperature"),
         top_p=params.get("top_p"),
-        stop=params.get("stop")
+        stop=params.get("stop"),
+        cache=params.get("cache")
     )
     
     if not result['success']:
@@ -3842,6 +4196,175 @@ async def generate_with_router(
     completion_tokens = estimate_tokens(generated_text)
     
     return generated_text, prompt_tokens, completion_tokens, metadata
+async def start_router_stream(
+    messages: List[ChatMessage],
+    prompt: str,
+    params: Dict[str, Any]
+) -> tuple[Dict[str, Any], AsyncIterator[Dict[str, Any]]]:
+    """
+    Start a token stream through AgentRouter and wait for the first token.
+
+    Failures before the first token surface as HTTP 503, exactly like
+    generate_with_router, so no partial SSE response is ever started for them.
+    """
+    router = get_agent_router()
+
+    messages_dict = [{"role": msg.role, "content": msg.content} for msg in messages]
+
+    router_events = router.generate_stream(
+        messages=messages_dict,
+        prompt=prompt,
+        preferred_model=params.get("preferred_model"),
+        max_tokens=params.get("max_tokens"),
+        temperature=params.get("temperature"),
+        top_p=params.get("top_p"),
+        stop=params.get("stop")
+    )
+
+    first_event = await router_events.__anext__()
+    if first_event["type"] != "start":
+        await router_events.aclose()
+        error_msg = first_event.get("error", "Generation failed")
+        logger.error(f"Router stream failed: {error_msg}")
+        raise HTTPException(status_code=503, detail=f"Generation error: {error_msg}")
+
+    return dict(first_event.get("metadata") or {}), router_events
+
+
+def _record_chat_completion_usage(
+    *,
+    latency_ms: float,
+    workspace_id: str,
+    user_id: Optional[str],
+    request_id: Optional[str],
+    model: Optional[str],
+    prompt_tokens: int,
+    completion_tokens: int,
+) -> None:
+    """Record request metrics and token metering for a finished chat completion."""
+    metrics.record_request(
+        latency_ms,
+        model=model,
+        completion_tokens=completion_tokens,
+        user_id=user_id,
+    )
+    usage_metering.record_tokens(
+        workspace_id=workspace_id,
+        user_id=user_id,
+        endpoint="/v1/chat/completions",
+        model=model,
+        prompt_tokens=prompt_tokens,
+        completion_tokens=completion_tokens,
+    )
+    if prompt_tokens > 0:
+        _record_metering_event(
+            workspace_id=workspace_id,
+            meter_key="tokens.input",
+            quantity=float(prompt_tokens),
+            user_id=user_id,
+            request_id=request_id,
+            metadata={"endpoint": "/v1/chat/completions", "model": model},
+        )
+    if completion_tokens > 0:
+        _record_metering_event(
+            workspace_id=workspace_id,
+            meter_key="tokens.output",
+            quantity=float(completion_tokens),
+            user_id=user_id,
+            request_id=request_id,
+            metadata={"endpoint": "/v1/chat/completions", "model": model},
+        )
+    _record_metering_event(
+        workspace_id=workspace_id,
+        meter_key="chat.completions.request",
+        quantity=1,
+        user_id=user_id,
+        request_id=request_id,
+        metadata={
+            "model": model,
+            "completion_tokens": completion_tokens,
+            "prompt_tokens": prompt_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        },
+    )
+
+
+async def _auto_store_chat_memory(
+    request: ChatCompletionRequest,
+    *,
+    user_id: Optional[str],
+    workspace_id: str,
+    model: Optional[str],
+    generated_text: str,
+    memory_metadata: Optional[Dict[str, Any]],
+    request_id: Optional[str] = None,
+) -> Optional[Dict[str, Any]]:
+    """
+    Persist the latest user turn and the answer to memory, annotating memory metadata.
+
+    The turn is handed to the write-behind queue when it is enabled; it is
+    written synchronously when the queue is disabled or full (overflow=sync).
+    Its idempotency key is scoped to ``request_id``, so only a replay of the
+    same request is deduplicated.
+    """
+    try:
+        latest_user_message = next(
+            (msg.content for msg in reversed(request.messages) if msg.role == "user"),
+            None
+        )
+        if latest_user_message:
+            memory_messages = [
+                {"role": "user", "content": latest_user_message},
+                {"role": "assistant", "content": generated_text}
+            ]
+            store_metadata = ensure_workspace_metadata(
+                {
+                "source": "chat.completions",
+                "model": model
+                },
+                workspace_id,
+            )
+            store_memory_id = None
+            if memory_write_queue.enabled:
+                job = memory_write_queue.make_job(
+                    memory_messages,
+                    user_id=user_id,
+                    metadata=store_metadata,
+                    request_id=request_id,
+                )
+                outcome = memory_write_queue.enqueue(job)
+                if outcome in ("queued", "duplicate", "dropped"):
+                    if memory_metadata is None:
+                        memory_metadata = {"enabled": True}
+                    memory_metadata["memory_write"] = outcome
+                    if outcome == "dropped":
+                        memory_metadata["memory_stored"] = False
+                    else:
+                        memory_metadata["stored_memory_id"] = job.memory_id
+                    return memory_metadata
+                store_memory_id = job.memory_id
+            memory_service_instance = get_memory_service()
+            store_result = await backend_executor.run(
+                "memory",
+                memory_service_instance.add_memory,
+                messages=memory_messages,
+                user_id=user_id,
+                metadata=store_metadata,
+                memory_id=store_memory_id,
+            )
+            if memory_metadata is None:
+                memory_metadata = {"enabled": True}
+            memory_metadata["memory_stored"] = True
+            memory_metadata["stored_memory_id"] = store_result.get("memory_id")
+        else:
+            logger.info("No user message found, skipping automatic memory storage")
+    except Exception as exc:
+        logger.warning("Automatic memory storage failed: %s", exc)
+        if memory_metadata is None:
+            memory_metadata = {"enabled": True}
+        memory_metadata["memory_stored"] = False
+        memory_metadata["storage_error"] = str(exc)
+    return memory_metadata
 @app.get("/")
 async def root():
     """Root endpoint."""
@@ -4158,6 +4681,9 @@ async def get_metrics_json():
     return {
         "metrics": metrics.get_stats(),
         "per_model_metrics": metrics.get_model_stats(),
+        "http_pool": model_http_pool.get_stats(),
+        "backend_executor": backend_executor.get_stats(),
+        "embedding_cache": embedding_cache.get_stats(),
         "timestamp": datetime.utcnow().isoformat()
     }
 @app.get("/circuit-breakers")
@@ -4800,21 +5326,157 @@ async def chat_completions(request: ChatCompletionRequest, raw_request: Request)
                 workspace_id,
             )
 
+        retrieval_stages: List[RetrievalStage] = []
+        semantic_query_vector = None
+        semantic_cache_scope = None
         if request.memory and request.memory.enabled:
             latest_user_message = next(
                 (msg.content for msg in reversed(request.messages) if msg.role == "user"),
                 None
             )
             if latest_user_message:
-                try:
+                memory_query = latest_user_message
+
+                async def search_chat_memory():
                     service = get_memory_service()
-                    memory_results = service.search_memory(
-                        query=latest_user_message,
+                    return await backend_executor.run(
+                        "memory",
+                        service.search_memory,
+                        query=memory_query,
                         user_id=effective_user_id,
                         limit=request.memory.top_k,
                         filters=ensure_workspace_filter(None, workspace_id),
                         use_temporal_decay=request.memory.use_temporal_decay
                     )
+
+                retrieval_stages.append(
+                    RetrievalStage("memory", search_chat_memory, retrieval_deadlines.memory_seconds)
+                )
+            else:
+                logger.info("Memory enabled but no user message was found for retrieval query")
+        if request.rag and request.rag.enabled:
+            service = get_rag_service()
+            latest_user_message = next(
+                (msg.content for msg in reversed(request.messages) if msg.role == "user"),
+                None
+            )
+            retrieval_query = request.rag.query or latest_user_message
+            if not retrieval_query:
+                raise HTTPException(
+                    status_code=400,
+                    detail="RAG requires at least one user message or rag.query"
+                )
+            grounding_intent = grounding_intent_classifier.classify(retrieval_query).value
+            metrics.record_grounding_intent(grounding_intent)
+
+            rag_filters = build_rag_retrieval_filters(
+                request.rag.filters,
+                workspace_id,
+                repo=request.rag.repo,
+                path=request.rag.path,
+                lang=request.rag.lang,
+            )
+
+            # Personalized (memory) turns, follow-ups and streams are never served from the cache
+            conversation_turns = [msg for msg in request.messages if msg.role in ("user", "assistant")]
+            if not (request.memory and request.memory.enabled) and not request.stream and len(conversation_turns) == 1:
+                semantic_cache_scope = cache_scope(
+                    endpoint="/v1/chat/completions",
+                    model=request.model,
+                    system=[msg.content for msg in request.messages if msg.role == "system"],
+                    filters=rag_filters,
+                    k=request.rag.k,
+                    min_score=request.rag.min_score,
+                    include_context=request.rag.include_context,
+                    grounding_intent=grounding_intent,
+                    max_tokens=request.max_tokens,
+                    temperature=request.temperature,
+                    top_p=request.top_p,
+                    question=semantic_cache_question_key(request.rag.query, latest_user_message),
+                )
+                semantic_query_vector, cached_answer = await lookup_semantic_answer(
+                    service,
+                    workspace_id=workspace_id,
+                    scope=semantic_cache_scope,
+                    query=retrieval_query,
+                )
+                if cached_answer is not None:
+                    cached_response = cached_answer["response"]
+                    _record_chat_completion_usage(
+                        latency_ms=(time.time() - start_time) * 1000,
+                        workspace_id=metering_workspace_id,
+                        user_id=effective_user_id,
+                        request_id=getattr(raw_request.state, "audit_request_id", None),
+                        model=cached_response["model"],
+                        prompt_tokens=0,
+                        completion_tokens=0,
+                    )
+                    response_data = {
+                        "id": f"chatcmpl-{uuid.uuid4().hex[:24]}",
+                        "object": "chat.completion",
+                        "created": int(time.time()),
+                        "model": cached_response["model"],
+                        "x-security-metadata": security_metadata,
+                        "choices": [
+                            {
+                                "index": 0,
+                                "message": {"role": "assistant", "content": cached_response["content"]},
+                                "finish_reason": "stop",
+                            }
+                        ],
+                        "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+                        "x-routing-metadata": {
+                            "model_id": "semantic_cache",
+                            "semantic_cache": {
+                                "hit": True,
+                                "similarity": cached_answer["similarity"],
+                                "cached_query": cached_answer["cached_query"],
+                                "age_seconds": cached_answer["age_seconds"],
+                            },
+                            "workspace_id": workspace_id,
+                            "user_id": effective_user_id,
+                            "role": get_authenticated_role(raw_request),
+                        },
+                        "x-rag-metadata": cached_response["x-rag-metadata"],
+                        "sources": cached_response["sources"],
+                    }
+                    if cached_response.get("rag_context") is not None:
+                        response_data["rag_context"] = cached_response["rag_context"]
+                    if safety_verdict is not None:
+                        response_data["x-safety-metadata"] = safety_verdict.model_dump()
+                    return response_data
+
+            async def search_chat_documents():
+                return await backend_executor.run(
+                    "rag",
+                    service.search_documents,
+                    query=retrieval_query,
+                    limit=request.rag.k,
+                    filters=rag_filters,
+                    workspace_id=workspace_id,
+                )
+
+            retrieval_stages.append(
+                RetrievalStage("rag", search_chat_documents, retrieval_deadlines.rag_seconds)
+            )
+
+        # Memory and RAG lookups run concurrently; a source that errors or misses
+        # its deadline is dropped so the answer uses whatever context arrived.
+        retrieval_outcomes: Dict[str, StageResult] = {}
+        retrieval_timing: Optional[Dict[str, Any]] = None
+        if retrieval_stages:
+            fan_out_start = time.time()
+            retrieval_outcomes = await fan_out_retrieval(*retrieval_stages)
+            retrieval_timing = retrieval_timing_metadata(
+                retrieval_outcomes,
+                (time.time() - fan_out_start) * 1000,
+            )
+
+        memory_outcome = retrieval_outcomes.get("memory")
+        if memory_outcome is not None:
+            if memory_outcome.ok:
+                try:
+                    memory_results = memory_outcome.value
                     if request.memory.min_score is not None:
                         memory_results = [
                             result
@@ -4854,7 +5516,7 @@ async def chat_completions(request: ChatCompletionRequest, raw_request: Request)
                     memory_scores = [result.get("score", 0.0) for result in memory_results]
                     memory_metadata = {
                         "enabled": True,
-                        "query": latest_user_message,
+                        "query": memory_query,
                         "top_k": request.memory.top_k,
                         "min_score": request.memory.min_score,
                         "use_temporal_decay": request.memory.use_temporal_decay,
@@ -4873,37 +5535,17 @@ async def chat_completions(request: ChatCompletionRequest, raw_request: Request)
                 except Exception as exc:
                     logger.warning("Memory retrieval failed: %s", exc)
             else:
-                logger.info("Memory enabled but no user message was found for retrieval query")
-        if request.rag and request.rag.enabled:
-            service = get_rag_service()
-            latest_user_message = next(
-                (msg.content for msg in reversed(request.messages) if msg.role == "user"),
-                None
-            )
-            retrieval_query = request.rag.query or latest_user_message
-            if not retrieval_query:
-                raise HTTPException(
-                    status_code=400,
-                    detail="RAG requires at least one user message or rag.query"
+                logger.warning(
+                    "Memory retrieval %s after %.2fms; continuing without memory context",
+                    memory_outcome.status,
+                    memory_outcome.elapsed_ms,
                 )
-            retrieval_start = time.time()
-            grounding_intent = grounding_intent_classifier.classify(retrieval_query).value
-            metrics.record_grounding_intent(grounding_intent)
-
-            rag_filters = build_rag_retrieval_filters(
-                request.rag.filters,
-                workspace_id,
-                repo=request.rag.repo,
-                path=request.rag.path,
-                lang=request.rag.lang,
-            )
-            rag_results = service.search_documents(
-                query=retrieval_query,
-                limit=request.rag.k,
-                filters=rag_filters,
-                workspace_id=workspace_id,
-            )
-            retrieval_time_ms = (time.time() - retrieval_start) * 1000
+        rag_outcome = retrieval_outcomes.get("rag")
+        if rag_outcome is not None:
+            if rag_outcome.status == STAGE_ERROR:
+                raise rag_outcome.error
+            rag_results = rag_outcome.value or []
+            retrieval_time_ms = rag_outcome.elapsed_ms
             if request.rag.min_score is not None:
                 rag_results = [r for r in rag_results if r.get("score", 0.0) >= request.rag.min_score]
             rag_results, rag_sanitization = sanitize_retrieved_context_chunks(rag_results)
@@ -4963,6 +5605,8 @@ async def chat_completions(request: ChatCompletionRequest, raw_request: Request)
                 created = int(time.time())
                 response_model = request.model or "missing-context"
                 routing_metadata = {"model_id": "missing_context", "intent": "must_ground", "fallback_used": True}
+                if retrieval_timing:
+                    routing_metadata["retrieval"] = retrieval_timing
                 response_data = {
                     "id": completion_id,
                     "object": "chat.completion",
@@ -5073,7 +5717,103 @@ async def chat_completions(request: ChatCompletionRequest, raw_request: Request)
             "temperature": request.temperature,
             "top_p": request.top_p,
             "stop": request.stop or ["<|eot_id|>", "<|end_of_text|>"],
+            "cache": request.cache,
         }
+
+        if request.stream:
+            logger.info("Streaming response requested; forwarding router tokens over SSE")
+            routing_metadata, router_events = await start_router_stream(
+                messages=sanitized_messages,
+                prompt=prompt,
+                params=params
+            )
+            output_guard = StreamingOutputGuard()
+            routing_metadata["security"] = security_metadata
+            routing_metadata["exfiltration_safety"] = {
+                "prompt_redactions": prompt_redaction_stats,
+                "response_redactions": output_guard.redaction_stats,
+            }
+            routing_metadata["workspace_id"] = workspace_id
+            routing_metadata["user_id"] = effective_user_id
+            routing_metadata["role"] = get_authenticated_role(raw_request)
+            if safety_verdict is not None:
+                routing_metadata["safety"] = safety_verdict.model_dump()
+            if retrieval_timing:
+                routing_metadata["retrieval"] = retrieval_timing
+
+            completion_id = f"chatcmpl-{uuid.uuid4().hex[:24]}"
+            created = int(time.time())
+            response_model = routing_metadata.get('model_name', request.model)
+            metering_request_id = getattr(raw_request.state, "audit_request_id", None)
+
+            async def finalize_stream(streamed_text: str, stream_metadata: Dict[str, Any]) -> str:
+                """Run post-generation checks on the streamed answer and return trailing content."""
+                trailing_text = ""
+                if request.rag and request.rag.enabled:
+                    context_insufficient = rag_context_insufficient
+                    if bool(rag_sources) and not answer_supported_by_context(streamed_text, rag_results):
+                        # The answer is already on the wire, so it is flagged with
+                        # missing-context guidance instead of being replaced.
+                        context_insufficient = True
+                        metrics.record_false_citation_event()
+                        metrics.record_unsupported_answer()
+                        stream_metadata["support_check_failed"] = True
+                        record_learning_event(workspace_id=workspace_id, event={"trigger": "support_check", "teacher_used": False, "outcome": "flagged_missing_context"})
+                    answer_with_citations = append_rag_citations_and_guidance(
+                        streamed_text,
+                        rag_sources=rag_sources,
+                        context_insufficient=context_insufficient,
+                    )
+                    if answer_with_citations != streamed_text:
+                        trailing_text = answer_with_citations[len(streamed_text.rstrip()):]
+
+                return trailing_text
+
+            async def record_stream(final_text: str, stream_metadata: Dict[str, Any]) -> None:
+                """Meter the streamed answer and auto-store it to memory, including after a disconnect."""
+                _record_chat_completion_usage(
+                    latency_ms=(time.time() - start_time) * 1000,
+                    workspace_id=metering_workspace_id,
+                    user_id=effective_user_id,
+                    request_id=metering_request_id,
+                    model=response_model,
+                    prompt_tokens=estimate_tokens(prompt),
+                    completion_tokens=estimate_tokens(final_text),
+                )
+                stream_memory_metadata = memory_metadata
+                if request.memory and request.memory.enabled and request.memory.auto_store and not stream_metadata.get("stream_error") and not stream_metadata.get("stream_interrupted"):
+                    stream_memory_metadata = await _auto_store_chat_memory(
+                        request,
+                        user_id=effective_user_id,
+                        workspace_id=workspace_id,
+                        model=response_model,
+                        generated_text=final_text,
+                        memory_metadata=memory_metadata,
+                        request_id=metering_request_id,
+                    )
+                metrics.record_memory_telemetry(stream_memory_metadata, memory_context_data)
+
+            stream_headers = {
+                "Cache-Control": "no-cache",
+                "Connection": "keep-alive",
+            }
+            if safety_verdict is not None:
+                stream_headers["X-Safety-Verdict"] = safety_verdict.verdict
+                stream_headers["X-Safety-Reason-Codes"] = ",".join(safety_verdict.reason_codes)
+            return StreamingResponse(
+                stream_chat_completion_response(
+                    completion_id=completion_id,
+                    created=created,
+                    model=response_model,
+                    router_events=router_events,
+                    routing_metadata=routing_metadata,
+                    output_guard=output_guard,
+                    finalize=finalize_stream,
+                    record=record_stream,
+                ),
+                media_type="text/event-stream",
+                headers=stream_headers
+            )
         
         generated_text, prompt_tokens, completion_tokens, routing_metadata = await generate_with_router(
             messages=sanitized_messages,
@@ -5123,112 +5863,32 @@ async def chat_completions(request: ChatCompletionRequest, raw_request: Request)
         routing_metadata["role"] = get_authenticated_role(raw_request)
         if safety_verdict is not None:
             routing_metadata["safety"] = safety_verdict.model_dump()
+        if retrieval_timing:
+            routing_metadata["retrieval"] = retrieval_timing
         
         completion_id = f"chatcmpl-{uuid.uuid4().hex[:24]}"
         created = int(time.time())
         response_model = routing_metadata.get('model_name', request.model)
         # Calculate latency
         latency_ms = (time.time() - start_time) * 1000
-        metrics.record_request(
-            latency_ms,
-            model=response_model,
-            completion_tokens=completion_tokens,
-            user_id=effective_user_id,
-        )
-        usage_metering.record_tokens(
-            workspace_id=workspace_id,
+        _record_chat_completion_usage(
+            latency_ms=latency_ms,
+            workspace_id=metering_workspace_id,
             user_id=effective_user_id,
-            endpoint="/v1/chat/completions",
+            request_id=getattr(raw_request.state, "audit_request_id", None),
             model=response_model,
             prompt_tokens=prompt_tokens,
             completion_tokens=completion_tokens,
         )
-        metering_request_id = getattr(raw_request.state, "audit_request_id", None)
-        if prompt_tokens > 0:
-            _record_metering_event(
-                workspace_id=metering_workspace_id,
-                meter_key="tokens.input",
-                quantity=float(prompt_tokens),
-                user_id=effective_user_id,
-                request_id=metering_request_id,
-                metadata={"endpoint": "/v1/chat/completions", "model": response_model},
-            )
-        if completion_tokens > 0:
-            _record_metering_event(
-                workspace_id=metering_workspace_id,
-                meter_key="tokens.output",
-                quantity=float(completion_tokens),
-                user_id=effective_user_id,
-                request_id=metering_request_id,
-                metadata={"endpoint": "/v1/chat/completions", "model": response_model},
-            )
-        _record_metering_event(
-            workspace_id=metering_workspace_id,
-            meter_key="chat.completions.request",
-            quantity=1,
-            user_id=effective_user_id,
-            request_id=metering_request_id,
-            metadata={
-                "model": response_model,
-                "completion_tokens": completion_tokens,
-                "prompt_tokens": prompt_tokens,
-                "total_tokens": prompt_tokens + completion_tokens,
-            },
-        )
         if request.memory and request.memory.enabled and request.memory.auto_store:
-            try:
-                memory_service_instance = get_memory_service()
-                latest_user_message = next(
-                    (msg.content for msg in reversed(request.messages) if msg.role == "user"),
-                    None
-                )
-                if latest_user_message:
-                    memory_messages = [
-                        {"role": "user", "content": latest_user_message},
-                        {"role": "assistant", "content": generated_text}
-                    ]
-                    store_result = memory_service_instance.add_memory(
-                        messages=memory_messages,
-                        user_id=effective_user_id,
-                        metadata=ensure_workspace_metadata(
-                            {
-                            "source": "chat.completions",
-                            "model": response_model
-                            },
-                            workspace_id,
-                        ),
-                    )
-                    if memory_metadata is None:
-                        memory_metadata = {"enabled": True}
-                    memory_metadata["memory_stored"] = True
-                    memory_metadata["stored_memory_id"] = store_result.get("memory_id")
-                else:
-                    logger.info("No user message found, skipping automatic memory storage")
-            except Exception as exc:
-                logger.warning("Automatic memory storage failed: %s", exc)
-                if memory_metadata is None:
-                    memory_metadata = {"enabled": True}
-                memory_metadata["memory_stored"] = False
-                memory_metadata["storage_error"] = str(exc)
-        if request.stream:
-            logger.info("Streaming response requested; returning SSE-compatible output")
-            stream_headers = {
-                "Cache-Control": "no-cache",
-                "Connection": "keep-alive",
-            }
-            if safety_verdict is not None:
-                stream_headers["X-Safety-Verdict"] = safety_verdict.verdict
-                stream_headers["X-Safety-Reason-Codes"] = ",".join(safety_verdict.reason_codes)
-            return StreamingResponse(
-                stream_chat_completion_response(
-                    completion_id=completion_id,
-                    created=created,
-                    model=response_model,
-                    content=generated_text,
-                    finish_reason="stop"
-                ),
-                media_type="text/event-stream",
-                headers=stream_headers
+            memory_metadata = await _auto_store_chat_memory(
+                request,
+                user_id=effective_user_id,
+                workspace_id=workspace_id,
+                model=response_model,
+                generated_text=generated_text,
+                memory_metadata=memory_metadata,
+                request_id=getattr(raw_request.state, "audit_request_id", None),
             )
         # Build response with routing metadata
         response_data = {
@@ -5261,6 +5921,28 @@ async def chat_completions(request: ChatCompletionRequest, raw_request: Request)
             response_data["sources"] = rag_sources
             if rag_context_data is not None:
                 response_data["rag_context"] = rag_context_data
+            if semantic_query_vector is not None and answer_is_cacheable(
+                ess_score=ess_score,
+                context_insufficient=rag_context_insufficient,
+                response_mode=rag_metadata.get("response_mode"),
+                sources=rag_sources,
+            ):
+                await backend_executor.run(
+                    "rag",
+                    semantic_response_cache.store,
+                    workspace_id,
+                    semantic_cache_scope,
+                    retrieval_query,
+                    semantic_query_vector,
+                    {
+                        "content": generated_text,
+                        "model": response_model,
+                        "x-rag-metadata": rag_metadata,
+                        "sources": rag_sources,
+                        "rag_context": rag_context_data,
+                    },
+                    rag_results,
+                )
         if memory_metadata:
             response_data["x-memory-metadata"] = memory_metadata
             if memory_context_data is not None:
@@ -5420,6 +6102,7 @@ async def router_info():
             "enabled": router.health_check_enabled,
             "interval_seconds": router.health_check_interval
         },
+        "response_cache": router.response_cache.get_stats(),
         "prometheus_metrics": "http://localhost:8001/metrics"
     }
 @app.post("/v1/documents/ingest/text", response_model=DocumentIngestResponse)
@@ -5554,7 +6237,9 @@ async def rag_ingest_batch(request: RAGIngestBatchRequest):
             normalized_documents.append(normalized_document)
 
         service = get_rag_service()
-        result = service.ingest_documents_batch(
+        result = await backend_executor.run(
+            "rag",
+            service.ingest_documents_batch,
             documents=normalized_documents,
             workspace_id=workspace_id,
         )
@@ -5670,7 +6355,9 @@ async def rag_search(request: RAGSearchRequest):
             lang=request.lang,
         )
         service = get_rag_service()
-        results = service.search_documents(
+        results = await backend_executor.run(
+            "rag",
+            service.search_documents,
             query=request.query,
             limit=request.limit,
             filters=rag_filters,
@@ -5816,10 +6503,12 @@ async def rag_stats():
     - Number of vectors
     - Number of points
     - Status
+    - stats_reconciled_at / stats_age_seconds: when the cached values were read
     """
     try:
         service = get_rag_service()
-        stats = service.get_stats()
+        stats = await backend_executor.run("rag", service.get_stats)
+        schedule_stats_reconcile(service.stats, "rag")
         return RAGStatsResponse(collection_info=stats)
     except Exception as e:
         logger.error(f"Error getting RAG stats: {e}", exc_info=True)
@@ -5894,14 +6583,58 @@ async def rag_query(request: RAGQueryRequest, raw_request: Request):
             effective_k,
             _redacted_log_preview(rewritten_query, limit=100),
         )
-        
-        retrieval_start = time.time()
-        results = service.search_documents(
-            query=rewritten_query,
-            limit=effective_k,
+
+        # Follow-up turns depend on chat history, so only standalone questions hit the cache
+        semantic_cache_scope = cache_scope(
+            endpoint="/v1/rag/query",
             filters=rag_filters,
-            workspace_id=workspace_id,
+            k=effective_k,
+            grounding_intent=grounding_intent,
+            include_context=request.include_context,
+            include_graph_context=request.include_graph_context,
+            graph_limit=request.graph_limit,
+            max_tokens=request.max_tokens,
+            temperature=request.temperature,
+            top_p=request.top_p,
         )
+        semantic_query_vector = None
+        if not request.messages:
+            semantic_query_vector, cached_answer = await lookup_semantic_answer(
+                service,
+                workspace_id=workspace_id,
+                scope=semantic_cache_scope,
+                query=rewritten_query,
+            )
+            if cached_answer is not None:
+                cached_response = dict(cached_answer["response"])
+                cached_stats = dict(cached_response.pop("retrieval_stats", None) or {})
+                cached_stats["semantic_cache"] = {
+                    "hit": True,
+                    "similarity": cached_answer["similarity"],
+                    "cached_query": cached_answer["cached_query"],
+                    "age_seconds": cached_answer["age_seconds"],
+                }
+                cached_stats["total_time_ms"] = round((time.time() - start_time) * 1000, 2)
+                if safety_verdict is not None:
+                    cached_stats["safety"] = safety_verdict.model_dump()
+                metrics.record_request((time.time() - start_time) * 1000, user_id=metering_user_id)
+                _record_metering_event(
+                    workspace_id=workspace_id,
+                    meter_key="rag.query.requests",
+                    quantity=1,
+                    user_id=metering_user_id,
+                    metadata={"k": request.k, "semantic_cache_hit": True},
+                )
+                return RAGQueryResponse(
+                    **cached_response,
+                    id=f"rag-{uuid.uuid4().hex[:24]}",
+                    created=int(time.time()),
+                    query=request.query,
+                    usage=ChatCompletionUsage(prompt_tokens=0, completion_tokens=0, total_tokens=0),
+                    retrieval_stats=cached_stats,
+                )
+        
+        retrieval_start = time.time()
         graph_context = None
         graph_context_formatted = ""
         relationships_found = 0
@@ -5909,15 +6642,53 @@ async def rag_query(request: RAGQueryRequest, raw_request: Request):
         should_enrich_with_graph = bool(
             request.include_graph_context and service.graph_service is not None
         )
+
+        async def search_query_documents():
+            return await backend_executor.run(
+                "rag",
+                service.search_documents,
+                query=rewritten_query,
+                limit=effective_k,
+                filters=rag_filters,
+                workspace_id=workspace_id,
+            )
+
+        def lookup_query_graph():
+            # Graph lookups key off the query's entities so they can start
+            # before the vector results are back.
+            entities = service.extract_graph_entities(rewritten_query)
+            return entities, service.collect_graph_context(
+                entities,
+                graph_depth=1,
+                graph_limit=request.graph_limit,
+            )
+
+        async def search_query_graph():
+            return await backend_executor.run("graph", lookup_query_graph)
+
+        retrieval_stages = [
+            RetrievalStage("rag", search_query_documents, retrieval_deadlines.rag_seconds),
+        ]
         if should_enrich_with_graph:
+            retrieval_stages.append(
+                RetrievalStage("graph", search_query_graph, retrieval_deadlines.graph_seconds)
+            )
+        retrieval_outcomes = await fan_out_retrieval(*retrieval_stages)
+        retrieval_timing = retrieval_timing_metadata(retrieval_outcomes, (time.time() - retrieval_start) * 1000)
+        rag_outcome = retrieval_outcomes["rag"]
+        if rag_outcome.status == STAGE_ERROR:
+            raise rag_outcome.error
+        results = rag_outcome.value or []
+
+        graph_outcome = retrieval_outcomes.get("graph")
+        if graph_outcome is not None and graph_outcome.ok:
             try:
-                enriched_results = service.search_with_graph_enrichment(
-                    query=rewritten_query,
-                    limit=effective_k,
-                    filters=rag_filters,
-                    graph_depth=1,
-                    graph_limit=request.graph_limit,
-                    workspace_id=workspace_id,
+                graph_entities, query_graph_context = graph_outcome.value
+                enriched_results = service.enrich_results_with_graph(
+                    rewritten_query,
+                    results,
+                    graph_entities,
+                    query_graph_context,
                 )
                 if enriched_results.get("enriched"):
                     results = enriched_results.get("vector_results", results)
@@ -5928,6 +6699,12 @@ async def rag_query(request: RAGQueryRequest, raw_request: Request):
                     entities_in_graph = graph_stats.get("entities_in_graph", 0)
             except Exception as graph_error:
                 logger.warning("Graph enrichment unavailable, using vector-only retrieval: %s", graph_error)
+        elif graph_outcome is not None:
+            logger.warning(
+                "Graph enrichment %s, using vector-only retrieval: %s",
+                graph_outcome.status,
+                graph_outcome.error,
+            )
         results, context_sanitization = sanitize_retrieved_context_chunks(results)
         source_citations = extract_rag_sources(results)
         missing_context_guidance_required = rag_context_is_insufficient(results, source_citations)
@@ -6011,6 +6788,7 @@ async def rag_query(request: RAGQueryRequest, raw_request: Request):
                 "ess_threshold_low": ESS_THRESHOLD_LOW,
                 "ess_threshold_high": ESS_THRESHOLD_HIGH,
             }
+        retrieval_stats["retrieval"] = retrieval_timing
         if should_return_missing_context(grounding_intent, ess_score, ESS_THRESHOLD_HIGH):
             missing_context_payload = build_missing_context_payload(request.query, ess_score, ESS_THRESHOLD_HIGH)
             teacher_request, blocked = teacher_broker.build_request(
@@ -6036,7 +6814,9 @@ async def rag_query(request: RAGQueryRequest, raw_request: Request):
 
             candidate_queries = teacher_guidance.get("candidate_queries", []) if isinstance(teacher_guidance, dict) else []
             if isinstance(candidate_queries, list) and candidate_queries:
-                recovered_results, recovered_ess, attempts_used = run_recovery_attempts(
+                recovered_results, recovered_ess, attempts_used = await backend_executor.run(
+                    "rag",
+                    run_recovery_attempts,
                     service=service,
                     candidate_queries=[str(q) for q in candidate_queries],
                     workspace_id=workspace_id,
@@ -6214,6 +6994,22 @@ async def rag_query(request: RAGQueryRequest, raw_request: Request):
             ),
             retrieval_stats=retrieval_stats
         )
+        if semantic_query_vector is not None and answer_is_cacheable(
+            ess_score=ess_score,
+            context_insufficient=missing_context_guidance_required,
+            response_mode=retrieval_stats.get("response_mode"),
+            sources=source_citations,
+        ):
+            await backend_executor.run(
+                "rag",
+                semantic_response_cache.store,
+                workspace_id,
+                semantic_cache_scope,
+                rewritten_query,
+                semantic_query_vector,
+                response.model_dump(include={"context", "sources", "graph_context", "graph_context_formatted", "response", "retrieval_stats"}),
+                results,
+            )
         usage_metering.record_tokens(
             workspace_id=workspace_id,
             user_id=metering_user_id,
@@ -6331,7 +7127,9 @@ async def rag_graph_search(request: RAGGraphSearchRequest):
             _redacted_log_preview(request.query, limit=100),
         )
         
-        enriched_results = service.search_with_graph_enrichment(
+        enriched_results = await backend_executor.run(
+            "rag",
+            service.search_with_graph_enrichment,
             query=request.query,
             limit=request.limit,
             filters=rag_filters,
@@ -6449,7 +7247,9 @@ async def rag_graph_query(request: RAGGraphQueryRequest, raw_request: Request):
         )
         
         retrieval_start = time.time()
-        enriched_results = service.search_with_graph_enrichment(
+        enriched_results = await backend_executor.run(
+            "rag",
+            service.search_with_graph_enrichment,
             query=rewritten_query,
             limit=effective_k,
             filters=rag_filters,
@@ -6778,7 +7578,9 @@ async def memory_add(request: MemoryAddRequest):
     try:
         workspace_id = get_current_workspace_id()
         service = get_memory_service()
-        result = service.add_memory(
+        result = await backend_executor.run(
+            "memory",
+            service.add_memory,
             messages=request.messages,
             user_id=request.user_id,
             metadata=ensure_workspace_metadata(request.metadata, workspace_id),
@@ -6817,7 +7619,9 @@ async def memory_search(request: MemorySearchRequest):
         workspace_id = get_current_workspace_id()
         workspace_filters = ensure_workspace_filter(request.filters, workspace_id)
         service = get_memory_service()
-        results = service.search_memory(
+        results = await backend_executor.run(
+            "memory",
+            service.search_memory,
             query=request.query,
             user_id=request.user_id,
             limit=request.limit,
@@ -6900,7 +7704,7 @@ async def memory_forget(memory_id: str):
     """
     try:
         service = get_memory_service()
-        result = service.forget_memory(memory_id)
+        result = await backend_executor.run("memory", service.forget_memory, memory_id)
         logger.info(f"Memory deleted: {memory_id}")
         return MemoryForgetResponse(**result)
     except Exception as e:
@@ -6925,11 +7729,13 @@ async def memory_stats():
         - Number of memories in Redis
         - Vector dimension
         - Distance metric used
+        - stats_reconciled_at / stats_age_seconds: staleness of the maintained counters
     """
     try:
         service = get_memory_service()
-        stats = service.get_memory_stats()
-        return MemoryStatsResponse(**stats)
+        stats = await backend_executor.run("memory", service.get_memory_stats)
+        schedule_stats_reconcile(service.stats, "memory")
+        return MemoryStatsResponse(**stats, write_queue=memory_write_queue.get_stats())
     except Exception as e:
         logger.error(f"Error getting memory stats: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Memory stats error: {str(e)}")
@@ -6961,7 +7767,9 @@ async def graph_process(request: GraphProcessRequest):
     try:
         workspace_id = get_current_workspace_id()
         service = get_graph_service()
-        result = service.process_document(
+        result = await backend_executor.run(
+            "graph",
+            service.process_document,
             text=request.text,
             document_id=request.document_id,
             metadata=ensure_workspace_metadata(request.metadata, workspace_id),
@@ -7009,7 +7817,9 @@ async def graph_query(request: GraphQueryRequest):
         query_parameters = dict(request.parameters or {})
         query_parameters.setdefault("workspace_id", workspace_id)
         service = get_graph_service()
-        results = service.query_graph(
+        results = await backend_executor.run(
+            "graph",
+            service.query_graph,
             query=request.query,
             parameters=query_parameters,
         )
@@ -7057,7 +7867,9 @@ async def graph_neighbors(
         if relation_types:
             rel_types_list = [rt.strip() for rt in relation_types.split(",")]
         
-        result = service.get_neighbors(
+        result = await backend_executor.run(
+            "graph",
+            service.get_neighbors,
             entity_name=entity,
             entity_type=entity_type,
             relation_types=rel_types_list,
@@ -7096,7 +7908,9 @@ async def graph_search(request: GraphSearchRequest):
     try:
         _ = get_current_workspace_id()
         service = get_graph_service()
-        results = service.search_entities(
+        results = await backend_executor.run(
+            "graph",
+            service.search_entities,
             search_text=request.search_text,
             entity_types=request.entity_types,
             limit=request.limit
@@ -7120,11 +7934,13 @@ async def graph_stats():
         - Total number of relationships
         - Breakdown by node type (Project, Person, Concept, etc.)
         - Breakdown by relationship type (WORKS_ON, RELATES_TO, etc.)
+        - stats_reconciled_at / stats_age_seconds: staleness of the maintained counters
     """
     try:
         _ = get_current_workspace_id()
         service = get_graph_service()
-        stats = service.get_graph_stats()
+        stats = await backend_executor.run("graph", service.get_graph_stats)
+        schedule_stats_reconcile(service.stats, "graph")
         logger.info(f"Graph stats: {stats['total_nodes']} nodes, {stats['total_relationships']} relationships")
         return GraphStatsResponse(**stats)
     except Exception as e:
@@ -7464,6 +8280,8 @@ async def startup_event():
     router = get_agent_router()
     await router.start_health_checks()
     logger.info("Agent Router health checks started")
+    # Load the cross-encoder before the first request instead of falling back on it
+    warm_up_reranker()
 @app.on_event("shutdown")
 async def shutdown_event():
     """Cleanup on shutdown with graceful termination."""
@@ -7476,10 +8294,25 @@ async def shutdown_event():
     logger.info("Waiting for in-flight requests to complete...")
     await asyncio.sleep(5)  # Give pending requests time to finish
     
-    # Stop health checks
+    # Stop health checks and release pooled model connections
     if agent_router:
-        await agent_router.stop_health_checks()
-        logger.info("Agent Router health checks stopped")
+        await agent_router.aclose()
+        logger.info("Agent Router health checks stopped and HTTP clients closed")
+    else:
+        await model_http_pool.aclose()
+    
+    # Persist queued chat-turn memories while the memory executor is still up
+    abandoned_memory_writes = await memory_write_queue.drain()
+    logger.info("Memory write queue drained (%d writes abandoned)", abandoned_memory_writes)
+    
+    # Let in-flight backend calls finish before closing their clients
+    backend_executor.shutdown(wait=True)
+    
+    # Persist BM25 index changes not yet compacted to disk
+    lexical_index = getattr(getattr(rag_service, "storage", None), "lexical_index", None)
+    if lexical_index is not None:
+        lexical_index.flush_all()
+        logger.info("BM25 lexical index flushed")
     
     # Close database connections
     if graph_service:
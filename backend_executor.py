@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Bounded executor for blocking backend calls made from async handlers.
+
+The RAG, memory and graph services use synchronous Qdrant, Redis and Neo4j
+clients. Calling them directly from a FastAPI handler blocks the event loop
+for the whole round-trip, so a single slow backend stalls every in-flight
+request. ``BackendExecutor`` runs those calls on a dedicated thread pool and
+caps how many calls each backend may have in flight, so a slow backend queues
+its own callers instead of exhausting the pool for everyone else.
+"""
+
+import os
+import time
+import asyncio
+import logging
+import contextvars
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional, TypeVar
+
+from metrics_exporter import MetricsExporter
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+DEFAULT_BACKEND_LIMITS = {
+    "rag": 16,
+    "memory": 16,
+    "graph": 8,
+}
+
+
+@dataclass
+class BackendExecutorConfig:
+    """Thread pool size and per-backend concurrency limits."""
+    max_workers: int = 32
+    backend_limits: Dict[str, int] = field(default_factory=lambda: dict(DEFAULT_BACKEND_LIMITS))
+    default_limit: int = 8
+
+    @classmethod
+    def from_env(cls) -> "BackendExecutorConfig":
+        """
+        Load settings from environment variables.
+
+        ``BACKEND_EXECUTOR_MAX_WORKERS`` sizes the thread pool and
+        ``BACKEND_CONCURRENCY_<NAME>`` (e.g. ``BACKEND_CONCURRENCY_RAG``)
+        overrides the in-flight limit for one backend.
+        """
+        limits = {
+            name: int(os.getenv(f"BACKEND_CONCURRENCY_{name.upper()}", str(limit)))
+            for name, limit in DEFAULT_BACKEND_LIMITS.items()
+        }
+        return cls(
+            max_workers=int(os.getenv("BACKEND_EXECUTOR_MAX_WORKERS", "32")),
+            backend_limits=limits,
+            default_limit=int(os.getenv("BACKEND_CONCURRENCY_DEFAULT", "8")),
+        )
+
+    def limit_for(self, backend: str) -> int:
+        return max(1, self.backend_limits.get(backend, self.default_limit))
+
+
+class BackendExecutor:
+    """
+    Run blocking service calls off the event loop with per-backend limits.
+
+    Context variables (such as the active workspace) are copied into the
+    worker thread so services see the same request context as the handler.
+    """
+
+    def __init__(
+        self,
+        config: Optional[BackendExecutorConfig] = None,
+        metrics_exporter: Optional[MetricsExporter] = None
+    ):
+        """
+        Initialize backend executor.
+
+        Args:
+            config: Executor settings (loaded from environment if None)
+            metrics_exporter: Exporter receiving queue depth/wait metrics (optional)
+        """
+        self.config = config or BackendExecutorConfig.from_env()
+        self.metrics_exporter = metrics_exporter
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._stats: Dict[str, Dict[str, float]] = {}
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.config.max_workers,
+                thread_name_prefix="backend-call"
+            )
+        return self._executor
+
+    def _get_semaphore(self, backend: str) -> asyncio.Semaphore:
+        semaphore = self._semaphores.get(backend)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.config.limit_for(backend))
+            self._semaphores[backend] = semaphore
+        return semaphore
+
+    def _backend_stats(self, backend: str) -> Dict[str, float]:
+        stats = self._stats.get(backend)
+        if stats is None:
+            stats = {
+                "waiting": 0,
+                "in_flight": 0,
+                "completed": 0,
+                "failed": 0,
+                "total_wait_seconds": 0.0,
+                "max_wait_seconds": 0.0,
+            }
+            self._stats[backend] = stats
+        return stats
+
+    def _publish_depth(self, backend: str, stats: Dict[str, float]):
+        if self.metrics_exporter:
+            self.metrics_exporter.update_queue_depth(
+                f"backend_{backend}",
+                int(stats["waiting"] + stats["in_flight"])
+            )
+
+    async def run(self, backend: str, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """
+        Run a blocking callable on the executor.
+
+        Args:
+            backend: Backend name used for the concurrency limit (``rag``, ``memory``, ``graph``)
+            func: Blocking callable
+            *args: Positional arguments for ``func``
+            **kwargs: Keyword arguments for ``func``
+
+        Returns:
+            Whatever ``func`` returns; exceptions are re-raised in the caller
+        """
+        loop = asyncio.get_running_loop()
+        semaphore = self._get_semaphore(backend)
+        stats = self._backend_stats(backend)
+        stats["waiting"] += 1
+        self._publish_depth(backend, stats)
+        queued_at = time.perf_counter()
+
+        try:
+            await semaphore.acquire()
+        finally:
+            stats["waiting"] -= 1
+        wait = time.perf_counter() - queued_at
+        stats["in_flight"] += 1
+        stats["total_wait_seconds"] += wait
+        stats["max_wait_seconds"] = max(stats["max_wait_seconds"], wait)
+        if self.metrics_exporter:
+            self.metrics_exporter.record_queue_wait(f"backend_{backend}", wait)
+
+        def release(future):
+            # The slot is held until the thread finishes, not until the caller
+            # stops waiting, so cancelled callers cannot exceed the backend limit.
+            stats["in_flight"] -= 1
+            stats["completed"] += 1
+            if not future.cancelled() and future.exception() is not None:
+                stats["failed"] += 1
+            semaphore.release()
+            self._publish_depth(backend, stats)
+
+        ctx = contextvars.copy_context()
+        future = self._get_executor().submit(ctx.run, functools.partial(func, *args, **kwargs))
+        def on_done(future):
+            try:
+                loop.call_soon_threadsafe(release, future)
+            except RuntimeError:
+                pass  # event loop already closed during shutdown
+
+        future.add_done_callback(on_done)
+        return await asyncio.wrap_future(future)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get executor statistics."""
+        backends = {}
+        for backend, stats in self._stats.items():
+            completed = stats["completed"]
+            backends[backend] = {
+                "limit": self.config.limit_for(backend),
+                "waiting": int(stats["waiting"]),
+                "in_flight": int(stats["in_flight"]),
+                "completed": int(completed),
+                "failed": int(stats["failed"]),
+                "avg_wait_ms": round(stats["total_wait_seconds"] / completed * 1000, 2) if completed else 0.0,
+                "max_wait_ms": round(stats["max_wait_seconds"] * 1000, 2),
+            }
+
+        return {
+            "max_workers": self.config.max_workers,
+            "backends": backends,
+        }
+
+    def shutdown(self, wait: bool = True):
+        """Shut down the thread pool; it is recreated lazily on next use."""
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+            logger.info("Backend executor shut down")
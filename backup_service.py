@@ -23,6 +23,8 @@ from botocore.exceptions import ClientError
 from apscheduler.schedulers.blocking import BlockingScheduler
 from apscheduler.triggers.cron import CronTrigger
 
+from qdrant_client_factory import create_qdrant_client
+
 
 # Configure logging
 logging.basicConfig(
@@ -129,21 +131,23 @@ class BackupService:
         logger.info(f"Starting Qdrant backup: {backup_id}")
         
         try:
-            # Create snapshot via Qdrant API
-            async_client = httpx.Client(timeout=300.0)
-            snapshot_url = f"http://{self.qdrant_host}:{self.qdrant_port}/snapshots"
-            
-            response = async_client.post(snapshot_url)
-            response.raise_for_status()
-            snapshot_info = response.json()
-            snapshot_name = snapshot_info.get('result', {}).get('name')
+            # Create snapshot via the shared Qdrant client (REST or gRPC)
+            qdrant_client = create_qdrant_client(
+                host=self.qdrant_host,
+                port=self.qdrant_port,
+                timeout_seconds=300
+            )
+            snapshot_info = qdrant_client.create_full_snapshot(wait=True)
+            snapshot_name = snapshot_info.name if snapshot_info else None
             
             if not snapshot_name:
                 raise ValueError("Failed to get snapshot name from Qdrant")
             
             logger.info(f"Qdrant snapshot created: {snapshot_name}")
             
-            # Download snapshot
+            # Download snapshot (snapshot files are only served over REST)
+            async_client = httpx.Client(timeout=300.0)
+            snapshot_url = f"http://{self.qdrant_host}:{self.qdrant_port}/snapshots"
             download_url = f"{snapshot_url}/{snapshot_name}"
             with tempfile.NamedTemporaryFile(delete=False, suffix='.snapshot') as tmp_file:
                 response = async_client.get(download_url)
@@ -174,10 +178,8 @@ class BackupService:
             
             # Delete snapshot from Qdrant to save space
             try:
-                async_client = httpx.Client(timeout=30.0)
-                delete_response = async_client.delete(download_url)
-                delete_response.raise_for_status()
-                async_client.close()
+                qdrant_client.delete_full_snapshot(snapshot_name, wait=True)
+                qdrant_client.close()
             except Exception as e:
                 logger.warning(f"Failed to delete Qdrant snapshot: {e}")
             
@@ -0,0 +1,1066 @@
+#!/usr/bin/env python3
+"""
+Per-workspace BM25 inverted index for the lexical leg of hybrid retrieval.
+
+``rank_bm25_lite`` can only rescore candidates the vector search already
+returned, so exact identifiers, error codes and function names the embedding
+misses are never recalled. ``BM25Index`` keeps a real inverted index (term
+frequencies, document lengths, IDF) per workspace and answers queries on its
+own, so the lexical leg contributes its own top-k to RRF.
+
+Layout: each workspace index is a list of immutable segment files named by a
+small JSON manifest, plus an in-memory delta of documents added since the
+last flush and a set of tombstoned point IDs. A segment holds offset-indexed
+string tables (point IDs, sorted terms, the filterable payload fields and the
+point IDs it deletes from older segments) and numeric arrays (uint32 doc
+slots, uint16 term frequencies, uint64 term offsets), all memory-mapped, so
+loading a segment does not materialize per-document Python objects.
+
+``flush`` only writes the delta and tombstones as a new small segment under a
+file lock, first picking up segments written by another process (API server
+or ingestion worker). Segments are then merged size-tiered: a segment is
+merged with the newer ones once they hold at least ``1 / merge_ratio`` of its
+size, so each document is rewritten O(log n) times instead of on every
+flush. Merges build the new segment outside the index lock.
+
+Upserts only add the points they write, so an index is marked complete only
+once ``rebuild`` has loaded the workspace's full corpus (see
+``scripts/deploy/rebuild_bm25_index.py``); until then retrieval keeps using
+``rank_bm25_lite``.
+"""
+
+import os
+import re
+import json
+import mmap
+import time
+import struct
+import hashlib
+import logging
+import threading
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from hybrid_retrieval import tokenize
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX platforms
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+_MAGIC = b"BM25SEG2"
+_HEADER = struct.Struct("<8sQQQQ")  # magic, n_docs, n_terms, n_postings, n_tombstones
+_MAX_TF = np.iinfo(np.uint16).max
+# Payload fields kept in the index for search filters and deletes; other
+# filters are applied by the caller on the payloads it hydrates from Qdrant
+FILTER_FIELDS = ("document_id", "repo", "path", "lang")
+_LIST_MARKER = "\x1f"
+
+# Compound identifiers (snake_case, dotted paths, ERR-CODES) are indexed whole
+# in addition to their parts so exact identifier queries get a high-IDF term.
+_IDENTIFIER_PATTERN = re.compile(r"[a-z0-9]+(?:[_.:/\-][a-z0-9]+)+")
+
+
+def analyze(text: str) -> List[str]:
+    """Tokenize text for indexing and querying."""
+    lowered = (text or "").lower()
+    tokens = tokenize(lowered)
+    tokens.extend(_IDENTIFIER_PATTERN.findall(lowered))
+    return tokens
+
+
+def matches_filters(metadata: Dict[str, Any], filters: Optional[Dict[str, Any]]) -> bool:
+    """
+    Evaluate search_documents-style metadata filters against a payload.
+
+    Mirrors the Qdrant filter built by ``QdrantStorage.search``: scalar values
+    match by equality (or membership for list payloads), ``{"any": [...]}``
+    matches any listed value. ``workspace_id`` is skipped because each index
+    already holds a single workspace.
+    """
+    for key, expected in (filters or {}).items():
+        if key == "workspace_id":
+            continue
+        actual = metadata.get(key)
+        candidates = expected["any"] if isinstance(expected, dict) and "any" in expected else [expected]
+        values = actual if isinstance(actual, list) else [actual]
+        if not any(value in candidates for value in values):
+            return False
+    return True
+
+
+def _field_value(value: Any) -> Any:
+    """Normalize a filterable payload value to str (or list of str, or None)."""
+    if value is None:
+        return None
+    if isinstance(value, list):
+        return [str(item) for item in value] or None
+    return str(value)
+
+
+def _filter_payload(metadata: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    metadata = metadata or {}
+    return {field: _field_value(metadata.get(field)) for field in FILTER_FIELDS}
+
+
+def _indexed_filters(filters: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Keep the filters the index can evaluate, with values compared as strings."""
+    indexed: Dict[str, Any] = {}
+    for key, expected in (filters or {}).items():
+        if key not in FILTER_FIELDS:
+            continue
+        candidates = expected["any"] if isinstance(expected, dict) and "any" in expected else [expected]
+        indexed[key] = {"any": [str(candidate) for candidate in candidates]}
+    return indexed
+
+
+def _encode_field(value: Any) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, list):
+        return _LIST_MARKER + _LIST_MARKER.join(value)
+    return value
+
+
+def _decode_field(value: str) -> Any:
+    if not value:
+        return None
+    if value.startswith(_LIST_MARKER):
+        return value.split(_LIST_MARKER)[1:]
+    return value
+
+
+def _align(offset: int) -> int:
+    return (offset + 7) & ~7
+
+
+class _StringTable:
+    """Offset-indexed UTF-8 strings read straight from a segment buffer."""
+
+    def __init__(self, offsets: np.ndarray, blob: memoryview):
+        self.offsets = offsets
+        self.blob = blob
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index: int) -> str:
+        return str(self.blob[int(self.offsets[index]):int(self.offsets[index + 1])], "utf-8")
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    @staticmethod
+    def encode(values: Sequence[str]) -> Tuple[np.ndarray, bytes]:
+        encoded = [value.encode("utf-8") for value in values]
+        offsets = np.zeros(len(encoded) + 1, dtype="<u8")
+        np.cumsum([len(value) for value in encoded], out=offsets[1:])
+        return offsets, b"".join(encoded)
+
+
+def _equal_range(table: _StringTable, order: Optional[np.ndarray], key: str) -> Tuple[int, int]:
+    """Binary-search the positions of ``key`` in a table sorted directly or through ``order``."""
+    def at(position: int) -> str:
+        return table[int(order[position]) if order is not None else position]
+
+    lo, hi = 0, len(table)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if at(mid) < key:
+            lo = mid + 1
+        else:
+            hi = mid
+    end = lo
+    while end < len(table) and at(end) == key:
+        end += 1
+    return lo, end
+
+
+@dataclass
+class _DeltaDoc:
+    length: int
+    term_freqs: Counter
+    metadata: Dict[str, Any]
+
+
+class _Segment:
+    """Immutable memory-mapped segment of documents and tombstones for older segments."""
+
+    def __init__(self, buffer: Any, name: str = ""):
+        self.name = name
+        magic, n_docs, n_terms, n_postings, n_tombstones = _HEADER.unpack_from(buffer, 0)
+        if magic != _MAGIC:
+            raise ValueError(f"{name or 'buffer'} is not a BM25 index segment")
+        view = memoryview(buffer)
+        position = _HEADER.size
+
+        def array(dtype: str, count: int) -> np.ndarray:
+            nonlocal position
+            values = np.frombuffer(buffer, dtype=dtype, count=count, offset=position)
+            position = _align(position + values.nbytes)
+            return values
+
+        def strings(count: int) -> _StringTable:
+            nonlocal position
+            offsets = array("<u8", count + 1)
+            size = int(offsets[-1])
+            blob = view[position:position + size]
+            position = _align(position + size)
+            return _StringTable(offsets, blob)
+
+        self.doc_ids = strings(n_docs)
+        self.fields = {field: strings(n_docs) for field in FILTER_FIELDS}
+        self.id_order = array("<u4", n_docs)
+        self.document_order = array("<u4", n_docs)
+        self.terms = strings(n_terms)
+        self.lengths = array("<u4", n_docs)
+        self.offsets = array("<u8", n_terms + 1)
+        self.post_docs = array("<u4", n_postings)
+        self.post_tfs = array("<u2", n_postings)
+        self.tombstones = strings(n_tombstones)
+        self.n_docs = n_docs
+        self.reset_live()
+
+    def reset_live(self):
+        self.live = np.ones(self.n_docs, dtype=bool)
+        self.live_docs = self.n_docs
+        self.live_length = int(self.lengths.sum(dtype=np.uint64)) if self.n_docs else 0
+
+    @property
+    def size(self) -> int:
+        """Documents plus tombstones, used to plan merges."""
+        return self.n_docs + len(self.tombstones)
+
+    def slot_of(self, doc_id: str) -> Optional[int]:
+        start, end = _equal_range(self.doc_ids, self.id_order, doc_id)
+        return int(self.id_order[start]) if start < end else None
+
+    def slots_for_document(self, document_id: str) -> np.ndarray:
+        start, end = _equal_range(self.fields["document_id"], self.document_order, document_id)
+        return self.document_order[start:end]
+
+    def payload(self, slot: int) -> Dict[str, Any]:
+        return {field: _decode_field(table[slot]) for field, table in self.fields.items()}
+
+    def kill(self, doc_id: str) -> bool:
+        slot = self.slot_of(doc_id)
+        if slot is None or not self.live[slot]:
+            return False
+        self.live[slot] = False
+        self.live_docs -= 1
+        self.live_length -= int(self.lengths[slot])
+        return True
+
+    def postings(self, term: str) -> Tuple[np.ndarray, np.ndarray]:
+        start, end = _equal_range(self.terms, None, term)
+        if start == end:
+            return self.post_docs[:0], self.post_tfs[:0]
+        first, last = int(self.offsets[start]), int(self.offsets[start + 1])
+        return self.post_docs[first:last], self.post_tfs[first:last]
+
+    @classmethod
+    def load(cls, path: Path) -> "_Segment":
+        with open(path, "rb") as handle:
+            buffer = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        return cls(buffer, name=path.name)
+
+    @staticmethod
+    def serialize(
+        doc_ids: List[str],
+        payloads: List[Dict[str, Any]],
+        lengths: np.ndarray,
+        postings: Dict[str, Tuple[np.ndarray, np.ndarray]],
+        tombstones: Sequence[str] = (),
+    ) -> bytes:
+        """Encode segment contents into the on-disk layout."""
+        terms = sorted(postings)
+        counts = np.array([len(postings[term][0]) for term in terms], dtype=np.uint64)
+        term_offsets = np.zeros(len(terms) + 1, dtype="<u8")
+        np.cumsum(counts, out=term_offsets[1:])
+        if terms:
+            post_docs = np.concatenate([postings[term][0] for term in terms]).astype("<u4")
+            post_tfs = np.concatenate([postings[term][1] for term in terms]).astype("<u2")
+        else:
+            post_docs = np.zeros(0, dtype="<u4")
+            post_tfs = np.zeros(0, dtype="<u2")
+        field_values = {
+            field: [_encode_field(payload.get(field)) for payload in payloads] for field in FILTER_FIELDS
+        }
+        id_order = np.array(sorted(range(len(doc_ids)), key=doc_ids.__getitem__), dtype="<u4")
+        document_ids = field_values["document_id"]
+        document_order = np.array(sorted(range(len(doc_ids)), key=document_ids.__getitem__), dtype="<u4")
+
+        parts: List[bytes] = [_HEADER.pack(_MAGIC, len(doc_ids), len(terms), len(post_docs), len(tombstones))]
+        size = _HEADER.size
+
+        def add(chunk: bytes):
+            nonlocal size
+            padding = _align(size) - size
+            if padding:
+                parts.append(b"\0" * padding)
+                size += padding
+            parts.append(chunk)
+            size += len(chunk)
+
+        def add_strings(values: Sequence[str]):
+            offsets, blob = _StringTable.encode(values)
+            add(offsets.tobytes())
+            add(blob)
+
+        add_strings(doc_ids)
+        for field in FILTER_FIELDS:
+            add_strings(field_values[field])
+        add(id_order.tobytes())
+        add(document_order.tobytes())
+        add_strings(terms)
+        add(np.asarray(lengths, dtype="<u4").tobytes())
+        add(term_offsets.tobytes())
+        add(post_docs.tobytes())
+        add(post_tfs.tobytes())
+        add_strings(sorted(tombstones))
+        return b"".join(parts) + b"\0" * (_align(size) - size)
+
+    @staticmethod
+    def write(path: Path, data: bytes):
+        """Write a serialized segment to ``path`` atomically."""
+        tmp_path = path.with_name(f"{path.name}.tmp-{os.getpid()}-{threading.get_ident()}")
+        with open(tmp_path, "wb") as handle:
+            handle.write(data)
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(tmp_path, path)
+
+
+def _segment_arrays(
+    sources: Sequence[Tuple["_Segment", np.ndarray]],
+    delta: Optional[Dict[str, _DeltaDoc]] = None,
+    delta_postings: Optional[Dict[str, Dict[str, int]]] = None,
+) -> Tuple[List[str], List[Dict[str, Any]], np.ndarray, Dict[str, Tuple[np.ndarray, np.ndarray]]]:
+    """Collect the documents kept by ``live`` masks of segments, then the delta, into segment arrays."""
+    doc_ids: List[str] = []
+    payloads: List[Dict[str, Any]] = []
+    lengths: List[np.ndarray] = []
+    term_docs: Dict[str, List[np.ndarray]] = {}
+    term_tfs: Dict[str, List[np.ndarray]] = {}
+
+    for segment, live in sources:
+        live_slots = np.flatnonzero(live)
+        if not len(live_slots):
+            continue
+        remap = np.full(segment.n_docs, -1, dtype=np.int64)
+        remap[live_slots] = np.arange(len(doc_ids), len(doc_ids) + len(live_slots))
+        doc_ids.extend(segment.doc_ids[int(slot)] for slot in live_slots)
+        payloads.extend(segment.payload(int(slot)) for slot in live_slots)
+        lengths.append(segment.lengths[live_slots])
+        for index in range(len(segment.terms)):
+            start, end = int(segment.offsets[index]), int(segment.offsets[index + 1])
+            docs = segment.post_docs[start:end]
+            keep = live[docs]
+            if keep.any():
+                term = segment.terms[index]
+                term_docs.setdefault(term, []).append(remap[docs[keep]])
+                term_tfs.setdefault(term, []).append(segment.post_tfs[start:end][keep].astype(np.int64))
+
+    delta_slots: Dict[str, int] = {}
+    for doc_id, doc in (delta or {}).items():
+        delta_slots[doc_id] = len(doc_ids)
+        doc_ids.append(doc_id)
+        payloads.append(doc.metadata)
+    lengths.append(np.array([doc.length for doc in (delta or {}).values()], dtype=np.uint32))
+    for term, docs in (delta_postings or {}).items():
+        term_docs.setdefault(term, []).append(np.array([delta_slots[doc_id] for doc_id in docs], dtype=np.int64))
+        term_tfs.setdefault(term, []).append(np.minimum(np.array(list(docs.values()), dtype=np.int64), _MAX_TF))
+
+    postings = {
+        term: (np.concatenate(term_docs[term]), np.concatenate(term_tfs[term]))
+        for term in term_docs
+    }
+    return doc_ids, payloads, np.concatenate(lengths).astype(np.uint32), postings
+
+
+def _plan_merge(sizes: List[int], merge_ratio: float, max_segments: int) -> Optional[int]:
+    """Index of the first segment of the newest run worth merging, or None."""
+    if len(sizes) < 2:
+        return None
+    start = len(sizes) - 1
+    total = sizes[-1]
+    for index in range(len(sizes) - 2, -1, -1):
+        if sizes[index] > merge_ratio * total:
+            break
+        start = index
+        total += sizes[index]
+    start = min(start, max(max_segments, 1) - 1)
+    return start if start < len(sizes) - 1 else None
+
+
+class BM25Index:
+    """
+    Incremental BM25 index for a single workspace.
+
+    Point IDs are the Qdrant point IDs, so adding an existing ID replaces the
+    previous version. All methods are thread-safe.
+    """
+
+    def __init__(
+        self,
+        path: Optional[Path] = None,
+        k1: float = 1.2,
+        b: float = 0.75,
+        reload_interval_seconds: float = 30.0,
+        merge_ratio: float = 1.0,
+        max_segments: int = 16
+    ):
+        """
+        Initialize index.
+
+        Args:
+            path: Manifest file; segments are stored next to it (None keeps the index in memory only)
+            k1: BM25 term-frequency saturation
+            b: BM25 length normalization
+            reload_interval_seconds: Minimum seconds between checks for newer segments on disk
+            merge_ratio: Merge a segment once the newer ones hold at least 1/merge_ratio of its size
+            max_segments: Segments kept before the newest ones are merged regardless of size
+        """
+        self.path = Path(path) if path else None
+        self.k1 = k1
+        self.b = b
+        self.reload_interval_seconds = reload_interval_seconds
+        self.merge_ratio = merge_ratio
+        self.max_segments = max_segments
+        self._lock = threading.RLock()
+        self._segments: List[_Segment] = []
+        self._generation = 0
+        self._complete = False
+        self._manifest_mtime_ns = 0
+        self._delta: Dict[str, _DeltaDoc] = {}
+        self._delta_postings: Dict[str, Dict[str, int]] = {}
+        self._delta_length = 0
+        self._deleted: set = set()
+        self._pending_changes = 0
+        self._pending_since: Optional[float] = None
+        self._last_reload_check = time.monotonic()
+        if self.path and self.path.exists():
+            self._reload_locked(check_mtime=False)
+
+    @property
+    def doc_count(self) -> int:
+        return sum(segment.live_docs for segment in self._segments) + len(self._delta)
+
+    @property
+    def pending_changes(self) -> int:
+        return self._pending_changes
+
+    @property
+    def pending_age_seconds(self) -> float:
+        """Seconds since the oldest change not yet flushed (0 when there is none)."""
+        since = self._pending_since
+        return time.monotonic() - since if since is not None else 0.0
+
+    @property
+    def complete(self) -> bool:
+        """True once the index was rebuilt from the full corpus (see ``rebuild``)."""
+        return self._complete
+
+    def _segment_path(self, name: str) -> Path:
+        return self.path.with_name(name)
+
+    def _remove_locked(self, point_id: str) -> bool:
+        removed = False
+        for segment in self._segments:
+            if segment.kill(point_id):
+                self._deleted.add(point_id)
+                removed = True
+        delta_doc = self._delta.pop(point_id, None)
+        if delta_doc is not None:
+            self._delta_length -= delta_doc.length
+            for term in delta_doc.term_freqs:
+                postings = self._delta_postings.get(term)
+                if postings is not None:
+                    postings.pop(point_id, None)
+                    if not postings:
+                        del self._delta_postings[term]
+            removed = True
+        return removed
+
+    def _changed_locked(self, count: int = 1):
+        if count and self._pending_since is None:
+            self._pending_since = time.monotonic()
+        self._pending_changes += count
+
+    def add(self, point_id: Any, text: str, metadata: Optional[Dict[str, Any]] = None):
+        """Index (or re-index) one point."""
+        point_id = str(point_id)
+        tokens = analyze(text)
+        term_freqs = Counter(tokens)
+        with self._lock:
+            self._remove_locked(point_id)
+            self._delta[point_id] = _DeltaDoc(len(tokens), term_freqs, _filter_payload(metadata))
+            self._delta_length += len(tokens)
+            for term, tf in term_freqs.items():
+                self._delta_postings.setdefault(term, {})[point_id] = tf
+            self._changed_locked()
+
+    def remove(self, point_id: Any) -> bool:
+        """Remove one point; returns True if it was indexed."""
+        with self._lock:
+            removed = self._remove_locked(str(point_id))
+            if removed:
+                self._changed_locked()
+            return removed
+
+    def delete_where(self, metadata_key: str, metadata_value: Any) -> int:
+        """
+        Remove every point whose metadata matches ``metadata_key == metadata_value``.
+
+        Only ``FILTER_FIELDS`` are stored, so other keys match nothing.
+        """
+        if metadata_key not in FILTER_FIELDS:
+            logger.warning(f"BM25 index cannot delete by unindexed metadata key '{metadata_key}'")
+            return 0
+        filters = _indexed_filters({metadata_key: metadata_value})
+        with self._lock:
+            doomed: List[str] = []
+            for segment in self._segments:
+                if metadata_key == "document_id":
+                    slots = segment.slots_for_document(str(metadata_value))
+                else:
+                    slots = range(segment.n_docs)
+                doomed.extend(
+                    segment.doc_ids[int(slot)]
+                    for slot in slots
+                    if segment.live[slot] and matches_filters(segment.payload(int(slot)), filters)
+                )
+            doomed.extend(
+                doc_id for doc_id, doc in self._delta.items() if matches_filters(doc.metadata, filters)
+            )
+            doomed = list(dict.fromkeys(doomed))
+            for doc_id in doomed:
+                self._remove_locked(doc_id)
+            self._changed_locked(len(doomed))
+            return len(doomed)
+
+    def search(
+        self,
+        query: str,
+        limit: int = 10,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> List[Tuple[str, float]]:
+        """
+        Rank indexed points against ``query`` with BM25.
+
+        Args:
+            query: Query text
+            limit: Maximum number of hits
+            filters: Optional metadata filters (see ``matches_filters``); keys
+                outside ``FILTER_FIELDS`` are ignored here
+
+        Returns:
+            List of (point_id, bm25_score), best first
+        """
+        terms = list(dict.fromkeys(analyze(query)))
+        if not terms or limit < 1:
+            return []
+        self.maybe_reload()
+        filters = _indexed_filters(filters)
+
+        with self._lock:
+            segments = self._segments
+            total_docs = sum(segment.live_docs for segment in segments) + len(self._delta)
+            if total_docs == 0:
+                return []
+            total_length = sum(segment.live_length for segment in segments) + self._delta_length
+            avgdl = max(1e-9, total_length / total_docs)
+            k1, b = self.k1, self.b
+
+            segment_scores = [np.zeros(segment.n_docs, dtype=np.float32) for segment in segments]
+            delta_scores: Dict[str, float] = {}
+            for term in terms:
+                term_postings = [segment.postings(term) for segment in segments]
+                df = len(self._delta_postings.get(term, ()))
+                for segment, (docs, _) in zip(segments, term_postings):
+                    df += int(np.count_nonzero(segment.live[docs]))
+                idf = float(np.log1p((total_docs - df + 0.5) / (df + 0.5)))
+                for segment, scores, (docs, tfs) in zip(segments, segment_scores, term_postings):
+                    if not len(docs):
+                        continue
+                    live = segment.live[docs]
+                    docs, tfs = docs[live], tfs[live].astype(np.float32)
+                    norm = k1 * (1.0 - b + b * segment.lengths[docs] / avgdl)
+                    scores[docs] += idf * tfs * (k1 + 1.0) / (tfs + norm)
+                for doc_id, tf in self._delta_postings.get(term, {}).items():
+                    norm = k1 * (1.0 - b + b * self._delta[doc_id].length / avgdl)
+                    delta_scores[doc_id] = delta_scores.get(doc_id, 0.0) + idf * tf * (k1 + 1.0) / (tf + norm)
+
+            hits: List[Tuple[str, float]] = []
+            for segment, scores in zip(segments, segment_scores):
+                candidates = np.flatnonzero(scores)
+                if len(candidates) > limit and not filters:
+                    top = np.argpartition(-scores[candidates], limit - 1)[:limit]
+                    candidates = candidates[top]
+                found = 0
+                for slot in candidates[np.argsort(-scores[candidates], kind="stable")]:
+                    if filters and not matches_filters(segment.payload(int(slot)), filters):
+                        continue
+                    hits.append((segment.doc_ids[int(slot)], float(scores[slot])))
+                    found += 1
+                    if found >= limit:
+                        break
+            for doc_id, score in delta_scores.items():
+                if not filters or matches_filters(self._delta[doc_id].metadata, filters):
+                    hits.append((doc_id, float(score)))
+
+        hits.sort(key=lambda hit: hit[1], reverse=True)
+        return hits[:limit]
+
+    def _attach_locked(self, segments: List[_Segment]):
+        """Install a segment list, applying on-disk tombstones and then local changes."""
+        previous = [segment.name for segment in self._segments]
+        start = len(previous)
+        if [segment.name for segment in segments[:start]] != previous:
+            start = 0
+            for segment in segments:
+                segment.reset_live()
+        for index in range(start, len(segments)):
+            for doc_id in segments[index].tombstones:
+                for older in segments[:index]:
+                    older.kill(doc_id)
+        # Local deletes and replacements not yet flushed also hide points in
+        # segments another process wrote; remember them as tombstones
+        for doc_id in list(self._deleted) + list(self._delta):
+            for segment in segments[start:]:
+                if segment.kill(doc_id):
+                    self._deleted.add(doc_id)
+        self._segments = segments
+
+    def _read_manifest(self) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self.path, "r", encoding="utf-8") as handle:
+                return json.load(handle)
+        except FileNotFoundError:
+            return None
+
+    def _write_manifest(self, generation: int, segments: List[_Segment], complete: bool):
+        tmp_path = self.path.with_name(f"{self.path.name}.tmp-{os.getpid()}-{threading.get_ident()}")
+        with open(tmp_path, "w", encoding="utf-8") as handle:
+            json.dump(
+                {"generation": generation, "segments": [segment.name for segment in segments], "complete": complete},
+                handle,
+            )
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(tmp_path, self.path)
+        self._generation = generation
+        self._complete = complete
+        self._manifest_mtime_ns = self.path.stat().st_mtime_ns
+
+    def _reload_locked(self, check_mtime: bool = True) -> bool:
+        """
+        Load the manifest and any segments not loaded yet; returns True if the segment list changed.
+
+        Writers holding the file lock pass ``check_mtime=False`` so a manifest
+        rewritten within the filesystem's mtime resolution is still seen.
+        """
+        try:
+            mtime_ns = self.path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return False
+        if check_mtime and mtime_ns == self._manifest_mtime_ns:
+            return False
+        manifest = self._read_manifest()
+        if manifest is None:
+            return False
+        if manifest["generation"] == self._generation:
+            self._manifest_mtime_ns = mtime_ns
+            return False
+        loaded = {segment.name: segment for segment in self._segments}
+        segments = [
+            loaded.get(name) or _Segment.load(self._segment_path(name))
+            for name in manifest["segments"]
+        ]
+        with self._lock:
+            self._attach_locked(segments)
+            self._generation = manifest["generation"]
+            self._complete = bool(manifest.get("complete", False))
+            self._manifest_mtime_ns = mtime_ns
+        return True
+
+    def maybe_reload(self, force: bool = False) -> bool:
+        """Pick up segments written by another process; returns True if reloaded."""
+        if self.path is None:
+            return False
+        now = time.monotonic()
+        if not force and now - self._last_reload_check < self.reload_interval_seconds:
+            return False
+        self._last_reload_check = now
+        try:
+            reloaded = self._reload_locked()
+        except FileNotFoundError:
+            # A concurrent merge replaced segments listed by the manifest we read; retry on the next check
+            return False
+        if reloaded:
+            logger.info(f"Reloaded BM25 index {self.path} ({len(self._segments)} segments, {self.doc_count} documents)")
+        return reloaded
+
+    def _lock_file(self):
+        handle = open(self.path.with_name(self.path.name + ".lock"), "a+")
+        if fcntl is not None:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+        return handle
+
+    def _clear_delta_locked(self):
+        self._delta.clear()
+        self._delta_postings.clear()
+        self._delta_length = 0
+        self._deleted.clear()
+        self._pending_changes = 0
+        self._pending_since = None
+
+    def _remove_segment_files(self, segments: Iterable[_Segment]):
+        for segment in segments:
+            try:
+                self._segment_path(segment.name).unlink()
+            except FileNotFoundError:
+                pass
+
+    def rebuild(self, points: Iterable[Tuple[Any, str, Optional[Dict[str, Any]]]]) -> int:
+        """
+        Replace the index with the full corpus and mark it complete.
+
+        Until an index is complete it only holds points upserted since it was
+        created, so callers keep their fallback ranking for it. Changes made
+        locally while ``points`` is read are kept on top of the rebuilt index.
+
+        Args:
+            points: Every (point_id, text, metadata) of the workspace, e.g. scrolled from Qdrant
+
+        Returns:
+            Number of indexed points
+        """
+        fresh = BM25Index(k1=self.k1, b=self.b)
+        for point_id, text, metadata in points:
+            fresh.add(point_id, text, metadata)
+        doc_ids, payloads, lengths, postings = _segment_arrays((), fresh._delta, fresh._delta_postings)
+        data = _Segment.serialize(doc_ids, payloads, lengths, postings)
+
+        if self.path is None:
+            with self._lock:
+                self._attach_locked([_Segment(data, name=f"rebuild-{self._generation + 1}")])
+                self._generation += 1
+                self._complete = True
+            return len(doc_ids)
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        lock_handle = self._lock_file()
+        try:
+            manifest = self._read_manifest() or {}
+            generation = max(self._generation, manifest.get("generation", 0)) + 1
+            name = f"{self.path.name}.{generation:08d}.seg"
+            _Segment.write(self._segment_path(name), data)
+            segment = _Segment.load(self._segment_path(name))
+            with self._lock:
+                obsolete = [self._segment_path(existing) for existing in manifest.get("segments", [])]
+                self._write_manifest(generation, [segment], complete=True)
+                self._attach_locked([segment])
+            for stale in obsolete:
+                if stale.name != name:
+                    stale.unlink(missing_ok=True)
+        finally:
+            lock_handle.close()
+        logger.info(f"Rebuilt BM25 index {self.path} ({len(doc_ids)} documents)")
+        return len(doc_ids)
+
+    def flush(self) -> bool:
+        """
+        Write pending changes as a new segment, then merge segments that are due.
+
+        Only the delta and tombstones are written, so a flush costs the size
+        of the change, not of the workspace.
+
+        Returns:
+            True if a segment was written
+        """
+        if self.path is None:
+            return False
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        lock_handle = self._lock_file()
+        try:
+            with self._lock:
+                if not self._pending_changes:
+                    return False
+                self._reload_locked(check_mtime=False)
+                doc_ids, payloads, lengths, postings = _segment_arrays((), self._delta, self._delta_postings)
+                data = _Segment.serialize(doc_ids, payloads, lengths, postings, tombstones=list(self._deleted))
+                generation = self._generation + 1
+                name = f"{self.path.name}.{generation:08d}.seg"
+                _Segment.write(self._segment_path(name), data)
+                self._clear_delta_locked()
+                segments = self._segments + [_Segment.load(self._segment_path(name))]
+                self._write_manifest(generation, segments, self._complete)
+                self._attach_locked(segments)
+                logger.info(
+                    f"Flushed BM25 segment {name} ({len(doc_ids)} documents, "
+                    f"{len(self._segments[-1].tombstones)} tombstones)"
+                )
+            self._merge_locked_file()
+            return True
+        finally:
+            lock_handle.close()
+
+    def _merge_locked_file(self):
+        """Merge the newest run of similar-sized segments (caller holds the file lock)."""
+        with self._lock:
+            segments = list(self._segments)
+        start = _plan_merge([segment.size for segment in segments], self.merge_ratio, self.max_segments)
+        if start is None:
+            return
+        sources = segments[start:]
+        older = segments[:start]
+
+        # Liveness from on-disk tombstones only: local unflushed deletes stay local
+        masks = [np.ones(segment.n_docs, dtype=bool) for segment in sources]
+        tombstones: List[str] = []
+        for index, segment in enumerate(sources):
+            for doc_id in segment.tombstones:
+                for source, mask in zip(sources[:index], masks[:index]):
+                    slot = source.slot_of(doc_id)
+                    if slot is not None:
+                        mask[slot] = False
+                if any(segment.slot_of(doc_id) is not None for segment in older):
+                    tombstones.append(doc_id)
+        doc_ids, payloads, lengths, postings = _segment_arrays(list(zip(sources, masks)))
+        data = _Segment.serialize(doc_ids, payloads, lengths, postings, tombstones=list(dict.fromkeys(tombstones)))
+
+        with self._lock:
+            generation = self._generation + 1
+            name = f"{self.path.name}.{generation:08d}.seg"
+            _Segment.write(self._segment_path(name), data)
+            merged = older + [_Segment.load(self._segment_path(name))]
+            self._write_manifest(generation, merged, self._complete)
+            self._attach_locked(merged)
+        self._remove_segment_files(sources)
+        logger.info(f"Merged {len(sources)} BM25 segments into {name} ({len(doc_ids)} documents)")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get index statistics."""
+        with self._lock:
+            return {
+                "documents": self.doc_count,
+                "segments": len(self._segments),
+                "segment_documents": sum(segment.live_docs for segment in self._segments),
+                "delta_documents": len(self._delta),
+                "pending_changes": self._pending_changes,
+                "complete": self._complete,
+                "persistent": self.path is not None,
+            }
+
+
+class BM25IndexManager:
+    """
+    Lazily opened BM25 indexes, one per workspace of a collection.
+
+    Persistent indexes are flushed by a background thread once a workspace
+    has ``flush_every`` pending changes or its oldest pending change is
+    ``flush_interval_seconds`` old, so upserts never wait on segment writes.
+    """
+
+    def __init__(
+        self,
+        directory: Optional[str] = None,
+        collection_name: str = "documents",
+        k1: float = 1.2,
+        b: float = 0.75,
+        flush_every: int = 1000,
+        reload_interval_seconds: float = 30.0,
+        flush_interval_seconds: float = 30.0,
+        merge_ratio: float = 1.0,
+        max_segments: int = 16,
+        flush_in_background: bool = True
+    ):
+        """
+        Initialize manager.
+
+        Args:
+            directory: Root directory for index files (None keeps indexes in memory)
+            collection_name: Qdrant collection the indexes mirror
+            k1: BM25 term-frequency saturation
+            b: BM25 length normalization
+            flush_every: Pending changes per workspace that trigger a flush (0 disables)
+            reload_interval_seconds: Minimum seconds between checks for newer segments
+            flush_interval_seconds: Maximum age of a pending change before it is flushed (0 disables)
+            merge_ratio: Segment merge ratio (see ``BM25Index``)
+            max_segments: Segments per workspace before forced merges
+            flush_in_background: Flush from a background thread instead of the caller's
+        """
+        self.directory = Path(directory) / collection_name if directory else None
+        self.collection_name = collection_name
+        self.k1 = k1
+        self.b = b
+        self.flush_every = flush_every
+        self.reload_interval_seconds = reload_interval_seconds
+        self.flush_interval_seconds = flush_interval_seconds
+        self.merge_ratio = merge_ratio
+        self.max_segments = max_segments
+        self.flush_in_background = flush_in_background
+        self._indexes: Dict[str, BM25Index] = {}
+        self._lock = threading.Lock()
+        self._flush_requested = threading.Event()
+        self._stopped = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+
+    @classmethod
+    def from_env(cls, collection_name: str = "documents") -> "BM25IndexManager":
+        """Build a manager from BM25_INDEX_* environment variables."""
+        return cls(
+            directory=os.getenv("BM25_INDEX_DIR", "data/bm25_index").strip() or None,
+            collection_name=collection_name,
+            k1=float(os.getenv("BM25_K1", "1.2")),
+            b=float(os.getenv("BM25_B", "0.75")),
+            flush_every=int(os.getenv("BM25_INDEX_FLUSH_EVERY", "1000")),
+            reload_interval_seconds=float(os.getenv("BM25_INDEX_RELOAD_INTERVAL_SECONDS", "30")),
+            flush_interval_seconds=float(os.getenv("BM25_INDEX_FLUSH_INTERVAL_SECONDS", "30")),
+            merge_ratio=float(os.getenv("BM25_INDEX_MERGE_RATIO", "1.0")),
+            max_segments=int(os.getenv("BM25_INDEX_MAX_SEGMENTS", "16")),
+        )
+
+    def _segment_path(self, workspace_id: str) -> Optional[Path]:
+        if self.directory is None:
+            return None
+        safe_name = re.sub(r"[^A-Za-z0-9_.-]", "_", workspace_id)[:64]
+        digest = hashlib.sha1(workspace_id.encode("utf-8")).hexdigest()[:8]
+        return self.directory / f"{safe_name}-{digest}.bm25"
+
+    def get_index(self, workspace_id: str) -> BM25Index:
+        """Get (opening if needed) the index for a workspace."""
+        with self._lock:
+            index = self._indexes.get(workspace_id)
+            if index is None:
+                index = BM25Index(
+                    self._segment_path(workspace_id),
+                    k1=self.k1,
+                    b=self.b,
+                    reload_interval_seconds=self.reload_interval_seconds,
+                    merge_ratio=self.merge_ratio,
+                    max_segments=self.max_segments,
+                )
+                self._indexes[workspace_id] = index
+            return index
+
+    def _flush_due(self, index: BM25Index) -> bool:
+        if not index.pending_changes:
+            return False
+        if self.flush_every and index.pending_changes >= self.flush_every:
+            return True
+        return bool(self.flush_interval_seconds) and index.pending_age_seconds >= self.flush_interval_seconds
+
+    def _flush(self, index: BM25Index):
+        try:
+            index.flush()
+        except Exception as e:
+            logger.warning(f"BM25 index flush failed for {index.path}: {e}")
+
+    def _maybe_flush(self, index: BM25Index):
+        if index.path is None:
+            return
+        if not self.flush_in_background:
+            if self._flush_due(index):
+                self._flush(index)
+            return
+        self._ensure_flusher()
+        if self.flush_every and index.pending_changes >= self.flush_every:
+            self._flush_requested.set()
+
+    def _ensure_flusher(self):
+        if self._flusher is not None:
+            return
+        with self._lock:
+            if self._flusher is None:
+                self._flusher = threading.Thread(target=self._flush_loop, name="bm25-flush", daemon=True)
+                self._flusher.start()
+
+    def _flush_loop(self):
+        while not self._stopped.is_set():
+            self._flush_requested.wait(timeout=self.flush_interval_seconds or None)
+            self._flush_requested.clear()
+            if not self._stopped.is_set():
+                self.flush_due()
+
+    def flush_due(self) -> int:
+        """Flush every open index past its change-count or age threshold; returns the number flushed."""
+        with self._lock:
+            indexes = list(self._indexes.values())
+        due = [index for index in indexes if self._flush_due(index)]
+        for index in due:
+            self._flush(index)
+        return len(due)
+
+    def add_points(
+        self,
+        workspace_id: str,
+        point_ids: Iterable[Any],
+        texts: Iterable[str],
+        metadatas: Iterable[Optional[Dict[str, Any]]]
+    ):
+        """Index upserted points."""
+        index = self.get_index(workspace_id)
+        for point_id, text, metadata in zip(point_ids, texts, metadatas):
+            index.add(point_id, text, metadata)
+        self._maybe_flush(index)
+
+    def remove_points(self, workspace_id: str, point_ids: Iterable[Any]) -> int:
+        """Remove points deleted from Qdrant by ID."""
+        index = self.get_index(workspace_id)
+        removed = sum(1 for point_id in point_ids if index.remove(point_id))
+        self._maybe_flush(index)
+        return removed
+
+    def delete_by_metadata(self, workspace_id: str, metadata_key: str, metadata_value: Any) -> int:
+        """Remove points deleted from Qdrant by metadata."""
+        index = self.get_index(workspace_id)
+        removed = index.delete_where(metadata_key, metadata_value)
+        self._maybe_flush(index)
+        return removed
+
+    def rebuild(self, workspace_id: str, points: Iterable[Tuple[Any, str, Optional[Dict[str, Any]]]]) -> int:
+        """Rebuild a workspace index from its full corpus and mark it complete."""
+        return self.get_index(workspace_id).rebuild(points)
+
+    def search(
+        self,
+        workspace_id: str,
+        query: str,
+        limit: int = 10,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> List[Tuple[str, float]]:
+        """Query a workspace index."""
+        return self.get_index(workspace_id).search(query, limit=limit, filters=filters)
+
+    def flush_all(self):
+        """Flush every open index with pending changes."""
+        with self._lock:
+            indexes = list(self._indexes.values())
+        for index in indexes:
+            self._flush(index)
+
+    def close(self):
+        """Stop the background flusher and flush what is left."""
+        self._stopped.set()
+        self._flush_requested.set()
+        if self._flusher is not None:
+            self._flusher.join(timeout=5)
+        self.flush_all()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get per-workspace index statistics."""
+        with self._lock:
+            indexes = dict(self._indexes)
+        return {
+            "directory": str(self.directory) if self.directory else None,
+            "workspaces": {workspace_id: index.get_stats() for workspace_id, index in indexes.items()},
+        }
@@ -0,0 +1,386 @@
+#!/usr/bin/env python3
+"""
+Structure-aware, token-budgeted document chunking.
+
+Fixed character windows split sentences, code blocks and functions in half,
+so answers need more chunks and prompts grow. ``StructuredChunker`` instead
+cuts documents at natural boundaries (Markdown headings, paragraphs, fenced
+code blocks, and top-level definitions for the ``lang`` recorded by the
+GitHub collector), packs the pieces up to a token budget measured with the
+embedder's tokenizer, and carries a token-bounded overlap between chunks.
+
+Chunks are produced by a generator, and each chunk is a contiguous span of
+the source text, so huge files never materialize all chunks at once.
+"""
+
+import os
+import re
+import logging
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+TokenCounter = Callable[[str], int]
+
+# Approximates subword tokenizers when the embedder's tokenizer is unavailable
+_APPROX_TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+_LINE_PATTERN = re.compile(r"[^\n]*\n|[^\n]+$")
+_WORD_PATTERN = re.compile(r"\S+\s*")
+_SENTENCE_END_PATTERN = re.compile(r"(?<=[.!?])\s+")
+_HEADING_PATTERN = re.compile(r"^\s{0,3}(#{1,6})\s+(.*?)\s*#*\s*$")
+_FENCE_PATTERN = re.compile(r"^\s{0,3}(```|~~~)")
+
+# Lines (at column 0) that open a new top-level definition, by collector ``lang``
+_DEFINITION_PATTERNS = {
+    "python": r"(?:@\w|(?:async\s+)?def\s|class\s)",
+    "javascript": r"(?:export\s+)?(?:default\s+)?(?:async\s+)?(?:function\b|class\s|interface\s|enum\s|type\s+\w+|(?:const|let|var)\s+\w+\s*=)",
+    "typescript": r"(?:export\s+)?(?:default\s+)?(?:async\s+)?(?:function\b|class\s|interface\s|enum\s|type\s+\w+|(?:const|let|var)\s+\w+\s*=)",
+    "go": r"(?:func|type)\s",
+    "rust": r"(?:#\[|(?:pub(?:\([^)]*\))?\s+)?(?:async\s+)?(?:fn|struct|enum|impl|trait|mod)\s)",
+    "java": r"(?:@\w|(?:public|private|protected|abstract|final|static)\s|(?:class|interface|enum|record)\s)",
+    "kotlin": r"(?:@\w|(?:public|private|internal|data|sealed|open|abstract)\s|(?:class|interface|object|fun)\s)",
+    "scala": r"(?:@\w|(?:case\s+)?(?:class|object|trait|def)\s)",
+    "csharp": r"(?:\[\w|(?:public|private|internal|protected|static|abstract|sealed)\s|(?:class|interface|struct|enum|namespace)\s)",
+    "swift": r"(?:@\w|(?:public|private|internal|open|final)\s|(?:class|struct|enum|protocol|extension|func)\s)",
+    "php": r"(?:(?:abstract\s+|final\s+)?class\s|function\s|interface\s|trait\s)",
+    "ruby": r"(?:def|class|module)\s",
+    "c": r"(?:struct|enum|typedef|union)\b|[A-Za-z_][^;{}()]*\([^;]*\)\s*\{?\s*$",
+    "cpp": r"(?:struct|class|enum|namespace|template|typedef)\b|[A-Za-z_][^;{}()]*\([^;]*\)\s*(?:const\s*)?\{?\s*$",
+    "shell": r"(?:function\s+\w+|\w+\s*\(\)\s*\{)",
+    "sql": r"(?i:create|alter|drop|insert|update|delete|select|with)\b",
+    "yaml": r"[\w\"'-][^:#]*:(?:\s|$)",
+    "toml": r"\[",
+    "makefile": r"[\w./-]+\s*:(?!=)",
+    "dockerfile": r"(?i:from)\s",
+}
+_DEFINITION_REGEXES = {lang: re.compile(pattern) for lang, pattern in _DEFINITION_PATTERNS.items()}
+# Decorator/attribute lines belong with the definition that follows them
+_DECORATOR_PREFIXES = ("@", "#[", "[")
+MARKDOWN_LANGS = ("markdown", "text", "")
+
+
+def approximate_token_count(text: str) -> int:
+    """Count word and punctuation pieces as a tokenizer-free token estimate."""
+    return len(_APPROX_TOKEN_PATTERN.findall(text))
+
+
+def tokenizer_token_counter(tokenizer: Any) -> TokenCounter:
+    """Build a token counter from a Hugging Face tokenizer."""
+    def count(text: str) -> int:
+        return len(tokenizer.encode(text, add_special_tokens=False))
+    return count
+
+
+def build_token_counter(embedder: Any = None, model_name: Optional[str] = None) -> TokenCounter:
+    """
+    Resolve a token counter for the embedding model.
+
+    Uses the tokenizer of an in-process SentenceTransformer embedder, else
+    loads the model's tokenizer with ``transformers``; falls back to
+    ``approximate_token_count`` when neither is available.
+
+    Args:
+        embedder: Embedder instance (``model.tokenizer`` is used when present)
+        model_name: Embedding model name for loading a standalone tokenizer
+
+    Returns:
+        Callable returning the token count of a text
+    """
+    tokenizer = getattr(getattr(embedder, "model", None), "tokenizer", None)
+    if tokenizer is None and model_name:
+        try:
+            from transformers import AutoTokenizer
+            tokenizer = AutoTokenizer.from_pretrained(model_name)
+        except Exception as e:
+            logger.warning(f"Tokenizer for '{model_name}' unavailable, approximating token counts: {e}")
+    if tokenizer is None:
+        return approximate_token_count
+    return tokenizer_token_counter(tokenizer)
+
+
+@dataclass
+class _Unit:
+    """A contiguous span of the document that is never split further."""
+    start: int
+    end: int
+    tokens: int
+    boundary: bool = False
+    section: Optional[str] = None
+
+
+class StructuredChunker:
+    """
+    Split documents into boundary-aligned chunks of at most ``max_tokens`` tokens.
+
+    Documents are first cut into blocks (sections, paragraphs, fenced code,
+    top-level definitions); blocks larger than the budget are split by lines,
+    sentences, words and finally character slices of over-long words. Blocks
+    are then packed greedily. A chunk is closed early at a heading or
+    definition once it holds half the budget, so sections and functions tend
+    to start their own chunk.
+    """
+
+    def __init__(
+        self,
+        max_tokens: int = 512,
+        overlap_tokens: int = 64,
+        token_counter: Optional[TokenCounter] = None
+    ):
+        """
+        Initialize structured chunker.
+
+        Args:
+            max_tokens: Token budget per chunk
+            overlap_tokens: Tokens of the previous chunk repeated at the start of the next
+            token_counter: Token counting function (``approximate_token_count`` if None)
+        """
+        if max_tokens <= 0:
+            raise ValueError("max_tokens must be positive")
+        self.max_tokens = max_tokens
+        self.overlap_tokens = max(0, min(overlap_tokens, max_tokens // 2))
+        self.count_tokens = token_counter or approximate_token_count
+
+    @classmethod
+    def from_env(cls, token_counter: Optional[TokenCounter] = None) -> "StructuredChunker":
+        """Build a chunker from RAG_CHUNK_MAX_TOKENS / RAG_CHUNK_OVERLAP_TOKENS."""
+        return cls(
+            max_tokens=int(os.getenv("RAG_CHUNK_MAX_TOKENS", "512")),
+            overlap_tokens=int(os.getenv("RAG_CHUNK_OVERLAP_TOKENS", "64")),
+            token_counter=token_counter,
+        )
+
+    def chunk_text(self, text: str, metadata: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """Split text into chunks (list form of ``iter_chunks``)."""
+        return list(self.iter_chunks(text, metadata))
+
+    def iter_chunks(self, text: str, metadata: Optional[Dict[str, Any]] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Lazily split text into structure-aligned chunks.
+
+        Args:
+            text: Text to chunk
+            metadata: Optional metadata attached to each chunk; ``lang`` selects code boundaries
+
+        Yields:
+            Chunk dictionaries with text and metadata (``chunk_index``,
+            ``chunk_start``/``chunk_end`` offsets, ``chunk_tokens`` and, for
+            Markdown, the enclosing ``section`` heading)
+        """
+        if not text:
+            return
+        base_metadata = metadata or {}
+        lang = str(base_metadata.get("lang") or "").strip().lower()
+
+        chunk_index = 0
+        pending: List[_Unit] = []
+        pending_tokens = 0
+        chunk_start = 0
+        overlap_tokens = 0
+
+        def emit(end: int) -> Dict[str, Any]:
+            section = next((unit.section for unit in reversed(pending) if unit.section), None)
+            chunk_metadata = {
+                **base_metadata,
+                "chunk_index": chunk_index,
+                "chunk_start": chunk_start,
+                "chunk_end": end,
+                "total_length": len(text),
+                "chunk_tokens": overlap_tokens + pending_tokens,
+            }
+            if section:
+                chunk_metadata["section"] = section
+            return {"text": text[chunk_start:end], "metadata": chunk_metadata}
+
+        for unit in self._units(text, lang):
+            budget = self.max_tokens - overlap_tokens
+            should_close = pending and (
+                pending_tokens + unit.tokens > budget
+                or (unit.boundary and overlap_tokens + pending_tokens >= self.max_tokens // 2)
+            )
+            if should_close:
+                chunk_end = pending[-1].end
+                yield emit(chunk_end)
+                chunk_index += 1
+                chunk_start, overlap_tokens = self._overlap_start(text, chunk_start, chunk_end, unit.boundary)
+                pending, pending_tokens = [], 0
+            if not pending and overlap_tokens + unit.tokens > self.max_tokens:
+                # No room to repeat the previous tail before this unit
+                overlap_tokens = 0
+            if not pending and overlap_tokens == 0:
+                chunk_start = unit.start
+            pending.append(unit)
+            pending_tokens += unit.tokens
+
+        if pending:
+            yield emit(pending[-1].end)
+
+    def _overlap_start(self, text: str, start: int, end: int, at_boundary: bool) -> Tuple[int, int]:
+        """Pick where the next chunk starts: a line/word-aligned tail of the previous one."""
+        if self.overlap_tokens == 0 or at_boundary:
+            return end, 0
+        offset = end
+        tokens = 0
+        for line in reversed(_LINE_PATTERN.findall(text[start:end])):
+            line_tokens = self.count_tokens(line)
+            if tokens + line_tokens > self.overlap_tokens:
+                # Finish the budget with the trailing words of this line
+                for word in reversed(_WORD_PATTERN.findall(line)):
+                    word_tokens = self.count_tokens(word)
+                    if tokens + word_tokens > self.overlap_tokens:
+                        break
+                    offset -= len(word)
+                    tokens += word_tokens
+                break
+            offset -= len(line)
+            tokens += line_tokens
+        return offset, tokens
+
+    def _units(self, text: str, lang: str) -> Iterator[_Unit]:
+        """Yield budget-sized units in document order."""
+        for start, end, boundary, section in self._blocks(text, lang):
+            tokens = self.count_tokens(text[start:end])
+            if tokens <= self.max_tokens:
+                yield _Unit(start, end, tokens, boundary, section)
+                continue
+            first = True
+            for piece_start, piece_end, piece_tokens in self._split_oversized(text, start, end):
+                yield _Unit(piece_start, piece_end, piece_tokens, boundary and first, section)
+                first = False
+
+    def _blocks(self, text: str, lang: str) -> Iterator[Tuple[int, int, bool, Optional[str]]]:
+        """Yield (start, end, starts_boundary, section) blocks for the document's structure."""
+        definition = None if lang in MARKDOWN_LANGS else _DEFINITION_REGEXES.get(lang)
+        markdown = lang in MARKDOWN_LANGS
+
+        block_start: Optional[int] = None
+        block_boundary = False
+        section: Optional[str] = None
+        in_fence = False
+        heading_only = False
+        previous_was_decorator = False
+        offset = 0
+
+        for match in _LINE_PATTERN.finditer(text):
+            line = match.group(0)
+            line_start = offset
+            offset = match.end()
+            stripped = line.strip()
+
+            if markdown and _FENCE_PATTERN.match(line):
+                if not in_fence and not heading_only:
+                    if block_start is not None:
+                        yield block_start, line_start, block_boundary, section
+                    block_start, block_boundary = line_start, False
+                in_fence = not in_fence
+                heading_only = False
+                continue
+            if in_fence:
+                continue
+
+            heading = _HEADING_PATTERN.match(line) if markdown else None
+            opens_definition = bool(
+                definition is not None
+                and line[:1] not in (" ", "\t")
+                and definition.match(line)
+                and not previous_was_decorator
+            )
+            if heading or opens_definition:
+                if block_start is not None:
+                    yield block_start, line_start, block_boundary, section
+                if heading:
+                    section = heading.group(2)
+                block_start, block_boundary = line_start, True
+                heading_only = bool(heading)
+            elif not stripped:
+                # Blank lines close a paragraph and stay attached to it; a
+                # heading stays with the paragraph that follows it
+                if block_start is not None and not heading_only:
+                    yield block_start, offset, block_boundary, section
+                    block_start, block_boundary = None, False
+                continue
+            else:
+                heading_only = False
+                if block_start is None:
+                    block_start, block_boundary = line_start, False
+            previous_was_decorator = opens_definition and stripped.startswith(_DECORATOR_PREFIXES)
+
+        if block_start is not None:
+            yield block_start, len(text), block_boundary, section
+
+    def _split_oversized(self, text: str, start: int, end: int) -> Iterator[Tuple[int, int, int]]:
+        """Split a block larger than the budget into line, sentence and word pieces."""
+        offset = start
+        for line in _LINE_PATTERN.findall(text[start:end]):
+            line_tokens = self.count_tokens(line)
+            if line_tokens <= self.max_tokens:
+                yield offset, offset + len(line), line_tokens
+                offset += len(line)
+                continue
+            for piece in self._pack(_SENTENCE_END_PATTERN.split(line), line):
+                yield offset, offset + len(piece), self.count_tokens(piece)
+                offset += len(piece)
+
+    def _pack(self, sentences: List[str], line: str) -> Iterator[str]:
+        """Greedily pack a long line's sentences (or words) into budget-sized pieces."""
+        pieces: List[str] = []
+        cursor = 0
+        for sentence in sentences:
+            # Recover each sentence with its trailing whitespace from the original line
+            position = line.find(sentence, cursor)
+            next_cursor = position + len(sentence)
+            while next_cursor < len(line) and line[next_cursor].isspace():
+                next_cursor += 1
+            pieces.append(line[cursor:next_cursor])
+            cursor = next_cursor
+        if cursor < len(line):
+            pieces.append(line[cursor:])
+
+        current, current_tokens = "", 0
+        for piece in pieces:
+            piece_tokens = self.count_tokens(piece)
+            if piece_tokens > self.max_tokens:
+                if current:
+                    yield current
+                    current, current_tokens = "", 0
+                for word in _WORD_PATTERN.findall(piece):
+                    word_tokens = self.count_tokens(word)
+                    if current and current_tokens + word_tokens > self.max_tokens:
+                        yield current
+                        current, current_tokens = "", 0
+                    if word_tokens > self.max_tokens:
+                        # A single run without whitespace (minified code, base64)
+                        *slices, current = self._split_word(word)
+                        yield from slices
+                        current_tokens = self.count_tokens(current)
+                        continue
+                    current += word
+                    current_tokens += word_tokens
+                continue
+            if current and current_tokens + piece_tokens > self.max_tokens:
+                yield current
+                current, current_tokens = "", 0
+            current += piece
+            current_tokens += piece_tokens
+        if current:
+            yield current
+
+    def _split_word(self, word: str) -> List[str]:
+        """Cut a word larger than the budget into the longest character slices that fit."""
+        slices: List[str] = []
+        while word:
+            # Gallop to bracket the longest fitting prefix, then bisect it
+            fits, limit = 0, min(len(word), self.max_tokens)
+            while fits < len(word) and self.count_tokens(word[:limit]) <= self.max_tokens:
+                fits, limit = limit, min(len(word), limit * 2)
+            low, high = fits, limit
+            while high - low > 1 and fits < len(word):
+                middle = (low + high) // 2
+                if self.count_tokens(word[:middle]) <= self.max_tokens:
+                    low = middle
+                else:
+                    high = middle
+            end = max(1, low)
+            slices.append(word[:end])
+            word = word[end:]
+        return slices
@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+"""
+Optional CPU cross-encoder reranking stage.
+
+``CrossEncoderReranker.rerank`` has the same contract as
+``cheap_reranker.rerank_results`` but scores (query, chunk) pairs with a
+cross-encoder model. Pairs are scored in batches on a dedicated executor under
+a hard latency budget; when the budget is exceeded (cold model, overload) the
+request falls back to the cheap lexical reranker while the batch finishes in
+the background and warms the score cache. At most one batch per query is in
+flight and the number of in-flight batches is bounded, so a slow model sheds
+load to the cheap reranker instead of queueing work nobody waits for. Scores
+are cached per (query hash, chunk_hash) so repeated queries skip the model
+entirely.
+"""
+
+import os
+import math
+import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from cheap_reranker import rerank_results
+from embedding_cache import normalize_embedding_text
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CROSS_ENCODER_MODEL = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+
+
+def _sigmoid(value: float) -> float:
+    if value >= 0:
+        return 1.0 / (1.0 + math.exp(-value))
+    exp_value = math.exp(value)
+    return exp_value / (1.0 + exp_value)
+
+
+def chunk_hash_for(item: Dict[str, Any]) -> str:
+    """Return the payload chunk_hash of a result, hashing its text when absent."""
+    chunk_hash = (item.get("metadata") or {}).get("chunk_hash")
+    if chunk_hash:
+        return str(chunk_hash)
+    return hashlib.sha256(str(item.get("text") or "").encode("utf-8")).hexdigest()
+
+
+class CrossEncoderReranker:
+    """
+    Cross-encoder reranker with batching, a latency budget and a score cache.
+
+    Final scores blend like the cheap reranker:
+    ``alpha * vector_score + (1 - alpha) * cross_encoder_score`` where the
+    cross-encoder logit is squashed to [0, 1].
+    """
+
+    def __init__(
+        self,
+        model_name: str = DEFAULT_CROSS_ENCODER_MODEL,
+        batch_size: int = 16,
+        latency_budget_ms: float = 200.0,
+        cache_size: int = 20000,
+        max_workers: int = 1,
+        max_pending: int = 4,
+        model: Optional[Any] = None
+    ):
+        """
+        Initialize reranker.
+
+        Args:
+            model_name: sentence-transformers CrossEncoder model
+            batch_size: Pairs per model forward pass
+            latency_budget_ms: Hard budget for scoring uncached pairs (0 disables)
+            cache_size: Maximum cached (query, chunk) scores
+            max_workers: Concurrent scoring threads
+            max_pending: Maximum in-flight (running or queued) scoring batches
+            model: Preloaded model exposing ``predict(pairs, batch_size=...)`` (optional)
+        """
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.latency_budget_ms = latency_budget_ms
+        self.cache_size = cache_size
+        self._model = model
+        self._model_lock = threading.Lock()
+        self.max_pending = max(1, max_pending)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="cross-encoder")
+        # In-flight scoring batches by query hash
+        self._pending: Dict[str, Future] = {}
+        self._pending_lock = threading.Lock()
+        self._cache: "OrderedDict[Tuple[str, str], float]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._stats = {
+            "requests": 0,
+            "cache_hits": 0,
+            "cache_misses": 0,
+            "pairs_scored": 0,
+            "batches": 0,
+            "fallbacks": 0,
+            "shed": 0,
+            "cancelled": 0,
+            "errors": 0,
+        }
+
+    @classmethod
+    def from_env(cls) -> "CrossEncoderReranker":
+        """Build a reranker from CROSS_ENCODER_* environment variables."""
+        return cls(
+            model_name=os.getenv("CROSS_ENCODER_MODEL", DEFAULT_CROSS_ENCODER_MODEL),
+            batch_size=int(os.getenv("CROSS_ENCODER_BATCH_SIZE", "16")),
+            latency_budget_ms=float(os.getenv("CROSS_ENCODER_LATENCY_BUDGET_MS", "200")),
+            cache_size=int(os.getenv("CROSS_ENCODER_CACHE_SIZE", "20000")),
+            max_workers=int(os.getenv("CROSS_ENCODER_WORKERS", "1")),
+            max_pending=int(os.getenv("CROSS_ENCODER_MAX_PENDING", "4")),
+        )
+
+    @staticmethod
+    def query_hash(query: str) -> str:
+        """Hash a normalized query for cache keys."""
+        return hashlib.sha256(normalize_embedding_text(query).encode("utf-8")).hexdigest()
+
+    def _load_model(self):
+        if self._model is None:
+            with self._model_lock:
+                if self._model is None:
+                    from sentence_transformers import CrossEncoder
+
+                    started = time.perf_counter()
+                    self._model = CrossEncoder(self.model_name, device="cpu")
+                    logger.info(
+                        f"Loaded cross-encoder {self.model_name} in {(time.perf_counter() - started) * 1000:.0f} ms"
+                    )
+        return self._model
+
+    def warm_up(self):
+        """Load the model in the background so the first request is not a fallback."""
+        self._executor.submit(self._load_model)
+
+    def _cache_get(self, key: Tuple[str, str]) -> Optional[float]:
+        with self._cache_lock:
+            score = self._cache.get(key)
+            if score is not None:
+                self._cache.move_to_end(key)
+            return score
+
+    def _cache_put(self, key: Tuple[str, str], score: float):
+        with self._cache_lock:
+            self._cache[key] = score
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def score_pairs(self, query: str, texts: Sequence[str], keys: Sequence[Tuple[str, str]]) -> List[float]:
+        """Score (query, text) pairs with the model in one batched call and cache the results."""
+        model = self._load_model()
+        raw_scores = model.predict([(query, text) for text in texts], batch_size=self.batch_size)
+        scores = [_sigmoid(float(score)) for score in raw_scores]
+        for key, score in zip(keys, scores):
+            self._cache_put(key, score)
+        self._stats["pairs_scored"] += len(scores)
+        self._stats["batches"] += math.ceil(len(scores) / max(1, self.batch_size))
+        return scores
+
+    def _submit_batch(
+        self,
+        query_key: str,
+        query: str,
+        texts: Sequence[str],
+        keys: Sequence[Tuple[str, str]],
+    ) -> Optional[Future]:
+        """Submit a scoring batch unless one for the query is pending or the queue is full."""
+        with self._pending_lock:
+            if query_key in self._pending or len(self._pending) >= self.max_pending:
+                return None
+            future = self._executor.submit(self.score_pairs, query, texts, keys)
+            self._pending[query_key] = future
+
+        def _release(done: Future):
+            with self._pending_lock:
+                if self._pending.get(query_key) is done:
+                    del self._pending[query_key]
+
+        future.add_done_callback(_release)
+        return future
+
+    def rerank(
+        self,
+        query: str,
+        results: List[Dict[str, Any]],
+        *,
+        alpha: float = 0.65,
+        top_k: int = 10
+    ) -> List[Dict[str, Any]]:
+        """
+        Rerank results with the cross-encoder, falling back to the cheap reranker.
+
+        Args:
+            query: Search query
+            results: Candidates (already trimmed to RERANK_MAX_CANDIDATES)
+            alpha: Weight of the vector score in the blended score
+            top_k: Number of results to return
+
+        Returns:
+            Reranked results with ``rerank_score`` and blended ``score``
+        """
+        started = time.perf_counter()
+        self._stats["requests"] += 1
+        query_key = self.query_hash(query)
+        keys = [(query_key, chunk_hash_for(item)) for item in results]
+
+        scores: List[Optional[float]] = [self._cache_get(key) for key in keys]
+        missing = [index for index, score in enumerate(scores) if score is None]
+        self._stats["cache_hits"] += len(results) - len(missing)
+        self._stats["cache_misses"] += len(missing)
+
+        if missing:
+            future = self._submit_batch(
+                query_key,
+                query,
+                [str(results[index].get("text") or "") for index in missing],
+                [keys[index] for index in missing],
+            )
+            if future is None:
+                # A batch for this query is still scoring, or the queue is full
+                self._stats["shed"] += 1
+                self._stats["fallbacks"] += 1
+                return rerank_results(query, results, alpha=alpha, top_k=top_k)
+            timeout = self.latency_budget_ms / 1000.0 if self.latency_budget_ms > 0 else None
+            try:
+                for index, score in zip(missing, future.result(timeout=timeout)):
+                    scores[index] = score
+            except FutureTimeoutError:
+                # A batch still queued is dropped; one already scoring finishes and
+                # fills the cache for the next identical query
+                if future.cancel():
+                    self._stats["cancelled"] += 1
+                self._stats["fallbacks"] += 1
+                logger.info(
+                    f"Cross-encoder exceeded {self.latency_budget_ms:.0f} ms budget for "
+                    f"{len(missing)} pairs; using cheap reranker"
+                )
+                return rerank_results(query, results, alpha=alpha, top_k=top_k)
+            except Exception as e:
+                self._stats["errors"] += 1
+                self._stats["fallbacks"] += 1
+                logger.warning(f"Cross-encoder reranking failed, using cheap reranker: {e}")
+                return rerank_results(query, results, alpha=alpha, top_k=top_k)
+
+        clamped_alpha = max(0.0, min(1.0, float(alpha)))
+        reranked: List[Dict[str, Any]] = []
+        for item, rerank_score in zip(results, scores):
+            row = dict(item)
+            vector_score = float(row.get("score", 0.0) or 0.0)
+            final_score = (clamped_alpha * vector_score) + ((1.0 - clamped_alpha) * rerank_score)
+            row["rerank_score"] = round(rerank_score, 6)
+            row["score"] = round(final_score, 6)
+            row["ranking_stage"] = "cross_encoder_reranked"
+            reranked.append(row)
+
+        reranked.sort(key=lambda x: x.get("score", 0.0), reverse=True)
+        logger.debug(f"Cross-encoder reranked {len(results)} candidates in {(time.perf_counter() - started) * 1000:.1f} ms")
+        return reranked[: max(1, top_k)]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get reranker statistics."""
+        with self._cache_lock:
+            cache_entries = len(self._cache)
+        with self._pending_lock:
+            pending_batches = len(self._pending)
+        return {
+            **self._stats,
+            "model": self.model_name,
+            "model_loaded": self._model is not None,
+            "latency_budget_ms": self.latency_budget_ms,
+            "pending_batches": pending_batches,
+            "cache_entries": cache_entries,
+        }
+
+    def shutdown(self):
+        """Stop the scoring executor."""
+        self._executor.shutdown(wait=False)
+
+
+_cross_encoder_reranker: Optional[CrossEncoderReranker] = None
+_cross_encoder_lock = threading.Lock()
+
+
+def get_cross_encoder_reranker() -> CrossEncoderReranker:
+    """Get the process-wide cross-encoder reranker, creating it from the environment."""
+    global _cross_encoder_reranker
+    if _cross_encoder_reranker is None:
+        with _cross_encoder_lock:
+            if _cross_encoder_reranker is None:
+                _cross_encoder_reranker = CrossEncoderReranker.from_env()
+    return _cross_encoder_reranker
@@ -10,11 +10,73 @@ from typing import Dict, Any, List, Optional
 import json
 from datetime import datetime
 from redis import Redis
-from rq import Queue, Worker
+from rq import Queue, SimpleWorker, Worker
 from rq.job import Job
 
 logger = logging.getLogger(__name__)
 
+# Batched ingestion: group documents into jobs bounded by count and total characters
+INGESTION_BATCH_ENABLED = os.getenv("INGESTION_BATCH_ENABLED", "false").strip().lower() in ("1", "true", "yes")
+INGESTION_BATCH_MAX_DOCUMENTS = int(os.getenv("INGESTION_BATCH_MAX_DOCUMENTS", "64"))
+INGESTION_BATCH_MAX_CHARS = int(os.getenv("INGESTION_BATCH_MAX_CHARS", "500000"))
+
+
+def batch_documents(
+    documents: List[Dict[str, Any]],
+    max_documents: int = INGESTION_BATCH_MAX_DOCUMENTS,
+    max_chars: int = INGESTION_BATCH_MAX_CHARS
+) -> List[List[Dict[str, Any]]]:
+    """
+    Group documents into batches bounded by document count and total text length.
+
+    A document larger than ``max_chars`` gets a batch of its own.
+
+    Args:
+        documents: Documents to group
+        max_documents: Maximum documents per batch
+        max_chars: Maximum total characters of ``text`` per batch
+
+    Returns:
+        List of document batches, preserving input order
+    """
+    batches: List[List[Dict[str, Any]]] = []
+    current: List[Dict[str, Any]] = []
+    current_chars = 0
+    for doc in documents:
+        doc_chars = len(doc.get("text") or "")
+        if current and (len(current) >= max_documents or current_chars + doc_chars > max_chars):
+            batches.append(current)
+            current, current_chars = [], 0
+        current.append(doc)
+        current_chars += doc_chars
+    if current:
+        batches.append(current)
+    return batches
+
+
+class IngestionWorker(SimpleWorker):
+    """
+    RQ worker that runs jobs in its own process and keeps ingestion services warm.
+
+    The default RQ worker forks a work horse per job, so anything a job loads
+    (embedding model, Qdrant client) is thrown away when the job ends. This
+    worker executes jobs in-process and loads the RAG service before taking
+    the first job, so every job reuses the same model and connection.
+    """
+
+    def work(self, *args, **kwargs):
+        from data_collectors.ingestion_worker import flush_lexical_indexes, warm_up
+
+        try:
+            warm_up()
+        except Exception as e:
+            # Jobs retry initialization lazily, so a cold dependency is not fatal here
+            logger.warning(f"Ingestion worker warm-up failed: {e}")
+        try:
+            return super().work(*args, **kwargs)
+        finally:
+            flush_lexical_indexes()
+
 
 class IngestionQueue:
     """Manages ingestion queue using Redis Queue."""
@@ -54,7 +116,8 @@ class IngestionQueue:
     def enqueue_documents(
         self,
         documents: List[Dict[str, Any]],
-        priority: str = "normal"
+        priority: str = "normal",
+        batch: Optional[bool] = None
     ) -> List[str]:
         """
         Enqueue documents for ingestion.
@@ -62,10 +125,16 @@ class IngestionQueue:
         Args:
             documents: List of documents to ingest
             priority: Priority level (high, normal, low)
+            batch: Group documents into batch jobs (defaults to INGESTION_BATCH_ENABLED)
             
         Returns:
-            List of job IDs
+            List of job IDs (one per document, or one per batch in batch mode)
         """
+        if batch is None:
+            batch = INGESTION_BATCH_ENABLED
+        if batch:
+            return self.enqueue_document_batches(documents)
+
         job_ids = []
         
         for doc in documents:
@@ -85,6 +154,47 @@ class IngestionQueue:
         logger.info(f"Enqueued {len(job_ids)} documents for ingestion")
         return job_ids
     
+    def enqueue_document_batches(
+        self,
+        documents: List[Dict[str, Any]],
+        max_documents: int = INGESTION_BATCH_MAX_DOCUMENTS,
+        max_chars: int = INGESTION_BATCH_MAX_CHARS
+    ) -> List[str]:
+        """
+        Enqueue documents as batch jobs processed by ``process_document_batch``.
+
+        Each job embeds its documents in large batches and writes them with a
+        few Qdrant upserts; per-document outcomes are reported in the job
+        result and surfaced by ``get_job_status``.
+        
+        Args:
+            documents: List of documents to ingest
+            max_documents: Maximum documents per job
+            max_chars: Maximum total characters per job
+            
+        Returns:
+            List of batch job IDs
+        """
+        job_ids = []
+        
+        for group in batch_documents(documents, max_documents=max_documents, max_chars=max_chars):
+            try:
+                job = self.queue.enqueue(
+                    'data_collectors.ingestion_worker.process_document_batch',
+                    group,
+                    job_timeout='30m',
+                    result_ttl=3600,
+                    failure_ttl=86400,
+                    meta={"mode": "batch", "document_count": len(group)}
+                )
+                job_ids.append(job.id)
+                
+            except Exception as e:
+                logger.error(f"Error enqueuing document batch: {e}")
+        
+        logger.info(f"Enqueued {len(documents)} documents for ingestion in {len(job_ids)} batch jobs")
+        return job_ids
+    
     def enqueue_collection_job(
         self,
         source: str,
@@ -125,7 +235,7 @@ class IngestionQueue:
         try:
             job = Job.fetch(job_id, connection=self.redis_conn)
             
-            return {
+            status = {
                 "job_id": job.id,
                 "status": job.get_status(),
                 "created_at": job.created_at.isoformat() if job.created_at else None,
@@ -135,6 +245,18 @@ class IngestionQueue:
                 "exc_info": job.exc_info
             }
             
+            meta = job.meta or {}
+            if meta.get("mode") == "batch":
+                result = job.result if isinstance(job.result, dict) else {}
+                documents = result.get("documents")
+                status["document_count"] = meta.get("document_count")
+                status["documents"] = documents
+                if documents is not None:
+                    status["documents_succeeded"] = sum(1 for doc in documents if doc.get("status") == "success")
+                    status["documents_failed"] = len(documents) - status["documents_succeeded"]
+            
+            return status
+            
         except Exception as e:
             logger.error(f"Error fetching job {job_id}: {e}")
             return {"job_id": job_id, "status": "unknown", "error": str(e)}
@@ -163,13 +285,15 @@ class IngestionQueue:
     
     def create_worker(
         self,
-        num_workers: int = 1
+        num_workers: int = 1,
+        worker_class: type = IngestionWorker
     ) -> List[Worker]:
         """
         Create worker instances.
         
         Args:
             num_workers: Number of workers to create
+            worker_class: RQ worker class (IngestionWorker keeps services warm across jobs)
             
         Returns:
             List of worker instances
@@ -177,7 +301,7 @@ class IngestionQueue:
         workers = []
         
         for i in range(num_workers):
-            worker = Worker(
+            worker = worker_class(
                 [self.queue],
                 connection=self.redis_conn,
                 name=f"ingestion-worker-{i}"
@@ -5,12 +5,26 @@ Background worker that processes documents from the ingestion queue.
 """
 
 import os
+import time
 import logging
-from typing import Dict, Any, List
+import functools
+import threading
+from typing import Callable, Dict, Any, List, Optional, Tuple
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
+# Minimum seconds between Qdrant health probes on a cached service
+RAG_WORKER_HEALTHCHECK_INTERVAL_SECONDS = float(os.getenv("RAG_WORKER_HEALTHCHECK_INTERVAL_SECONDS", "30"))
+# Jobs run in a forked RQ work horse that exits with os._exit (see worker_service.py)
+INGESTION_WORKER_FORK = os.getenv("INGESTION_WORKER_FORK", "false").strip().lower() in {"1", "true", "yes", "on"}
+
+# Per-process caches so model loading happens once per worker, not once per job
+_rag_services: Dict[Tuple[Any, ...], Any] = {}
+_rag_health_checked_at: Dict[Tuple[Any, ...], float] = {}
+_format_normalizer: Optional[Any] = None
+_service_lock = threading.Lock()
+
 
 def _normalize_channel_ids(raw_channel_ids: Any) -> List[str]:
     """Normalize channel IDs from list or comma-separated string."""
@@ -48,6 +62,120 @@ def _resolve_workspace_id(config: Dict[str, Any]) -> str:
     return normalized_workspace_id
 
 
+def _rag_service_config(collection_name: str = "documents") -> Dict[str, Any]:
+    """Build RAGIngestionService constructor arguments from the environment."""
+    return {
+        "qdrant_host": os.getenv("QDRANT_HOST", "localhost"),
+        "qdrant_port": int(os.getenv("QDRANT_PORT", "6333")),
+        "collection_name": collection_name,
+    }
+
+
+def _ensure_rag_service_healthy(key: Tuple[Any, ...], service: Any):
+    """Probe the cached service's Qdrant connection at most once per interval."""
+    now = time.monotonic()
+    if now - _rag_health_checked_at.get(key, 0.0) < RAG_WORKER_HEALTHCHECK_INTERVAL_SECONDS:
+        return
+    ensure_connected = getattr(getattr(service, "storage", None), "ensure_connected", None)
+    if callable(ensure_connected):
+        ensure_connected()
+    _rag_health_checked_at[key] = now
+
+
+def get_rag_ingestion_service(collection_name: str = "documents") -> Any:
+    """
+    Get the worker process's RAGIngestionService, creating it on first use.
+
+    Services are cached per process and keyed by their configuration, so the
+    embedding model and Qdrant client are loaded once and reused by every job.
+    The Qdrant connection is health-checked before reuse and rebuilt if it
+    has dropped.
+
+    Args:
+        collection_name: Qdrant collection name
+
+    Returns:
+        Shared RAGIngestionService instance
+    """
+    from rag_service import RAGIngestionService
+
+    config = _rag_service_config(collection_name)
+    key = (RAGIngestionService,) + tuple(sorted(config.items()))
+    with _service_lock:
+        service = _rag_services.get(key)
+        if service is None:
+            started = time.monotonic()
+            service = RAGIngestionService(**config)
+            _rag_services[key] = service
+            _rag_health_checked_at[key] = time.monotonic()
+            logger.info(
+                f"Initialized worker RAG service for {config['qdrant_host']}:{config['qdrant_port']}"
+                f"/{collection_name} in {(time.monotonic() - started) * 1000:.0f} ms"
+            )
+        else:
+            _ensure_rag_service_healthy(key, service)
+    return service
+
+
+def get_format_normalizer() -> Any:
+    """Get the worker process's shared FormatNormalizer."""
+    global _format_normalizer
+    from data_collectors.format_normalizer import FormatNormalizer
+
+    with _service_lock:
+        if not isinstance(_format_normalizer, FormatNormalizer):
+            _format_normalizer = FormatNormalizer()
+    return _format_normalizer
+
+
+def warm_up() -> None:
+    """Load the RAG service and normalizer before the worker takes its first job."""
+    get_format_normalizer()
+    get_rag_ingestion_service()
+
+
+def flush_lexical_indexes() -> None:
+    """
+    Persist pending BM25 index changes of every cached RAG service.
+
+    In-process workers leave flushing to each index manager, which writes
+    its changes once they reach BM25_INDEX_FLUSH_EVERY or
+    BM25_INDEX_FLUSH_INTERVAL_SECONDS, and call this when they stop.
+    """
+    with _service_lock:
+        services = list(_rag_services.values())
+    for service in services:
+        lexical_index = getattr(getattr(service, "storage", None), "lexical_index", None)
+        if lexical_index is not None:
+            lexical_index.flush_all()
+
+
+def flushes_lexical_indexes_when_forked(job: Callable[..., Dict[str, Any]]) -> Callable[..., Dict[str, Any]]:
+    """
+    Flush BM25 index changes when the job ends if it runs in a forked work horse.
+
+    A forked job process exits without running the worker's shutdown flush
+    or the manager's background flusher, so its changes would be lost.
+    """
+    @functools.wraps(job)
+    def wrapper(*args, **kwargs):
+        try:
+            return job(*args, **kwargs)
+        finally:
+            if INGESTION_WORKER_FORK:
+                flush_lexical_indexes()
+    return wrapper
+
+
+def reset_service_cache() -> None:
+    """Drop cached services (used by tests and after configuration changes)."""
+    global _format_normalizer
+    with _service_lock:
+        _rag_services.clear()
+        _rag_health_checked_at.clear()
+        _format_normalizer = None
+
+
 def _collect_and_process_github_repo(config: Dict[str, Any]) -> Dict[str, Any]:
     """Collect and ingest GitHub repository codebase into vector storage."""
     repo_name = str(config.get("repo_name") or "").strip()
@@ -55,7 +183,6 @@ def _collect_and_process_github_repo(config: Dict[str, Any]) -> Dict[str, Any]:
         raise ValueError("repo_name is required for source='github_repo'")
 
     from data_collectors.github_collector import GitHubCollector
-    from rag_service import RAGIngestionService
 
     workspace_id = _resolve_workspace_id(config)
     branch = config.get("branch")
@@ -105,13 +232,7 @@ def _collect_and_process_github_repo(config: Dict[str, Any]) -> Dict[str, Any]:
             "completed_at": datetime.utcnow().isoformat(),
         }
 
-    qdrant_host = os.getenv("QDRANT_HOST", "localhost")
-    qdrant_port = int(os.getenv("QDRANT_PORT", "6333"))
-    rag_service = RAGIngestionService(
-        qdrant_host=qdrant_host,
-        qdrant_port=qdrant_port,
-        collection_name="documents",
-    )
+    rag_service = get_rag_ingestion_service()
 
     deleted_document_ids = 0
 
@@ -155,6 +276,7 @@ def _collect_and_process_github_repo(config: Dict[str, Any]) -> Dict[str, Any]:
     }
 
 
+@flushes_lexical_indexes_when_forked
 def process_document(document: Dict[str, Any]) -> Dict[str, Any]:
     """
     Process a single document through the ingestion pipeline.
@@ -167,24 +289,13 @@ def process_document(document: Dict[str, Any]) -> Dict[str, Any]:
     Returns:
         Processing result
     """
-    from data_collectors.format_normalizer import FormatNormalizer
-    from data_collectors.deduplicator import Deduplicator
-    from rag_service import RAGIngestionService
-    
     try:
         logger.info(f"Processing document from {document.get('metadata', {}).get('source', 'unknown')}")
         
-        normalizer = FormatNormalizer()
+        normalizer = get_format_normalizer()
         normalized_doc = normalizer.normalize_document(document)
         
-        qdrant_host = os.getenv("QDRANT_HOST", "localhost")
-        qdrant_port = int(os.getenv("QDRANT_PORT", "6333"))
-        
-        rag_service = RAGIngestionService(
-            qdrant_host=qdrant_host,
-            qdrant_port=qdrant_port,
-            collection_name="documents"
-        )
+        rag_service = get_rag_ingestion_service()
         
         result = rag_service.ingest_document(
             text=normalized_doc["text"],
@@ -209,6 +320,91 @@ def process_document(document: Dict[str, Any]) -> Dict[str, Any]:
         }
 
 
+@flushes_lexical_indexes_when_forked
+def process_document_batch(documents: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Process a batch of documents through the ingestion pipeline in one job.
+
+    Documents are normalized individually, then chunked, embedded and upserted
+    together through ``RAGIngestionService.ingest_documents_batch``, which
+    isolates failures to the documents that caused them, so a document is
+    only reported as failed when it was not stored. This function is
+    executed by RQ workers.
+
+    Args:
+        documents: Documents to process
+
+    Returns:
+        Batch result with one status entry per document, in input order
+    """
+    statuses: List[Dict[str, Any]] = []
+    try:
+        logger.info(f"Processing batch of {len(documents)} documents")
+
+        normalizer = get_format_normalizer()
+        normalized_docs: List[Dict[str, Any]] = []
+        normalized_indexes: List[int] = []
+        for index, document in enumerate(documents):
+            try:
+                normalized_docs.append(normalizer.normalize_document(document))
+                normalized_indexes.append(index)
+                statuses.append({"index": index, "status": "pending"})
+            except Exception as e:
+                logger.error(f"Error normalizing document {index}: {e}")
+                statuses.append({"index": index, "status": "error", "error": str(e)})
+
+        batch_result = {"results": [], "total_chunks": 0}
+        if normalized_docs:
+            rag_service = get_rag_ingestion_service()
+            batch_result = rag_service.ingest_documents_batch(normalized_docs)
+
+        for index, result in zip(normalized_indexes, batch_result.get("results", [])):
+            if result.get("status") == "success":
+                statuses[index] = {
+                    "index": index,
+                    "status": "success",
+                    "document_id": result.get("document_id"),
+                    "chunks_created": result.get("chunks_created", 0),
+                }
+            elif result.get("status") == "partial":
+                # Some points were written and could not be rolled back
+                statuses[index] = {
+                    "index": index,
+                    "status": "partial",
+                    "error": result.get("error"),
+                    "document_id": result.get("document_id"),
+                    "points_stored": result.get("points_stored", 0),
+                }
+            else:
+                statuses[index] = {"index": index, "status": "error", "error": result.get("error")}
+
+    except Exception as e:
+        logger.error(f"Error processing document batch: {e}", exc_info=True)
+        statuses = [
+            status if status["status"] == "error" else {"index": status["index"], "status": "error", "error": str(e)}
+            for status in statuses
+        ] or [{"index": index, "status": "error", "error": str(e)} for index in range(len(documents))]
+
+    failed = sum(1 for status in statuses if status["status"] != "success")
+    if failed == 0:
+        overall_status = "success"
+    elif failed == len(statuses):
+        overall_status = "error"
+    else:
+        overall_status = "partial"
+
+    logger.info(f"Processed document batch: {len(statuses) - failed} succeeded, {failed} failed")
+    return {
+        "status": overall_status,
+        "processed": len(statuses) - failed,
+        "failed": failed,
+        "total_chunks": sum(status.get("chunks_created", 0) for status in statuses),
+        "documents": statuses,
+        "processed_at": datetime.utcnow().isoformat()
+    }
+
+
+@flushes_lexical_indexes_when_forked
 def collect_and_process(
     source: str,
     config: Dict[str, Any]
@@ -288,7 +484,6 @@ def collect_and_process(
         elif source == "notion_mcp":
             from data_collectors.notion_mcp_ingestion import NotionMCPIngestionJob
             from mcp_client import MCPClientService
-            from rag_service import RAGIngestionService
             import yaml
 
             mcp_config_path = os.getenv("MCP_SERVERS_CONFIG", "configs/mcp-servers.yaml")
@@ -306,11 +501,7 @@ def collect_and_process(
                 import asyncio
                 asyncio.run(awaitable_initialize())
 
-            rag_service = RAGIngestionService(
-                qdrant_host=os.getenv("QDRANT_HOST", "localhost"),
-                qdrant_port=int(os.getenv("QDRANT_PORT", "6333")),
-                collection_name="documents"
-            )
+            rag_service = get_rag_ingestion_service()
             job = NotionMCPIngestionJob(mcp_service, rag_service)
             import asyncio
             job_result = asyncio.run(
@@ -371,24 +562,15 @@ def collect_and_process(
                 "message": "No new documents found"
             }
 
-        from data_collectors.format_normalizer import FormatNormalizer
         from data_collectors.deduplicator import Deduplicator
-        from rag_service import RAGIngestionService
 
-        normalizer = FormatNormalizer()
+        normalizer = get_format_normalizer()
         normalized_docs = normalizer.normalize_batch(documents)
         
         deduplicator = Deduplicator(similarity_threshold=0.95)
         unique_docs, dedup_stats = deduplicator.deduplicate_batch(normalized_docs)
         
-        qdrant_host = os.getenv("QDRANT_HOST", "localhost")
-        qdrant_port = int(os.getenv("QDRANT_PORT", "6333"))
-        
-        rag_service = RAGIngestionService(
-            qdrant_host=qdrant_host,
-            qdrant_port=qdrant_port,
-            collection_name="documents"
-        )
+        rag_service = get_rag_ingestion_service()
         
         batch_result = rag_service.ingest_documents_batch(unique_docs)
         
@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+Dynamic micro-batching for the embedding service.
+
+Concurrent single-query requests each used to run their own forward pass.
+``EmbeddingBatcher`` queues incoming inputs for a few milliseconds, runs one
+batched encode for everything that arrived, and scatters the vectors back to
+the waiting callers. The queue is bounded so overload is rejected up front
+instead of growing latency without limit.
+"""
+
+import os
+import time
+import asyncio
+import logging
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Callable, Deque, Dict, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingQueueFullError(Exception):
+    """Raised when the batcher queue cannot accept more inputs."""
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token estimate used for batch sizing (~4 characters per token)."""
+    return max(1, len(text) // 4)
+
+
+@dataclass
+class BatcherConfig:
+    """Micro-batching limits."""
+    max_wait_ms: float = 5.0
+    max_batch_tokens: int = 8192
+    max_batch_size: int = 64
+    max_queue_inputs: int = 1024
+
+    @classmethod
+    def from_env(cls) -> "BatcherConfig":
+        """Load limits from EMBEDDING_BATCH_* / EMBEDDING_QUEUE_* environment variables."""
+        return cls(
+            max_wait_ms=float(os.getenv("EMBEDDING_BATCH_MAX_WAIT_MS", "5")),
+            max_batch_tokens=int(os.getenv("EMBEDDING_BATCH_MAX_TOKENS", "8192")),
+            max_batch_size=int(os.getenv("EMBEDDING_BATCH_MAX_SIZE", "64")),
+            max_queue_inputs=int(os.getenv("EMBEDDING_QUEUE_MAX_INPUTS", "1024")),
+        )
+
+
+@dataclass
+class _PendingRequest:
+    texts: List[str]
+    tokens: int
+    future: "asyncio.Future[List[Any]]"
+    enqueued_at: float
+
+
+class EmbeddingBatcher:
+    """
+    Coalesce concurrent embedding requests into batched encode calls.
+
+    Requests are never split: a batch closes when adding the next request
+    would exceed ``max_batch_tokens`` or ``max_batch_size``, or when the
+    oldest request has waited ``max_wait_ms``. A single oversized request is
+    encoded on its own.
+    """
+
+    def __init__(
+        self,
+        encode_fn: Callable[[List[str]], Sequence[Any]],
+        config: Optional[BatcherConfig] = None,
+        token_estimator: Callable[[str], int] = estimate_tokens
+    ):
+        """
+        Initialize batcher.
+
+        Args:
+            encode_fn: Blocking function encoding a list of texts into vectors
+            config: Batching limits (loaded from environment if None)
+            token_estimator: Function estimating tokens per text
+        """
+        self.encode_fn = encode_fn
+        self.config = config or BatcherConfig.from_env()
+        self.token_estimator = token_estimator
+        self._queue: Deque[_PendingRequest] = deque()
+        self._queued_inputs = 0
+        self._wakeup: Optional[asyncio.Event] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._stats = {
+            "requests": 0,
+            "inputs": 0,
+            "batches": 0,
+            "rejected": 0,
+            "max_batch_inputs": 0,
+        }
+
+    @property
+    def queued_inputs(self) -> int:
+        return self._queued_inputs
+
+    def start(self):
+        """Start the batching worker on the running event loop."""
+        if self._worker is None or self._worker.done():
+            self._wakeup = asyncio.Event()
+            self._worker = asyncio.get_running_loop().create_task(self._run())
+            logger.info(
+                "Embedding batcher started (max_wait_ms=%s, max_batch_tokens=%s, max_queue_inputs=%s)",
+                self.config.max_wait_ms,
+                self.config.max_batch_tokens,
+                self.config.max_queue_inputs,
+            )
+
+    async def stop(self):
+        """Stop the worker and fail any requests still queued."""
+        worker, self._worker = self._worker, None
+        if worker is not None:
+            worker.cancel()
+            try:
+                await worker
+            except asyncio.CancelledError:
+                pass
+        while self._queue:
+            pending = self._queue.popleft()
+            if not pending.future.done():
+                pending.future.set_exception(RuntimeError("Embedding batcher stopped"))
+        self._queued_inputs = 0
+
+    async def submit(self, texts: List[str]) -> List[Any]:
+        """
+        Queue texts for the next batch and wait for their vectors.
+
+        Args:
+            texts: Texts to embed
+
+        Returns:
+            Vectors in the same order as ``texts``
+
+        Raises:
+            EmbeddingQueueFullError: If the queue cannot take ``len(texts)`` more inputs
+        """
+        if self._queued_inputs + len(texts) > self.config.max_queue_inputs:
+            self._stats["rejected"] += 1
+            raise EmbeddingQueueFullError(
+                f"Embedding queue full ({self._queued_inputs}/{self.config.max_queue_inputs} inputs queued)"
+            )
+        self.start()
+
+        future = asyncio.get_running_loop().create_future()
+        self._queue.append(_PendingRequest(
+            texts=list(texts),
+            tokens=sum(self.token_estimator(text) for text in texts),
+            future=future,
+            enqueued_at=time.monotonic(),
+        ))
+        self._queued_inputs += len(texts)
+        self._stats["requests"] += 1
+        self._wakeup.set()
+        return await future
+
+    def _take_batch(self) -> List[_PendingRequest]:
+        batch: List[_PendingRequest] = []
+        tokens = 0
+        inputs = 0
+        while self._queue:
+            pending = self._queue[0]
+            if batch and (
+                tokens + pending.tokens > self.config.max_batch_tokens
+                or inputs + len(pending.texts) > self.config.max_batch_size
+            ):
+                break
+            self._queue.popleft()
+            self._queued_inputs -= len(pending.texts)
+            if pending.future.cancelled():
+                continue
+            batch.append(pending)
+            tokens += pending.tokens
+            inputs += len(pending.texts)
+        return batch
+
+    def _batch_is_full(self) -> bool:
+        tokens = 0
+        inputs = 0
+        for pending in self._queue:
+            tokens += pending.tokens
+            inputs += len(pending.texts)
+            if tokens >= self.config.max_batch_tokens or inputs >= self.config.max_batch_size:
+                return True
+        return False
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            if not self._queue:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            # Hold the batch open until it is full or the oldest request has waited long enough.
+            deadline = self._queue[0].enqueued_at + self.config.max_wait_ms / 1000.0
+            while not self._batch_is_full():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=remaining)
+                except asyncio.TimeoutError:
+                    break
+
+            batch = self._take_batch()
+            if not batch:
+                continue
+            texts = [text for pending in batch for text in pending.texts]
+            try:
+                vectors = await loop.run_in_executor(None, self.encode_fn, texts)
+            except Exception as exc:
+                for pending in batch:
+                    if not pending.future.done():
+                        pending.future.set_exception(exc)
+                continue
+
+            self._stats["batches"] += 1
+            self._stats["inputs"] += len(texts)
+            self._stats["max_batch_inputs"] = max(self._stats["max_batch_inputs"], len(texts))
+            offset = 0
+            for pending in batch:
+                count = len(pending.texts)
+                if not pending.future.done():
+                    pending.future.set_result(list(vectors[offset:offset + count]))
+                offset += count
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get batching statistics."""
+        batches = self._stats["batches"]
+        return {
+            **self._stats,
+            "queued_inputs": self._queued_inputs,
+            "avg_batch_inputs": round(self._stats["inputs"] / batches, 2) if batches else 0.0,
+            "max_wait_ms": self.config.max_wait_ms,
+            "max_batch_tokens": self.config.max_batch_tokens,
+            "max_queue_inputs": self.config.max_queue_inputs,
+        }
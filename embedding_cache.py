@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+Query-embedding cache shared by the RAG, memory and graph-enrichment paths.
+
+A single chat turn can embed the same query several times (memory search,
+RAG search, graph enrichment, recovery attempts). ``EmbeddingCache`` keeps
+recent query vectors in an in-process LRU bounded by bytes, optionally backed
+by Redis with a TTL so replicas share warm entries. Vectors are stored as
+packed float32 to keep the footprint predictable.
+"""
+
+import os
+import hashlib
+import logging
+import threading
+import unicodedata
+from array import array
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Approximate per-entry bookkeeping (dict slot, key string, array header).
+ENTRY_OVERHEAD_BYTES = 200
+
+
+def normalize_embedding_text(text: str) -> str:
+    """Normalize text for cache keys: Unicode NFKC and collapsed whitespace."""
+    return " ".join(unicodedata.normalize("NFKC", text or "").split())
+
+
+class EmbeddingCache:
+    """
+    Two-tier cache of embedding vectors keyed on (model, normalized text).
+
+    The first tier is a thread-safe LRU bounded by ``max_bytes``; the optional
+    second tier is Redis with a per-entry TTL. Redis errors are logged and
+    treated as misses so the cache never fails a search.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = 64 * 1024 * 1024,
+        redis_client: Optional[Any] = None,
+        redis_ttl_seconds: int = 86400,
+        redis_key_prefix: str = "embcache:",
+        metrics_exporter: Optional[Any] = None
+    ):
+        """
+        Initialize embedding cache.
+
+        Args:
+            max_bytes: Byte budget for the in-process tier (0 disables it)
+            redis_client: Redis client for the second tier (optional)
+            redis_ttl_seconds: TTL for Redis entries
+            redis_key_prefix: Prefix for Redis keys
+            metrics_exporter: Exporter receiving cache hit/miss counters (optional)
+        """
+        self.max_bytes = max_bytes
+        self.redis_client = redis_client
+        self.redis_ttl_seconds = redis_ttl_seconds
+        self.redis_key_prefix = redis_key_prefix
+        self.metrics_exporter = metrics_exporter
+        self._entries: "OrderedDict[str, array]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "redis_hits": 0, "misses": 0, "evictions": 0, "redis_errors": 0}
+
+    @classmethod
+    def from_env(cls, metrics_exporter: Optional[Any] = None) -> "EmbeddingCache":
+        """
+        Build a cache from EMBEDDING_CACHE_* environment variables.
+
+        ``EMBEDDING_CACHE_REDIS_URL`` enables the Redis tier; it is skipped with
+        a warning when the ``redis`` package is unavailable.
+        """
+        redis_client = None
+        redis_url = os.getenv("EMBEDDING_CACHE_REDIS_URL", "").strip()
+        if redis_url:
+            try:
+                import redis
+                redis_client = redis.Redis.from_url(redis_url)
+            except ImportError:
+                logger.warning("EMBEDDING_CACHE_REDIS_URL is set but the redis package is not installed")
+        return cls(
+            max_bytes=int(os.getenv("EMBEDDING_CACHE_MAX_BYTES", str(64 * 1024 * 1024))),
+            redis_client=redis_client,
+            redis_ttl_seconds=int(os.getenv("EMBEDDING_CACHE_REDIS_TTL_SECONDS", "86400")),
+            metrics_exporter=metrics_exporter,
+        )
+
+    @staticmethod
+    def make_key(model: str, text: str) -> str:
+        """Build the cache key for a model and text."""
+        normalized = normalize_embedding_text(text)
+        return hashlib.sha256(f"{model}\x00{normalized}".encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _entry_size(key: str, vector: array) -> int:
+        return len(key) + vector.itemsize * len(vector) + ENTRY_OVERHEAD_BYTES
+
+    def _record(self, outcome: str, tier: str = "embedding"):
+        self._stats[outcome] += 1
+        if not self.metrics_exporter:
+            return
+        if outcome == "misses":
+            self.metrics_exporter.record_cache_miss(tier)
+        else:
+            self.metrics_exporter.record_cache_hit(tier)
+
+    def _store_local(self, key: str, vector: array):
+        size = self._entry_size(key, vector)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= self._entry_size(key, previous)
+            self._entries[key] = vector
+            self._bytes += size
+            while self._bytes > self.max_bytes and self._entries:
+                evicted_key, evicted = self._entries.popitem(last=False)
+                self._bytes -= self._entry_size(evicted_key, evicted)
+                self._stats["evictions"] += 1
+
+    def get(self, model: str, text: str) -> Optional[List[float]]:
+        """
+        Look up a cached embedding.
+
+        Args:
+            model: Embedding model name
+            text: Text that was embedded
+
+        Returns:
+            Embedding vector, or None on a miss
+        """
+        key = self.make_key(model, text)
+        with self._lock:
+            vector = self._entries.get(key)
+            if vector is not None:
+                self._entries.move_to_end(key)
+        if vector is not None:
+            self._record("hits")
+            return vector.tolist()
+
+        if self.redis_client is not None:
+            try:
+                payload = self.redis_client.get(self.redis_key_prefix + key)
+            except Exception as e:
+                self._stats["redis_errors"] += 1
+                logger.warning(f"Embedding cache Redis lookup failed: {e}")
+                payload = None
+            if payload:
+                vector = array("f")
+                vector.frombytes(payload)
+                self._store_local(key, vector)
+                self._record("redis_hits", tier="embedding_redis")
+                return vector.tolist()
+
+        self._record("misses")
+        return None
+
+    def put(self, model: str, text: str, embedding: List[float]):
+        """Store an embedding in both tiers."""
+        key = self.make_key(model, text)
+        vector = array("f", embedding)
+        self._store_local(key, vector)
+        if self.redis_client is not None:
+            try:
+                self.redis_client.setex(self.redis_key_prefix + key, self.redis_ttl_seconds, vector.tobytes())
+            except Exception as e:
+                self._stats["redis_errors"] += 1
+                logger.warning(f"Embedding cache Redis write failed: {e}")
+
+    def get_or_compute(self, model: str, text: str, compute: Callable[[str], List[float]]) -> List[float]:
+        """
+        Return the cached embedding for ``text`` or compute and cache it.
+
+        Args:
+            model: Embedding model name
+            text: Text to embed
+            compute: Embedding function called with ``text`` on a miss
+
+        Returns:
+            Embedding vector
+        """
+        cached = self.get(model, text)
+        if cached is not None:
+            return cached
+        embedding = compute(text)
+        self.put(model, text, embedding)
+        return embedding
+
+    def clear(self):
+        """Drop all in-process entries."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics."""
+        lookups = self._stats["hits"] + self._stats["redis_hits"] + self._stats["misses"]
+        with self._lock:
+            entries, used_bytes = len(self._entries), self._bytes
+        return {
+            **self._stats,
+            "hit_rate": round((self._stats["hits"] + self._stats["redis_hits"]) / lookups, 4) if lookups else 0.0,
+            "entries": entries,
+            "bytes": used_bytes,
+            "max_bytes": self.max_bytes,
+            "redis_enabled": self.redis_client is not None,
+        }
+
+
+_embedding_cache: Optional[EmbeddingCache] = None
+
+
+def get_embedding_cache() -> EmbeddingCache:
+    """
+    Get the process-wide embedding cache, creating it from the environment.
+
+    Services that are not handed a cache explicitly share this instance.
+    """
+    global _embedding_cache
+    if _embedding_cache is None:
+        _embedding_cache = EmbeddingCache.from_env()
+    return _embedding_cache
+
+
+def set_embedding_cache(cache: EmbeddingCache):
+    """Install ``cache`` as the process-wide embedding cache."""
+    global _embedding_cache
+    _embedding_cache = cache
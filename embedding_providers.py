@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Embedding providers shared by the RAG and memory services.
+
+``NomicEmbedder`` loads a SentenceTransformer model in-process and
+``HTTPEmbeddingServiceClient`` calls the embedding service. Kept apart from
+rag_service so the memory service can build an embedder without importing
+the RAG stack (Qdrant storage, rerankers, chunking, caches).
+sentence-transformers is imported only when a local model is loaded, so the
+service provider does not need it installed.
+"""
+
+import os
+import logging
+from typing import Any, Dict, List
+
+import httpx
+import numpy as np
+
+from embedding_wire import (
+    DTYPE_HEADER,
+    OCTET_STREAM,
+    SHAPE_HEADER,
+    decode_base64_vector,
+    decode_matrix,
+)
+
+logger = logging.getLogger(__name__)
+
+# Embedding service response format: json (OpenAI default), base64 or binary (application/octet-stream)
+RAG_EMBEDDING_WIRE_FORMAT = os.getenv("RAG_EMBEDDING_WIRE_FORMAT", "json").strip().lower()
+RAG_EMBEDDING_WIRE_DTYPE = os.getenv("RAG_EMBEDDING_WIRE_DTYPE", "float32").strip().lower()
+
+
+class NomicEmbedder:
+    """Handles embeddings using Nomic Embed v1.5 model."""
+    
+    def __init__(self, model_name: str = "nomic-ai/nomic-embed-text-v1.5"):
+        from sentence_transformers import SentenceTransformer
+
+        logger.info(f"Loading embedding model: {model_name}")
+        self.model = SentenceTransformer(
+            model_name,
+            trust_remote_code=True
+        )
+        self.dimension = self.model.get_sentence_embedding_dimension()
+        logger.info(f"Embedding model loaded. Dimension: {self.dimension}")
+    
+    def embed_text(self, text: str) -> List[float]:
+        """Generate embedding for a single text."""
+        embedding = self.model.encode(text, convert_to_numpy=True)
+        return embedding.tolist()
+    
+    def embed_batch(self, texts: List[str]) -> List[List[float]]:
+        """Generate embeddings for a batch of texts."""
+        embeddings = self.model.encode(texts, convert_to_numpy=True, show_progress_bar=False)
+        return embeddings.tolist()
+
+
+class HTTPEmbeddingServiceClient:
+    """Embedding client that delegates vectorization to a local HTTP service."""
+
+    WIRE_FORMATS = ("json", "base64", "binary")
+
+    def __init__(
+        self,
+        service_url: str,
+        model_name: str = "nomic-ai/nomic-embed-text-v1.5",
+        timeout_seconds: float = 60.0,
+        wire_format: str = RAG_EMBEDDING_WIRE_FORMAT,
+        wire_dtype: str = RAG_EMBEDDING_WIRE_DTYPE,
+    ):
+        if wire_format not in self.WIRE_FORMATS:
+            raise ValueError(f"Unsupported embedding wire format '{wire_format}' (expected one of {self.WIRE_FORMATS})")
+        self.service_url = service_url.rstrip("/")
+        self.model_name = model_name
+        self.timeout_seconds = timeout_seconds
+        self.wire_format = wire_format
+        self.wire_dtype = wire_dtype
+        self.dimension = self._fetch_dimension()
+        logger.info(
+            "Connected to embedding service at %s with model %s (dimension=%s, wire_format=%s)",
+            self.service_url,
+            self.model_name,
+            self.dimension,
+            self.wire_format,
+        )
+
+    def _fetch_dimension(self) -> int:
+        """Fetch embedding dimension from the service health endpoint."""
+        try:
+            response = httpx.get(
+                f"{self.service_url}/health",
+                timeout=self.timeout_seconds,
+            )
+            response.raise_for_status()
+            payload = response.json()
+            dimension = payload.get("dimension")
+            if not isinstance(dimension, int) or dimension <= 0:
+                raise ValueError("Embedding service returned invalid dimension")
+            return dimension
+        except Exception as exc:
+            logger.error("Failed to fetch embedding dimension from %s: %s", self.service_url, exc)
+            raise
+
+    def embed_text(self, text: str) -> List[float]:
+        """Generate embedding for a single text via HTTP service."""
+        embeddings = self.embed_batch([text])
+        return embeddings[0]
+
+    def _request_embeddings(self, texts: List[str]) -> httpx.Response:
+        body: Dict[str, Any] = {
+            "model": self.model_name,
+            "input": texts,
+        }
+        headers = {}
+        if self.wire_format == "base64":
+            body["encoding_format"] = "base64"
+            body["dtype"] = self.wire_dtype
+        elif self.wire_format == "binary":
+            body["dtype"] = self.wire_dtype
+            headers["Accept"] = OCTET_STREAM
+
+        response = httpx.post(
+            f"{self.service_url}/v1/embeddings",
+            json=body,
+            headers=headers or None,
+            timeout=self.timeout_seconds,
+        )
+        response.raise_for_status()
+        return response
+
+    def embed_batch_array(self, texts: List[str]) -> np.ndarray:
+        """
+        Generate embeddings as a (len(texts), dimension) NumPy array.
+
+        Binary responses are viewed in place over the response body; base64
+        responses are decoded per row without going through Python floats.
+        """
+        if not texts:
+            return np.empty((0, self.dimension), dtype=np.float32)
+
+        response = self._request_embeddings(texts)
+        if response.headers.get("content-type", "").startswith(OCTET_STREAM):
+            return decode_matrix(
+                response.content,
+                response.headers.get(SHAPE_HEADER),
+                response.headers.get(DTYPE_HEADER, self.wire_dtype),
+            )
+
+        # JSON response (default format, or a server without binary support)
+        data = response.json().get("data", [])
+        rows = [
+            decode_base64_vector(item["embedding"], self.wire_dtype)
+            if isinstance(item["embedding"], str)
+            else item["embedding"]
+            for item in data
+        ]
+        return np.asarray(rows, dtype=np.float32)
+
+    def embed_batch(self, texts: List[str]) -> List[List[float]]:
+        """Generate embeddings for a batch of texts via HTTP service."""
+        if not texts:
+            return []
+
+        if self.wire_format == "json":
+            response = self._request_embeddings(texts)
+            payload = response.json()
+            data = payload.get("data", [])
+            return [item["embedding"] for item in data]
+
+        return self.embed_batch_array(texts).astype(np.float32, copy=False).tolist()
+
+
+def create_embedder(provider: str, model_name: str, service_url: str) -> Any:
+    """
+    Build a long-lived embedder for the configured provider.
+
+    Args:
+        provider: ``service`` for the HTTP embedding service, anything else for an in-process model
+        model_name: Embedding model name
+        service_url: Embedding service base URL (``service`` provider only)
+
+    Returns:
+        Embedder exposing ``embed_text``, ``embed_batch`` and ``dimension``
+    """
+    if provider.strip().lower() == "service":
+        if not service_url:
+            raise ValueError("The service embedding provider needs an embedding service URL")
+        logger.info("Using HTTP embedding service provider")
+        return HTTPEmbeddingServiceClient(service_url=service_url, model_name=model_name)
+    logger.info("Using in-process embedding provider")
+    return NomicEmbedder(model_name=model_name)
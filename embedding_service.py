@@ -1,22 +1,33 @@
 #!/usr/bin/env python3
 """Local embedding service exposing OpenAI-compatible /v1/embeddings endpoint."""
 
+import asyncio
 import logging
 import os
 import time
-from typing import List, Union
+from typing import List, Literal, Union
 
 import uvicorn
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request, Response
 from pydantic import BaseModel, Field
 from sentence_transformers import SentenceTransformer
 
+from embedding_batcher import BatcherConfig, EmbeddingBatcher, EmbeddingQueueFullError
+from embedding_wire import (
+    MODEL_HEADER,
+    OCTET_STREAM,
+    PROMPT_TOKENS_HEADER,
+    encode_base64_vector,
+    encode_matrix,
+)
+
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
 EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "nomic-ai/nomic-embed-text-v1.5")
 EMBEDDING_SERVICE_HOST = os.getenv("EMBEDDING_SERVICE_HOST", "0.0.0.0")
 EMBEDDING_SERVICE_PORT = int(os.getenv("EMBEDDING_SERVICE_PORT", "8003"))
+EMBEDDING_BATCHING_ENABLED = os.getenv("EMBEDDING_BATCHING_ENABLED", "true").strip().lower() in ("1", "true", "yes")
 
 app = FastAPI(
     title="Local Embedding Service",
@@ -26,17 +37,26 @@ app = FastAPI(
 
 _model = None
 _model_dimension = None
+_batcher = None
 
 
 class EmbeddingRequest(BaseModel):
     model: str = Field(default=EMBEDDING_MODEL, description="Embedding model name")
     input: Union[str, List[str]] = Field(..., description="Text input or list of texts")
+    encoding_format: Literal["float", "base64"] = Field(
+        default="float",
+        description="'float' for JSON number lists, 'base64' for packed little-endian vectors",
+    )
+    dtype: Literal["float32", "float16"] = Field(
+        default="float32",
+        description="Component type for base64 and application/octet-stream responses",
+    )
 
 
 class EmbeddingData(BaseModel):
     object: str = "embedding"
     index: int
-    embedding: List[float]
+    embedding: Union[List[float], str]
 
 
 class EmbeddingUsage(BaseModel):
@@ -64,9 +84,28 @@ def _load_model() -> None:
         logger.info("Embedding model loaded with dimension: %s", _model_dimension)
 
 
+def _encode(texts: List[str]):
+    return _model.encode(texts, convert_to_numpy=True, show_progress_bar=False)
+
+
+def _get_batcher() -> EmbeddingBatcher:
+    global _batcher
+    if _batcher is None:
+        _batcher = EmbeddingBatcher(_encode, config=BatcherConfig.from_env(), token_estimator=_estimate_tokens)
+    return _batcher
+
+
 @app.on_event("startup")
-def startup_event() -> None:
+async def startup_event() -> None:
     _load_model()
+    if EMBEDDING_BATCHING_ENABLED:
+        _get_batcher().start()
+
+
+@app.on_event("shutdown")
+async def shutdown_event() -> None:
+    if _batcher is not None:
+        await _batcher.stop()
 
 
 @app.get("/health")
@@ -75,11 +114,12 @@ def health() -> dict:
         "status": "healthy",
         "model": EMBEDDING_MODEL,
         "dimension": _model_dimension,
+        "batching": _batcher.get_stats() if _batcher is not None else {"enabled": False},
     }
 
 
 @app.post("/v1/embeddings", response_model=EmbeddingResponse)
-def create_embeddings(request: EmbeddingRequest) -> EmbeddingResponse:
+async def create_embeddings(request: EmbeddingRequest, raw_request: Request):
     try:
         _load_model()
         inputs = request.input if isinstance(request.input, list) else [request.input]
@@ -87,26 +127,44 @@ def create_embeddings(request: EmbeddingRequest) -> EmbeddingResponse:
             raise HTTPException(status_code=400, detail="Input list cannot be empty")
 
         started = time.time()
-        vectors = _model.encode(inputs, convert_to_numpy=True, show_progress_bar=False)
+        if EMBEDDING_BATCHING_ENABLED:
+            vectors = await _get_batcher().submit(inputs)
+        else:
+            vectors = await asyncio.get_running_loop().run_in_executor(None, _encode, inputs)
         elapsed_ms = (time.time() - started) * 1000
 
-        data = [
-            EmbeddingData(index=i, embedding=vector.tolist())
-            for i, vector in enumerate(vectors)
-        ]
         prompt_tokens = sum(_estimate_tokens(text) for text in inputs)
-
         logger.info(
             "Generated %s embeddings in %.2f ms",
-            len(data),
+            len(vectors),
             elapsed_ms,
         )
 
+        if OCTET_STREAM in raw_request.headers.get("accept", ""):
+            body, headers = encode_matrix(vectors, dtype=request.dtype)
+            headers[MODEL_HEADER] = request.model
+            headers[PROMPT_TOKENS_HEADER] = str(prompt_tokens)
+            return Response(content=body, media_type=OCTET_STREAM, headers=headers)
+
+        if request.encoding_format == "base64":
+            data = [
+                EmbeddingData(index=i, embedding=encode_base64_vector(vector, dtype=request.dtype))
+                for i, vector in enumerate(vectors)
+            ]
+        else:
+            data = [
+                EmbeddingData(index=i, embedding=vector.tolist())
+                for i, vector in enumerate(vectors)
+            ]
+
         return EmbeddingResponse(
             data=data,
             model=request.model,
             usage=EmbeddingUsage(prompt_tokens=prompt_tokens, total_tokens=prompt_tokens),
         )
+    except EmbeddingQueueFullError as exc:
+        logger.warning("Rejecting embedding request: %s", exc)
+        raise HTTPException(status_code=429, detail=str(exc), headers={"Retry-After": "1"})
     except HTTPException:
         raise
     except Exception as exc:
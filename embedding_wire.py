@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Compact wire formats for embedding vectors.
+
+The OpenAI-compatible JSON response spells every component out as decimal
+text, which dominates serialization cost for ingestion-sized batches. These
+helpers implement the two negotiated alternatives served by
+embedding_service.py and consumed by ``HTTPEmbeddingServiceClient``:
+
+- ``encoding_format="base64"``: each ``embedding`` is a base64 string of
+  little-endian float32 (OpenAI-compatible) or float16 (``dtype`` extension).
+- ``Accept: application/octet-stream``: the body is one contiguous
+  little-endian (rows, dimension) matrix described by ``X-Embedding-*``
+  headers.
+"""
+
+import base64
+from typing import Any, Dict, Sequence, Tuple
+
+import numpy as np
+
+OCTET_STREAM = "application/octet-stream"
+SHAPE_HEADER = "X-Embedding-Shape"
+DTYPE_HEADER = "X-Embedding-Dtype"
+MODEL_HEADER = "X-Embedding-Model"
+PROMPT_TOKENS_HEADER = "X-Embedding-Prompt-Tokens"
+
+SUPPORTED_DTYPES = ("float32", "float16")
+
+
+def wire_dtype(name: str) -> np.dtype:
+    """Resolve a wire dtype name to an explicit little-endian NumPy dtype."""
+    if name not in SUPPORTED_DTYPES:
+        raise ValueError(f"Unsupported embedding dtype '{name}' (expected one of {SUPPORTED_DTYPES})")
+    return np.dtype(name).newbyteorder("<")
+
+
+def encode_matrix(vectors: Sequence[Any], dtype: str = "float32") -> Tuple[bytes, Dict[str, str]]:
+    """
+    Pack vectors into a contiguous little-endian matrix.
+
+    Args:
+        vectors: Equal-length vectors (NumPy rows or lists)
+        dtype: Wire dtype name
+
+    Returns:
+        Tuple of (body bytes, shape/dtype headers)
+    """
+    matrix = np.ascontiguousarray(np.stack([np.asarray(v) for v in vectors]), dtype=wire_dtype(dtype))
+    headers = {
+        SHAPE_HEADER: f"{matrix.shape[0]},{matrix.shape[1]}",
+        DTYPE_HEADER: dtype,
+    }
+    return matrix.tobytes(), headers
+
+
+def decode_matrix(buffer: bytes, shape_header: str, dtype: str = "float32") -> np.ndarray:
+    """
+    View a packed matrix as a NumPy array without copying.
+
+    Args:
+        buffer: Response body
+        shape_header: ``rows,dimension`` from ``X-Embedding-Shape``
+        dtype: Wire dtype name from ``X-Embedding-Dtype``
+
+    Returns:
+        Read-only (rows, dimension) array backed by ``buffer``
+    """
+    try:
+        rows, dimension = (int(part) for part in shape_header.split(","))
+    except (AttributeError, ValueError):
+        raise ValueError(f"Invalid {SHAPE_HEADER} header: {shape_header!r}")
+    array = np.frombuffer(buffer, dtype=wire_dtype(dtype))
+    if array.size != rows * dimension:
+        raise ValueError(f"Embedding payload has {array.size} values, expected {rows}x{dimension}")
+    return array.reshape(rows, dimension)
+
+
+def encode_base64_vector(vector: Any, dtype: str = "float32") -> str:
+    """Encode one vector as base64 little-endian bytes."""
+    return base64.b64encode(np.asarray(vector, dtype=wire_dtype(dtype)).tobytes()).decode("ascii")
+
+
+def decode_base64_vector(encoded: str, dtype: str = "float32") -> np.ndarray:
+    """Decode one base64 vector into a NumPy array backed by the decoded bytes."""
+    return np.frombuffer(base64.b64decode(encoded), dtype=wire_dtype(dtype))
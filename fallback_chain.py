@@ -10,10 +10,10 @@ import hashlib
 import json
 from typing import Optional, Dict, Any, List, Callable
 from datetime import datetime
-import httpx
 import redis
 
 from circuit_breaker import CircuitBreaker, CircuitBreakerConfig, CircuitBreakerError
+from http_client_pool import HTTPClientPool
 
 logger = logging.getLogger(__name__)
 
@@ -33,7 +33,8 @@ class FallbackChain:
         ollama_cpu_endpoint: Optional[str] = None,
         redis_client: Optional[redis.Redis] = None,
         degraded_message: str = "Service temporarily unavailable. Please try again later.",
-        circuit_breaker_config: Optional[CircuitBreakerConfig] = None
+        circuit_breaker_config: Optional[CircuitBreakerConfig] = None,
+        http_pool: Optional[HTTPClientPool] = None
     ):
         """
         Initialize fallback chain.
@@ -44,11 +45,14 @@ class FallbackChain:
             redis_client: Redis client for caching (optional)
             degraded_message: Message to return when all tiers fail
             circuit_breaker_config: Circuit breaker configuration
+            http_pool: Shared pooled HTTP clients for the inference tiers (created if None)
         """
         self.max_gpu_endpoint = max_gpu_endpoint
         self.ollama_cpu_endpoint = ollama_cpu_endpoint
         self.redis_client = redis_client
         self.degraded_message = degraded_message
+        self.http_pool = http_pool or HTTPClientPool("fallback_chain")
+        self.http_pool.register(max_gpu_endpoint, ollama_cpu_endpoint)
         
         # Circuit breaker configuration
         cb_config = circuit_breaker_config or CircuitBreakerConfig(
@@ -102,14 +106,14 @@ class FallbackChain:
         """Try MAX GPU inference."""
         async def call_max_gpu():
             url = f"{self.max_gpu_endpoint}/generate"
-            async with httpx.AsyncClient() as client:
-                response = await client.post(url, json={
-                    "prompt": prompt,
-                    **params
-                })
-                response.raise_for_status()
-                result = response.json()
-                return result.get("text", "").strip()
+            client = self.http_pool.get_client(self.max_gpu_endpoint)
+            response = await client.post(url, json={
+                "prompt": prompt,
+                **params
+            })
+            response.raise_for_status()
+            result = response.json()
+            return result.get("text", "").strip()
         
         try:
             text = await self.max_gpu_breaker.call(call_max_gpu)
@@ -133,20 +137,20 @@ class FallbackChain:
         async def call_ollama():
             url = f"{self.ollama_cpu_endpoint}/api/generate"
             # Convert to Ollama API format
-            async with httpx.AsyncClient() as client:
-                response = await client.post(url, json={
-                    "model": "llama3.2",  # Default model
-                    "prompt": prompt,
-                    "stream": False,
-                    "options": {
-                        "num_predict": params.get("max_tokens", 2048),
-                        "temperature": params.get("temperature", 0.7),
-                        "top_p": params.get("top_p", 0.9)
-                    }
-                })
-                response.raise_for_status()
-                result = response.json()
-                return result.get("response", "").strip()
+            client = self.http_pool.get_client(self.ollama_cpu_endpoint)
+            response = await client.post(url, json={
+                "model": "llama3.2",  # Default model
+                "prompt": prompt,
+                "stream": False,
+                "options": {
+                    "num_predict": params.get("max_tokens", 2048),
+                    "temperature": params.get("temperature", 0.7),
+                    "top_p": params.get("top_p", 0.9)
+                }
+            })
+            response.raise_for_status()
+            result = response.json()
+            return result.get("response", "").strip()
         
         try:
             text = await self.ollama_cpu_breaker.call(call_ollama)
@@ -299,8 +303,14 @@ class FallbackChain:
         if self.ollama_cpu_breaker:
             stats["ollama_cpu_breaker"] = self.ollama_cpu_breaker.get_stats()
         
+        stats["http_pool"] = self.http_pool.get_stats()
+        
         return stats
     
+    async def aclose(self):
+        """Close pooled HTTP clients."""
+        await self.http_pool.aclose()
+    
     def reset_stats(self):
         """Reset statistics."""
         self.stats = {k: 0 for k in self.stats.keys()}
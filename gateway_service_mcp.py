@@ -544,8 +544,8 @@ async def health_check():
     # Check Qdrant health
     qdrant_status = "unknown"
     try:
-        from qdrant_client import QdrantClient
-        client = QdrantClient(host=QDRANT_HOST, port=QDRANT_PORT, timeout=5.0)
+        from qdrant_client_factory import create_qdrant_client
+        client = create_qdrant_client(host=QDRANT_HOST, port=QDRANT_PORT, timeout_seconds=5)
         collections = client.get_collections()
         qdrant_status = "healthy"
     except Exception as e:
@@ -21,6 +21,8 @@ from neo4j.exceptions import ServiceUnavailable, Neo4jError
 import spacy
 from sentence_transformers import SentenceTransformer
 
+from maintained_stats import MaintainedStats
+
 logger = logging.getLogger(__name__)
 
 
@@ -47,6 +49,8 @@ class GraphService:
     
     # Co-occurrence window size (in sentences)
     COOCCURRENCE_WINDOW = 3
+
+    stats: Optional[MaintainedStats] = None
     
     def __init__(
         self,
@@ -69,6 +73,7 @@ class GraphService:
         self.neo4j_uri = neo4j_uri
         self.neo4j_user = neo4j_user
         self.neo4j_password = neo4j_password
+        self.stats = MaintainedStats("graph", self._count_graph_stats)
         
         # Initialize Neo4j driver
         logger.info(f"Connecting to Neo4j at {neo4j_uri}...")
@@ -409,13 +414,14 @@ class GraphService:
                     RETURN n
                     """
                     
-                    session.run(
+                    summary = session.run(
                         query,
                         name=entity["text"],
                         embedding=embedding,
                         label=entity["label"],
                         doc_id=document_id
-                    )
+                    ).consume()
+                    self._count_graph_writes(summary, node_type=entity["type"])
                     added += 1
                     
                 except Neo4jError as e:
@@ -464,14 +470,15 @@ class GraphService:
                     RETURN r
                     """
                     
-                    session.run(
+                    summary = session.run(
                         query,
                         source_name=rel["source"],
                         target_name=rel["target"],
                         method=rel["method"],
                         confidence=rel["confidence"],
                         doc_id=document_id
-                    )
+                    ).consume()
+                    self._count_graph_writes(summary, relation_type=rel["type"])
                     added += 1
                     
                 except Neo4jError as e:
@@ -560,12 +567,13 @@ class GraphService:
                 d.metadata = $metadata
             RETURN d
             """
-            session.run(
+            summary = session.run(
                 query,
                 doc_id=document_id,
                 title=metadata.get("title", document_id),
                 metadata=metadata
-            )
+            ).consume()
+            self._count_graph_writes(summary, node_type="Document")
             
             # Link document to entities
             for entity in entities:
@@ -576,11 +584,12 @@ class GraphService:
                 SET r.created_at = datetime()
                 """
                 try:
-                    session.run(
+                    summary = session.run(
                         link_query,
                         doc_id=document_id,
                         entity_name=entity["text"]
-                    )
+                    ).consume()
+                    self._count_graph_writes(summary, relation_type="MENTIONS")
                 except Neo4jError as e:
                     logger.debug(f"Error linking document to entity: {e}")
     
@@ -603,6 +612,7 @@ class GraphService:
             try:
                 result = session.run(query, parameters or {})
                 records = [dict(record) for record in result]
+                self._count_graph_writes(result.consume())
                 logger.info(f"Query returned {len(records)} records")
                 return records
             except Neo4jError as e:
@@ -742,8 +752,39 @@ class GraphService:
                 logger.error(f"Error searching entities: {e}")
                 raise
     
+    def _count_graph_writes(
+        self,
+        summary: Any,
+        node_type: Optional[str] = None,
+        relation_type: Optional[str] = None
+    ):
+        """Apply the node/relationship deltas of a write to the maintained stats."""
+        if self.stats is None:
+            return
+        counters = summary.counters
+        nodes = counters.nodes_created - counters.nodes_deleted
+        relationships = counters.relationships_created - counters.relationships_deleted
+        self.stats.increment("total_nodes", delta=nodes)
+        self.stats.increment("total_relationships", delta=relationships)
+        if node_type in self.NODE_TYPES:
+            self.stats.increment("nodes_by_type", node_type, delta=nodes)
+        if relation_type in self.RELATION_TYPES:
+            self.stats.increment("relationships_by_type", relation_type, delta=relationships)
+        if node_type is None and relation_type is None and (nodes or relationships):
+            # Arbitrary Cypher: the per-type breakdown is unknown until reconciled
+            self.stats.mark_stale()
+
     def get_graph_stats(self) -> Dict[str, Any]:
-        """Get graph statistics."""
+        """
+        Get graph statistics.
+
+        Served from counters maintained on writes (see ``MaintainedStats``);
+        only the very first call counts synchronously.
+        """
+        return self.stats.get()
+
+    def _count_graph_stats(self) -> Dict[str, Any]:
+        """Count nodes and relationships exactly (used to reconcile the maintained stats)."""
         with self.driver.session() as session:
             # Count nodes by type
             node_counts = {}
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Shared, lifecycle-managed async HTTP clients for model backends.
+
+Keeps one pooled httpx.AsyncClient per endpoint so generations, retries and
+health probes reuse keep-alive connections instead of opening a new TCP (and
+TLS) connection on every call.
+"""
+
+import os
+import logging
+from dataclasses import dataclass
+from typing import Dict, Any, Optional
+
+import httpx
+
+from metrics_exporter import MetricsExporter
+
+logger = logging.getLogger(__name__)
+
+
+def _env_bool(name: str, default: str) -> bool:
+    return os.getenv(name, default).strip().lower() in ("1", "true", "yes")
+
+
+@dataclass
+class HTTPPoolConfig:
+    """Connection pool settings applied to every client in a pool."""
+    max_connections: int = 100
+    max_keepalive_connections: int = 20
+    keepalive_expiry_seconds: float = 30.0
+    http2: bool = False
+    connect_timeout_seconds: float = 5.0
+    request_timeout_seconds: float = 5.0
+
+    @classmethod
+    def from_env(cls) -> "HTTPPoolConfig":
+        """Load pool settings from HTTP_POOL_* environment variables."""
+        return cls(
+            max_connections=int(os.getenv("HTTP_POOL_MAX_CONNECTIONS", "100")),
+            max_keepalive_connections=int(os.getenv("HTTP_POOL_MAX_KEEPALIVE_CONNECTIONS", "20")),
+            keepalive_expiry_seconds=float(os.getenv("HTTP_POOL_KEEPALIVE_EXPIRY_SECONDS", "30")),
+            http2=_env_bool("HTTP_POOL_HTTP2", "false"),
+            connect_timeout_seconds=float(os.getenv("HTTP_POOL_CONNECT_TIMEOUT_SECONDS", "5")),
+            request_timeout_seconds=float(os.getenv("HTTP_POOL_REQUEST_TIMEOUT_SECONDS", "5")),
+        )
+
+
+class HTTPClientPool:
+    """
+    Registry of pooled async HTTP clients keyed by endpoint.
+
+    Clients are created on first use (or eagerly via ``register``) and live
+    until ``aclose`` is called, typically from the owning service's shutdown
+    hook. Callers must not close clients obtained from the pool.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        config: Optional[HTTPPoolConfig] = None,
+        metrics_exporter: Optional[MetricsExporter] = None
+    ):
+        """
+        Initialize client pool.
+
+        Args:
+            name: Pool name used in logs and metric labels
+            config: Pool settings (loaded from environment if None)
+            metrics_exporter: Exporter receiving pool metrics (optional)
+        """
+        self.name = name
+        self.config = config or HTTPPoolConfig.from_env()
+        self.metrics_exporter = metrics_exporter
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        self._request_counts: Dict[str, int] = {}
+
+    @staticmethod
+    def _endpoint_key(endpoint: str) -> str:
+        return endpoint.rstrip('/')
+
+    def _create_client(self, endpoint: str) -> httpx.AsyncClient:
+        limits = httpx.Limits(
+            max_connections=self.config.max_connections,
+            max_keepalive_connections=self.config.max_keepalive_connections,
+            keepalive_expiry=self.config.keepalive_expiry_seconds
+        )
+        timeout = httpx.Timeout(
+            self.config.request_timeout_seconds,
+            connect=self.config.connect_timeout_seconds
+        )
+
+        async def on_request(request: httpx.Request):
+            self._request_counts[endpoint] = self._request_counts.get(endpoint, 0) + 1
+            if self.metrics_exporter:
+                self.metrics_exporter.record_http_pool_request(self.name, endpoint)
+                self.publish_metrics()
+
+        client_kwargs = {
+            'limits': limits,
+            'timeout': timeout,
+            'event_hooks': {'request': [on_request]},
+        }
+        if self.config.http2:
+            try:
+                return httpx.AsyncClient(http2=True, **client_kwargs)
+            except ImportError:
+                logger.warning(
+                    f"HTTP/2 requested for pool '{self.name}' but the 'h2' package is not installed; "
+                    f"using HTTP/1.1 for {endpoint}"
+                )
+        return httpx.AsyncClient(**client_kwargs)
+
+    def get_client(self, endpoint: str) -> httpx.AsyncClient:
+        """
+        Get the pooled client for an endpoint, creating it on first use.
+
+        Args:
+            endpoint: Base URL of the backend (e.g. ``http://max-serve-llama:8080``)
+
+        Returns:
+            Shared httpx.AsyncClient for the endpoint
+        """
+        key = self._endpoint_key(endpoint)
+        client = self._clients.get(key)
+        if client is None or client.is_closed:
+            client = self._create_client(key)
+            self._clients[key] = client
+            logger.info(f"HTTP client pool '{self.name}': opened client for {key}")
+            self.publish_metrics()
+        return client
+
+    def register(self, *endpoints: str):
+        """Eagerly create pooled clients for known endpoints."""
+        for endpoint in endpoints:
+            if endpoint:
+                self.get_client(endpoint)
+
+    @staticmethod
+    def _connection_counts(client: httpx.AsyncClient) -> Dict[str, int]:
+        """Count active and idle connections from the client's transport pool."""
+        counts = {'active': 0, 'idle': 0}
+        transport = getattr(client, '_transport', None)
+        connections = getattr(getattr(transport, '_pool', None), 'connections', None) or []
+        for connection in connections:
+            try:
+                state = 'idle' if connection.is_idle() else 'active'
+            except Exception:
+                continue
+            counts[state] += 1
+        return counts
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get pool statistics."""
+        endpoints = {}
+        for endpoint, client in self._clients.items():
+            if client.is_closed:
+                continue
+            endpoints[endpoint] = {
+                **self._connection_counts(client),
+                'requests': self._request_counts.get(endpoint, 0),
+            }
+
+        return {
+            'pool': self.name,
+            'clients': len(endpoints),
+            'http2': self.config.http2,
+            'max_connections': self.config.max_connections,
+            'max_keepalive_connections': self.config.max_keepalive_connections,
+            'keepalive_expiry_seconds': self.config.keepalive_expiry_seconds,
+            'endpoints': endpoints,
+        }
+
+    def publish_metrics(self):
+        """Push current pool gauges to the metrics exporter."""
+        if not self.metrics_exporter:
+            return
+        stats = self.get_stats()
+        self.metrics_exporter.update_http_pool_stats(
+            pool=self.name,
+            clients=stats['clients'],
+            connections={
+                endpoint: {'active': info['active'], 'idle': info['idle']}
+                for endpoint, info in stats['endpoints'].items()
+            }
+        )
+
+    async def aclose(self):
+        """Close every pooled client."""
+        clients, self._clients = self._clients, {}
+        for endpoint, client in clients.items():
+            try:
+                await client.aclose()
+            except Exception as e:
+                logger.warning(f"HTTP client pool '{self.name}': failed to close client for {endpoint}: {e}")
+        if self.metrics_exporter:
+            self.metrics_exporter.update_http_pool_stats(
+                pool=self.name,
+                clients=0,
+                connections={endpoint: {'active': 0, 'idle': 0} for endpoint in clients}
+            )
+        if clients:
+            logger.info(f"HTTP client pool '{self.name}': closed {len(clients)} clients")
@@ -3,32 +3,71 @@
 from __future__ import annotations
 
 import re
-from typing import Any, Dict, List
+from typing import Any, Dict, FrozenSet, List, Optional, Sequence
 
+# Distinct-token sets of the texts seen by one request, keyed by text.
+# Retrieval and reranking share one mapping per search so each candidate is
+# tokenized once; nothing outlives the request.
+TermSets = Dict[str, FrozenSet[str]]
 
-def _tokenize(text: str) -> List[str]:
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase alphanumeric tokens shared by the lexical retrieval stages."""
     return re.findall(r"[a-z0-9]+", (text or "").lower())
 
 
+def text_terms(text: str, term_sets: Optional[TermSets] = None) -> FrozenSet[str]:
+    """Distinct tokens of ``text``, memoized in the request's ``term_sets`` when given."""
+    if term_sets is None:
+        return frozenset(tokenize(text))
+    terms = term_sets.get(text)
+    if terms is None:
+        terms = term_sets[text] = frozenset(tokenize(text))
+    return terms
+
+
+def overlap_scores(query: str, texts: Sequence[str], *, term_sets: Optional[TermSets] = None) -> List[float]:
+    """
+    Score every candidate text by query-token overlap ratio in one pass.
+
+    The query is tokenized once and each text's token set comes from
+    ``term_sets`` when the caller shares one across stages, so later stages
+    over the same candidates only pay for set intersections.
+
+    Args:
+        query: Query text
+        texts: Candidate texts
+        term_sets: Per-request token sets to reuse and fill (optional)
+
+    Returns:
+        Overlap ratio per text (fraction of distinct query tokens present)
+    """
+    query_terms = text_terms(query or "", term_sets)
+    if not query_terms:
+        return [0.0] * len(texts)
+    denominator = len(query_terms)
+    return [
+        round(len(query_terms.intersection(text_terms(text, term_sets))) / denominator, 6) if text else 0.0
+        for text in texts
+    ]
+
+
 def bm25_lite_score(query: str, text: str) -> float:
     """Lightweight lexical score as overlap ratio proxy for BM25."""
-    q_tokens = _tokenize(query)
-    if not q_tokens:
-        return 0.0
-    t_tokens = _tokenize(text)
-    if not t_tokens:
-        return 0.0
-    q_set = set(q_tokens)
-    t_set = set(t_tokens)
-    overlap = len(q_set.intersection(t_set))
-    return round(overlap / max(1, len(q_set)), 6)
-
-
-def rank_bm25_lite(query: str, results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return overlap_scores(query, [text])[0]
+
+
+def rank_bm25_lite(
+    query: str,
+    results: List[Dict[str, Any]],
+    *,
+    term_sets: Optional[TermSets] = None,
+) -> List[Dict[str, Any]]:
+    scores = overlap_scores(query, [str(item.get("text", "")) for item in results], term_sets=term_sets)
     ranked: List[Dict[str, Any]] = []
-    for item in results:
+    for item, score in zip(results, scores):
         row = dict(item)
-        row["bm25_score"] = bm25_lite_score(query, str(item.get("text", "")))
+        row["bm25_score"] = score
         ranked.append(row)
     ranked.sort(key=lambda x: x.get("bm25_score", 0.0), reverse=True)
     return ranked
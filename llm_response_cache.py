@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Exact-match cache of LLM generations for deterministic requests.
+
+Eval runs and synthetic probes replay the same prompts at temperature 0 over
+and over. ``LLMResponseCache`` sits in front of the router's backend calls
+and returns the earlier completion when the full prompt, model and sampling
+parameters match exactly. A small in-process LRU is backed by an optional
+Redis tier shared across replicas, and concurrent identical requests are
+coalesced so only one of them reaches the model (single-flight).
+
+Caching is opt-in (``LLM_CACHE_ENABLED``) and only applies to requests with
+temperature 0 or an explicit cache hint; sampled generations are never reused.
+"""
+
+import os
+import json
+import time
+import asyncio
+import hashlib
+import logging
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Result fields persisted for a cached generation
+CACHED_FIELDS = ("text", "model_id")
+
+
+def _env_bool(name: str, default: str) -> bool:
+    return os.getenv(name, default).strip().lower() in ("1", "true", "yes")
+
+
+@dataclass
+class LLMResponseCacheConfig:
+    """LLM response cache settings."""
+    enabled: bool = False
+    max_entries: int = 1024
+    ttl_seconds: int = 3600
+    redis_url: str = ""
+    redis_key_prefix: str = "llm_response:"
+
+    @classmethod
+    def from_env(cls) -> "LLMResponseCacheConfig":
+        """Load settings from LLM_CACHE_* environment variables."""
+        return cls(
+            enabled=_env_bool("LLM_CACHE_ENABLED", "false"),
+            max_entries=int(os.getenv("LLM_CACHE_MAX_ENTRIES", "1024")),
+            ttl_seconds=int(os.getenv("LLM_CACHE_TTL_SECONDS", "3600")),
+            redis_url=os.getenv("LLM_CACHE_REDIS_URL", "").strip(),
+        )
+
+
+class LLMResponseCache:
+    """
+    Two-tier exact-match cache with single-flight request coalescing.
+
+    Redis calls run in a worker thread so they never block the event loop;
+    Redis errors are logged and treated as misses.
+    """
+
+    def __init__(self, config: Optional[LLMResponseCacheConfig] = None, redis_client: Optional[Any] = None):
+        """
+        Initialize LLM response cache.
+
+        Args:
+            config: Cache settings (loaded from environment if None)
+            redis_client: Redis client for the second tier (built from ``redis_url`` if None)
+        """
+        self.config = config or LLMResponseCacheConfig.from_env()
+        self.redis_client = redis_client
+        if self.redis_client is None and self.config.enabled and self.config.redis_url:
+            try:
+                import redis
+                self.redis_client = redis.Redis.from_url(self.config.redis_url)
+            except ImportError:
+                logger.warning("LLM_CACHE_REDIS_URL is set but the redis package is not installed")
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._in_flight: Dict[str, "asyncio.Task[Tuple[Dict[str, Any], str]]"] = {}
+        self._stats = {"hits": 0, "redis_hits": 0, "misses": 0, "coalesced": 0, "stores": 0, "redis_errors": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return self.config.enabled
+
+    def applies_to(self, temperature: Optional[float], cache_hint: Optional[bool] = None) -> bool:
+        """
+        Decide whether a request may be served from the cache.
+
+        Args:
+            temperature: Effective sampling temperature of the request
+            cache_hint: Explicit per-request override (True forces, False skips)
+
+        Returns:
+            True when caching is enabled and the request is deterministic or hinted
+        """
+        if not self.enabled or cache_hint is False:
+            return False
+        return bool(cache_hint) or temperature == 0
+
+    @staticmethod
+    def make_key(model_id: str, payload: Dict[str, Any]) -> str:
+        """Hash the model id, full prompt and sampling parameters into a cache key."""
+        rendered = json.dumps({"model": model_id, **payload}, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(rendered.encode("utf-8")).hexdigest()
+
+    def _get_local(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        stored_at, result = entry
+        if time.time() - stored_at > self.config.ttl_seconds:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return result
+
+    def _put_local(self, key: str, result: Dict[str, Any]):
+        self._entries[key] = (time.time(), result)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.config.max_entries:
+            self._entries.popitem(last=False)
+
+    async def _get_redis(self, key: str) -> Optional[Dict[str, Any]]:
+        if self.redis_client is None:
+            return None
+        try:
+            payload = await asyncio.to_thread(self.redis_client.get, self.config.redis_key_prefix + key)
+        except Exception as e:
+            self._stats["redis_errors"] += 1
+            logger.warning(f"LLM cache Redis lookup failed: {e}")
+            return None
+        return json.loads(payload) if payload else None
+
+    async def _put_redis(self, key: str, result: Dict[str, Any]):
+        if self.redis_client is None:
+            return
+        try:
+            await asyncio.to_thread(
+                self.redis_client.setex,
+                self.config.redis_key_prefix + key,
+                self.config.ttl_seconds,
+                json.dumps(result, ensure_ascii=False),
+            )
+        except Exception as e:
+            self._stats["redis_errors"] += 1
+            logger.warning(f"LLM cache Redis write failed: {e}")
+
+    async def get_or_generate(
+        self,
+        key: str,
+        generate: Callable[[], Awaitable[Dict[str, Any]]],
+    ) -> Tuple[Dict[str, Any], str]:
+        """
+        Return the cached result for ``key`` or generate it once.
+
+        Concurrent callers with the same key wait on one shared backend call
+        instead of issuing their own; a caller that is cancelled stops waiting
+        without cancelling that call. Only successful results are stored.
+
+        Args:
+            key: Key from ``make_key``
+            generate: Coroutine factory calling the model backend
+
+        Returns:
+            Tuple of (result dict, cache outcome: ``hit``, ``redis_hit``, ``coalesced`` or ``miss``)
+        """
+        cached = self._get_local(key)
+        if cached is not None:
+            self._stats["hits"] += 1
+            return {**cached, "success": True}, "hit"
+
+        pending = self._in_flight.get(key)
+        if pending is not None:
+            self._stats["coalesced"] += 1
+            result, _ = await asyncio.shield(pending)
+            return dict(result), "coalesced"
+
+        # The backend call runs in its own task so cancelling any one caller
+        # (e.g. a client disconnect) never cancels the others waiting on it
+        task = asyncio.create_task(self._lookup_or_generate(key, generate))
+        self._in_flight[key] = task
+        task.add_done_callback(lambda done: self._finish_in_flight(key, done))
+        return await asyncio.shield(task)
+
+    async def _lookup_or_generate(
+        self,
+        key: str,
+        generate: Callable[[], Awaitable[Dict[str, Any]]],
+    ) -> Tuple[Dict[str, Any], str]:
+        cached = await self._get_redis(key)
+        if cached is not None:
+            self._stats["redis_hits"] += 1
+            self._put_local(key, cached)
+            return {**cached, "success": True}, "redis_hit"
+
+        self._stats["misses"] += 1
+        result = await generate()
+        if result.get("success"):
+            stored = {field: result.get(field) for field in CACHED_FIELDS}
+            self._put_local(key, stored)
+            self._stats["stores"] += 1
+            await self._put_redis(key, stored)
+        return result, "miss"
+
+    def _finish_in_flight(self, key: str, task: "asyncio.Task[Tuple[Dict[str, Any], str]]"):
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        # Mark the exception retrieved when every caller was cancelled
+        if not task.cancelled():
+            task.exception()
+
+    def clear(self):
+        """Drop all in-process entries."""
+        self._entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics."""
+        served = self._stats["hits"] + self._stats["redis_hits"] + self._stats["coalesced"]
+        lookups = served + self._stats["misses"]
+        return {
+            **self._stats,
+            "hit_rate": round(served / lookups, 4) if lookups else 0.0,
+            "entries": len(self._entries),
+            "in_flight": len(self._in_flight),
+            "enabled": self.enabled,
+            "redis_enabled": self.redis_client is not None,
+        }
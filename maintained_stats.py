@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Incrementally maintained service statistics.
+
+Stats endpoints used to recount everything on every request (``KEYS
+memory:*`` in Redis, one full-label ``count`` per node and relation type in
+Neo4j), so dashboard polling slowed production traffic. ``MaintainedStats``
+keeps the counters in memory, updated by the write paths, and reconciles them
+with the source of truth at most every ``STATS_RECONCILE_INTERVAL_SECONDS``
+(or sooner after writes whose effect cannot be counted). Reads are O(1) and
+report how old the values are.
+"""
+
+import os
+import copy
+import time
+import logging
+import threading
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+STATS_RECONCILE_INTERVAL_SECONDS = float(os.getenv("STATS_RECONCILE_INTERVAL_SECONDS", "300"))
+
+
+def _isoformat(timestamp: Optional[float]) -> Optional[str]:
+    if timestamp is None:
+        return None
+    return datetime.fromtimestamp(timestamp, tz=timezone.utc).isoformat()
+
+
+class MaintainedStats:
+    """
+    Counters kept current by write paths and periodically reconciled.
+
+    Increments that land while a reconciliation is reading the source of
+    truth may be counted twice or not at all; the next reconciliation
+    corrects them.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        reconcile_fn: Callable[[], Dict[str, Any]],
+        reconcile_interval_seconds: float = STATS_RECONCILE_INTERVAL_SECONDS
+    ):
+        """
+        Initialize maintained stats.
+
+        Args:
+            name: Stats name used in logs (e.g. ``memory``)
+            reconcile_fn: Blocking function computing exact stats from the backend
+            reconcile_interval_seconds: Maximum age of the last reconciliation before it is due again
+        """
+        self.name = name
+        self.reconcile_fn = reconcile_fn
+        self.reconcile_interval_seconds = reconcile_interval_seconds
+        self._lock = threading.Lock()
+        self._values: Optional[Dict[str, Any]] = None
+        self._updated_at: Optional[float] = None
+        self._reconciled_at: Optional[float] = None
+        self._stale = True
+        self._reconciling = False
+
+    @property
+    def has_values(self) -> bool:
+        return self._values is not None
+
+    def increment(self, *path: str, delta: int = 1):
+        """
+        Adjust a counter, e.g. ``increment("nodes_by_type", "Person")``.
+
+        Ignored until the first reconciliation, which reads the exact value.
+        """
+        if not delta:
+            return
+        with self._lock:
+            if self._values is None:
+                return
+            target = self._values
+            for key in path[:-1]:
+                target = target.setdefault(key, {})
+            target[path[-1]] = (target.get(path[-1]) or 0) + delta
+            self._updated_at = time.time()
+
+    def mark_stale(self):
+        """Request a reconciliation after a write whose effect cannot be counted."""
+        self._stale = True
+
+    def needs_reconcile(self) -> bool:
+        """Return True when the values are missing, marked stale or older than the interval."""
+        if self._values is None or self._stale:
+            return True
+        return time.time() - (self._reconciled_at or 0) >= self.reconcile_interval_seconds
+
+    def try_begin_reconcile(self) -> bool:
+        """Claim the single reconciliation slot; False if one is already running."""
+        with self._lock:
+            if self._reconciling:
+                return False
+            self._reconciling = True
+            return True
+
+    def reconcile(self, claimed: bool = False) -> Dict[str, Any]:
+        """
+        Recompute the stats from the backend and replace the counters.
+
+        Args:
+            claimed: True when the caller already holds the slot from ``try_begin_reconcile``
+
+        Returns:
+            Snapshot after reconciliation
+        """
+        if not claimed and not self.try_begin_reconcile():
+            return self.snapshot()
+        try:
+            self._apply_reconciled()
+        finally:
+            with self._lock:
+                self._reconciling = False
+        return self.snapshot()
+
+    def _apply_reconciled(self):
+        self._stale = False
+        try:
+            values = self.reconcile_fn()
+        except Exception:
+            self._stale = True
+            raise
+        if "error" in values:
+            self._stale = True
+        now = time.time()
+        with self._lock:
+            self._values = copy.deepcopy(values)
+            self._updated_at = now
+            self._reconciled_at = now
+        logger.debug(f"Reconciled {self.name} stats")
+
+    def get(self) -> Dict[str, Any]:
+        """Return the snapshot, computing it synchronously only when it never was."""
+        if self._values is None:
+            self._apply_reconciled()
+        return self.snapshot()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Current values plus ``stats_updated_at``, ``stats_reconciled_at`` and ``stats_age_seconds``."""
+        with self._lock:
+            values = copy.deepcopy(self._values or {})
+            updated_at = self._updated_at
+            reconciled_at = self._reconciled_at
+        return {
+            **values,
+            "stats_updated_at": _isoformat(updated_at),
+            "stats_reconciled_at": _isoformat(reconciled_at),
+            "stats_age_seconds": round(time.time() - reconciled_at, 3) if reconciled_at else None,
+        }
@@ -46,6 +46,8 @@ memory_service = MemoryService(
     temporal_decay_factor=scoring_config["temporal_decay_factor"],
     cosine_weight=scoring_config["cosine_weight"],
     temporal_weight=scoring_config["temporal_weight"],
+    embedding_provider=os.getenv("MEMORY_EMBEDDING_PROVIDER", "local"),
+    embedding_service_url=os.getenv("MEMORY_EMBEDDING_SERVICE_URL", ""),
 )
 
 
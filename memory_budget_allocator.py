@@ -5,17 +5,27 @@ Mem0 scoring with relevance×importance×freshness formula, and promotion/demoti
 mechanism for memory items.
 """
 
+import os
 import logging
 import math
 import time
+from collections import deque
 from datetime import datetime, timezone, timedelta
-from typing import List, Dict, Optional, Any, Tuple
+from typing import Deque, List, Dict, Optional, Any, Tuple
 from enum import Enum
 from dataclasses import dataclass, field
 import json
 
+import numpy as np
+
 logger = logging.getLogger(__name__)
 
+# Allocation results kept for statistics and export (oldest dropped first)
+MEMORY_ALLOCATION_HISTORY_SIZE = int(os.getenv("MEMORY_ALLOCATION_HISTORY_SIZE", "1000"))
+
+# Smallest number of top-scored candidates sorted per tier before widening
+MIN_SELECTION_CANDIDATES = 32
+
 
 class MemoryTier(Enum):
     """Memory storage tiers for different time horizons."""
@@ -132,7 +142,8 @@ class MemoryBudgetAllocator:
     def __init__(
         self,
         default_config: Optional[WorkspaceConfig] = None,
-        log_allocations: bool = True
+        log_allocations: bool = True,
+        history_size: int = MEMORY_ALLOCATION_HISTORY_SIZE
     ):
         """
         Initialize Memory Budget Allocator.
@@ -140,6 +151,7 @@ class MemoryBudgetAllocator:
         Args:
             default_config: Default workspace configuration
             log_allocations: Whether to log allocation decisions
+            history_size: Number of recent allocations kept for statistics and export
         """
         self.default_config = default_config or WorkspaceConfig(workspace_id="default")
         self.workspace_configs: Dict[str, WorkspaceConfig] = {
@@ -148,8 +160,8 @@ class MemoryBudgetAllocator:
         self.project_configs: Dict[Tuple[str, str], WorkspaceConfig] = {}
         self.log_allocations = log_allocations
         
-        # Allocation history for analysis
-        self.allocation_history: List[Dict[str, Any]] = []
+        # Recent allocations for analysis (ring buffer, oldest dropped first)
+        self.allocation_history: Deque[Dict[str, Any]] = deque(maxlen=max(1, history_size))
         
         logger.info("Memory Budget Allocator initialized")
     
@@ -322,7 +334,123 @@ class MemoryBudgetAllocator:
             Estimated token count
         """
         return int(len(text) * config.tokens_per_char)
-    
+
+    def score_memories_batch(
+        self,
+        items: List[MemoryItem],
+        config: WorkspaceConfig,
+        current_time: Optional[datetime] = None
+    ) -> Dict[str, np.ndarray]:
+        """
+        Score many memory items at once (columnar ``calculate_memory_score``).
+
+        Missing token counts are estimated, and token counts, freshness and
+        combined scores are written back to the items as the per-item path does.
+
+        Args:
+            items: Memory items to score
+            config: Workspace configuration
+            current_time: Current time for freshness calculation
+
+        Returns:
+            Arrays aligned with ``items``: ``relevance``, ``importance``,
+            ``freshness``, ``combined`` and ``token_count``
+        """
+        current_time = current_time or datetime.now(timezone.utc)
+        count = len(items)
+
+        relevance = np.fromiter((item.relevance_score for item in items), dtype=np.float64, count=count)
+        importance = np.fromiter((item.importance_score for item in items), dtype=np.float64, count=count)
+        age_hours = np.fromiter(
+            (
+                (current_time - item.timestamp).total_seconds() / 3600 if item.timestamp else np.nan
+                for item in items
+            ),
+            dtype=np.float64,
+            count=count
+        )
+        freshness = np.exp(-0.693 * age_hours / config.freshness_half_life_hours)
+        freshness[np.isnan(age_hours)] = 1.0
+
+        combined = np.clip(
+            relevance * config.relevance_weight +
+            importance * config.importance_weight +
+            freshness * config.freshness_weight,
+            0.0,
+            1.0
+        )
+
+        token_count = np.fromiter((item.token_count for item in items), dtype=np.int64, count=count)
+        missing = np.flatnonzero(token_count == 0)
+        if missing.size:
+            text_length = np.fromiter((len(items[i].text) for i in missing.tolist()), dtype=np.float64, count=missing.size)
+            token_count[missing] = (text_length * config.tokens_per_char).astype(np.int64)
+            for i, tokens in zip(missing.tolist(), token_count[missing].tolist()):
+                items[i].token_count = tokens
+
+        for item, fresh, score in zip(items, freshness.tolist(), combined.tolist()):
+            item.freshness_score = fresh
+            item.combined_score = score
+
+        return {
+            "relevance": relevance,
+            "importance": importance,
+            "freshness": freshness,
+            "combined": combined,
+            "token_count": token_count,
+        }
+
+    @staticmethod
+    def _select_within_budget(
+        scores: np.ndarray,
+        token_counts: np.ndarray,
+        budget: int
+    ) -> Tuple[List[int], int]:
+        """
+        Greedily fill a budget in descending score order, skipping items that do not fit.
+
+        Selects exactly what sorting the whole tier would (ties keep input
+        order), but only sorts the best candidates: ``argpartition`` takes the
+        top k, and the next band is only ranked while budget remains for the
+        smallest item left.
+
+        Args:
+            scores: Combined scores
+            token_counts: Token counts aligned with ``scores``
+            budget: Token budget
+
+        Returns:
+            Selected positions in selection order, and tokens used
+        """
+        count = len(scores)
+        selected: List[int] = []
+        tokens_used = 0
+        if count == 0:
+            return selected, tokens_used
+
+        negated = -scores
+        mean_tokens = max(1.0, float(token_counts.mean()))
+        k = min(count, max(MIN_SELECTION_CANDIDATES, 2 * int(budget / mean_tokens) + 1))
+        ranked = np.zeros(count, dtype=bool)
+
+        while True:
+            top_k = np.argpartition(negated, k - 1)[:k]
+            threshold = negated[top_k].max()
+            # Take every item up to the k-th score so ties are never split across bands
+            band = np.flatnonzero(~ranked & (negated <= threshold))
+            band = band[np.lexsort((band, negated[band]))]
+            ranked[band] = True
+
+            for position, tokens in zip(band.tolist(), token_counts[band].tolist()):
+                if tokens_used + tokens <= budget:
+                    selected.append(position)
+                    tokens_used += tokens
+
+            remaining = token_counts[~ranked]
+            if k == count or remaining.size == 0 or tokens_used + int(remaining.min()) > budget:
+                return selected, tokens_used
+            k = min(count, 2 * k)
+
     def allocate_memory_budget(
         self,
         query: str,
@@ -351,23 +479,12 @@ class MemoryBudgetAllocator:
         # Estimate query complexity
         complexity = self.estimate_query_complexity(query, context)
         
-        # Calculate token counts for memories
-        for item in available_memories:
-            if item.token_count == 0:
-                item.token_count = self.estimate_token_count(item.text, config)
-        
-        # Score all memories
+        # Estimate token counts and score all memories as columns
         current_time = datetime.now(timezone.utc)
-        for item in available_memories:
-            self.calculate_memory_score(item, config, current_time)
-        
-        # Group memories by tier
-        memories_by_tier: Dict[MemoryTier, List[MemoryItem]] = {
-            tier: [] for tier in MemoryTier
-        }
-        for item in available_memories:
-            memories_by_tier[item.tier].append(item)
-        
+        columns = self.score_memories_batch(available_memories, config, current_time)
+        item_tiers = np.empty(len(available_memories), dtype=object)
+        item_tiers[:] = [item.tier for item in available_memories]
+
         # Allocate per tier
         allocation_result = {
             "query": query,
@@ -393,31 +510,28 @@ class MemoryBudgetAllocator:
         }
         
         for tier in MemoryTier:
-            tier_memories = memories_by_tier[tier]
+            tier_indices = np.flatnonzero(item_tiers == tier)
             tier_budget = config.get_tier_budget(tier, complexity)
-            
-            # Sort memories by combined score (descending)
-            tier_memories.sort(key=lambda x: x.combined_score, reverse=True)
-            
-            # Select memories within budget
-            selected_memories = []
-            tokens_used = 0
-            
-            for item in tier_memories:
-                if tokens_used + item.token_count <= tier_budget:
-                    selected_memories.append(item)
-                    tokens_used += item.token_count
-                    
-                    # Update access tracking
-                    item.access_count += 1
-                    item.last_accessed = current_time
-            
+
+            # Select the best-scored memories within budget
+            positions, tokens_used = self._select_within_budget(
+                columns["combined"][tier_indices],
+                columns["token_count"][tier_indices],
+                tier_budget
+            )
+            selected_memories = [available_memories[i] for i in tier_indices[positions].tolist()]
+
+            # Update access tracking
+            for item in selected_memories:
+                item.access_count += 1
+                item.last_accessed = current_time
+
             # Store tier allocation results
             allocation_result["tiers"][tier.value] = {
                 "budget_tokens": tier_budget,
                 "tokens_used": tokens_used,
                 "tokens_remaining": tier_budget - tokens_used,
-                "memories_available": len(tier_memories),
+                "memories_available": int(tier_indices.size),
                 "memories_selected": len(selected_memories),
                 "utilization_pct": round(100 * tokens_used / tier_budget, 2) if tier_budget > 0 else 0,
                 "selected_memories": [
@@ -609,7 +723,7 @@ class MemoryBudgetAllocator:
         Returns:
             Allocation statistics
         """
-        filtered_history = self.allocation_history
+        filtered_history = list(self.allocation_history)
         
         # Filter by workspace
         if workspace_id:
@@ -669,6 +783,7 @@ class MemoryBudgetAllocator:
         
         return {
             "total_allocations": total_allocations,
+            "history_limit": self.allocation_history.maxlen,
             "workspace_id": workspace_id or "all",
             "time_window_hours": time_window_hours,
             "averages": {
@@ -684,7 +799,7 @@ class MemoryBudgetAllocator:
     def export_allocation_log(self, filepath: str):
         """Export allocation history to JSON file."""
         with open(filepath, 'w') as f:
-            json.dump(self.allocation_history, f, indent=2, default=str)
+            json.dump(list(self.allocation_history), f, indent=2, default=str)
         logger.info(f"Exported {len(self.allocation_history)} allocations to {filepath}")
     
     def clear_allocation_history(self):
@@ -13,15 +13,29 @@ import logging
 from typing import List, Dict, Optional, Any
 from datetime import datetime, timezone
 from mem0 import Memory
-from qdrant_client import QdrantClient
 from qdrant_client.http import models
 import redis
 import numpy as np
 
 from memory_scoring import combined_memory_score, normalize_weights
+from embedding_cache import EmbeddingCache, get_embedding_cache
+from qdrant_client_factory import create_qdrant_client
+from single_flight import SingleFlight
+from maintained_stats import MaintainedStats
+from embedding_providers import create_embedder
 
 logger = logging.getLogger(__name__)
 
+# Keys written into the Mem0 payload metadata so fact points can be ranked and forgotten by memory ID
+RANKING_METADATA_KEYS = ("memory_id", "timestamp")
+# Redis hash fields read for a search hit, in HMGET order
+SEARCH_REDIS_FIELDS = ("timestamp", "user_id", "metadata", "messages")
+# Lifetime of a memory's Redis record and of its write claim once stored
+MEMORY_TTL_SECONDS = 30 * 24 * 60 * 60
+# Lease on a write claim until the record is stored (about one Mem0 write);
+# a worker that dies mid-write only blocks replays of that ID this long
+MEMORY_WRITE_CLAIM_LEASE_SECONDS = int(os.getenv("MEMORY_WRITE_CLAIM_LEASE_SECONDS", "120"))
+
 
 class MemoryService:
     """
@@ -33,6 +47,9 @@ class MemoryService:
     - Temporal decay scoring (recency bias)
     - Redis for key-value storage and metadata
     """
+
+    search_flight: Optional[SingleFlight] = None
+    stats: Optional[MaintainedStats] = None
     
     def __init__(
         self,
@@ -45,7 +62,12 @@ class MemoryService:
         embedding_model: str = "sentence-transformers/all-MiniLM-L6-v2",
         temporal_decay_factor: float = 0.1,
         cosine_weight: float = 0.7,
-        temporal_weight: float = 0.3
+        temporal_weight: float = 0.3,
+        embedding_cache: Optional[EmbeddingCache] = None,
+        search_flight: Optional[SingleFlight] = None,
+        embedding_provider: str = "local",
+        embedding_service_url: str = "",
+        embedder: Optional[Any] = None
     ):
         """
         Initialize Memory Service.
@@ -61,6 +83,11 @@ class MemoryService:
             temporal_decay_factor: Factor for temporal decay (higher = faster decay)
             cosine_weight: Relative weight for cosine similarity score
             temporal_weight: Relative weight for recency score
+            embedding_cache: Query-embedding cache (process-wide cache if None)
+            search_flight: Coalescing group for identical concurrent searches (from environment if None)
+            embedding_provider: ``local`` (in-process model) or ``service`` (HTTP embedding service)
+            embedding_service_url: URL of an embedding service serving ``embedding_model`` (``service`` provider only)
+            embedder: Preloaded embedder to share (built from the provider settings if None)
         """
         self.qdrant_host = qdrant_host
         self.qdrant_port = qdrant_port
@@ -68,6 +95,9 @@ class MemoryService:
         self.redis_port = redis_port
         self.memory_collection = memory_collection
         self.embedding_model = embedding_model
+        self.embedding_cache = embedding_cache or get_embedding_cache()
+        self.search_flight = search_flight or SingleFlight.from_env("memory_search")
+        self.stats = MaintainedStats("memory", self._count_memory_stats)
         self.temporal_decay_factor = temporal_decay_factor
         self.cosine_weight, self.temporal_weight = normalize_weights(
             cosine_weight, temporal_weight
@@ -75,8 +105,13 @@ class MemoryService:
         
         logger.info("Initializing Memory Service...")
         
+        # Load the embedder once; Mem0 fallbacks reuse it instead of reloading the model per call
+        self.embedder = embedder or create_embedder(
+            embedding_provider, embedding_model, embedding_service_url
+        )
+        
         # Initialize Qdrant client
-        self.qdrant_client = QdrantClient(host=qdrant_host, port=qdrant_port)
+        self.qdrant_client = create_qdrant_client(host=qdrant_host, port=qdrant_port)
         
         # Initialize Redis client
         self.redis_client = redis.Redis(
@@ -102,6 +137,7 @@ class MemoryService:
                     "host": qdrant_host,
                     "port": qdrant_port,
                     "collection_name": memory_collection,
+                    "embedding_model_dims": self.embedder.dimension,
                 }
             },
             "embedder": {
@@ -135,6 +171,7 @@ class MemoryService:
                         "host": qdrant_host,
                         "port": qdrant_port,
                         "collection_name": memory_collection,
+                        "embedding_model_dims": self.embedder.dimension,
                     }
                 },
                 "embedder": {
@@ -147,10 +184,40 @@ class MemoryService:
             self.memory = Memory.from_config(config_basic)
             logger.info("Mem0 initialized with basic configuration (no LLM)")
         
+        # Fallback vectors share the collection with Mem0's, so the dimensions must agree
+        self._check_embedding_dimension()
+        
         # Ensure collection exists
         self._ensure_collection()
         
         logger.info("Memory Service initialization complete")
+
+    def _check_embedding_dimension(self):
+        """
+        Fail fast when the fallback embedder does not match the collection or Mem0's embedder.
+
+        Raises:
+            ValueError: If a dimension differs from ``self.embedder.dimension``
+        """
+        expected = {}
+        try:
+            vectors = self.qdrant_client.get_collection(self.memory_collection).config.params.vectors
+            if getattr(vectors, "size", None):
+                expected[f"collection '{self.memory_collection}'"] = vectors.size
+        except Exception as e:
+            # A missing collection is created from the embedder dimension
+            logger.debug(f"Memory collection not inspected: {e}")
+        mem0_embedder = getattr(getattr(self.memory, "embedding_model", None), "config", None)
+        if getattr(mem0_embedder, "embedding_dims", None):
+            expected[f"Mem0 embedder '{self.embedding_model}'"] = mem0_embedder.embedding_dims
+
+        mismatched = {name: size for name, size in expected.items() if size != self.embedder.dimension}
+        if mismatched:
+            details = ", ".join(f"{name}: {size}" for name, size in mismatched.items())
+            raise ValueError(
+                f"Memory embedder dimension {self.embedder.dimension} does not match {details}; "
+                f"MEMORY_EMBEDDING_PROVIDER=service needs a service serving {self.embedding_model}"
+            )
     
     def _ensure_collection(self):
         """Ensure the memory collection exists in Qdrant."""
@@ -159,10 +226,7 @@ class MemoryService:
             collection_names = [c.name for c in collections]
             
             if self.memory_collection not in collection_names:
-                # Get embedding dimension from the model
-                from sentence_transformers import SentenceTransformer
-                model = SentenceTransformer(self.embedding_model)
-                vector_size = model.get_sentence_embedding_dimension()
+                vector_size = self.embedder.dimension
                 
                 self.qdrant_client.create_collection(
                     collection_name=self.memory_collection,
@@ -181,7 +245,8 @@ class MemoryService:
         self,
         messages: List[Dict[str, str]],
         user_id: Optional[str] = None,
-        metadata: Optional[Dict[str, Any]] = None
+        metadata: Optional[Dict[str, Any]] = None,
+        memory_id: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         Add memories from conversation messages with automatic fact extraction.
@@ -190,12 +255,23 @@ class MemoryService:
             messages: List of conversation messages [{"role": "user/assistant", "content": "..."}]
             user_id: Optional user identifier for personalized memories
             metadata: Optional metadata to store with the memory
+            memory_id: Stable ID for idempotent writes (random if None); a
+                write replaying an ID that was already stored is skipped,
+                since Mem0 would extract and add its facts a second time
         
         Returns:
-            Dictionary with memory IDs and extracted facts
+            Dictionary with memory IDs and extracted facts (``duplicate`` is
+            True when the write was skipped)
         """
+        claim_key = None
         try:
-            memory_id = str(uuid.uuid4())
+            if memory_id:
+                claim_key = f"memory_write:{memory_id}"
+                if not self.redis_client.set(claim_key, "1", nx=True, ex=MEMORY_WRITE_CLAIM_LEASE_SECONDS):
+                    claim_key = None
+                    logger.info(f"Memory {memory_id} already written or in flight, skipping replay")
+                    return {"status": "success", "memory_id": memory_id, "duplicate": True, "facts_extracted": 0}
+            memory_id = memory_id or str(uuid.uuid4())
             timestamp = datetime.now(timezone.utc).isoformat()
             
             # Convert messages to text for Mem0
@@ -212,7 +288,7 @@ class MemoryService:
                 result = self.memory.add(
                     messages=messages,
                     user_id=mem0_user_id,
-                    metadata=metadata or {}
+                    metadata={**(metadata or {}), "memory_id": memory_id, "timestamp": timestamp}
                 )
                 
                 # Store metadata in Redis
@@ -225,14 +301,16 @@ class MemoryService:
                     "metadata": json.dumps(metadata or {}),
                     "mem0_result": json.dumps(result) if result else "{}"
                 }
-                self.redis_client.hset(redis_key, mapping=redis_data)
+                if self.redis_client.hset(redis_key, mapping=redis_data) == len(redis_data):
+                    self._count_stat("redis_memories")
+                self._count_stat("qdrant_points", delta=self._mem0_point_delta(result))
                 
                 # Set expiration (30 days)
-                self.redis_client.expire(redis_key, 30 * 24 * 60 * 60)
+                self.redis_client.expire(redis_key, MEMORY_TTL_SECONDS)
                 
                 logger.info(f"Memory added successfully: {memory_id}")
                 
-                return {
+                response = {
                     "status": "success",
                     "memory_id": memory_id,
                     "timestamp": timestamp,
@@ -244,14 +322,41 @@ class MemoryService:
             except Exception as e:
                 logger.warning(f"Mem0 add failed, using fallback: {e}")
                 # Fallback: manually create embeddings and store
-                return self._add_memory_fallback(
+                response = self._add_memory_fallback(
                     memory_id, messages, mem0_user_id, metadata, timestamp
                 )
+
+            if claim_key:
+                # The record is stored: hold the claim as long as the record lives
+                self.redis_client.expire(claim_key, MEMORY_TTL_SECONDS)
+            return response
         
         except Exception as e:
             logger.error(f"Error adding memory: {e}", exc_info=True)
+            if claim_key:
+                # Let a retry of this write through
+                self.redis_client.delete(claim_key)
             raise
     
+    def add_memories(self, items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Add a batch of memories (used by the write-behind queue).
+
+        Args:
+            items: ``add_memory`` keyword arguments, one dict per memory
+
+        Returns:
+            One result per item; failed items get ``{"status": "error", ...}``
+            instead of aborting the batch
+        """
+        results = []
+        for item in items:
+            try:
+                results.append(self.add_memory(**item))
+            except Exception as e:
+                results.append({"status": "error", "error": str(e), "memory_id": item.get("memory_id")})
+        return results
+
     def _add_memory_fallback(
         self,
         memory_id: str,
@@ -261,16 +366,13 @@ class MemoryService:
         timestamp: str
     ) -> Dict[str, Any]:
         """Fallback method to add memory without Mem0 fact extraction."""
-        from sentence_transformers import SentenceTransformer
-        
         # Create embedding from conversation
         conversation_text = "\n".join([
             f"{msg['role']}: {msg['content']}"
             for msg in messages
         ])
         
-        model = SentenceTransformer(self.embedding_model)
-        embedding = model.encode(conversation_text).tolist()
+        embedding = self.embedder.embed_text(conversation_text)
         
         # Store in Qdrant
         point = models.PointStruct(
@@ -301,8 +403,10 @@ class MemoryService:
             "metadata": json.dumps(metadata or {}),
             "text": conversation_text
         }
-        self.redis_client.hset(redis_key, mapping=redis_data)
-        self.redis_client.expire(redis_key, 30 * 24 * 60 * 60)
+        if self.redis_client.hset(redis_key, mapping=redis_data) == len(redis_data):
+            self._count_stat("redis_memories")
+            self._count_stat("qdrant_points")
+        self.redis_client.expire(redis_key, MEMORY_TTL_SECONDS)
         
         logger.info(f"Memory added via fallback: {memory_id}")
         
@@ -325,6 +429,8 @@ class MemoryService:
     ) -> List[Dict[str, Any]]:
         """
         Search memories with cosine similarity + temporal decay scoring.
+
+        Identical concurrent searches share one execution via ``search_flight``.
         
         Args:
             query: Search query text
@@ -336,6 +442,30 @@ class MemoryService:
         Returns:
             List of memories with combined scores
         """
+        if self.search_flight is None:
+            return self._search_memory(query, user_id, limit, filters, use_temporal_decay)
+        key = SingleFlight.make_key(
+            str((filters or {}).get("workspace_id", "")),
+            query,
+            user_id=user_id,
+            limit=limit,
+            filters=filters,
+            use_temporal_decay=use_temporal_decay,
+        )
+        return self.search_flight.do(
+            key,
+            lambda: self._search_memory(query, user_id, limit, filters, use_temporal_decay),
+        )
+
+    def _search_memory(
+        self,
+        query: str,
+        user_id: Optional[str],
+        limit: int,
+        filters: Optional[Dict[str, Any]],
+        use_temporal_decay: bool
+    ) -> List[Dict[str, Any]]:
+        """Run one memory search (Mem0 first, direct Qdrant fallback)."""
         try:
             mem0_user_id = user_id or "default_user"
             
@@ -348,66 +478,19 @@ class MemoryService:
                 )
                 
                 if mem0_results:
-                    # Enhance results with temporal decay
-                    enhanced_results = []
-                    current_time = datetime.now(timezone.utc)
-                    
-                    for result in mem0_results:
-                        # Get memory details from Redis if available
-                        memory_id = result.get("id") or result.get("memory_id")
-                        
-                        if memory_id:
-                            redis_key = f"memory:{memory_id}"
-                            redis_data = self.redis_client.hgetall(redis_key)
-                            
-                            if redis_data:
-                                timestamp_str = redis_data.get("timestamp")
-                                if timestamp_str and use_temporal_decay:
-                                    memory_time = datetime.fromisoformat(timestamp_str)
-                                    time_diff_hours = (current_time - memory_time).total_seconds() / 3600
-                                else:
-                                    time_diff_hours = 0.0
-
-                                parsed_metadata = json.loads(redis_data.get("metadata", "{}"))
-                                if not self._matches_metadata_filters(parsed_metadata, filters):
-                                    continue
-
-                                cosine_score = result.get("score", 0.5)
-                                combined_score, cosine_score, temporal_score = combined_memory_score(
-                                    cosine_similarity=cosine_score,
-                                    age_hours=time_diff_hours if use_temporal_decay else 0.0,
-                                    temporal_decay_factor=self.temporal_decay_factor,
-                                    similarity_weight=self.cosine_weight,
-                                    recency_weight=self.temporal_weight,
-                                )
-                                
-                                enhanced_results.append({
-                                    "memory_id": memory_id,
-                                    "text": result.get("memory", result.get("text", "")),
-                                    "score": round(combined_score, 4),
-                                    "cosine_score": round(cosine_score, 4),
-                                    "temporal_score": round(temporal_score, 4),
-                                    "timestamp": redis_data.get("timestamp"),
-                                    "user_id": redis_data.get("user_id"),
-                                    "metadata": parsed_metadata,
-                                    "messages": json.loads(redis_data.get("messages", "[]"))
-                                })
-                        else:
-                            # No Redis data, use Mem0 result as-is
-                            result_metadata = result.get("metadata", {})
-                            if not self._matches_metadata_filters(result_metadata, filters):
-                                continue
-                            enhanced_results.append({
-                                "text": result.get("memory", result.get("text", "")),
-                                "score": result.get("score", 0.5),
-                                "metadata": result_metadata
-                            })
+                    enhanced_results = self._rank_mem0_results(
+                        mem0_results, filters, use_temporal_decay
+                    )
                     
-                    # Sort by combined score
+                    # Sort by combined score; only returned hits get their messages decoded
                     enhanced_results.sort(key=lambda x: x.get("score", 0), reverse=True)
+                    returned = enhanced_results[:limit]
+                    for item in returned:
+                        if "messages" in item:
+                            item["messages"] = json.loads(item["messages"] or "[]")
                     
-                    logger.info(f"Memory search via Mem0: {len(enhanced_results)} results")
-                    return enhanced_results[:limit]
+                    logger.info(f"Memory search via Mem0: {len(returned)} results")
+                    return returned
             
             except Exception as e:
                 logger.warning(f"Mem0 search failed, using fallback: {e}")
@@ -419,6 +502,109 @@ class MemoryService:
             logger.error(f"Error searching memory: {e}", exc_info=True)
             raise
 
+    def _fetch_memory_records(self, memory_ids: List[Optional[str]]) -> List[Optional[Dict[str, Any]]]:
+        """
+        Read the Redis hashes of several memories in one pipelined round trip.
+
+        Args:
+            memory_ids: Memory IDs (None entries are skipped)
+
+        Returns:
+            One dict of ``SEARCH_REDIS_FIELDS`` per ID, or None when the hash is missing
+        """
+        pipeline = self.redis_client.pipeline(transaction=False)
+        for memory_id in memory_ids:
+            if memory_id:
+                pipeline.hmget(f"memory:{memory_id}", SEARCH_REDIS_FIELDS)
+        replies = iter(pipeline.execute())
+
+        records: List[Optional[Dict[str, Any]]] = []
+        for memory_id in memory_ids:
+            values = next(replies) if memory_id else None
+            if not values or all(value is None for value in values):
+                records.append(None)
+            else:
+                records.append(dict(zip(SEARCH_REDIS_FIELDS, values)))
+        return records
+
+    def _rank_mem0_results(
+        self,
+        mem0_results: List[Dict[str, Any]],
+        filters: Optional[Dict[str, Any]],
+        use_temporal_decay: bool
+    ) -> List[Dict[str, Any]]:
+        """
+        Filter and score Mem0 hits with temporal decay.
+
+        Every hit is checked against its Redis record in one pipelined read;
+        hits whose record is gone (forgotten or expired) are dropped. Ranking
+        fields come from the vector payload when the memory was written with
+        them and from the Redis record otherwise. ``messages`` is left
+        JSON-encoded so only returned hits pay for decoding it.
+        """
+        current_time = datetime.now(timezone.utc)
+        hits = []
+        for result in mem0_results:
+            payload_metadata = dict(result.get("metadata") or {})
+            ranking = {key: payload_metadata.pop(key, None) for key in RANKING_METADATA_KEYS}
+            memory_id = ranking["memory_id"] or result.get("id") or result.get("memory_id")
+            hits.append((result, memory_id, ranking["timestamp"], payload_metadata))
+
+        records = self._fetch_memory_records([memory_id for _, memory_id, _, _ in hits])
+
+        enhanced_results = []
+        for (result, memory_id, payload_timestamp, payload_metadata), record in zip(hits, records):
+            if not memory_id:
+                # No stored memory behind this hit, use the Mem0 result as-is
+                if not self._matches_metadata_filters(payload_metadata, filters):
+                    continue
+                enhanced_results.append({
+                    "text": result.get("memory", result.get("text", "")),
+                    "score": result.get("score", 0.5),
+                    "metadata": payload_metadata
+                })
+                continue
+            if record is None:
+                # Forgotten or expired: Mem0 fact points can outlive the Redis record
+                continue
+
+            if payload_timestamp is not None:
+                timestamp_str = payload_timestamp
+                parsed_metadata = payload_metadata
+            else:
+                timestamp_str = record.get("timestamp")
+                parsed_metadata = json.loads(record.get("metadata") or "{}")
+            if not self._matches_metadata_filters(parsed_metadata, filters):
+                continue
+
+            if timestamp_str and use_temporal_decay:
+                memory_time = datetime.fromisoformat(timestamp_str)
+                time_diff_hours = (current_time - memory_time).total_seconds() / 3600
+            else:
+                time_diff_hours = 0.0
+
+            cosine_score = result.get("score", 0.5)
+            combined_score, cosine_score, temporal_score = combined_memory_score(
+                cosine_similarity=cosine_score,
+                age_hours=time_diff_hours if use_temporal_decay else 0.0,
+                temporal_decay_factor=self.temporal_decay_factor,
+                similarity_weight=self.cosine_weight,
+                recency_weight=self.temporal_weight,
+            )
+            
+            enhanced_results.append({
+                "memory_id": memory_id,
+                "text": result.get("memory", result.get("text", "")),
+                "score": round(combined_score, 4),
+                "cosine_score": round(cosine_score, 4),
+                "temporal_score": round(temporal_score, 4),
+                "timestamp": timestamp_str,
+                "user_id": result.get("user_id") or record.get("user_id"),
+                "metadata": parsed_metadata,
+                "messages": record.get("messages")
+            })
+        return enhanced_results
+
     @staticmethod
     def _matches_metadata_filters(
         metadata: Optional[Dict[str, Any]],
@@ -449,11 +635,11 @@ class MemoryService:
         use_temporal_decay: bool
     ) -> List[Dict[str, Any]]:
         """Fallback method for memory search using direct Qdrant query."""
-        from sentence_transformers import SentenceTransformer
-        
-        # Generate query embedding
-        model = SentenceTransformer(self.embedding_model)
-        query_embedding = model.encode(query).tolist()
+        query_embedding = self.embedding_cache.get_or_compute(
+            self.embedding_model,
+            query,
+            self.embedder.embed_text
+        )
         
         # Build Qdrant filter
         qdrant_filter = None
@@ -546,12 +732,18 @@ class MemoryService:
             Deletion status
         """
         try:
-            # Delete from Qdrant
+            # Delete from Qdrant: the fallback point and the Mem0 fact points tagged with the memory ID
             try:
                 self.qdrant_client.delete(
                     collection_name=self.memory_collection,
-                    points_selector=models.PointIdsList(
-                        points=[memory_id]
+                    points_selector=models.FilterSelector(
+                        filter=models.Filter(should=[
+                            models.HasIdCondition(has_id=[memory_id]),
+                            models.FieldCondition(
+                                key="memory_id",
+                                match=models.MatchValue(value=memory_id)
+                            ),
+                        ])
                     )
                 )
                 logger.info(f"Deleted memory from Qdrant: {memory_id}")
@@ -562,7 +754,11 @@ class MemoryService:
             redis_key = f"memory:{memory_id}"
             deleted = self.redis_client.delete(redis_key)
             
+            # The number of Mem0 fact points removed is unknown, recount on the next read
+            if self.stats is not None:
+                self.stats.mark_stale()
             if deleted:
+                self._count_stat("redis_memories", delta=-deleted)
                 logger.info(f"Deleted memory from Redis: {memory_id}")
             else:
                 logger.warning(f"Memory not found in Redis: {memory_id}")
@@ -577,15 +773,44 @@ class MemoryService:
             logger.error(f"Error deleting memory: {e}", exc_info=True)
             raise
     
+    @staticmethod
+    def _mem0_point_delta(result: Any) -> int:
+        """Net number of vector points a Mem0 ``add`` created (ADD minus DELETE events)."""
+        events = result.get("results", []) if isinstance(result, dict) else (result or [])
+        delta = 0
+        for event in events:
+            if isinstance(event, dict):
+                delta += {"ADD": 1, "DELETE": -1}.get(event.get("event"), 0)
+        return delta
+
+    def _count_stat(self, *path: str, delta: int = 1):
+        """Keep the maintained stats current after a write."""
+        if self.stats is not None:
+            self.stats.increment(*path, delta=delta)
+
     def get_memory_stats(self) -> Dict[str, Any]:
-        """Get memory system statistics."""
+        """
+        Get memory system statistics.
+
+        Served from counters maintained on add/forget (see ``MaintainedStats``);
+        only the very first call counts synchronously.
+        """
+        try:
+            return self.stats.get()
+        except Exception as e:
+            logger.error(f"Error getting memory stats: {e}", exc_info=True)
+            raise
+
+    def _count_memory_stats(self) -> Dict[str, Any]:
+        """Count memories exactly (SCAN-based, used to reconcile the maintained stats)."""
         try:
             # Qdrant stats
             collection_info = self.qdrant_client.get_collection(self.memory_collection)
             
-            # Redis stats
-            redis_keys = self.redis_client.keys("memory:*")
-            redis_memory_count = len(redis_keys)
+            # Redis stats: incremental SCAN instead of a keyspace-blocking KEYS
+            redis_memory_count = sum(
+                1 for _ in self.redis_client.scan_iter(match="memory:*", count=1000)
+            )
             
             return {
                 "collection_name": self.memory_collection,
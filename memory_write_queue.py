@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+"""
+Write-behind persistence of chat turns to memory.
+
+Storing a turn runs Mem0 fact extraction, embedding, Qdrant and Redis writes,
+which used to sit on the chat response path. ``MemoryWriteQueue`` lets the
+request handler enqueue the turn and return immediately; background workers
+pull jobs in small batches and persist them off the request path.
+
+Every job carries an idempotency key (derived from the request ID, user,
+workspace and turn content unless given). It deduplicates re-submissions of
+the same turn within a TTL and fixes the memory ID, which
+``MemoryService.add_memory`` claims in Redis so a replayed write is skipped
+instead of adding its Mem0 facts again. The same question asked in another
+request gets another key and is stored. The queue is bounded: when it is full the turn is written
+synchronously (``overflow=sync``, the default) or dropped (``overflow=drop``).
+``drain()`` is awaited on shutdown so accepted turns are not lost.
+"""
+
+import os
+import json
+import time
+import uuid
+import asyncio
+import hashlib
+import logging
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Namespace for deriving stable memory IDs from idempotency keys
+MEMORY_ID_NAMESPACE = uuid.UUID("6f1c7a52-3d1e-4c55-9b8e-2a7f0d4c9e10")
+OVERFLOW_POLICIES = ("sync", "drop")
+
+
+def _env_bool(name: str, default: str) -> bool:
+    return os.getenv(name, default).strip().lower() in ("1", "true", "yes")
+
+
+@dataclass
+class MemoryWriteQueueConfig:
+    """Write-behind memory queue settings."""
+    enabled: bool = True
+    max_queue_size: int = 1000
+    workers: int = 2
+    batch_size: int = 16
+    idempotency_ttl_seconds: int = 3600
+    drain_timeout_seconds: float = 30.0
+    overflow: str = "sync"
+
+    @classmethod
+    def from_env(cls) -> "MemoryWriteQueueConfig":
+        """Load settings from MEMORY_WRITE_* environment variables."""
+        overflow = os.getenv("MEMORY_WRITE_QUEUE_OVERFLOW", "sync").strip().lower()
+        return cls(
+            enabled=_env_bool("MEMORY_WRITE_BEHIND_ENABLED", "true"),
+            max_queue_size=int(os.getenv("MEMORY_WRITE_QUEUE_SIZE", "1000")),
+            workers=int(os.getenv("MEMORY_WRITE_WORKERS", "2")),
+            batch_size=int(os.getenv("MEMORY_WRITE_BATCH_SIZE", "16")),
+            idempotency_ttl_seconds=int(os.getenv("MEMORY_WRITE_IDEMPOTENCY_TTL_SECONDS", "3600")),
+            drain_timeout_seconds=float(os.getenv("MEMORY_WRITE_DRAIN_TIMEOUT_SECONDS", "30")),
+            overflow=overflow if overflow in OVERFLOW_POLICIES else "sync",
+        )
+
+
+@dataclass
+class MemoryWriteJob:
+    """One chat turn waiting to be persisted."""
+    messages: List[Dict[str, str]]
+    user_id: Optional[str]
+    metadata: Dict[str, Any]
+    idempotency_key: str
+    memory_id: str
+    enqueued_at: float = field(default_factory=time.monotonic)
+
+    def as_kwargs(self) -> Dict[str, Any]:
+        """Arguments for ``MemoryService.add_memory``."""
+        return {
+            "messages": self.messages,
+            "user_id": self.user_id,
+            "metadata": self.metadata,
+            "memory_id": self.memory_id,
+        }
+
+
+def make_idempotency_key(
+    messages: List[Dict[str, str]],
+    user_id: Optional[str],
+    metadata: Optional[Dict[str, Any]] = None,
+    request_id: Optional[str] = None,
+) -> str:
+    """Hash the request ID, user, workspace and turn content into an idempotency key."""
+    rendered = json.dumps(
+        {
+            "request_id": request_id,
+            "user_id": user_id,
+            "workspace_id": (metadata or {}).get("workspace_id"),
+            "messages": messages,
+        },
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(rendered.encode("utf-8")).hexdigest()
+
+
+class MemoryWriteQueue:
+    """
+    Bounded asyncio queue with background workers persisting memory writes.
+
+    Workers are started lazily on the first enqueue so the queue can be
+    created at import time, before the event loop runs.
+    """
+
+    def __init__(
+        self,
+        write_batch: Callable[[List[Dict[str, Any]]], Awaitable[List[Dict[str, Any]]]],
+        config: Optional[MemoryWriteQueueConfig] = None,
+        metrics_exporter: Optional[Any] = None
+    ):
+        """
+        Initialize write-behind queue.
+
+        Args:
+            write_batch: Coroutine persisting a list of ``add_memory`` kwargs, one result per item
+            config: Queue settings (loaded from environment if None)
+            metrics_exporter: Exporter receiving queue depth, wait and outcome metrics (optional)
+        """
+        self.write_batch = write_batch
+        self.config = config or MemoryWriteQueueConfig.from_env()
+        self.metrics_exporter = metrics_exporter
+        self._queue: Optional["asyncio.Queue[MemoryWriteJob]"] = None
+        self._workers: List["asyncio.Task[None]"] = []
+        self._seen: "OrderedDict[str, float]" = OrderedDict()
+        self._closed = False
+        self._stats = {
+            "queued": 0, "duplicate": 0, "overflow": 0, "written": 0, "failed": 0, "dropped": 0, "batches": 0
+        }
+
+    @property
+    def enabled(self) -> bool:
+        return self.config.enabled and not self._closed
+
+    @staticmethod
+    def memory_id_for(idempotency_key: str) -> str:
+        """Derive the memory ID a job with this key is stored under."""
+        return str(uuid.uuid5(MEMORY_ID_NAMESPACE, idempotency_key))
+
+    def _record(self, outcome: str, count: int = 1):
+        self._stats[outcome] += count
+        if self.metrics_exporter:
+            self.metrics_exporter.record_memory_write(outcome, count)
+
+    def _publish_depth(self):
+        if self.metrics_exporter and self._queue is not None:
+            self.metrics_exporter.update_queue_depth("memory_write", self._queue.qsize())
+
+    def _ensure_started(self):
+        if self._queue is not None:
+            return
+        self._queue = asyncio.Queue(maxsize=self.config.max_queue_size)
+        self._workers = [
+            asyncio.create_task(self._worker(), name=f"memory-write-{index}")
+            for index in range(max(1, self.config.workers))
+        ]
+
+    def _is_duplicate(self, key: str) -> bool:
+        now = time.monotonic()
+        while self._seen:
+            oldest_key, expires_at = next(iter(self._seen.items()))
+            if expires_at > now:
+                break
+            del self._seen[oldest_key]
+        return key in self._seen
+
+    def make_job(
+        self,
+        messages: List[Dict[str, str]],
+        user_id: Optional[str] = None,
+        metadata: Optional[Dict[str, Any]] = None,
+        idempotency_key: Optional[str] = None,
+        request_id: Optional[str] = None,
+    ) -> MemoryWriteJob:
+        """Build a job, deriving its idempotency key (scoped to ``request_id``) and memory ID."""
+        key = idempotency_key or make_idempotency_key(messages, user_id, metadata, request_id)
+        return MemoryWriteJob(
+            messages=messages,
+            user_id=user_id,
+            metadata=dict(metadata or {}),
+            idempotency_key=key,
+            memory_id=self.memory_id_for(key),
+        )
+
+    def enqueue(self, job: MemoryWriteJob) -> str:
+        """
+        Hand a job to the background workers without waiting for it.
+
+        Args:
+            job: Job from ``make_job``
+
+        Returns:
+            ``queued``, ``duplicate`` (same key accepted within the TTL),
+            ``overflow`` (queue full, policy ``sync``: caller should write it
+            itself) or ``dropped`` (queue full, policy ``drop``, or closed)
+        """
+        if self._closed:
+            self._record("dropped")
+            return "dropped"
+        self._ensure_started()
+        if self._is_duplicate(job.idempotency_key):
+            self._record("duplicate")
+            return "duplicate"
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            outcome = "overflow" if self.config.overflow == "sync" else "dropped"
+            self._record(outcome)
+            logger.warning(f"Memory write queue full ({self.config.max_queue_size}), job {outcome}")
+            return outcome
+        self._seen[job.idempotency_key] = time.monotonic() + self.config.idempotency_ttl_seconds
+        self._record("queued")
+        self._publish_depth()
+        return "queued"
+
+    async def _next_batch(self) -> List[MemoryWriteJob]:
+        batch = [await self._queue.get()]
+        while len(batch) < self.config.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except asyncio.QueueEmpty:
+                break
+        return batch
+
+    async def _worker(self):
+        while True:
+            batch = await self._next_batch()
+            self._publish_depth()
+            if self.metrics_exporter:
+                now = time.monotonic()
+                for job in batch:
+                    self.metrics_exporter.record_queue_wait("memory_write", now - job.enqueued_at)
+            try:
+                results = await self.write_batch([job.as_kwargs() for job in batch])
+                failed = [
+                    job for job, result in zip(batch, results)
+                    if (result or {}).get("status") == "error"
+                ]
+                self._stats["batches"] += 1
+                self._record("written", len(batch) - len(failed))
+                if failed:
+                    self._record("failed", len(failed))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                failed = batch
+                self._record("failed", len(batch))
+                logger.error(f"Memory write batch of {len(batch)} failed: {e}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+            # Forget failed keys so a resubmitted turn is accepted again
+            for job in failed:
+                self._seen.pop(job.idempotency_key, None)
+
+    async def drain(self, timeout: Optional[float] = None) -> int:
+        """
+        Stop accepting jobs and wait for queued ones to be written.
+
+        Args:
+            timeout: Seconds to wait (``drain_timeout_seconds`` if None)
+
+        Returns:
+            Number of jobs abandoned because the timeout expired
+        """
+        self._closed = True
+        if self._queue is None:
+            return 0
+        wait = self.config.drain_timeout_seconds if timeout is None else timeout
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout=wait)
+        except asyncio.TimeoutError:
+            logger.warning(f"Memory write drain timed out with {self._queue.qsize()} jobs pending")
+        abandoned = self._queue.qsize()
+        if abandoned:
+            self._record("dropped", abandoned)
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self._publish_depth()
+        return abandoned
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get queue statistics."""
+        return {
+            **self._stats,
+            "depth": self._queue.qsize() if self._queue is not None else 0,
+            "max_queue_size": self.config.max_queue_size,
+            "workers": len(self._workers),
+            "enabled": self.enabled,
+            "overflow": self.config.overflow,
+        }
@@ -12,7 +12,7 @@ Provides custom metrics for:
 """
 
 import logging
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Tuple
 from prometheus_client import (
     Counter,
     Histogram,
@@ -252,6 +252,44 @@ class MetricsExporter:
             ['cache_type'],
             registry=self.registry
         )
+
+        # Single-flight coalescing metrics
+        self.single_flight_coalesced_total = Counter(
+            'single_flight_coalesced_total',
+            'Calls served by an identical in-flight or just-finished call',
+            ['operation', 'outcome'],
+            registry=self.registry
+        )
+        
+        # Write-behind memory queue metrics
+        self.memory_write_jobs_total = Counter(
+            'memory_write_jobs_total',
+            'Chat-turn memory writes by queue outcome',
+            ['outcome'],  # queued, duplicate, overflow, written, failed, dropped
+            registry=self.registry
+        )
+        
+        # Pooled HTTP client metrics
+        self.http_pool_clients = Gauge(
+            'http_client_pool_clients',
+            'Pooled HTTP clients currently open',
+            ['pool'],
+            registry=self.registry
+        )
+        
+        self.http_pool_connections = Gauge(
+            'http_client_pool_connections',
+            'Connections held by a pooled HTTP client',
+            ['pool', 'endpoint', 'state'],  # state: active or idle
+            registry=self.registry
+        )
+        
+        self.http_pool_requests_total = Counter(
+            'http_client_pool_requests_total',
+            'Total requests sent through pooled HTTP clients',
+            ['pool', 'endpoint'],
+            registry=self.registry
+        )
         
         # Circuit breaker metrics
         self.circuit_breaker_state = Gauge(
@@ -512,6 +550,45 @@ class MetricsExporter:
     def record_cache_miss(self, cache_type: str):
         """Record cache miss."""
         self.cache_misses_total.labels(cache_type=cache_type).inc()
+
+    def record_coalesced_call(self, operation: str, outcome: str):
+        """Record a call coalesced onto an in-flight (or recent) identical call."""
+        self.single_flight_coalesced_total.labels(operation=operation, outcome=outcome).inc()
+    
+    def record_memory_write(self, outcome: str, count: int = 1):
+        """Record write-behind memory jobs by outcome."""
+        self.memory_write_jobs_total.labels(outcome=outcome).inc(count)
+    
+    def record_http_pool_request(self, pool: str, endpoint: str):
+        """Record a request sent through a pooled HTTP client."""
+        self.http_pool_requests_total.labels(
+            pool=pool,
+            endpoint=endpoint
+        ).inc()
+    
+    def update_http_pool_stats(
+        self,
+        pool: str,
+        clients: int,
+        connections: Dict[str, Dict[str, int]]
+    ):
+        """
+        Update pooled HTTP client gauges.
+        
+        Args:
+            pool: Pool name
+            clients: Number of open clients in the pool
+            connections: Per-endpoint ``{'active': n, 'idle': n}`` connection counts
+        """
+        self.http_pool_clients.labels(pool=pool).set(clients)
+        
+        for endpoint, counts in connections.items():
+            for state in ('active', 'idle'):
+                self.http_pool_connections.labels(
+                    pool=pool,
+                    endpoint=endpoint,
+                    state=state
+                ).set(counts.get(state, 0))
     
     def update_circuit_breaker_state(
         self,
@@ -599,6 +676,34 @@ class MetricsExporter:
     def get_metrics(self) -> bytes:
         """Get current metrics in Prometheus format."""
         return generate_latest(self.registry)
+    
+    def expose_in(self, parent: CollectorRegistry, prefixes: Tuple[str, ...]):
+        """
+        Publish metric families matching name prefixes through another registry.
+        
+        Lets a process serve selected exporter metrics from its existing
+        scrape endpoint when the exporter uses a private registry, e.g. to avoid
+        clashing with collectors the process already registered under the
+        same names (such as the circuit breaker module's).
+        
+        Args:
+            parent: Registry to expose the metrics through
+            prefixes: Metric name prefixes to expose
+        """
+        parent.register(_PrefixFilteredCollector(self.registry, prefixes))
+
+
+class _PrefixFilteredCollector:
+    """Collector yielding the metric families of a registry whose names match prefixes."""
+    
+    def __init__(self, registry: CollectorRegistry, prefixes: Tuple[str, ...]):
+        self._registry = registry
+        self._prefixes = tuple(prefixes)
+    
+    def collect(self):
+        for family in self._registry.collect():
+            if family.name.startswith(self._prefixes):
+                yield family
 
 
 # Global metrics exporters
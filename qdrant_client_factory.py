@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Single construction point for Qdrant clients.
+
+Every service used to build ``QdrantClient(host=..., port=...)`` itself, which
+pinned all traffic to REST/JSON with per-module timeouts. ``create_qdrant_client``
+applies one set of connection settings from the environment and can switch
+the data plane to gRPC (``QDRANT_PREFER_GRPC``), where upserted and returned
+vectors travel as packed protobuf floats instead of decimal JSON text.
+"""
+
+import os
+import logging
+from dataclasses import dataclass, replace
+from typing import Any, Optional
+
+from qdrant_client import QdrantClient
+
+logger = logging.getLogger(__name__)
+
+
+def _env_bool(name: str, default: str) -> bool:
+    return os.getenv(name, default).strip().lower() in ("1", "true", "yes")
+
+
+@dataclass
+class QdrantConnectionConfig:
+    """Connection settings shared by every Qdrant client."""
+    host: str = "localhost"
+    port: int = 6333
+    grpc_port: int = 6334
+    prefer_grpc: bool = False
+    timeout_seconds: int = 10
+    https: bool = False
+    api_key: Optional[str] = None
+
+    @classmethod
+    def from_env(cls) -> "QdrantConnectionConfig":
+        """Load connection settings from QDRANT_* environment variables."""
+        return cls(
+            host=os.getenv("QDRANT_HOST", "localhost"),
+            port=int(os.getenv("QDRANT_PORT", "6333")),
+            grpc_port=int(os.getenv("QDRANT_GRPC_PORT", "6334")),
+            prefer_grpc=_env_bool("QDRANT_PREFER_GRPC", "false"),
+            timeout_seconds=int(os.getenv("QDRANT_TIMEOUT_SECONDS", "10")),
+            https=_env_bool("QDRANT_HTTPS", "false"),
+            api_key=os.getenv("QDRANT_API_KEY") or None,
+        )
+
+
+def create_qdrant_client(
+    host: Optional[str] = None,
+    port: Optional[int] = None,
+    config: Optional[QdrantConnectionConfig] = None,
+    **overrides: Any
+) -> QdrantClient:
+    """
+    Create a Qdrant client with the shared connection settings.
+
+    Args:
+        host: Override the configured host
+        port: Override the configured REST port
+        config: Connection settings (loaded from environment if None)
+        **overrides: Other ``QdrantConnectionConfig`` fields to override (e.g. ``timeout_seconds``)
+
+    Returns:
+        QdrantClient using gRPC for data-plane calls when ``prefer_grpc`` is set
+    """
+    config = config or QdrantConnectionConfig.from_env()
+    if host is not None:
+        overrides["host"] = host
+    if port is not None:
+        overrides["port"] = port
+    if overrides:
+        config = replace(config, **overrides)
+
+    client = QdrantClient(
+        host=config.host,
+        port=config.port,
+        grpc_port=config.grpc_port,
+        prefer_grpc=config.prefer_grpc,
+        https=config.https,
+        api_key=config.api_key,
+        timeout=config.timeout_seconds,
+    )
+    logger.debug(
+        f"Qdrant client for {config.host}:{config.grpc_port if config.prefer_grpc else config.port} "
+        f"({'gRPC' if config.prefer_grpc else 'REST'}, timeout={config.timeout_seconds}s)"
+    )
+    return client
@@ -0,0 +1,394 @@
+#!/usr/bin/env python3
+"""
+Qdrant storage layout for the documents collection.
+
+``QdrantLayoutManager`` owns everything about how a collection is laid out on
+the Qdrant node: keyword payload indexes for the fields every search filters
+on, tenant partitioning by ``workspace_id`` and HNSW / quantization / on-disk
+settings. Two partitioning strategies are supported:
+
+- ``payload`` (default): one shared collection with ``workspace_id`` indexed
+  as a tenant key (``is_tenant``) and per-tenant HNSW graphs (``payload_m``)
+  instead of one global graph, so filtered search cost follows the tenant's
+  corpus rather than the whole collection.
+- dedicated collections: workspaces listed in ``QDRANT_DEDICATED_WORKSPACES``
+  get their own collection (``<base>__<workspace>``), for tenants large enough
+  to warrant their own graph and segment tuning.
+
+``migrate`` brings existing collections in line with the configured layout;
+see scripts/deploy/migrate_qdrant_layout.py.
+"""
+
+import os
+import re
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from qdrant_client import models
+
+logger = logging.getLogger(__name__)
+
+TENANT_FIELD = "workspace_id"
+PAYLOAD_INDEX_FIELDS = (
+    TENANT_FIELD,
+    "metadata.document_id",
+    "metadata.repo",
+    "metadata.path",
+    "metadata.lang",
+)
+TENANT_MODES = ("payload", "shared")
+QUANTIZATION_MODES = ("none", "scalar", "binary")
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    return os.getenv(name, "true" if default else "false").strip().lower() in ("1", "true", "yes")
+
+
+@dataclass
+class CollectionLayoutConfig:
+    """Layout settings applied to RAG document collections."""
+    tenant_mode: str = "payload"
+    dedicated_workspaces: Tuple[str, ...] = ()
+    hnsw_m: int = 16
+    hnsw_ef_construct: int = 100
+    hnsw_on_disk: bool = False
+    vectors_on_disk: bool = False
+    payload_on_disk: bool = True
+    quantization: str = "none"
+    quantization_always_ram: bool = True
+    quantization_oversampling: float = 2.0
+    quantization_rescore: bool = True
+    payload_index_fields: Tuple[str, ...] = field(default=PAYLOAD_INDEX_FIELDS)
+
+    def __post_init__(self):
+        if self.tenant_mode not in TENANT_MODES:
+            raise ValueError(f"Unsupported tenant mode '{self.tenant_mode}' (expected one of {TENANT_MODES})")
+        if self.quantization not in QUANTIZATION_MODES:
+            raise ValueError(
+                f"Unsupported quantization '{self.quantization}' (expected one of {QUANTIZATION_MODES})"
+            )
+
+    @classmethod
+    def from_env(cls) -> "CollectionLayoutConfig":
+        """Load layout settings from QDRANT_* environment variables."""
+        dedicated = tuple(
+            workspace.strip()
+            for workspace in os.getenv("QDRANT_DEDICATED_WORKSPACES", "").split(",")
+            if workspace.strip()
+        )
+        quantization = os.getenv("QDRANT_QUANTIZATION", "none").strip().lower()
+        return cls(
+            tenant_mode=os.getenv("QDRANT_TENANT_MODE", "payload").strip().lower(),
+            dedicated_workspaces=dedicated,
+            hnsw_m=int(os.getenv("QDRANT_HNSW_M", "16")),
+            hnsw_ef_construct=int(os.getenv("QDRANT_HNSW_EF_CONSTRUCT", "100")),
+            hnsw_on_disk=_env_bool("QDRANT_HNSW_ON_DISK", False),
+            # Quantized collections keep full-precision originals on disk for rescoring
+            vectors_on_disk=_env_bool("QDRANT_VECTORS_ON_DISK", quantization != "none"),
+            payload_on_disk=_env_bool("QDRANT_PAYLOAD_ON_DISK", True),
+            quantization=quantization,
+            quantization_always_ram=_env_bool("QDRANT_QUANTIZATION_ALWAYS_RAM", True),
+            quantization_oversampling=float(os.getenv("QDRANT_QUANTIZATION_OVERSAMPLING", "2.0")),
+            quantization_rescore=_env_bool("QDRANT_QUANTIZATION_RESCORE", True),
+        )
+
+
+def dedicated_collection_name(base_collection: str, workspace_id: str) -> str:
+    """Name of the dedicated collection for a workspace."""
+    slug = re.sub(r"[^A-Za-z0-9_-]+", "_", workspace_id.strip()).strip("_")
+    if not slug:
+        raise ValueError(f"Cannot derive a collection name from workspace_id {workspace_id!r}")
+    return f"{base_collection}__{slug}"
+
+
+class QdrantLayoutManager:
+    """Create, route and migrate RAG collections according to a layout config."""
+
+    def __init__(self, client: Any, config: Optional[CollectionLayoutConfig] = None):
+        """
+        Initialize layout manager.
+
+        Args:
+            client: QdrantClient
+            config: Layout settings (loaded from environment if None)
+        """
+        self.client = client
+        self.config = config or CollectionLayoutConfig.from_env()
+        self._dedicated = set(self.config.dedicated_workspaces)
+
+    def is_dedicated(self, workspace_id: str) -> bool:
+        """Whether a workspace lives in its own collection."""
+        return workspace_id in self._dedicated
+
+    def collection_for(self, base_collection: str, workspace_id: str) -> str:
+        """Resolve the physical collection holding a workspace's points."""
+        if self.is_dedicated(workspace_id):
+            return dedicated_collection_name(base_collection, workspace_id)
+        return base_collection
+
+    def managed_collections(self, base_collection: str) -> List[str]:
+        """Base collection followed by every dedicated workspace collection."""
+        return [base_collection] + [
+            dedicated_collection_name(base_collection, workspace_id)
+            for workspace_id in self.config.dedicated_workspaces
+        ]
+
+    def _partitioned(self, collection_name: str, base_collection: str) -> bool:
+        # Dedicated collections hold one tenant, so a global graph is the right index there
+        return self.config.tenant_mode == "payload" and collection_name == base_collection
+
+    def hnsw_config(self, partitioned: bool) -> "models.HnswConfigDiff":
+        """
+        HNSW settings for a collection.
+
+        Partitioned collections skip the global graph (``m=0``) and build one
+        graph per tenant value (``payload_m``); every search carries a
+        ``workspace_id`` filter, so the global graph would only cost memory.
+        """
+        return models.HnswConfigDiff(
+            m=0 if partitioned else self.config.hnsw_m,
+            payload_m=self.config.hnsw_m if partitioned else None,
+            ef_construct=self.config.hnsw_ef_construct,
+            on_disk=self.config.hnsw_on_disk,
+        )
+
+    def quantization_config(self) -> Optional[Any]:
+        """Quantization settings, or None when quantization is disabled."""
+        if self.config.quantization == "scalar":
+            return models.ScalarQuantization(
+                scalar=models.ScalarQuantizationConfig(
+                    type=models.ScalarType.INT8,
+                    quantile=0.99,
+                    always_ram=self.config.quantization_always_ram,
+                )
+            )
+        if self.config.quantization == "binary":
+            return models.BinaryQuantization(
+                binary=models.BinaryQuantizationConfig(always_ram=self.config.quantization_always_ram)
+            )
+        return None
+
+    def search_params(self, exact: bool = False) -> Optional["models.SearchParams"]:
+        """
+        Search-time parameters for quantized collections.
+
+        The quantized index returns ``limit * oversampling`` candidates, which
+        are rescored against the full-precision vectors before the top
+        ``limit`` are returned. Returns None when quantization is disabled.
+        """
+        if self.config.quantization == "none" and not exact:
+            return None
+        quantization = None
+        if self.config.quantization != "none":
+            quantization = models.QuantizationSearchParams(
+                ignore=exact,
+                rescore=self.config.quantization_rescore,
+                oversampling=self.config.quantization_oversampling,
+            )
+        return models.SearchParams(exact=exact, quantization=quantization)
+
+    def _index_schema(self, field_name: str, partitioned: bool) -> Any:
+        if field_name == TENANT_FIELD and partitioned:
+            keyword_params = getattr(models, "KeywordIndexParams", None)
+            if keyword_params is not None:
+                return keyword_params(type="keyword", is_tenant=True)
+            logger.warning("qdrant-client has no KeywordIndexParams; indexing workspace_id without is_tenant")
+        return models.PayloadSchemaType.KEYWORD
+
+    def _existing_collections(self) -> set:
+        return {collection.name for collection in self.client.get_collections().collections}
+
+    def ensure_collection(self, collection_name: str, vector_size: int, base_collection: Optional[str] = None):
+        """
+        Create a collection with the configured layout if missing, then ensure its payload indexes.
+
+        Args:
+            collection_name: Physical collection name
+            vector_size: Embedding dimension
+            base_collection: Shared collection this one belongs to (defaults to itself)
+        """
+        partitioned = self._partitioned(collection_name, base_collection or collection_name)
+        if collection_name in self._existing_collections():
+            logger.info(f"Collection '{collection_name}' already exists")
+        else:
+            self.client.create_collection(
+                collection_name=collection_name,
+                vectors_config=models.VectorParams(
+                    size=vector_size,
+                    distance=models.Distance.COSINE,
+                    on_disk=self.config.vectors_on_disk,
+                ),
+                hnsw_config=self.hnsw_config(partitioned),
+                quantization_config=self.quantization_config(),
+                on_disk_payload=self.config.payload_on_disk,
+            )
+            logger.info(
+                f"Created collection '{collection_name}' "
+                f"(partitioned={partitioned}, quantization={self.config.quantization})"
+            )
+        self.ensure_payload_indexes(collection_name, partitioned=partitioned)
+
+    def ensure_payload_indexes(self, collection_name: str, partitioned: bool = False) -> List[str]:
+        """
+        Create missing keyword payload indexes.
+
+        Returns:
+            Fields that were indexed by this call
+        """
+        existing = set((self.client.get_collection(collection_name).payload_schema or {}).keys())
+        created = []
+        for field_name in self.config.payload_index_fields:
+            if field_name in existing:
+                continue
+            self.client.create_payload_index(
+                collection_name=collection_name,
+                field_name=field_name,
+                field_schema=self._index_schema(field_name, partitioned),
+                wait=True,
+            )
+            created.append(field_name)
+        if created:
+            logger.info(f"Created payload indexes on '{collection_name}': {created}")
+        return created
+
+    def ensure_layout(self, base_collection: str, vector_size: int):
+        """Ensure the base collection and every dedicated workspace collection exist."""
+        for collection_name in self.managed_collections(base_collection):
+            self.ensure_collection(collection_name, vector_size, base_collection=base_collection)
+
+    def plan_migration(self, collection_name: str, base_collection: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Compare an existing collection with the configured layout.
+
+        Returns:
+            Plan with missing payload indexes and the settings that differ
+        """
+        partitioned = self._partitioned(collection_name, base_collection or collection_name)
+        info = self.client.get_collection(collection_name)
+        existing_indexes = set((info.payload_schema or {}).keys())
+        hnsw = info.config.hnsw_config
+        wanted_hnsw = self.hnsw_config(partitioned)
+
+        changes: Dict[str, Any] = {}
+        for name in ("m", "payload_m", "ef_construct"):
+            current, wanted = getattr(hnsw, name, None), getattr(wanted_hnsw, name)
+            if wanted is not None and current != wanted:
+                changes[f"hnsw.{name}"] = {"current": current, "wanted": wanted}
+        if bool(hnsw.on_disk) != self.config.hnsw_on_disk:
+            changes["hnsw.on_disk"] = {"current": bool(hnsw.on_disk), "wanted": self.config.hnsw_on_disk}
+
+        vectors_on_disk = bool(info.config.params.vectors.on_disk)
+        if vectors_on_disk != self.config.vectors_on_disk:
+            changes["vectors.on_disk"] = {"current": vectors_on_disk, "wanted": self.config.vectors_on_disk}
+        on_disk_payload = info.config.params.on_disk_payload
+        if on_disk_payload is not None and on_disk_payload != self.config.payload_on_disk:
+            changes["on_disk_payload"] = {"current": on_disk_payload, "wanted": self.config.payload_on_disk}
+
+        current_quantization = info.config.quantization_config
+        current_mode = "none"
+        if current_quantization is not None:
+            current_mode = "scalar" if getattr(current_quantization, "scalar", None) else "binary"
+        if current_mode != self.config.quantization:
+            changes["quantization"] = {"current": current_mode, "wanted": self.config.quantization}
+
+        return {
+            "collection": collection_name,
+            "partitioned": partitioned,
+            "missing_payload_indexes": [
+                name for name in self.config.payload_index_fields if name not in existing_indexes
+            ],
+            "changes": changes,
+        }
+
+    def migrate(self, collection_name: str, base_collection: Optional[str] = None, apply: bool = False) -> Dict[str, Any]:
+        """
+        Bring an existing collection in line with the configured layout.
+
+        Payload indexes are created first so per-tenant graphs can be built when
+        the HNSW change triggers re-indexing.
+
+        Args:
+            collection_name: Physical collection name
+            base_collection: Shared collection this one belongs to (defaults to itself)
+            apply: Apply the plan (dry run when False)
+
+        Returns:
+            Migration plan, with ``applied`` set when changes were made
+        """
+        plan = self.plan_migration(collection_name, base_collection)
+        plan["applied"] = False
+        if not apply or (not plan["missing_payload_indexes"] and not plan["changes"]):
+            return plan
+
+        self.ensure_payload_indexes(collection_name, partitioned=plan["partitioned"])
+        changes = plan["changes"]
+        update: Dict[str, Any] = {}
+        if any(name.startswith("hnsw.") for name in changes):
+            update["hnsw_config"] = self.hnsw_config(plan["partitioned"])
+        if "vectors.on_disk" in changes:
+            update["vectors_config"] = {"": models.VectorParamsDiff(on_disk=self.config.vectors_on_disk)}
+        if "on_disk_payload" in changes:
+            update["collection_params"] = models.CollectionParamsDiff(on_disk_payload=self.config.payload_on_disk)
+        if "quantization" in changes:
+            update["quantization_config"] = self.quantization_config() or models.Disabled.DISABLED
+        if update:
+            self.client.update_collection(collection_name=collection_name, **update)
+        plan["applied"] = True
+        logger.info(f"Migrated collection '{collection_name}': {sorted(changes)}")
+        return plan
+
+    def move_workspace_points(
+        self,
+        base_collection: str,
+        workspace_id: str,
+        batch_size: int = 256,
+        apply: bool = False
+    ) -> int:
+        """
+        Copy a dedicated workspace's points out of the shared collection, then delete them there.
+
+        Args:
+            base_collection: Shared collection currently holding the points
+            workspace_id: Workspace listed in ``dedicated_workspaces``
+            batch_size: Points per scroll/upsert page
+            apply: Move the points (count only when False)
+
+        Returns:
+            Number of points found (and moved when ``apply``)
+        """
+        if not self.is_dedicated(workspace_id):
+            raise ValueError(f"Workspace '{workspace_id}' is not configured as dedicated")
+        target = dedicated_collection_name(base_collection, workspace_id)
+        workspace_filter = models.Filter(
+            must=[models.FieldCondition(key=TENANT_FIELD, match=models.MatchValue(value=workspace_id))]
+        )
+
+        moved = 0
+        offset = None
+        while True:
+            records, offset = self.client.scroll(
+                collection_name=base_collection,
+                scroll_filter=workspace_filter,
+                limit=batch_size,
+                offset=offset,
+                with_payload=True,
+                with_vectors=apply,
+            )
+            if records and apply:
+                self.client.upsert(
+                    collection_name=target,
+                    points=[
+                        models.PointStruct(id=record.id, vector=record.vector, payload=record.payload)
+                        for record in records
+                    ],
+                    wait=True,
+                )
+            moved += len(records)
+            if offset is None:
+                break
+
+        if apply and moved:
+            self.client.delete(collection_name=base_collection, points_selector=workspace_filter, wait=True)
+            logger.info(f"Moved {moved} points for workspace '{workspace_id}' from '{base_collection}' to '{target}'")
+        return moved
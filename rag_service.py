@@ -9,12 +9,12 @@ import json
 import hashlib
 import uuid
 import logging
-from typing import List, Dict, Optional, Any
+from itertools import islice
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import List, Dict, Optional, Any, Iterator, Tuple
+from dataclasses import replace
 from datetime import datetime
 
-import httpx
-from sentence_transformers import SentenceTransformer
-from qdrant_client import QdrantClient
 from qdrant_client.models import (
     Distance,
     VectorParams,
@@ -23,20 +23,47 @@ from qdrant_client.models import (
     FieldCondition,
     MatchValue,
     MatchAny,
+    PointIdsList,
 )
 
-from hybrid_retrieval import rank_bm25_lite, fuse_rrf
+from hybrid_retrieval import TermSets, rank_bm25_lite, fuse_rrf
+from bm25_index import FILTER_FIELDS as LEXICAL_FILTER_FIELDS, BM25IndexManager, matches_filters
+from qdrant_layout import CollectionLayoutConfig, QdrantLayoutManager
+from qdrant_client_factory import create_qdrant_client
 from cheap_reranker import rerank_results
+from cross_encoder_reranker import get_cross_encoder_reranker
+from embedding_cache import EmbeddingCache, get_embedding_cache
+from semantic_response_cache import SemanticResponseCache, get_semantic_response_cache
+from single_flight import SingleFlight
+from maintained_stats import MaintainedStats
+from chunking_engine import StructuredChunker, build_token_counter
+# Embedders live in embedding_providers; re-exported here for existing callers
+from embedding_providers import HTTPEmbeddingServiceClient, NomicEmbedder, create_embedder  # noqa: F401
 
 logger = logging.getLogger(__name__)
 DEFAULT_WORKSPACE_ID = os.getenv("RAG_DEFAULT_WORKSPACE_ID", "default").strip() or "default"
 HYBRID_RETRIEVAL_ENABLED = os.getenv("HYBRID_RETRIEVAL_ENABLED", "true").strip().lower() in ("1", "true", "yes")
 HYBRID_RRF_K = int(os.getenv("HYBRID_RRF_K", "60"))
 HYBRID_VECTOR_CANDIDATE_MULTIPLIER = int(os.getenv("HYBRID_VECTOR_CANDIDATE_MULTIPLIER", "3"))
+# Corpus-level BM25 index feeding the lexical leg of RRF (falls back to rank_bm25_lite when empty)
+BM25_INDEX_ENABLED = os.getenv("BM25_INDEX_ENABLED", "true").strip().lower() in ("1", "true", "yes")
+# BM25 hits fetched per result when a filter key is not stored in the index and is checked on Qdrant payloads
+BM25_UNINDEXED_FILTER_OVERFETCH = int(os.getenv("BM25_UNINDEXED_FILTER_OVERFETCH", "4"))
 RERANK_ENABLED = os.getenv("RERANK_ENABLED", "true").strip().lower() in ("1", "true", "yes")
 RERANK_ALPHA = float(os.getenv("RERANK_ALPHA", "0.65"))
 RERANK_MAX_CANDIDATES = int(os.getenv("RERANK_MAX_CANDIDATES", "40"))
 RERANK_ALPHA_BY_WORKSPACE = os.getenv("RERANK_ALPHA_BY_WORKSPACE", "")
+# Reranking stage: cheap (lexical blend) or cross_encoder, with optional JSON per-workspace overrides
+RERANKER = os.getenv("RERANKER", "cheap").strip().lower() or "cheap"
+RERANKER_BY_WORKSPACE = os.getenv("RERANKER_BY_WORKSPACE", "")
+SUPPORTED_RERANKERS = ("cheap", "cross_encoder")
+# Batch ingestion: chunks per embed_batch call and points per Qdrant upsert
+RAG_INGEST_EMBED_BATCH_SIZE = int(os.getenv("RAG_INGEST_EMBED_BATCH_SIZE", "256"))
+RAG_INGEST_UPSERT_BATCH_SIZE = int(os.getenv("RAG_INGEST_UPSERT_BATCH_SIZE", "512"))
+# Overlap embedding of upsert batch N+1 with the Qdrant write of batch N
+RAG_INGEST_PIPELINE_ENABLED = os.getenv("RAG_INGEST_PIPELINE_ENABLED", "true").strip().lower() in ("1", "true", "yes")
+# Chunking strategy: structured (token-budgeted, boundary-aware) or fixed (character windows)
+RAG_CHUNKER = os.getenv("RAG_CHUNKER", "structured").strip().lower() or "structured"
 
 
 
@@ -77,6 +104,56 @@ def _resolve_rerank_alpha(workspace_id: str) -> float:
         return default_alpha
 
 
+def _resolve_reranker_name(workspace_id: str) -> str:
+    """Resolve reranker stage with optional workspace-specific override."""
+    default_name = RERANKER if RERANKER in SUPPORTED_RERANKERS else "cheap"
+    raw_mapping = (RERANKER_BY_WORKSPACE or "").strip()
+    if not raw_mapping:
+        return default_name
+    try:
+        mapping = json.loads(raw_mapping)
+    except Exception:
+        return default_name
+    if not isinstance(mapping, dict):
+        return default_name
+    candidate = str(mapping.get(workspace_id) or "").strip().lower()
+    return candidate if candidate in SUPPORTED_RERANKERS else default_name
+
+
+def cross_encoder_selected() -> bool:
+    """Return True when the default or any workspace override selects the cross-encoder."""
+    if _resolve_reranker_name(DEFAULT_WORKSPACE_ID) == "cross_encoder":
+        return True
+    try:
+        mapping = json.loads((RERANKER_BY_WORKSPACE or "").strip() or "{}")
+    except Exception:
+        return False
+    if not isinstance(mapping, dict):
+        return False
+    return any(str(name or "").strip().lower() == "cross_encoder" for name in mapping.values())
+
+
+def warm_up_reranker():
+    """Start loading the cross-encoder at startup when any workspace selects it."""
+    if cross_encoder_selected():
+        get_cross_encoder_reranker().warm_up()
+        logger.info("Cross-encoder reranker warm-up started")
+
+
+def _rerank(
+    query: str,
+    candidates: List[Dict[str, Any]],
+    workspace_id: str,
+    top_k: int,
+    term_sets: Optional[TermSets] = None,
+) -> List[Dict[str, Any]]:
+    """Rerank candidates with the stage configured for the workspace."""
+    alpha = _resolve_rerank_alpha(workspace_id)
+    if _resolve_reranker_name(workspace_id) == "cross_encoder":
+        return get_cross_encoder_reranker().rerank(query, candidates, alpha=alpha, top_k=top_k)
+    return rerank_results(query, candidates, alpha=alpha, top_k=top_k, term_sets=term_sets)
+
+
 class DocumentChunker:
     """Handles document chunking with configurable size and overlap."""
     
@@ -95,10 +172,13 @@ class DocumentChunker:
         Returns:
             List of chunk dictionaries with text and metadata
         """
+        return list(self.iter_chunks(text, metadata))
+
+    def iter_chunks(self, text: str, metadata: Optional[Dict[str, Any]] = None) -> Iterator[Dict[str, Any]]:
+        """Lazily split text into overlapping chunks (generator form of ``chunk_text``)."""
         if not text:
-            return []
+            return
         
-        chunks = []
         start = 0
         chunk_index = 0
         
@@ -114,114 +194,86 @@ class DocumentChunker:
                 "total_length": len(text)
             })
             
-            chunks.append({
+            yield {
                 "text": chunk_text,
                 "metadata": chunk_metadata
-            })
+            }
             
             start += (self.chunk_size - self.overlap)
             chunk_index += 1
-        
-        return chunks
-
-
-class NomicEmbedder:
-    """Handles embeddings using Nomic Embed v1.5 model."""
-    
-    def __init__(self, model_name: str = "nomic-ai/nomic-embed-text-v1.5"):
-        logger.info(f"Loading embedding model: {model_name}")
-        self.model = SentenceTransformer(
-            model_name,
-            trust_remote_code=True
-        )
-        self.dimension = self.model.get_sentence_embedding_dimension()
-        logger.info(f"Embedding model loaded. Dimension: {self.dimension}")
-    
-    def embed_text(self, text: str) -> List[float]:
-        """Generate embedding for a single text."""
-        embedding = self.model.encode(text, convert_to_numpy=True)
-        return embedding.tolist()
-    
-    def embed_batch(self, texts: List[str]) -> List[List[float]]:
-        """Generate embeddings for a batch of texts."""
-        embeddings = self.model.encode(texts, convert_to_numpy=True, show_progress_bar=False)
-        return embeddings.tolist()
-
-
-class HTTPEmbeddingServiceClient:
-    """Embedding client that delegates vectorization to a local HTTP service."""
-
-    def __init__(
-        self,
-        service_url: str,
-        model_name: str = "nomic-ai/nomic-embed-text-v1.5",
-        timeout_seconds: float = 60.0,
-    ):
-        self.service_url = service_url.rstrip("/")
-        self.model_name = model_name
-        self.timeout_seconds = timeout_seconds
-        self.dimension = self._fetch_dimension()
-        logger.info(
-            "Connected to embedding service at %s with model %s (dimension=%s)",
-            self.service_url,
-            self.model_name,
-            self.dimension,
-        )
-
-    def _fetch_dimension(self) -> int:
-        """Fetch embedding dimension from the service health endpoint."""
-        try:
-            response = httpx.get(
-                f"{self.service_url}/health",
-                timeout=self.timeout_seconds,
-            )
-            response.raise_for_status()
-            payload = response.json()
-            dimension = payload.get("dimension")
-            if not isinstance(dimension, int) or dimension <= 0:
-                raise ValueError("Embedding service returned invalid dimension")
-            return dimension
-        except Exception as exc:
-            logger.error("Failed to fetch embedding dimension from %s: %s", self.service_url, exc)
-            raise
-
-    def embed_text(self, text: str) -> List[float]:
-        """Generate embedding for a single text via HTTP service."""
-        embeddings = self.embed_batch([text])
-        return embeddings[0]
-
-    def embed_batch(self, texts: List[str]) -> List[List[float]]:
-        """Generate embeddings for a batch of texts via HTTP service."""
-        if not texts:
-            return []
-
-        response = httpx.post(
-            f"{self.service_url}/v1/embeddings",
-            json={
-                "model": self.model_name,
-                "input": texts,
-            },
-            timeout=self.timeout_seconds,
-        )
-        response.raise_for_status()
-        payload = response.json()
-        data = payload.get("data", [])
-        return [item["embedding"] for item in data]
 
 
 class QdrantStorage:
     """Handles storage and retrieval from Qdrant vector database."""
+
+    layout: Optional[QdrantLayoutManager] = None
     
     def __init__(
         self,
         host: str = "localhost",
         port: int = 6333,
-        collection_name: str = "documents"
+        collection_name: str = "documents",
+        lexical_index: Optional[BM25IndexManager] = None,
+        layout: Optional[QdrantLayoutManager] = None,
+        quantization: Optional[str] = None
     ):
-        self.client = QdrantClient(host=host, port=port)
+        """
+        Initialize storage.
+
+        Args:
+            host: Qdrant host
+            port: Qdrant port
+            collection_name: Base collection name
+            lexical_index: BM25 index manager (created from environment if None and enabled)
+            layout: Collection layout manager (created from QDRANT_* environment if None)
+            quantization: Override QDRANT_QUANTIZATION (none, scalar or binary) for new collections and search
+        """
+        self.host = host
+        self.port = port
+        self.client = create_qdrant_client(host=host, port=port)
         self.collection_name = collection_name
+        if layout is None:
+            layout_config = CollectionLayoutConfig.from_env()
+            if quantization is not None:
+                layout_config = replace(
+                    layout_config,
+                    quantization=quantization,
+                    vectors_on_disk=layout_config.vectors_on_disk or quantization != "none",
+                )
+            layout = QdrantLayoutManager(self.client, layout_config)
+        self.layout = layout
+        if lexical_index is None and BM25_INDEX_ENABLED:
+            lexical_index = BM25IndexManager.from_env(collection_name)
+        self.lexical_index = lexical_index
         logger.info(f"Connected to Qdrant at {host}:{port}")
 
+    def ensure_connected(self) -> bool:
+        """
+        Probe Qdrant and rebuild the client if the connection has gone bad.
+
+        Returns:
+            True if the client was reconnected, False if the probe succeeded
+
+        Raises:
+            Exception: If Qdrant is still unreachable after reconnecting
+        """
+        try:
+            self.client.get_collections()
+            return False
+        except Exception as e:
+            logger.warning(f"Qdrant health check failed ({e}); reconnecting to {self.host}:{self.port}")
+
+        try:
+            self.client.close()
+        except Exception:
+            pass
+        self.client = create_qdrant_client(host=self.host, port=self.port)
+        self.client.get_collections()
+        if self.layout is not None:
+            self.layout.client = self.client
+        logger.info(f"Reconnected to Qdrant at {self.host}:{self.port}")
+        return True
+
     @staticmethod
     def _normalize_workspace_id(workspace_id: Any) -> str:
         """Normalize and validate workspace IDs used for isolation."""
@@ -259,10 +311,20 @@ class QdrantStorage:
             return next(iter(normalized_values))
 
         return QdrantStorage._normalize_workspace_id(filter_value)
+
+    def collection_for(self, workspace_id: str) -> str:
+        """Resolve the collection holding a workspace's points (dedicated tenants get their own)."""
+        if self.layout is None:
+            return self.collection_name
+        return self.layout.collection_for(self.collection_name, workspace_id)
     
     def create_collection(self, vector_size: int):
-        """Create a new collection if it doesn't exist."""
+        """Create missing collections with the configured layout and payload indexes."""
         try:
+            if self.layout is not None:
+                self.layout.ensure_layout(self.collection_name, vector_size)
+                return
+
             collections = self.client.get_collections().collections
             collection_names = [col.name for col in collections]
             
@@ -288,6 +350,7 @@ class QdrantStorage:
         embeddings: List[List[float]],
         metadatas: List[Dict[str, Any]],
         workspace_id: str,
+        wait: bool = True,
     ) -> List[str]:
         """
         Insert or update points in the collection.
@@ -296,6 +359,7 @@ class QdrantStorage:
             texts: List of text chunks
             embeddings: List of embedding vectors
             metadatas: List of metadata dictionaries
+            wait: Wait for Qdrant to apply the update before returning
             
         Returns:
             List of point IDs
@@ -339,12 +403,25 @@ class QdrantStorage:
                 )
             )
         
+        collection_name = self.collection_for(normalized_workspace_id)
         self.client.upsert(
-            collection_name=self.collection_name,
-            points=points
+            collection_name=collection_name,
+            points=points,
+            wait=wait
         )
         
-        logger.info(f"Upserted {len(points)} points to collection '{self.collection_name}'")
+        logger.info(f"Upserted {len(points)} points to collection '{collection_name}'")
+
+        if self.lexical_index is not None:
+            try:
+                self.lexical_index.add_points(
+                    normalized_workspace_id,
+                    point_ids,
+                    texts,
+                    [point.payload["metadata"] for point in points],
+                )
+            except Exception as e:
+                logger.warning(f"BM25 index update failed after upsert: {e}")
         return point_ids
     
     def search(
@@ -398,11 +475,18 @@ class QdrantStorage:
                 )
         query_filter = Filter(must=conditions)
 
+        search_kwargs: Dict[str, Any] = {}
+        search_params = self.layout.search_params() if self.layout is not None else None
+        if search_params is not None:
+            # Quantized collections: oversample on the compressed index, rescore with the originals
+            search_kwargs["search_params"] = search_params
+
         results = self.client.search(
-            collection_name=collection_name or self.collection_name,
+            collection_name=collection_name or self.collection_for(normalized_workspace_id),
             query_vector=query_vector,
             limit=limit,
-            query_filter=query_filter
+            query_filter=query_filter,
+            **search_kwargs
         )
         
         formatted_results = []
@@ -438,12 +522,139 @@ class QdrantStorage:
         filter_condition = Filter(must=conditions)
         
         self.client.delete(
-            collection_name=self.collection_name,
+            collection_name=self.collection_for(normalized_workspace_id),
             points_selector=filter_condition
         )
         
         logger.info(f"Deleted points with {metadata_key}={metadata_value}")
+
+        if self.lexical_index is not None:
+            try:
+                self.lexical_index.delete_by_metadata(normalized_workspace_id, metadata_key, metadata_value)
+            except Exception as e:
+                logger.warning(f"BM25 index update failed after delete: {e}")
+
+    def delete_points(self, point_ids: List[str], workspace_id: str):
+        """Delete points by ID (e.g. to roll back a partially written document)."""
+        if not point_ids:
+            return
+        normalized_workspace_id = self._normalize_workspace_id(workspace_id)
+        self.client.delete(
+            collection_name=self.collection_for(normalized_workspace_id),
+            points_selector=PointIdsList(points=list(point_ids)),
+        )
+
+        logger.info(f"Deleted {len(point_ids)} points by ID")
+
+        if self.lexical_index is not None:
+            try:
+                self.lexical_index.remove_points(normalized_workspace_id, point_ids)
+            except Exception as e:
+                logger.warning(f"BM25 index update failed after delete: {e}")
+
+    def lexical_search(
+        self,
+        query: str,
+        workspace_id: str,
+        limit: int = 10,
+        filter_conditions: Optional[Dict[str, Any]] = None,
+    ) -> Optional[List[Dict[str, Any]]]:
+        """
+        Retrieve top-k points for a query from the workspace BM25 index.
+
+        Args:
+            query: Search query text
+            workspace_id: Workspace to search
+            limit: Maximum number of results
+            filter_conditions: Optional metadata filters
+
+        Returns:
+            Results shaped like ``search`` with ``bm25_score``, or None when the
+            workspace has no complete index (never rebuilt from the corpus)
+        """
+        if self.lexical_index is None:
+            return None
+        normalized_workspace_id = self._normalize_workspace_id(workspace_id)
+        index = self.lexical_index.get_index(normalized_workspace_id)
+        index.maybe_reload()
+        if not index.complete:
+            return None
+
+        unindexed_filters = {
+            key: value
+            for key, value in (filter_conditions or {}).items()
+            if key != "workspace_id" and key not in LEXICAL_FILTER_FIELDS
+        }
+        fetch_limit = limit * BM25_UNINDEXED_FILTER_OVERFETCH if unindexed_filters else limit
+        hits = index.search(query, limit=fetch_limit, filters=filter_conditions)
+        if not hits:
+            return []
+        records = self.client.retrieve(
+            collection_name=self.collection_for(normalized_workspace_id),
+            ids=[point_id for point_id, _ in hits],
+            with_payload=True,
+            with_vectors=False,
+        )
+        # Qdrant may return ids in canonical form and in any order
+        records_by_id = {str(record.id).replace("-", ""): record for record in records}
+
+        formatted_results = []
+        for point_id, bm25_score in hits:
+            record = records_by_id.get(point_id.replace("-", ""))
+            if record is None or record.payload.get("workspace_id") != normalized_workspace_id:
+                continue
+            if unindexed_filters and not matches_filters(record.payload.get("metadata") or {}, unindexed_filters):
+                continue
+            formatted_results.append({
+                "id": record.id,
+                "bm25_score": round(bm25_score, 6),
+                "text": record.payload.get("text"),
+                "metadata": record.payload.get("metadata"),
+                "ingested_at": record.payload.get("ingested_at")
+            })
+            if len(formatted_results) >= limit:
+                break
+        return formatted_results
     
+    def rebuild_lexical_index(self, workspace_id: str, batch_size: int = 256) -> int:
+        """
+        Rebuild a workspace BM25 index from the points already in Qdrant.
+
+        Args:
+            workspace_id: Workspace to rebuild
+            batch_size: Points per scroll request
+
+        Returns:
+            Number of indexed points
+        """
+        if self.lexical_index is None:
+            raise ValueError("BM25 index is disabled (BM25_INDEX_ENABLED=false)")
+        normalized_workspace_id = self._normalize_workspace_id(workspace_id)
+        workspace_filter = Filter(must=[
+            FieldCondition(key="workspace_id", match=MatchValue(value=normalized_workspace_id))
+        ])
+
+        def scroll_points():
+            offset = None
+            while True:
+                records, offset = self.client.scroll(
+                    collection_name=self.collection_for(normalized_workspace_id),
+                    scroll_filter=workspace_filter,
+                    limit=batch_size,
+                    offset=offset,
+                    with_payload=True,
+                    with_vectors=False,
+                )
+                for record in records:
+                    payload = record.payload or {}
+                    yield str(record.id), payload.get("text") or "", payload.get("metadata") or {}
+                if offset is None:
+                    break
+
+        indexed = self.lexical_index.rebuild(normalized_workspace_id, scroll_points())
+        logger.info(f"Rebuilt BM25 index for workspace '{normalized_workspace_id}' from {indexed} points")
+        return indexed
+
     def get_collection_info(self) -> Dict[str, Any]:
         """Get collection statistics."""
         try:
@@ -461,6 +672,9 @@ class QdrantStorage:
 
 class RAGIngestionService:
     """Main RAG ingestion service coordinating all components."""
+
+    search_flight: Optional[SingleFlight] = None
+    stats: Optional[MaintainedStats] = None
     
     def __init__(
         self,
@@ -473,19 +687,23 @@ class RAGIngestionService:
         embedding_provider: str = "local",
         embedding_service_url: str = "http://localhost:8003",
         default_workspace_id: str = DEFAULT_WORKSPACE_ID,
-        graph_service: Optional[Any] = None
+        graph_service: Optional[Any] = None,
+        embedding_cache: Optional[EmbeddingCache] = None,
+        response_cache: Optional[SemanticResponseCache] = None,
+        search_flight: Optional[SingleFlight] = None
     ):
-        self.chunker = DocumentChunker(chunk_size=chunk_size, overlap=chunk_overlap)
-        normalized_provider = embedding_provider.strip().lower()
-        if normalized_provider == "service":
-            logger.info("Using HTTP embedding service provider")
-            self.embedder = HTTPEmbeddingServiceClient(
-                service_url=embedding_service_url,
-                model_name=embedding_model,
-            )
+        self.embedding_model = embedding_model
+        self.embedding_cache = embedding_cache or get_embedding_cache()
+        self.response_cache = response_cache or get_semantic_response_cache()
+        self.search_flight = search_flight or SingleFlight.from_env("rag_search")
+        self.embedder = create_embedder(embedding_provider, embedding_model, embedding_service_url)
+        if RAG_CHUNKER == "fixed":
+            self.chunker = DocumentChunker(chunk_size=chunk_size, overlap=chunk_overlap)
         else:
-            logger.info("Using in-process embedding provider")
-            self.embedder = NomicEmbedder(model_name=embedding_model)
+            self.chunker = StructuredChunker.from_env(
+                token_counter=build_token_counter(self.embedder, embedding_model)
+            )
+        logger.info(f"Using {type(self.chunker).__name__} for ingestion")
         self.storage = QdrantStorage(
             host=qdrant_host,
             port=qdrant_port,
@@ -493,10 +711,33 @@ class RAGIngestionService:
         )
         self.default_workspace_id = QdrantStorage._normalize_workspace_id(default_workspace_id)
         self.graph_service = graph_service
+        self.stats = MaintainedStats("rag", self.storage.get_collection_info)
         
         self.storage.create_collection(self.embedder.dimension)
         logger.info("RAG Ingestion Service initialized")
 
+    def _embed_query(self, query: str) -> List[float]:
+        """Embed a search query, reusing cached vectors for repeated queries."""
+        return self.embedding_cache.get_or_compute(self.embedding_model, query, self.embedder.embed_text)
+
+    def embed_query(self, query: str) -> List[float]:
+        """Embed a query for callers outside retrieval (e.g. the semantic answer cache)."""
+        return self._embed_query(query)
+
+    def _invalidate_cached_answers(self, workspace_id: str, document_ids: List[str], chunk_texts: List[str] = ()):
+        """Evict cached answers grounded on documents or chunks that were just rewritten or deleted."""
+        # Point IDs are idempotent, so writes cannot be counted; recount on the next stats read
+        if self.stats is not None:
+            self.stats.mark_stale()
+        try:
+            self.response_cache.invalidate(
+                workspace_id,
+                document_ids=document_ids,
+                chunk_hashes={_stable_chunk_hash(text) for text in chunk_texts},
+            )
+        except Exception as e:
+            logger.warning(f"Semantic cache invalidation failed: {e}")
+
     def _resolve_workspace_id(
         self,
         workspace_id: Optional[str] = None,
@@ -531,22 +772,13 @@ class RAGIngestionService:
 
         return next(iter(unique_values))
     
-    def ingest_document(
+    def _prepare_metadata(
         self,
         text: str,
-        metadata: Optional[Dict[str, Any]] = None,
-        workspace_id: Optional[str] = None,
-    ) -> Dict[str, Any]:
-        """
-        Ingest a document: chunk, embed, and store.
-        
-        Args:
-            text: Document text to ingest
-            metadata: Optional metadata for the document
-            
-        Returns:
-            Dictionary with ingestion results
-        """
+        metadata: Optional[Dict[str, Any]],
+        workspace_id: Optional[str],
+    ) -> Tuple[Dict[str, Any], str]:
+        """Validate a document and resolve its workspace and identifiers."""
         if not text:
             raise ValueError("Text cannot be empty")
         
@@ -562,28 +794,64 @@ class RAGIngestionService:
         
         metadata.setdefault("document_id", str(uuid.uuid4()))
         metadata.setdefault("ingestion_timestamp", datetime.utcnow().isoformat())
-        
+        return metadata, resolved_workspace_id
+
+    def _prepare_document(
+        self,
+        text: str,
+        metadata: Optional[Dict[str, Any]],
+        workspace_id: Optional[str],
+    ) -> Tuple[Dict[str, Any], str, List[Dict[str, Any]]]:
+        """Validate a document, resolve its workspace and identifiers, and chunk it."""
+        metadata, resolved_workspace_id = self._prepare_metadata(text, metadata, workspace_id)
         chunks = self.chunker.chunk_text(text, metadata)
-        logger.info(f"Created {len(chunks)} chunks from document")
-        
-        chunk_texts = [chunk["text"] for chunk in chunks]
-        chunk_metadatas = [chunk["metadata"] for chunk in chunks]
+        return metadata, resolved_workspace_id, chunks
+
+    def ingest_document(
+        self,
+        text: str,
+        metadata: Optional[Dict[str, Any]] = None,
+        workspace_id: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        Ingest a document: chunk, embed, and store.
+
+        Chunks are streamed from the chunker and embedded and stored
+        ``RAG_INGEST_EMBED_BATCH_SIZE`` at a time, so large files never hold
+        all of their chunks or vectors in memory.
         
-        embeddings = self.embedder.embed_batch(chunk_texts)
-        logger.info(f"Generated {len(embeddings)} embeddings")
+        Args:
+            text: Document text to ingest
+            metadata: Optional metadata for the document
+            
+        Returns:
+            Dictionary with ingestion results
+        """
+        metadata, resolved_workspace_id = self._prepare_metadata(text, metadata, workspace_id)
         
-        point_ids = self.storage.upsert_points(
-            chunk_texts,
-            embeddings,
-            chunk_metadatas,
-            workspace_id=resolved_workspace_id,
-        )
-        logger.info(f"Stored {len(point_ids)} points in Qdrant")
+        chunks = self.chunker.iter_chunks(text, metadata)
+        chunks_created = 0
+        point_ids: List[str] = []
+        while True:
+            batch = list(islice(chunks, RAG_INGEST_EMBED_BATCH_SIZE))
+            if not batch:
+                break
+            chunk_texts = [chunk["text"] for chunk in batch]
+            embeddings = self.embedder.embed_batch(chunk_texts)
+            point_ids.extend(self.storage.upsert_points(
+                chunk_texts,
+                embeddings,
+                [chunk["metadata"] for chunk in batch],
+                workspace_id=resolved_workspace_id,
+            ))
+            chunks_created += len(batch)
+            self._invalidate_cached_answers(resolved_workspace_id, [metadata["document_id"]], chunk_texts)
+        logger.info(f"Stored {len(point_ids)} points in Qdrant from {chunks_created} chunks")
         
         return {
             "status": "success",
             "document_id": metadata["document_id"],
-            "chunks_created": len(chunks),
+            "chunks_created": chunks_created,
             "points_stored": len(point_ids),
             "point_ids": point_ids,
             "workspace_id": resolved_workspace_id,
@@ -594,49 +862,272 @@ class RAGIngestionService:
         self,
         documents: List[Dict[str, Any]],
         workspace_id: Optional[str] = None,
+        embed_batch_size: int = RAG_INGEST_EMBED_BATCH_SIZE,
+        upsert_batch_size: int = RAG_INGEST_UPSERT_BATCH_SIZE,
+        pipeline: bool = RAG_INGEST_PIPELINE_ENABLED,
     ) -> Dict[str, Any]:
         """
         Ingest multiple documents.
+
+        All documents are chunked first; chunks are then embedded in large
+        ``embed_batch`` calls and written with one upsert per
+        ``upsert_batch_size`` points (per workspace) instead of one round trip
+        per document. With ``pipeline`` enabled, each upsert runs on a
+        background thread while the following batches are embedded. Only the
+        last upsert submitted waits for Qdrant to apply it.
+
+        Groups mix chunks from several documents, so when a group fails to
+        embed or upsert its documents are retried one at a time and only the
+        documents whose own chunks still fail are reported as ``error``.
+        Points already written for a failed document are deleted; if that
+        rollback fails too, the document is reported as ``partial`` with the
+        point IDs left behind.
         
         Args:
             documents: List of documents, each with 'text' and optional 'metadata'
+            workspace_id: Workspace override for every document
+            embed_batch_size: Chunks per embedding call
+            upsert_batch_size: Points per Qdrant upsert
+            pipeline: Overlap embedding of the next batch with the current upsert
             
         Returns:
-            Dictionary with batch ingestion results
+            Dictionary with batch ingestion results (one result per document, in order)
         """
-        results = []
-        total_chunks = 0
-        total_points = 0
-        
-        for doc in documents:
-            text = doc.get("text")
+        results: List[Optional[Dict[str, Any]]] = [None] * len(documents)
+        prepared: Dict[int, Dict[str, Any]] = {}
+        chunks_by_workspace: Dict[str, List[Tuple[int, Dict[str, Any]]]] = {}
+
+        for index, doc in enumerate(documents):
             metadata = doc.get("metadata", {})
-            
             try:
-                result = self.ingest_document(
-                    text,
+                doc_metadata, resolved_workspace_id, chunks = self._prepare_document(
+                    doc.get("text"),
                     metadata,
-                    workspace_id=workspace_id,
+                    workspace_id,
                 )
-                results.append(result)
-                total_chunks += result["chunks_created"]
-                total_points += result["points_stored"]
             except Exception as e:
                 logger.error(f"Error ingesting document: {e}")
-                results.append({
-                    "status": "error",
-                    "error": str(e),
-                    "metadata": metadata
-                })
-        
+                results[index] = {"status": "error", "error": str(e), "metadata": metadata}
+                continue
+            prepared[index] = {
+                "metadata": doc_metadata,
+                "workspace_id": resolved_workspace_id,
+                "chunks_created": len(chunks),
+                "point_ids": [],
+                "error": None,
+            }
+            chunks_by_workspace.setdefault(resolved_workspace_id, []).extend(
+                (index, chunk) for chunk in chunks
+            )
+
+        upsert_groups = [
+            (batch_workspace_id, pending[start:start + upsert_batch_size])
+            for batch_workspace_id, pending in chunks_by_workspace.items()
+            for start in range(0, len(pending), upsert_batch_size)
+        ]
+        embed_calls = 0
+        upsert_calls = 0
+
+        def embed(texts: List[str]) -> List[List[float]]:
+            nonlocal embed_calls
+            embeddings: List[List[float]] = []
+            for start in range(0, len(texts), embed_batch_size):
+                embeddings.extend(self.embedder.embed_batch(texts[start:start + embed_batch_size]))
+                embed_calls += 1
+            return embeddings
+
+        def isolate_documents(
+            batch_workspace_id: str,
+            batch: List[Tuple[int, Dict[str, Any]]],
+            error: Exception,
+            embeddings: Optional[List[List[float]]] = None,
+        ):
+            """Retry a failed group one document at a time so only the failing documents are reported."""
+            nonlocal upsert_calls
+            positions_by_document: Dict[int, List[int]] = {}
+            for position, (index, _) in enumerate(batch):
+                positions_by_document.setdefault(index, []).append(position)
+            if len(positions_by_document) == 1:
+                logger.error(f"Error ingesting batch of {len(batch)} chunks: {error}")
+                prepared[batch[0][0]]["error"] = str(error)
+                return
+            logger.warning(
+                f"Batch of {len(batch)} chunks from {len(positions_by_document)} documents failed ({error}); "
+                "retrying each document separately"
+            )
+            for index, positions in positions_by_document.items():
+                chunks = [batch[position][1] for position in positions]
+                texts = [chunk["text"] for chunk in chunks]
+                try:
+                    if embeddings is None:
+                        document_embeddings = embed(texts)
+                    else:
+                        document_embeddings = [embeddings[position] for position in positions]
+                    upsert_calls += 1
+                    point_ids = self.storage.upsert_points(
+                        texts,
+                        document_embeddings,
+                        [chunk["metadata"] for chunk in chunks],
+                        workspace_id=batch_workspace_id,
+                    )
+                except Exception as e:
+                    logger.error(f"Error ingesting document {prepared[index]['metadata']['document_id']}: {e}")
+                    prepared[index]["error"] = str(e)
+                    continue
+                prepared[index]["point_ids"].extend(point_ids)
+
+        def collect_upsert(batch_workspace_id, batch, embeddings, future: "Future[List[str]]"):
+            try:
+                point_ids = future.result()
+            except Exception as e:
+                isolate_documents(batch_workspace_id, batch, e, embeddings)
+                return
+            for (index, _), point_id in zip(batch, point_ids):
+                prepared[index]["point_ids"].append(point_id)
+
+        in_flight: Optional[Tuple[str, List[Tuple[int, Dict[str, Any]]], List[List[float]], "Future[List[str]]"]] = None
+        # One upsert runs in the background while the next batch is embedded on this thread
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix="rag-upsert") as upsert_executor:
+            def submit_upsert(batch_workspace_id, batch, texts, embeddings, wait):
+                nonlocal in_flight, upsert_calls
+                if in_flight is not None:
+                    collect_upsert(*in_flight)
+                upsert_calls += 1
+                in_flight = (batch_workspace_id, batch, embeddings, upsert_executor.submit(
+                    self.storage.upsert_points,
+                    texts,
+                    embeddings,
+                    [chunk["metadata"] for _, chunk in batch],
+                    workspace_id=batch_workspace_id,
+                    wait=wait,
+                ))
+                if not pipeline:
+                    collect_upsert(*in_flight)
+                    in_flight = None
+
+            # An embedded batch is submitted once the next one embeds, so the
+            # last batch actually written (not the last planned) is the one
+            # that waits, even when later batches fail to embed
+            embedded = None
+            for batch_workspace_id, batch in upsert_groups:
+                texts = [chunk["text"] for _, chunk in batch]
+                try:
+                    embeddings = embed(texts)
+                except Exception as e:
+                    isolate_documents(batch_workspace_id, batch, e)
+                    continue
+
+                if embedded is not None:
+                    submit_upsert(*embedded, wait=False)
+                embedded = (batch_workspace_id, batch, texts, embeddings)
+            if embedded is not None:
+                submit_upsert(*embedded, wait=True)
+            if in_flight is not None:
+                collect_upsert(*in_flight)
+
+        # A document that failed after some of its chunks were written (it
+        # spans several groups) is rolled back so it leaves no orphan points
+        for state in prepared.values():
+            if not (state["error"] and state["point_ids"]):
+                continue
+            try:
+                self.storage.delete_points(state["point_ids"], state["workspace_id"])
+            except Exception as e:
+                logger.error(f"Rollback of document {state['metadata']['document_id']} failed: {e}")
+                state["partial"] = True
+                continue
+            state["point_ids"] = []
+
+        for batch_workspace_id, pending in chunks_by_workspace.items():
+            self._invalidate_cached_answers(
+                batch_workspace_id,
+                list({prepared[index]["metadata"]["document_id"] for index, _ in pending}),
+                [chunk["text"] for _, chunk in pending],
+            )
+
+        total_chunks = 0
+        total_points = 0
+        for index, state in prepared.items():
+            if state.get("partial"):
+                results[index] = {
+                    "status": "partial",
+                    "error": state["error"],
+                    "document_id": state["metadata"]["document_id"],
+                    "points_stored": len(state["point_ids"]),
+                    "point_ids": state["point_ids"],
+                    "workspace_id": state["workspace_id"],
+                    "metadata": state["metadata"],
+                }
+                continue
+            if state["error"]:
+                results[index] = {"status": "error", "error": state["error"], "metadata": state["metadata"]}
+                continue
+            total_chunks += state["chunks_created"]
+            total_points += len(state["point_ids"])
+            results[index] = {
+                "status": "success",
+                "document_id": state["metadata"]["document_id"],
+                "chunks_created": state["chunks_created"],
+                "points_stored": len(state["point_ids"]),
+                "point_ids": state["point_ids"],
+                "workspace_id": state["workspace_id"],
+                "metadata": state["metadata"],
+            }
+
+        logger.info(
+            f"Batch ingested {len(documents)} documents: {total_points} points "
+            f"in {embed_calls} embed calls and {upsert_calls} upserts"
+        )
         return {
             "status": "success",
             "documents_processed": len(documents),
+            "documents_failed": sum(1 for result in results if result["status"] != "success"),
             "total_chunks": total_chunks,
             "total_points": total_points,
+            "embed_calls": embed_calls,
+            "upsert_calls": upsert_calls,
             "results": results
         }
     
+    def _lexical_candidates(
+        self,
+        query: str,
+        vector_results: List[Dict[str, Any]],
+        workspace_id: str,
+        limit: int,
+        filters: Optional[Dict[str, Any]] = None,
+        collection_name: Optional[str] = None,
+        term_sets: Optional[TermSets] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Produce the lexical ranking for RRF.
+
+        Uses the workspace BM25 index so lexical matches the vector search
+        missed become candidates; falls back to rescoring the vector
+        candidates when the index is unavailable, not yet rebuilt from the
+        corpus, or the query targets another collection.
+        """
+        if collection_name in (None, self.storage.collection_name):
+            try:
+                lexical_results = self.storage.lexical_search(
+                    query,
+                    workspace_id=workspace_id,
+                    limit=limit,
+                    filter_conditions=filters,
+                )
+            except Exception as e:
+                logger.warning(f"BM25 index search failed, rescoring vector candidates: {e}")
+                lexical_results = None
+            if isinstance(lexical_results, list):
+                for result in lexical_results:
+                    result_workspace = str((result.get("metadata") or {}).get("workspace_id", "")).strip()
+                    if result_workspace != workspace_id:
+                        raise ValueError(
+                            f"Cross-workspace retrieval leakage detected: expected={workspace_id} got={result_workspace}"
+                        )
+                return lexical_results
+        return rank_bm25_lite(query, vector_results, term_sets=term_sets)
+
     def search_documents(
         self,
         query: str,
@@ -647,6 +1138,9 @@ class RAGIngestionService:
     ) -> List[Dict[str, Any]]:
         """
         Search for relevant documents.
+
+        Identical concurrent searches (same workspace, normalized query,
+        filters, limit and collection) share one execution via ``search_flight``.
         
         Args:
             query: Search query text
@@ -661,7 +1155,32 @@ class RAGIngestionService:
             workspace_id=workspace_id,
             filters=filters,
         )
-        query_embedding = self.embedder.embed_text(query)
+        if self.search_flight is None:
+            return self._search_documents(query, limit, filters, collection_name, resolved_workspace_id)
+        key = SingleFlight.make_key(
+            resolved_workspace_id,
+            query,
+            limit=limit,
+            filters=filters,
+            collection_name=collection_name,
+        )
+        return self.search_flight.do(
+            key,
+            lambda: self._search_documents(query, limit, filters, collection_name, resolved_workspace_id),
+        )
+
+    def _search_documents(
+        self,
+        query: str,
+        limit: int,
+        filters: Optional[Dict[str, Any]],
+        collection_name: Optional[str],
+        resolved_workspace_id: str,
+    ) -> List[Dict[str, Any]]:
+        """Run one hybrid search (embed, vector + lexical candidates, fuse, rerank)."""
+        # Candidate token sets shared by the lexical and rerank stages of this search
+        term_sets: TermSets = {}
+        query_embedding = self._embed_query(query)
         candidate_limit = max(limit, limit * max(1, HYBRID_VECTOR_CANDIDATE_MULTIPLIER))
         vector_results = self.storage.search(
             query_embedding,
@@ -681,7 +1200,15 @@ class RAGIngestionService:
         if not HYBRID_RETRIEVAL_ENABLED:
             base_results = vector_results[:limit]
         else:
-            bm25_ranked = rank_bm25_lite(query, vector_results)
+            bm25_ranked = self._lexical_candidates(
+                query,
+                vector_results,
+                workspace_id=resolved_workspace_id,
+                limit=candidate_limit,
+                filters=filters,
+                collection_name=collection_name,
+                term_sets=term_sets,
+            )
             base_results = fuse_rrf(
                 vector_results,
                 bm25_ranked,
@@ -693,12 +1220,7 @@ class RAGIngestionService:
             return base_results[:limit]
 
         rerank_candidates = base_results[: max(limit, RERANK_MAX_CANDIDATES)]
-        return rerank_results(
-            query,
-            rerank_candidates,
-            alpha=_resolve_rerank_alpha(resolved_workspace_id),
-            top_k=limit,
-        )
+        return _rerank(query, rerank_candidates, resolved_workspace_id, top_k=limit, term_sets=term_sets)
 
     def semantic_search(
         self,
@@ -782,7 +1304,8 @@ class RAGIngestionService:
             workspace_id=workspace_id,
             filters=filters,
         )
-        query_embedding = self.embedder.embed_text(query)
+        term_sets: TermSets = {}
+        query_embedding = self._embed_query(query)
         candidate_limit = max(limit, limit * max(1, HYBRID_VECTOR_CANDIDATE_MULTIPLIER))
         vector_results = self.storage.search(
             query_embedding,
@@ -797,7 +1320,14 @@ class RAGIngestionService:
                     f"Cross-workspace retrieval leakage detected: expected={resolved_workspace_id} got={result_workspace}"
                 )
         if HYBRID_RETRIEVAL_ENABLED:
-            bm25_ranked = rank_bm25_lite(query, vector_results)
+            bm25_ranked = self._lexical_candidates(
+                query,
+                vector_results,
+                workspace_id=resolved_workspace_id,
+                limit=candidate_limit,
+                filters=filters,
+                term_sets=term_sets,
+            )
             vector_results = fuse_rrf(
                 vector_results,
                 bm25_ranked,
@@ -808,22 +1338,46 @@ class RAGIngestionService:
             vector_results = vector_results[: max(limit, RERANK_MAX_CANDIDATES)]
 
         if RERANK_ENABLED:
-            vector_results = rerank_results(
+            vector_results = _rerank(
                 query,
                 vector_results[: max(limit, RERANK_MAX_CANDIDATES)],
-                alpha=_resolve_rerank_alpha(resolved_workspace_id),
+                resolved_workspace_id,
                 top_k=limit,
+                term_sets=term_sets,
             )
         else:
             vector_results = vector_results[:limit]
         
+        unique_entities = self.extract_graph_entities(query, vector_results)
+        graph_context = self.collect_graph_context(
+            unique_entities,
+            graph_depth=graph_depth,
+            graph_limit=graph_limit,
+        )
+        return self.enrich_results_with_graph(query, vector_results, unique_entities, graph_context)
+
+    def extract_graph_entities(
+        self,
+        query: str,
+        vector_results: Optional[List[Dict[str, Any]]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Extract deduplicated entities from the query and the top search results.
+
+        Args:
+            query: Search query text
+            vector_results: Ranked search results (only the top 3 are analyzed)
+
+        Returns:
+            Unique entities in order of first appearance
+        """
         # Step 2: Extract entities from query
         logger.info("Extracting entities from query")
         query_entities = self.graph_service.extract_entities(query)
         
         # Step 3: Extract entities from top search results
         result_entities = []
-        for result in vector_results[:3]:  # Only analyze top 3 results
+        for result in (vector_results or [])[:3]:  # Only analyze top 3 results
             text = result.get("text", "")
             if text:
                 entities = self.graph_service.extract_entities(text)
@@ -840,7 +1394,25 @@ class RAGIngestionService:
                 unique_entities.append(entity)
         
         logger.info(f"Found {len(unique_entities)} unique entities")
-        
+        return unique_entities
+
+    def collect_graph_context(
+        self,
+        entities: List[Dict[str, Any]],
+        graph_depth: int = 1,
+        graph_limit: int = 10
+    ) -> Dict[str, Any]:
+        """
+        Query the knowledge graph for the neighborhood of each entity.
+
+        Args:
+            entities: Entities from ``extract_graph_entities``
+            graph_depth: Maximum depth for graph traversal (1-3)
+            graph_limit: Maximum number of graph neighbors per entity
+
+        Returns:
+            Graph context with entities, relationships and subgraphs
+        """
         # Step 4: Query graph for each entity's neighborhood
         graph_context = {
             "entities": [],
@@ -848,7 +1420,7 @@ class RAGIngestionService:
             "subgraphs": []
         }
         
-        for entity in unique_entities[:5]:  # Limit to top 5 entities to avoid overload
+        for entity in entities[:5]:  # Limit to top 5 entities to avoid overload
             try:
                 # Get entity neighbors from graph
                 neighbors_data = self.graph_service.get_neighbors(
@@ -885,6 +1457,27 @@ class RAGIngestionService:
             except Exception as e:
                 logger.warning(f"Error querying graph for entity {entity['text']}: {e}")
         
+        return graph_context
+
+    def enrich_results_with_graph(
+        self,
+        query: str,
+        vector_results: List[Dict[str, Any]],
+        entities: List[Dict[str, Any]],
+        graph_context: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """
+        Attach graph context to search results.
+
+        Args:
+            query: Search query text
+            vector_results: Ranked search results
+            entities: Entities the graph context was collected for
+            graph_context: Output of ``collect_graph_context``
+
+        Returns:
+            Dictionary with enriched vector results, graph context and stats
+        """
         # Step 5: Enrich vector results with graph context
         enriched_results = []
         for result in vector_results:
@@ -892,7 +1485,7 @@ class RAGIngestionService:
             
             # Find related graph entities for this result
             related_entities = []
-            for entity in unique_entities:
+            for entity in entities:
                 if entity["text"].lower() in result.get("text", "").lower():
                     # Find this entity's neighbors in graph context
                     for subgraph in graph_context["subgraphs"]:
@@ -916,7 +1509,7 @@ class RAGIngestionService:
             "enriched": True,
             "stats": {
                 "vector_results_count": len(vector_results),
-                "entities_found": len(unique_entities),
+                "entities_found": len(entities),
                 "entities_in_graph": len(graph_context["entities"]),
                 "relationships_found": len(graph_context["relationships"]),
                 "subgraphs": len(graph_context["subgraphs"])
@@ -981,8 +1574,14 @@ class RAGIngestionService:
             document_id,
             workspace_id=resolved_workspace_id,
         )
+        self._invalidate_cached_answers(resolved_workspace_id, [document_id])
         logger.info(f"Deleted document: {document_id}")
     
     def get_stats(self) -> Dict[str, Any]:
-        """Get RAG service statistics."""
-        return self.storage.get_collection_info()
+        """
+        Get RAG service statistics.
+
+        Served from the last collection info read (see ``MaintainedStats``);
+        only the very first call queries Qdrant synchronously.
+        """
+        return self.stats.get()
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Concurrent retrieval fan-out with per-source deadlines.
+
+Memory, RAG and graph lookups are independent, so running them one after
+another makes context assembly cost the sum of the stages. ``fan_out_retrieval``
+starts every stage at once and waits for each one up to its own deadline;
+a stage that errors or misses its budget is reported instead of failing the
+whole request, so callers can answer with whatever sources did return.
+"""
+
+import os
+import time
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+STAGE_OK = "ok"
+STAGE_TIMEOUT = "timeout"
+STAGE_ERROR = "error"
+
+
+def _deadline_seconds(name: str, default_ms: str) -> Optional[float]:
+    value = float(os.getenv(name, default_ms))
+    return value / 1000.0 if value > 0 else None
+
+
+@dataclass
+class RetrievalDeadlines:
+    """Per-source retrieval budgets in seconds (None disables the deadline)."""
+    memory_seconds: Optional[float] = 0.8
+    rag_seconds: Optional[float] = 5.0
+    graph_seconds: Optional[float] = 1.5
+
+    @classmethod
+    def from_env(cls) -> "RetrievalDeadlines":
+        """Load budgets from RETRIEVAL_*_DEADLINE_MS environment variables (0 = no deadline)."""
+        return cls(
+            memory_seconds=_deadline_seconds("RETRIEVAL_MEMORY_DEADLINE_MS", "800"),
+            rag_seconds=_deadline_seconds("RETRIEVAL_RAG_DEADLINE_MS", "5000"),
+            graph_seconds=_deadline_seconds("RETRIEVAL_GRAPH_DEADLINE_MS", "1500"),
+        )
+
+
+@dataclass
+class RetrievalStage:
+    """One retrieval source: a coroutine factory and its deadline."""
+    name: str
+    run: Callable[[], Awaitable[Any]]
+    deadline_seconds: Optional[float] = None
+
+
+@dataclass
+class StageResult:
+    """Outcome of a retrieval stage."""
+    name: str
+    status: str
+    value: Any = None
+    error: Optional[BaseException] = None
+    elapsed_ms: float = 0.0
+    deadline_ms: Optional[float] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.status == STAGE_OK
+
+    def to_metadata(self) -> Dict[str, Any]:
+        metadata = {
+            "status": self.status,
+            "elapsed_ms": round(self.elapsed_ms, 2),
+            "deadline_ms": self.deadline_ms,
+        }
+        if self.error is not None and self.status == STAGE_ERROR:
+            metadata["error"] = str(self.error)
+        return metadata
+
+
+async def _run_stage(stage: RetrievalStage) -> StageResult:
+    deadline_ms = round(stage.deadline_seconds * 1000, 2) if stage.deadline_seconds else None
+    start = time.perf_counter()
+    try:
+        value = await asyncio.wait_for(stage.run(), timeout=stage.deadline_seconds)
+        status, error = STAGE_OK, None
+    except asyncio.TimeoutError as e:
+        value, status, error = None, STAGE_TIMEOUT, e
+        logger.warning(f"Retrieval stage '{stage.name}' missed its {deadline_ms}ms deadline")
+    except Exception as e:
+        value, status, error = None, STAGE_ERROR, e
+        logger.warning(f"Retrieval stage '{stage.name}' failed: {e}")
+    return StageResult(
+        name=stage.name,
+        status=status,
+        value=value,
+        error=error,
+        elapsed_ms=(time.perf_counter() - start) * 1000,
+        deadline_ms=deadline_ms,
+    )
+
+
+async def fan_out_retrieval(*stages: RetrievalStage) -> Dict[str, StageResult]:
+    """
+    Run retrieval stages concurrently.
+
+    Args:
+        *stages: Stages to start together
+
+    Returns:
+        Stage results keyed by stage name; never raises for a failed stage
+    """
+    results = await asyncio.gather(*(_run_stage(stage) for stage in stages))
+    return {result.name: result for result in results}
+
+
+def retrieval_timing_metadata(results: Dict[str, StageResult], total_ms: float) -> Dict[str, Any]:
+    """
+    Summarize stage timings for ``x-routing-metadata``.
+
+    Args:
+        results: Output of ``fan_out_retrieval``
+        total_ms: Wall-clock time of the fan-out
+
+    Returns:
+        Per-stage status/timing plus wall-clock and serial-equivalent totals
+    """
+    return {
+        "concurrent": True,
+        "stages": {name: result.to_metadata() for name, result in results.items()},
+        "total_ms": round(total_ms, 2),
+        "sum_of_stages_ms": round(sum(result.elapsed_ms for result in results.values()), 2),
+        "partial": any(not result.ok for result in results.values()),
+    }
@@ -24,6 +24,10 @@ import httpx
 import psycopg2
 from qdrant_client import QdrantClient
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from qdrant_client_factory import create_qdrant_client
+
 try:
     from boto3 import client as boto3_client
     from botocore.exceptions import ClientError
@@ -409,7 +413,7 @@ class DisasterRecoveryDrill:
             time.sleep(5)
             
             # Get point count
-            qdrant_client = QdrantClient(
+            qdrant_client = create_qdrant_client(
                 host=self.new_cluster_config['qdrant_host'],
                 port=self.new_cluster_config['qdrant_port']
             )
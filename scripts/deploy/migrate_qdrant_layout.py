@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""Apply the configured Qdrant storage layout to existing RAG collections.
+
+Creates missing payload indexes, updates HNSW / quantization / on-disk
+settings and, with --move-dedicated, moves workspaces listed in
+QDRANT_DEDICATED_WORKSPACES out of the shared collection into their own.
+Layout settings come from the same QDRANT_* environment variables the
+services use (see qdrant_layout.CollectionLayoutConfig).
+
+Dry run by default; pass --apply to make changes.
+
+Usage:
+    python scripts/deploy/migrate_qdrant_layout.py --collection documents
+    python scripts/deploy/migrate_qdrant_layout.py --collection documents --apply --move-dedicated
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from qdrant_client_factory import create_qdrant_client  # noqa: E402
+from qdrant_layout import CollectionLayoutConfig, QdrantLayoutManager  # noqa: E402
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Migrate Qdrant collections to the configured storage layout")
+    parser.add_argument("--host", default=os.getenv("QDRANT_HOST", "localhost"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("QDRANT_PORT", "6333")))
+    parser.add_argument("--collection", default=os.getenv("QDRANT_COLLECTION", "documents"))
+    parser.add_argument("--vector-size", type=int, default=768, help="Dimension for dedicated collections that do not exist yet")
+    parser.add_argument("--move-dedicated", action="store_true", help="Move dedicated workspaces out of the shared collection")
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--apply", action="store_true", help="Apply changes (dry run otherwise)")
+    args = parser.parse_args()
+
+    client = create_qdrant_client(host=args.host, port=args.port)
+    manager = QdrantLayoutManager(client, CollectionLayoutConfig.from_env())
+    existing = {collection.name for collection in client.get_collections().collections}
+    if args.collection not in existing:
+        logger.error(f"Collection '{args.collection}' does not exist")
+        return 1
+
+    report = {"apply": args.apply, "collections": [], "moved_points": {}}
+    for collection_name in manager.managed_collections(args.collection):
+        if collection_name not in existing:
+            if args.apply:
+                manager.ensure_collection(collection_name, args.vector_size, base_collection=args.collection)
+            report["collections"].append({"collection": collection_name, "created": args.apply, "missing": True})
+            continue
+        report["collections"].append(manager.migrate(collection_name, base_collection=args.collection, apply=args.apply))
+
+    if args.move_dedicated:
+        for workspace_id in manager.config.dedicated_workspaces:
+            report["moved_points"][workspace_id] = manager.move_workspace_points(
+                args.collection,
+                workspace_id,
+                batch_size=args.batch_size,
+                apply=args.apply,
+            )
+
+    print(json.dumps(report, indent=2, default=str))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""Rebuild per-workspace BM25 lexical indexes from the points in Qdrant.
+
+Upserts only add the points they write, so a workspace index is not used for
+retrieval (rank_bm25_lite rescoring is used instead) until it has been
+rebuilt from the full corpus once. Run this after enabling the index on an
+existing corpus, or to repair an index that drifted. Index settings come from
+the same BM25_INDEX_* environment variables the services use.
+
+Usage:
+    python scripts/deploy/rebuild_bm25_index.py --collection documents --workspace ws-a ws-b
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from bm25_index import BM25IndexManager  # noqa: E402
+from rag_service import QdrantStorage  # noqa: E402
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Rebuild BM25 lexical indexes from Qdrant")
+    parser.add_argument("--host", default=os.getenv("QDRANT_HOST", "localhost"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("QDRANT_PORT", "6333")))
+    parser.add_argument("--collection", default=os.getenv("QDRANT_COLLECTION", "documents"))
+    parser.add_argument("--workspace", nargs="+", required=True, help="Workspace IDs to rebuild")
+    parser.add_argument("--batch-size", type=int, default=256)
+    args = parser.parse_args()
+
+    storage = QdrantStorage(
+        host=args.host,
+        port=args.port,
+        collection_name=args.collection,
+        lexical_index=BM25IndexManager.from_env(args.collection),
+    )
+
+    report = {"collection": args.collection, "workspaces": {}}
+    for workspace_id in args.workspace:
+        report["workspaces"][workspace_id] = storage.rebuild_lexical_index(workspace_id, batch_size=args.batch_size)
+
+    print(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""Memory budget allocation benchmark.
+
+Reports p50/p95 latency of ``MemoryBudgetAllocator.allocate_memory_budget``
+(columnar scoring, top-k selection per tier) against the per-item path it
+replaced (``calculate_memory_score`` per memory, full sort per tier) for
+synthetic memory sets, and checks both select the same memories.
+
+Usage:
+    python scripts/eval/bench_memory_budget.py --memories 10000 100000 --repeats 5
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from memory_budget_allocator import (  # noqa: E402
+    MemoryBudgetAllocator,
+    MemoryItem,
+    MemoryTier,
+    WorkspaceConfig,
+)
+
+QUERY = "summarize the deployment decisions for the gateway"
+
+
+def _memories(count: int, seed: int) -> List[MemoryItem]:
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc)
+    tiers = list(MemoryTier)
+    return [
+        MemoryItem(
+            memory_id=f"mem-{seed}-{index}",
+            text="memory " * rng.randint(5, 120),
+            tier=rng.choice(tiers),
+            timestamp=now - timedelta(minutes=rng.randint(0, 60 * 24 * 90)),
+            relevance_score=rng.random(),
+            importance_score=rng.random(),
+        )
+        for index in range(count)
+    ]
+
+
+def _per_item_allocation(allocator: MemoryBudgetAllocator, items: List[MemoryItem]) -> List[str]:
+    """The allocation loop before columnar scoring, for comparison."""
+    config = allocator.default_config
+    complexity = allocator.estimate_query_complexity(QUERY)
+    current_time = datetime.now(timezone.utc)
+    for item in items:
+        if item.token_count == 0:
+            item.token_count = allocator.estimate_token_count(item.text, config)
+        allocator.calculate_memory_score(item, config, current_time)
+    selected = []
+    for tier in MemoryTier:
+        tier_budget = config.get_tier_budget(tier, complexity)
+        tokens_used = 0
+        for item in sorted((m for m in items if m.tier == tier), key=lambda x: x.combined_score, reverse=True):
+            if tokens_used + item.token_count <= tier_budget:
+                selected.append(item.memory_id)
+                tokens_used += item.token_count
+    return selected
+
+
+def _percentiles(samples: List[float]) -> Dict[str, float]:
+    ordered = sorted(samples)
+    return {
+        "p50_ms": round(statistics.median(ordered), 3),
+        "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 3),
+    }
+
+
+def _time(fn: Callable[[], Any], repeats: int) -> List[float]:
+    samples = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--memories", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--max-total-tokens", type=int, default=8192)
+    args = parser.parse_args()
+
+    config = WorkspaceConfig(workspace_id="default", max_total_tokens=args.max_total_tokens)
+    allocator = MemoryBudgetAllocator(default_config=config, log_allocations=False)
+
+    rows = []
+    for count in args.memories:
+        items = _memories(count, seed=count)
+        result = allocator.allocate_memory_budget(QUERY, items)
+        columnar_ids = [
+            memory["memory_id"]
+            for tier in MemoryTier
+            for memory in result["tiers"][tier.value]["selected_memories"]
+        ]
+        rows.append({
+            "memories": count,
+            "selected": result["total_memories_selected"],
+            "same_selection": columnar_ids == _per_item_allocation(allocator, _memories(count, seed=count)),
+            "columnar": _percentiles(_time(lambda: allocator.allocate_memory_budget(QUERY, items), args.repeats)),
+            "per_item": _percentiles(_time(lambda: _per_item_allocation(allocator, items), args.repeats)),
+        })
+
+    report = {
+        "query": QUERY,
+        "complexity": allocator.estimate_query_complexity(QUERY).value,
+        "max_total_tokens": args.max_total_tokens,
+        "repeats": args.repeats,
+        "results": rows,
+    }
+    print(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""Qdrant REST vs gRPC transport benchmark.
+
+Upserts random vectors into a scratch collection and runs filtered searches
+against a local Qdrant once per transport, reporting upsert throughput
+(points/s) and search throughput/latency. Clients come from
+qdrant_client_factory, so QDRANT_* connection settings apply.
+
+Usage:
+    python scripts/eval/bench_qdrant_transport.py --points 20000 --dim 768 --searches 1000
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+# Needs: python-package:qdrant-client>=1.7.1
+from qdrant_client import models  # noqa: E402
+
+from qdrant_client_factory import create_qdrant_client  # noqa: E402
+
+
+def _vectors(count: int, dim: int, rng: random.Random) -> List[List[float]]:
+    return [[rng.uniform(-1.0, 1.0) for _ in range(dim)] for _ in range(count)]
+
+
+def run_transport(args: argparse.Namespace, prefer_grpc: bool) -> Dict[str, Any]:
+    """Benchmark one transport against a fresh scratch collection."""
+    transport = "grpc" if prefer_grpc else "rest"
+    collection = f"{args.collection_prefix}_{transport}"
+    client = create_qdrant_client(
+        host=args.host,
+        port=args.port,
+        grpc_port=args.grpc_port,
+        prefer_grpc=prefer_grpc,
+        timeout_seconds=60,
+    )
+    rng = random.Random(args.seed)
+    client.delete_collection(collection)
+    client.create_collection(
+        collection_name=collection,
+        vectors_config=models.VectorParams(size=args.dim, distance=models.Distance.COSINE),
+    )
+
+    try:
+        upsert_seconds = 0.0
+        for start in range(0, args.points, args.batch_size):
+            count = min(args.batch_size, args.points - start)
+            points = [
+                models.PointStruct(
+                    id=start + offset,
+                    vector=vector,
+                    payload={"workspace_id": f"ws-{(start + offset) % args.workspaces}"},
+                )
+                for offset, vector in enumerate(_vectors(count, args.dim, rng))
+            ]
+            started = time.perf_counter()
+            client.upsert(collection_name=collection, points=points, wait=True)
+            upsert_seconds += time.perf_counter() - started
+
+        queries = _vectors(args.searches, args.dim, rng)
+        latencies = []
+        for index, query in enumerate(queries):
+            query_filter = models.Filter(must=[
+                models.FieldCondition(key="workspace_id", match=models.MatchValue(value=f"ws-{index % args.workspaces}"))
+            ])
+            started = time.perf_counter()
+            client.search(
+                collection_name=collection,
+                query_vector=query,
+                query_filter=query_filter,
+                limit=args.limit,
+                with_payload=True,
+            )
+            latencies.append((time.perf_counter() - started) * 1000)
+    finally:
+        client.delete_collection(collection)
+        client.close()
+
+    latencies.sort()
+    return {
+        "transport": transport,
+        "upsert_points_per_second": round(args.points / upsert_seconds, 1) if upsert_seconds else None,
+        "search_qps": round(len(latencies) / (sum(latencies) / 1000.0), 1) if latencies else None,
+        "search_p50_ms": round(statistics.median(latencies), 3) if latencies else None,
+        "search_p95_ms": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 3) if latencies else None,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Compare Qdrant upsert/search throughput over REST and gRPC")
+    parser.add_argument("--host", default=os.getenv("QDRANT_HOST", "localhost"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("QDRANT_PORT", "6333")))
+    parser.add_argument("--grpc-port", type=int, default=int(os.getenv("QDRANT_GRPC_PORT", "6334")))
+    parser.add_argument("--points", type=int, default=20000)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--searches", type=int, default=1000)
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--workspaces", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--collection-prefix", default="bench_transport")
+    args = parser.parse_args()
+
+    results = [run_transport(args, prefer_grpc=False), run_transport(args, prefer_grpc=True)]
+    rest, grpc = results
+    speedup = {
+        "upsert": round(grpc["upsert_points_per_second"] / rest["upsert_points_per_second"], 2),
+        "search": round(grpc["search_qps"] / rest["search_qps"], 2),
+    }
+    print(json.dumps({"points": args.points, "dim": args.dim, "results": results, "grpc_speedup": speedup}, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
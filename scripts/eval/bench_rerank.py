@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""Rerank latency benchmark.
+
+Reports p50/p95 rerank latency versus candidate count for the cheap lexical
+reranker and the cross-encoder reranker (cold: empty score cache, cached:
+same query repeated). Candidates are synthetic chunks so the numbers isolate
+reranking cost from retrieval.
+
+Usage:
+    python scripts/eval/bench_rerank.py --candidates 10 20 40 80 --repeats 20
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from cheap_reranker import rerank_results  # noqa: E402
+from cross_encoder_reranker import CrossEncoderReranker, DEFAULT_CROSS_ENCODER_MODEL  # noqa: E402
+
+VOCABULARY = (
+    "qdrant collection payload index workspace tenant shard replica vector "
+    "embedding chunk document ingestion worker queue retry latency budget "
+    "rerank cache memory graph entity relation query answer citation source"
+).split()
+
+
+def _candidates(count: int, seed: int) -> List[Dict[str, Any]]:
+    rng = random.Random(seed)
+    rows = []
+    for index in range(count):
+        text = " ".join(rng.choice(VOCABULARY) for _ in range(120))
+        rows.append({
+            "id": f"chunk-{seed}-{index}",
+            "text": text,
+            "score": round(rng.random(), 6),
+            "metadata": {"chunk_hash": f"{seed:08x}{index:08x}"},
+        })
+    return rows
+
+
+def _percentiles(samples: List[float]) -> Dict[str, float]:
+    ordered = sorted(samples)
+    return {
+        "p50_ms": round(statistics.median(ordered), 3),
+        "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 3),
+    }
+
+
+def _time(fn: Callable[[], Any], repeats: int) -> List[float]:
+    samples = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--candidates", type=int, nargs="+", default=[10, 20, 40, 80])
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--model", default=DEFAULT_CROSS_ENCODER_MODEL)
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--skip-cross-encoder", action="store_true")
+    args = parser.parse_args()
+
+    query = "how are rerank cache entries keyed per workspace chunk"
+    cross_encoder = None
+    if not args.skip_cross_encoder:
+        # Budget disabled so cold numbers measure the model, not the fallback
+        cross_encoder = CrossEncoderReranker(
+            model_name=args.model,
+            batch_size=args.batch_size,
+            latency_budget_ms=0,
+        )
+        cross_encoder.rerank(query, _candidates(2, seed=-1), top_k=1)  # load the model
+
+    rows = []
+    for count in args.candidates:
+        row: Dict[str, Any] = {"candidates": count}
+        fixed = _candidates(count, seed=count)
+        row["cheap"] = _percentiles(_time(lambda: rerank_results(query, fixed, top_k=args.top_k), args.repeats))
+
+        if cross_encoder is not None:
+            cold_sets = iter([_candidates(count, seed=count * 1000 + i) for i in range(args.repeats)])
+            row["cross_encoder_cold"] = _percentiles(_time(
+                lambda: cross_encoder.rerank(query, next(cold_sets), top_k=args.top_k),
+                args.repeats,
+            ))
+            cross_encoder.rerank(query, fixed, top_k=args.top_k)
+            row["cross_encoder_cached"] = _percentiles(_time(
+                lambda: cross_encoder.rerank(query, fixed, top_k=args.top_k),
+                args.repeats,
+            ))
+        rows.append(row)
+
+    report = {"query": query, "top_k": args.top_k, "repeats": args.repeats, "results": rows}
+    if cross_encoder is not None:
+        report["cross_encoder"] = cross_encoder.get_stats()
+        cross_encoder.shutdown()
+    print(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
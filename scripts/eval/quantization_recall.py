@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""Quantization recall@k comparison.
+
+Replays golden-set questions against an unquantized collection and a
+quantized copy of it, and reports recall@k of the quantized search (with
+oversampling and rescoring) against exact full-precision search, alongside
+the vector memory footprint of both layouts.
+
+The quantized copy is built from the baseline collection with --build
+(points are copied with their original vectors and payloads).
+
+Usage:
+    python scripts/eval/quantization_recall.py --collection documents --quantization scalar --build
+    python scripts/eval/quantization_recall.py --quantization binary --oversampling 2 3 4 --k 5 10
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Sequence
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+# Needs: python-package:qdrant-client>=1.7.1
+from qdrant_client import QdrantClient, models  # noqa: E402
+
+from qdrant_client_factory import create_qdrant_client  # noqa: E402
+from qdrant_layout import CollectionLayoutConfig, QdrantLayoutManager, TENANT_FIELD  # noqa: E402
+
+# Bytes per dimension held in RAM by each layout
+BYTES_PER_DIMENSION = {"none": 4.0, "scalar": 1.0, "binary": 1.0 / 8.0}
+
+
+def _load_cases(path: Path) -> List[Dict[str, Any]]:
+    payload = json.loads(path.read_text(encoding="utf-8"))
+    cases = payload.get("cases", []) if isinstance(payload, dict) else payload
+    return [case for case in cases if isinstance(case, dict) and case.get("question")]
+
+
+def _embedder(provider: str, model_name: str, service_url: str):
+    from embedding_providers import HTTPEmbeddingServiceClient, NomicEmbedder
+
+    if provider == "service":
+        return HTTPEmbeddingServiceClient(service_url=service_url, model_name=model_name)
+    return NomicEmbedder(model_name=model_name)
+
+
+def _workspace_filter(workspace_id: str) -> models.Filter:
+    return models.Filter(
+        must=[models.FieldCondition(key=TENANT_FIELD, match=models.MatchValue(value=workspace_id))]
+    )
+
+
+def build_quantized_copy(client: QdrantClient, manager: QdrantLayoutManager, source: str, target: str, batch_size: int) -> int:
+    """Copy every point of ``source`` into a quantized ``target`` collection."""
+    vector_size = client.get_collection(source).config.params.vectors.size
+    manager.ensure_collection(target, vector_size)
+    copied = 0
+    offset = None
+    while True:
+        records, offset = client.scroll(
+            collection_name=source,
+            limit=batch_size,
+            offset=offset,
+            with_payload=True,
+            with_vectors=True,
+        )
+        if records:
+            client.upsert(
+                collection_name=target,
+                points=[models.PointStruct(id=r.id, vector=r.vector, payload=r.payload) for r in records],
+                wait=True,
+            )
+            copied += len(records)
+        if offset is None:
+            return copied
+
+
+def _search_ids(client: QdrantClient, collection: str, vector: Sequence[float], workspace_id: str, limit: int, params) -> List[Any]:
+    hits = client.search(
+        collection_name=collection,
+        query_vector=list(vector),
+        query_filter=_workspace_filter(workspace_id),
+        limit=limit,
+        search_params=params,
+        with_payload=False,
+    )
+    return [hit.id for hit in hits]
+
+
+def _memory_report(client: QdrantClient, collection: str, quantization: str) -> Dict[str, Any]:
+    info = client.get_collection(collection)
+    points = info.points_count or 0
+    dimension = info.config.params.vectors.size
+    full_bytes = points * dimension * BYTES_PER_DIMENSION["none"]
+    ram_bytes = points * dimension * BYTES_PER_DIMENSION[quantization]
+    return {
+        "points": points,
+        "dimension": dimension,
+        "float32_vector_bytes": int(full_bytes),
+        "quantized_ram_bytes": int(ram_bytes),
+        "ram_reduction": round(full_bytes / ram_bytes, 2) if ram_bytes else None,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Compare recall@k of quantized vs unquantized Qdrant search")
+    parser.add_argument("--golden-set", default="eval/golden_set_eng_v2.json")
+    parser.add_argument("--host", default=os.getenv("QDRANT_HOST", "localhost"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("QDRANT_PORT", "6333")))
+    parser.add_argument("--collection", default=os.getenv("QDRANT_COLLECTION", "documents"))
+    parser.add_argument("--quantized-collection", default=None, help="Defaults to <collection>__<quantization>")
+    parser.add_argument("--quantization", choices=["scalar", "binary"], default="scalar")
+    parser.add_argument("--oversampling", type=float, nargs="+", default=[1.0, 2.0, 3.0])
+    parser.add_argument("--k", type=int, nargs="+", default=[5, 10])
+    parser.add_argument("--build", action="store_true", help="Build the quantized copy from --collection first")
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--embedding-provider", choices=["local", "service"], default=os.getenv("RAG_EMBEDDING_PROVIDER", "local"))
+    parser.add_argument("--embedding-model", default=os.getenv("RAG_EMBEDDING_MODEL", "nomic-ai/nomic-embed-text-v1.5"))
+    parser.add_argument("--embedding-service-url", default=os.getenv("RAG_EMBEDDING_SERVICE_URL", "http://localhost:8003"))
+    parser.add_argument("--output", default=None, help="Write the JSON report to this path")
+    args = parser.parse_args()
+
+    client = create_qdrant_client(host=args.host, port=args.port)
+    quantized = args.quantized_collection or f"{args.collection}__{args.quantization}"
+    manager = QdrantLayoutManager(
+        client,
+        CollectionLayoutConfig(tenant_mode="shared", quantization=args.quantization, vectors_on_disk=True),
+    )
+    if args.build:
+        copied = build_quantized_copy(client, manager, args.collection, quantized, args.batch_size)
+        print(f"Copied {copied} points into '{quantized}'", file=sys.stderr)
+
+    cases = _load_cases(Path(args.golden_set))
+    embedder = _embedder(args.embedding_provider, args.embedding_model, args.embedding_service_url)
+    vectors = embedder.embed_batch([case["question"] for case in cases])
+    max_k = max(args.k)
+    exact = models.SearchParams(exact=True)
+
+    truth = [
+        _search_ids(client, args.collection, vector, case.get("workspace_id", "default"), max_k, exact)
+        for case, vector in zip(cases, vectors)
+    ]
+
+    runs = []
+    for oversampling in args.oversampling:
+        params = models.SearchParams(
+            quantization=models.QuantizationSearchParams(ignore=False, rescore=True, oversampling=oversampling)
+        )
+        recalls: Dict[int, List[float]] = {k: [] for k in args.k}
+        latencies = []
+        for case, vector, expected in zip(cases, vectors, truth):
+            if not expected:
+                continue
+            started = time.perf_counter()
+            found = _search_ids(client, quantized, vector, case.get("workspace_id", "default"), max_k, params)
+            latencies.append((time.perf_counter() - started) * 1000)
+            for k in args.k:
+                relevant = set(expected[:k])
+                recalls[k].append(len(relevant & set(found[:k])) / len(relevant))
+        runs.append({
+            "oversampling": oversampling,
+            **{f"recall@{k}": round(statistics.mean(values), 4) if values else None for k, values in recalls.items()},
+            "queries": len(latencies),
+            "p50_search_ms": round(statistics.median(latencies), 3) if latencies else None,
+        })
+
+    report = {
+        "golden_set": args.golden_set,
+        "baseline_collection": args.collection,
+        "quantized_collection": quantized,
+        "quantization": args.quantization,
+        "memory": _memory_report(client, quantized, args.quantization),
+        "runs": runs,
+    }
+    rendered = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.output).write_text(rendered, encoding="utf-8")
+    print(rendered)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
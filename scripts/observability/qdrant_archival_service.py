@@ -13,11 +13,15 @@ import json
 from typing import List, Dict, Any, Optional
 from datetime import datetime, timedelta
 import gzip
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
 
 # Needs: python-package:qdrant-client>=1.7.0
-from qdrant_client import QdrantClient
 from qdrant_client.models import Filter, FieldCondition, Range
 
+from qdrant_client_factory import create_qdrant_client
+
 # Needs: python-package:minio>=7.2.0
 from minio import Minio
 from minio.error import S3Error
@@ -57,7 +61,7 @@ class QdrantArchivalService:
             batch_size: Number of points to process per batch
             dry_run: If True, simulate archival without deleting data
         """
-        self.qdrant_client = QdrantClient(host=qdrant_host, port=qdrant_port)
+        self.qdrant_client = create_qdrant_client(host=qdrant_host, port=qdrant_port)
         self.archival_age_days = archival_age_days
         self.batch_size = batch_size
         self.dry_run = dry_run
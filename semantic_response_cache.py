@@ -0,0 +1,405 @@
+#!/usr/bin/env python3
+"""
+Workspace-scoped semantic cache of grounded answers.
+
+Teams ask the same questions over and over ("how do I deploy", "where is the
+runbook"), and each one pays for retrieval plus generation. ``SemanticResponseCache``
+keeps recent grounded answers per workspace keyed on the query embedding and
+serves one when a new query lands within ``similarity_threshold`` cosine of a
+cached query in the same scope (endpoint, filters, top-k, grounding intent).
+
+Each entry remembers the ``document_id`` and ``chunk_hash`` of the chunks its
+answer was grounded on; re-ingesting or deleting any of them evicts the entry.
+With ``SEMANTIC_CACHE_REDIS_URL`` set, every invalidation also bumps a
+per-workspace version key in Redis, and a process whose copy of the workspace
+is older drops it on its next lookup, so ingestion in the RQ worker evicts
+answers cached by the API server. Entries also expire after ``ttl_seconds``.
+"""
+
+import os
+import time
+import hashlib
+import json
+import logging
+import threading
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def _env_bool(name: str, default: str) -> bool:
+    return os.getenv(name, default).strip().lower() in ("1", "true", "yes")
+
+
+@dataclass
+class SemanticCacheConfig:
+    """Semantic response cache settings."""
+    enabled: bool = True
+    similarity_threshold: float = 0.95
+    ttl_seconds: int = 3600
+    max_entries_per_workspace: int = 1000
+    redis_url: str = ""
+    redis_key_prefix: str = "semantic_cache:version:"
+
+    @classmethod
+    def from_env(cls) -> "SemanticCacheConfig":
+        """Load settings from SEMANTIC_CACHE_* environment variables."""
+        return cls(
+            enabled=_env_bool("SEMANTIC_CACHE_ENABLED", "true"),
+            similarity_threshold=float(os.getenv("SEMANTIC_CACHE_SIMILARITY_THRESHOLD", "0.95")),
+            ttl_seconds=int(os.getenv("SEMANTIC_CACHE_TTL_SECONDS", "3600")),
+            max_entries_per_workspace=int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES_PER_WORKSPACE", "1000")),
+            redis_url=os.getenv("SEMANTIC_CACHE_REDIS_URL", "").strip(),
+        )
+
+
+@dataclass
+class CachedAnswer:
+    """A cached answer and the chunks it was grounded on."""
+    entry_id: str
+    workspace_id: str
+    scope: str
+    query: str
+    vector: np.ndarray
+    response: Dict[str, Any]
+    document_ids: Set[str] = field(default_factory=set)
+    chunk_hashes: Set[str] = field(default_factory=set)
+    created_at: float = field(default_factory=time.time)
+    hits: int = 0
+
+
+def cache_scope(**parts: Any) -> str:
+    """Hash the request parameters that must match for a cached answer to be reused."""
+    rendered = json.dumps(parts, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(rendered.encode("utf-8")).hexdigest()[:32]
+
+
+def grounding_keys(results: Iterable[Dict[str, Any]]) -> Tuple[Set[str], Set[str]]:
+    """Collect the ``document_id`` and ``chunk_hash`` values from retrieval results."""
+    document_ids: Set[str] = set()
+    chunk_hashes: Set[str] = set()
+    for result in results:
+        metadata = result.get("metadata") if isinstance(result, dict) else None
+        if not isinstance(metadata, dict):
+            continue
+        if metadata.get("document_id"):
+            document_ids.add(str(metadata["document_id"]))
+        if metadata.get("chunk_hash"):
+            chunk_hashes.add(str(metadata["chunk_hash"]))
+    return document_ids, chunk_hashes
+
+
+def _unit(vector: Any) -> Optional[np.ndarray]:
+    array = np.asarray(vector, dtype=np.float32).reshape(-1)
+    norm = float(np.linalg.norm(array))
+    if not array.size or norm == 0.0:
+        return None
+    return array / norm
+
+
+class _WorkspaceBucket:
+    """Entries of one workspace plus the reverse index used for invalidation."""
+
+    def __init__(self):
+        self.entries: "OrderedDict[str, CachedAnswer]" = OrderedDict()
+        self.by_document: Dict[str, Set[str]] = {}
+        self.by_chunk: Dict[str, Set[str]] = {}
+        self._matrices: Dict[str, Tuple[List[str], np.ndarray]] = {}
+        # Workspace version from Redis the entries were cached under (None without Redis)
+        self.version: Optional[int] = None
+
+    def clear(self) -> int:
+        removed = len(self.entries)
+        self.entries.clear()
+        self.by_document.clear()
+        self.by_chunk.clear()
+        self._matrices.clear()
+        return removed
+
+    def add(self, entry: CachedAnswer):
+        self.entries[entry.entry_id] = entry
+        for document_id in entry.document_ids:
+            self.by_document.setdefault(document_id, set()).add(entry.entry_id)
+        for chunk_hash in entry.chunk_hashes:
+            self.by_chunk.setdefault(chunk_hash, set()).add(entry.entry_id)
+        self._matrices.pop(entry.scope, None)
+
+    def remove(self, entry_id: str) -> bool:
+        entry = self.entries.pop(entry_id, None)
+        if entry is None:
+            return False
+        for index, keys in ((self.by_document, entry.document_ids), (self.by_chunk, entry.chunk_hashes)):
+            for key in keys:
+                ids = index.get(key)
+                if ids is not None:
+                    ids.discard(entry_id)
+                    if not ids:
+                        del index[key]
+        self._matrices.pop(entry.scope, None)
+        return True
+
+    def matrix(self, scope: str) -> Tuple[List[str], Optional[np.ndarray]]:
+        """Stacked unit query vectors of one scope, rebuilt only after the scope changes."""
+        if scope not in self._matrices:
+            entry_ids = [entry_id for entry_id, entry in self.entries.items() if entry.scope == scope]
+            stacked = np.stack([self.entries[entry_id].vector for entry_id in entry_ids]) if entry_ids else None
+            self._matrices[scope] = (entry_ids, stacked)
+        return self._matrices[scope]
+
+
+class SemanticResponseCache:
+    """
+    Thread-safe semantic answer cache partitioned by workspace.
+
+    Lookups compare the unit query vector against every cached query of the
+    same workspace and scope with one matrix-vector product; the best match at
+    or above ``similarity_threshold`` is returned. Each workspace holds at most
+    ``max_entries_per_workspace`` entries, evicted least recently used.
+    Redis calls are blocking; callers on the event loop run them on an executor.
+    """
+
+    def __init__(self, config: Optional[SemanticCacheConfig] = None, redis_client: Optional[Any] = None):
+        """
+        Initialize semantic response cache.
+
+        Args:
+            config: Cache settings (loaded from environment if None)
+            redis_client: Redis client holding workspace versions (built from ``redis_url`` if None)
+        """
+        self.config = config or SemanticCacheConfig.from_env()
+        self.redis_client = redis_client
+        if self.redis_client is None and self.config.enabled and self.config.redis_url:
+            try:
+                import redis
+                self.redis_client = redis.Redis.from_url(self.config.redis_url)
+            except ImportError:
+                logger.warning("SEMANTIC_CACHE_REDIS_URL is set but the redis package is not installed")
+        self._workspaces: Dict[str, _WorkspaceBucket] = {}
+        self._lock = threading.Lock()
+        self._stats = {
+            "lookups": 0,
+            "hits": 0,
+            "stores": 0,
+            "evictions": 0,
+            "expirations": 0,
+            "invalidations": 0,
+            "remote_invalidations": 0,
+            "redis_errors": 0,
+        }
+
+    @property
+    def enabled(self) -> bool:
+        return self.config.enabled
+
+    def _version_key(self, workspace_id: str) -> str:
+        return self.config.redis_key_prefix + workspace_id
+
+    def _remote_version(self, workspace_id: str) -> Optional[int]:
+        """Current workspace version in Redis, or None without Redis or on errors."""
+        if self.redis_client is None:
+            return None
+        try:
+            return int(self.redis_client.get(self._version_key(workspace_id)) or 0)
+        except Exception as e:
+            with self._lock:
+                self._stats["redis_errors"] += 1
+            logger.warning(f"Semantic cache version lookup failed: {e}")
+            return None
+
+    def _sync_version(self, bucket: _WorkspaceBucket, version: Optional[int]):
+        """Drop a workspace copy that another process invalidated (caller holds the lock)."""
+        if version is None:
+            return
+        if bucket.version is not None and bucket.version != version:
+            self._stats["remote_invalidations"] += bucket.clear()
+        bucket.version = version
+
+    def lookup(self, workspace_id: str, scope: str, query_vector: Any) -> Optional[Dict[str, Any]]:
+        """
+        Find a cached answer for a semantically equivalent query.
+
+        Args:
+            workspace_id: Workspace the query runs in
+            scope: Scope hash from ``cache_scope``
+            query_vector: Query embedding
+
+        Returns:
+            Dict with ``response``, ``similarity``, ``cached_query`` and
+            ``age_seconds``, or None on a miss
+        """
+        if not self.enabled:
+            return None
+        unit = _unit(query_vector)
+        version = self._remote_version(workspace_id)
+        with self._lock:
+            self._stats["lookups"] += 1
+            bucket = self._workspaces.get(workspace_id)
+            if unit is None or bucket is None:
+                return None
+            self._sync_version(bucket, version)
+            entry_ids, matrix = bucket.matrix(scope)
+            if matrix is None or matrix.shape[1] != unit.shape[0]:
+                return None
+            similarities = matrix @ unit
+            best = int(np.argmax(similarities))
+            similarity = float(similarities[best])
+            if similarity < self.config.similarity_threshold:
+                return None
+            entry = bucket.entries[entry_ids[best]]
+            age_seconds = time.time() - entry.created_at
+            if age_seconds > self.config.ttl_seconds:
+                bucket.remove(entry.entry_id)
+                self._stats["expirations"] += 1
+                return None
+            bucket.entries.move_to_end(entry.entry_id)
+            entry.hits += 1
+            self._stats["hits"] += 1
+            return {
+                "response": entry.response,
+                "similarity": round(similarity, 4),
+                "cached_query": entry.query,
+                "age_seconds": round(age_seconds, 1),
+            }
+
+    def store(
+        self,
+        workspace_id: str,
+        scope: str,
+        query: str,
+        query_vector: Any,
+        response: Dict[str, Any],
+        results: Iterable[Dict[str, Any]],
+    ) -> Optional[str]:
+        """
+        Cache a grounded answer.
+
+        Callers only store answers that passed the grounding gates. Answers
+        with no traceable ``document_id``/``chunk_hash`` are not cached since
+        they could never be invalidated.
+
+        Args:
+            workspace_id: Workspace the answer belongs to
+            scope: Scope hash from ``cache_scope``
+            query: Query text (kept for diagnostics)
+            query_vector: Query embedding
+            response: Answer payload returned on a hit
+            results: Retrieval results the answer was grounded on
+
+        Returns:
+            Entry id, or None when the answer was not cached
+        """
+        if not self.enabled:
+            return None
+        unit = _unit(query_vector)
+        document_ids, chunk_hashes = grounding_keys(results)
+        if unit is None or not (document_ids or chunk_hashes):
+            return None
+        entry = CachedAnswer(
+            entry_id=uuid.uuid4().hex,
+            workspace_id=workspace_id,
+            scope=scope,
+            query=query,
+            vector=unit,
+            response=response,
+            document_ids=document_ids,
+            chunk_hashes=chunk_hashes,
+        )
+        version = self._remote_version(workspace_id)
+        with self._lock:
+            bucket = self._workspaces.setdefault(workspace_id, _WorkspaceBucket())
+            self._sync_version(bucket, version)
+            bucket.add(entry)
+            self._stats["stores"] += 1
+            while len(bucket.entries) > self.config.max_entries_per_workspace:
+                oldest_id = next(iter(bucket.entries))
+                bucket.remove(oldest_id)
+                self._stats["evictions"] += 1
+        return entry.entry_id
+
+    def invalidate(
+        self,
+        workspace_id: str,
+        document_ids: Iterable[str] = (),
+        chunk_hashes: Iterable[str] = (),
+    ) -> int:
+        """
+        Evict every cached answer grounded on the given documents or chunks.
+
+        Other processes sharing the Redis version key drop their whole copy of
+        the workspace on their next lookup.
+
+        Args:
+            workspace_id: Workspace whose documents changed
+            document_ids: Re-ingested or deleted document ids
+            chunk_hashes: Hashes of re-ingested or deleted chunks
+
+        Returns:
+            Number of evicted entries in this process
+        """
+        document_ids, chunk_hashes = list(document_ids), list(chunk_hashes)
+        removed = 0
+        with self._lock:
+            bucket = self._workspaces.get(workspace_id)
+            if bucket is not None:
+                stale: Set[str] = set()
+                for document_id in document_ids:
+                    stale |= bucket.by_document.get(str(document_id), set())
+                for chunk_hash in chunk_hashes:
+                    stale |= bucket.by_chunk.get(str(chunk_hash), set())
+                removed = sum(1 for entry_id in stale if bucket.remove(entry_id))
+                self._stats["invalidations"] += removed
+        if self.redis_client is not None and (document_ids or chunk_hashes):
+            try:
+                version = int(self.redis_client.incr(self._version_key(workspace_id)))
+            except Exception as e:
+                with self._lock:
+                    self._stats["redis_errors"] += 1
+                logger.warning(f"Semantic cache version bump failed: {e}")
+            else:
+                with self._lock:
+                    bucket = self._workspaces.get(workspace_id)
+                    # Our own bump: the precise eviction above already covered it
+                    if bucket is not None and bucket.version == version - 1:
+                        bucket.version = version
+        if removed:
+            logger.info(f"Semantic cache: invalidated {removed} answers in workspace '{workspace_id}'")
+        return removed
+
+    def clear(self, workspace_id: Optional[str] = None):
+        """Drop all entries, or only those of ``workspace_id``."""
+        with self._lock:
+            if workspace_id is None:
+                self._workspaces.clear()
+            else:
+                self._workspaces.pop(workspace_id, None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics."""
+        with self._lock:
+            entries = sum(len(bucket.entries) for bucket in self._workspaces.values())
+            stats = dict(self._stats)
+            workspaces = len(self._workspaces)
+        return {
+            **stats,
+            "hit_rate": round(stats["hits"] / stats["lookups"], 4) if stats["lookups"] else 0.0,
+            "entries": entries,
+            "workspaces": workspaces,
+            "enabled": self.enabled,
+            "similarity_threshold": self.config.similarity_threshold,
+        }
+
+
+_semantic_response_cache: Optional[SemanticResponseCache] = None
+
+
+def get_semantic_response_cache() -> SemanticResponseCache:
+    """Get the process-wide semantic response cache, creating it from the environment."""
+    global _semantic_response_cache
+    if _semantic_response_cache is None:
+        _semantic_response_cache = SemanticResponseCache()
+    return _semantic_response_cache
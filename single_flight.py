@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Single-flight coalescing for identical concurrent retrievals.
+
+During incident spikes many users ask the same question within seconds and
+every request embeds the query and searches Qdrant on its own. ``SingleFlight``
+lets the first caller for a key run the search while identical callers that
+arrive meanwhile block on its result; the finished result is then served for
+a very short TTL to absorb the tail of the burst. Callers run on executor
+threads, so coordination uses ``threading`` primitives; waiters give up after
+``wait_timeout_seconds`` (the retrieval stage deadline) so a stuck leader
+cannot pin executor threads after the request has moved on.
+"""
+
+import os
+import copy
+import json
+import time
+import hashlib
+import logging
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple, TypeVar
+
+from embedding_cache import normalize_embedding_text
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Bound on remembered results so a flood of distinct queries cannot grow the map
+MAX_RECENT_RESULTS = 1024
+
+
+class _Call:
+    """One in-flight computation shared by every caller with the same key."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls with the same key into one execution.
+
+    Results are deep-copied for every caller because retrieval results are
+    mutated downstream (sanitization, graph enrichment).
+    """
+
+    def __init__(
+        self,
+        name: str,
+        result_ttl_seconds: float = 0.5,
+        enabled: bool = True,
+        metrics_exporter: Optional[Any] = None,
+        wait_timeout_seconds: Optional[float] = None
+    ):
+        """
+        Initialize a single-flight group.
+
+        Args:
+            name: Operation name used in metrics (e.g. ``rag_search``)
+            result_ttl_seconds: How long a finished result keeps serving identical calls
+            enabled: Run every call directly when False
+            metrics_exporter: Exporter receiving coalesced-call counters (optional)
+            wait_timeout_seconds: How long a caller waits on an in-flight call (None waits indefinitely)
+        """
+        self.name = name
+        self.result_ttl_seconds = result_ttl_seconds
+        self.enabled = enabled
+        self.metrics_exporter = metrics_exporter
+        self.wait_timeout_seconds = wait_timeout_seconds
+        self._lock = threading.Lock()
+        self._in_flight: Dict[str, _Call] = {}
+        self._recent: Dict[str, Tuple[float, Any]] = {}
+        self._stats = {"calls": 0, "executions": 0, "coalesced_in_flight": 0, "coalesced_recent": 0, "wait_timeouts": 0}
+
+    @classmethod
+    def from_env(
+        cls,
+        name: str,
+        metrics_exporter: Optional[Any] = None,
+        wait_timeout_seconds: Optional[float] = None
+    ) -> "SingleFlight":
+        """
+        Build a group from SINGLE_FLIGHT_* environment variables.
+
+        Args:
+            name: Operation name used in metrics
+            metrics_exporter: Exporter receiving coalesced-call counters (optional)
+            wait_timeout_seconds: Waiter timeout, typically the stage deadline
+                (SINGLE_FLIGHT_WAIT_TIMEOUT_MS if None, 0 waits indefinitely)
+        """
+        if wait_timeout_seconds is None:
+            wait_timeout_ms = float(os.getenv("SINGLE_FLIGHT_WAIT_TIMEOUT_MS", "5000"))
+            wait_timeout_seconds = wait_timeout_ms / 1000.0 if wait_timeout_ms > 0 else None
+        return cls(
+            name=name,
+            result_ttl_seconds=float(os.getenv("SINGLE_FLIGHT_RESULT_TTL_MS", "500")) / 1000.0,
+            enabled=os.getenv("SINGLE_FLIGHT_ENABLED", "true").strip().lower() in ("1", "true", "yes"),
+            metrics_exporter=metrics_exporter,
+            wait_timeout_seconds=wait_timeout_seconds,
+        )
+
+    @staticmethod
+    def make_key(workspace_id: str, query: str, **params: Any) -> str:
+        """Build a key from the workspace, normalized query and call parameters."""
+        rendered = json.dumps(
+            {"workspace_id": workspace_id, "query": normalize_embedding_text(query), **params},
+            sort_keys=True,
+            ensure_ascii=False,
+            default=str,
+        )
+        return hashlib.sha256(rendered.encode("utf-8")).hexdigest()
+
+    def _record_coalesced(self, outcome: str):
+        self._stats[f"coalesced_{outcome}"] += 1
+        if self.metrics_exporter:
+            self.metrics_exporter.record_coalesced_call(self.name, outcome)
+
+    def do(self, key: str, fn: Callable[[], T]) -> T:
+        """
+        Run ``fn`` once per key across concurrent callers.
+
+        Args:
+            key: Key from ``make_key``
+            fn: Computation to run; its exception reaches every waiting caller
+
+        Returns:
+            Result of ``fn`` (a private copy for every caller)
+
+        Raises:
+            TimeoutError: When waiting on another caller's execution exceeds ``wait_timeout_seconds``
+        """
+        if not self.enabled:
+            return fn()
+
+        with self._lock:
+            self._stats["calls"] += 1
+            recent = self._recent.get(key)
+            if recent is not None and recent[0] > time.monotonic():
+                self._record_coalesced("recent")
+                return copy.deepcopy(recent[1])
+            call = self._in_flight.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._in_flight[key] = call
+                self._stats["executions"] += 1
+            else:
+                self._record_coalesced("in_flight")
+
+        if not leader:
+            if not call.done.wait(self.wait_timeout_seconds):
+                with self._lock:
+                    self._stats["wait_timeouts"] += 1
+                raise TimeoutError(
+                    f"Single-flight '{self.name}' wait exceeded {self.wait_timeout_seconds:.3f}s"
+                )
+            if call.error is not None:
+                raise call.error
+            return copy.deepcopy(call.result)
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+                if call.error is None and self.result_ttl_seconds > 0:
+                    now = time.monotonic()
+                    if len(self._recent) >= MAX_RECENT_RESULTS:
+                        self._recent = {k: v for k, v in self._recent.items() if v[0] > now}
+                    if len(self._recent) < MAX_RECENT_RESULTS:
+                        self._recent[key] = (now + self.result_ttl_seconds, call.result)
+            call.done.set()
+        return copy.deepcopy(call.result)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get coalescing statistics."""
+        with self._lock:
+            stats = dict(self._stats)
+            in_flight = len(self._in_flight)
+        coalesced = stats["coalesced_in_flight"] + stats["coalesced_recent"]
+        return {
+            **stats,
+            "coalesced_rate": round(coalesced / stats["calls"], 4) if stats["calls"] else 0.0,
+            "in_flight": in_flight,
+            "result_ttl_seconds": self.result_ttl_seconds,
+            "wait_timeout_seconds": self.wait_timeout_seconds,
+            "enabled": self.enabled,
+        }
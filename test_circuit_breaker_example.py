@@ -181,14 +181,14 @@ class TestFallbackChain:
     @pytest.mark.asyncio
     async def test_fallback_chain_max_gpu_success(self):
         """Test fallback chain uses MAX GPU when available."""
-        with patch('fallback_chain.httpx.AsyncClient') as mock_client:
+        with patch('http_client_pool.httpx.AsyncClient') as mock_client:
             # Mock successful MAX GPU response
             mock_response = MagicMock()
             mock_response.json.return_value = {"text": "GPU response"}
             mock_response.status_code = 200
             mock_response.raise_for_status = MagicMock()
             
-            mock_client.return_value.__aenter__.return_value.post = AsyncMock(
+            mock_client.return_value.post = AsyncMock(
                 return_value=mock_response
             )
             
@@ -206,7 +206,7 @@ class TestFallbackChain:
     @pytest.mark.asyncio
     async def test_fallback_chain_ollama_fallback(self):
         """Test fallback to Ollama when MAX GPU fails."""
-        with patch('fallback_chain.httpx.AsyncClient') as mock_client:
+        with patch('http_client_pool.httpx.AsyncClient') as mock_client:
             # Mock MAX GPU failure
             mock_max_response = MagicMock()
             mock_max_response.raise_for_status.side_effect = httpx.HTTPError("GPU down")
@@ -224,7 +224,7 @@ class TestFallbackChain:
                 elif "11434" in url:
                     return mock_ollama_response
             
-            mock_client.return_value.__aenter__.return_value.post = mock_post
+            mock_client.return_value.post = mock_post
             
             chain = FallbackChain(
                 max_gpu_endpoint="http://fake:8080",
@@ -246,12 +246,12 @@ class TestFallbackChain:
         mock_redis = MagicMock(spec=redis.Redis)
         mock_redis.get.return_value = b"Cached response"
         
-        with patch('fallback_chain.httpx.AsyncClient') as mock_client:
+        with patch('http_client_pool.httpx.AsyncClient') as mock_client:
             # Mock all service failures
             mock_response = MagicMock()
             mock_response.raise_for_status.side_effect = httpx.HTTPError("Down")
             
-            mock_client.return_value.__aenter__.return_value.post = AsyncMock(
+            mock_client.return_value.post = AsyncMock(
                 return_value=mock_response
             )
             
@@ -276,12 +276,12 @@ class TestFallbackChain:
         mock_redis = MagicMock(spec=redis.Redis)
         mock_redis.get.return_value = None  # Cache miss
         
-        with patch('fallback_chain.httpx.AsyncClient') as mock_client:
+        with patch('http_client_pool.httpx.AsyncClient') as mock_client:
             # Mock all service failures
             mock_response = MagicMock()
             mock_response.raise_for_status.side_effect = httpx.HTTPError("Down")
             
-            mock_client.return_value.__aenter__.return_value.post = AsyncMock(
+            mock_client.return_value.post = AsyncMock(
                 return_value=mock_response
             )
             
@@ -301,13 +301,13 @@ class TestFallbackChain:
     @pytest.mark.asyncio
     async def test_fallback_chain_statistics(self):
         """Test fallback chain collects statistics."""
-        with patch('fallback_chain.httpx.AsyncClient') as mock_client:
+        with patch('http_client_pool.httpx.AsyncClient') as mock_client:
             mock_response = MagicMock()
             mock_response.json.return_value = {"text": "response"}
             mock_response.status_code = 200
             mock_response.raise_for_status = MagicMock()
             
-            mock_client.return_value.__aenter__.return_value.post = AsyncMock(
+            mock_client.return_value.post = AsyncMock(
                 return_value=mock_response
             )
             
@@ -332,7 +332,7 @@ class TestIntegration:
     @pytest.mark.asyncio
     async def test_circuit_breaker_in_fallback_chain(self):
         """Test circuit breaker integration in fallback chain."""
-        with patch('fallback_chain.httpx.AsyncClient') as mock_client:
+        with patch('http_client_pool.httpx.AsyncClient') as mock_client:
             # Simulate consistent failures to open circuit breaker
             call_count = [0]
             
@@ -342,7 +342,7 @@ class TestIntegration:
                 mock_response.raise_for_status.side_effect = httpx.HTTPError("Service down")
                 return mock_response
             
-            mock_client.return_value.__aenter__.return_value.post = mock_post
+            mock_client.return_value.post = mock_post
             
             chain = FallbackChain(
                 max_gpu_endpoint="http://fake:8080",
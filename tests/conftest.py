@@ -105,6 +105,79 @@ def mock_httpx_client():
     return mock_client
 
 
+class FakeLexicalStorage:
+    """Storage stand-in whose health probe is counted."""
+
+    def __init__(self):
+        self.probes = 0
+
+    def ensure_connected(self):
+        self.probes += 1
+        return False
+
+
+@pytest.fixture
+def fake_rag_module(monkeypatch, request):
+    """
+    Install a fake ``rag_service`` module for ingestion worker tests.
+
+    Yields the fake ``RAGIngestionService`` class; its ``instances`` are the
+    services the worker built. Parametrize indirectly with a dict to change
+    ``chunks_per_document`` (default 2) or ``fail_marker`` (default "fail"):
+    batch documents whose text contains the marker come back as failed.
+    """
+    import sys
+    import types
+
+    from data_collectors import ingestion_worker
+
+    options = {"chunks_per_document": 2, "fail_marker": "fail", **getattr(request, "param", {})}
+    module = types.ModuleType("rag_service")
+
+    class FakeRAGIngestionService:
+        instances = []
+
+        def __init__(self, **kwargs):
+            self.kwargs = kwargs
+            self.storage = FakeLexicalStorage()
+            self.ingested = []
+            self.batches = []
+            FakeRAGIngestionService.instances.append(self)
+
+        def ingest_document(self, text, metadata):
+            self.ingested.append(text)
+            return {"document_id": f"doc-{len(self.ingested)}", "chunks_created": options["chunks_per_document"]}
+
+        def ingest_documents_batch(self, documents, workspace_id=None):
+            self.batches.append(documents)
+            results = []
+            for position, doc in enumerate(documents):
+                if options["fail_marker"] in doc["text"]:
+                    results.append({"status": "error", "error": "embedding failed"})
+                else:
+                    results.append({
+                        "status": "success",
+                        "document_id": f"doc-{position}",
+                        "chunks_created": options["chunks_per_document"],
+                    })
+            return {"status": "success", "results": results}
+
+    module.RAGIngestionService = FakeRAGIngestionService
+    monkeypatch.setitem(sys.modules, "rag_service", module)
+    ingestion_worker.reset_service_cache()
+    yield FakeRAGIngestionService
+    ingestion_worker.reset_service_cache()
+
+
+@pytest.fixture
+def make_document():
+    """Build a raw ingestion job document from its text."""
+    def _document(text: str) -> dict:
+        return {"text": text, "metadata": {"source": "test"}}
+
+    return _document
+
+
 # Markers for test categorization
 
 
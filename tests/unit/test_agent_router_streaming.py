@@ -0,0 +1,186 @@
+# Needs: python-package:pyyaml
+# Needs: python-package:httpx
+# Needs: python-package:prometheus-client
+
+import asyncio
+import importlib.util
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import pytest
+
+
+_SPEC = importlib.util.spec_from_file_location("agent_router", Path(__file__).resolve().parents[2] / "agent_router.py")
+agent_router = importlib.util.module_from_spec(_SPEC)
+assert _SPEC and _SPEC.loader
+_SPEC.loader.exec_module(agent_router)
+Intent = agent_router.Intent
+
+
+def _build_router():
+    router = object.__new__(agent_router.AgentRouter)
+    router.metrics = MagicMock()
+    router.models = {
+        model_id: agent_router.ModelConfig(
+            name=f"{model_id}-model",
+            endpoint=f"http://{model_id}:8080",
+            description=model_id,
+            capabilities=[],
+            max_tokens=128,
+            temperature=0.2,
+            aliases=[],
+            health_status=True,
+        )
+        for model_id in ("llama", "qwen-coder")
+    }
+    router.routing_config = agent_router.RoutingConfig(
+        primary_model={"code": "qwen-coder", "general": "llama"},
+        fallback_chains={"qwen-coder": ["llama"], "llama": ["qwen-coder"]},
+        timeouts={"request": 30, "health_check": 5},
+        retry={"max_attempts": 1, "backoff_factor": 1.0},
+    )
+    router.circuit_breakers = {}
+    router.model_aliases = {}
+    router._routing_attempts = {}
+    router._routing_fallbacks = {}
+    router.classify_intent = lambda _: (Intent.CODE, 0.9)
+    return router
+
+
+async def _deltas(*texts):
+    for text in texts:
+        yield text
+
+
+def test_parse_stream_line_supports_sse_ndjson_and_openai_framing():
+    assert agent_router.parse_stream_line('data: {"token": {"text": "Hel"}}') == "Hel"
+    assert agent_router.parse_stream_line('{"token": {"text": "</s>", "special": true}}') is None
+    assert agent_router.parse_stream_line('data: {"choices": [{"delta": {"content": "lo"}}]}') == "lo"
+    assert agent_router.parse_stream_line('{"choices": [{"text": "!"}]}') == "!"
+    assert agent_router.parse_stream_line("data: [DONE]") is None
+    assert agent_router.parse_stream_line(": keep-alive") is None
+    assert agent_router.parse_stream_line("") is None
+
+
+@pytest.mark.asyncio
+async def test_generate_stream_forwards_deltas_with_start_and_done_events(monkeypatch):
+    router = _build_router()
+
+    async def stream_primary(**kwargs):
+        return {"success": True, "first_text": "def ", "deltas": _deltas("add", "()"), "model_id": kwargs["model_id"]}
+
+    monkeypatch.setattr(router, "_try_model_stream", stream_primary)
+
+    events = [event async for event in router.generate_stream(messages=[], prompt="p")]
+
+    assert events[0]["type"] == "start"
+    assert events[0]["metadata"]["model_id"] == "qwen-coder"
+    assert events[0]["metadata"]["streamed"] is True
+    assert [event["text"] for event in events if event["type"] == "delta"] == ["def ", "add", "()"]
+    assert events[-1]["type"] == "done"
+    assert events[-1]["metadata"]["fallback_used"] is False
+
+
+@pytest.mark.asyncio
+async def test_generate_stream_falls_back_only_before_first_token(monkeypatch):
+    router = _build_router()
+    tried = []
+
+    async def fail_primary(**kwargs):
+        tried.append(kwargs["model_id"])
+        if kwargs["model_id"] == "qwen-coder":
+            return {"success": False, "error": "boom"}
+        return {"success": True, "first_text": "ok", "deltas": _deltas(), "model_id": kwargs["model_id"]}
+
+    monkeypatch.setattr(router, "_try_model_stream", fail_primary)
+
+    events = [event async for event in router.generate_stream(messages=[], prompt="p")]
+
+    assert tried == ["qwen-coder", "llama"]
+    assert events[0]["metadata"]["fallback_used"] is True
+    assert events[0]["metadata"]["primary_model"] == "qwen-coder"
+    assert events[-1]["type"] == "done"
+
+
+@pytest.mark.asyncio
+async def test_generate_stream_reports_mid_stream_failure_without_switching_models(monkeypatch):
+    router = _build_router()
+    tried = []
+
+    async def broken_deltas():
+        yield "partial"
+        raise agent_router.httpx.ReadError("connection reset")
+
+    async def stream_then_break(**kwargs):
+        tried.append(kwargs["model_id"])
+        return {"success": True, "first_text": "a ", "deltas": broken_deltas(), "model_id": kwargs["model_id"]}
+
+    monkeypatch.setattr(router, "_try_model_stream", stream_then_break)
+
+    events = [event async for event in router.generate_stream(messages=[], prompt="p")]
+
+    assert tried == ["qwen-coder"]
+    assert [event["text"] for event in events if event["type"] == "delta"] == ["a ", "partial"]
+    assert events[-1]["type"] == "error"
+    assert events[-1]["metadata"]["stream_interrupted"] is True
+
+
+@pytest.mark.asyncio
+async def test_generate_stream_emits_error_when_all_models_fail(monkeypatch):
+    router = _build_router()
+
+    async def always_fail(**kwargs):
+        return {"success": False, "error": "down"}
+
+    monkeypatch.setattr(router, "_try_model_stream", always_fail)
+
+    events = [event async for event in router.generate_stream(messages=[], prompt="p")]
+
+    assert len(events) == 1
+    assert events[0]["type"] == "error"
+    assert events[0]["metadata"]["tried_models"] == ["qwen-coder", "llama"]
+
+
+@pytest.mark.asyncio
+async def test_empty_stream_succeeds_without_tripping_the_breaker(monkeypatch):
+    from circuit_breaker import CircuitBreaker, CircuitBreakerConfig
+
+    router = _build_router()
+    breaker = CircuitBreaker("llama-stream", CircuitBreakerConfig(failure_threshold=1))
+    router.circuit_breakers = {"llama": breaker}
+    monkeypatch.setattr(router, "_iter_model_stream", lambda model, payload: _deltas())
+
+    stream = await router._try_model_stream(model_id="llama", prompt="p", intent=Intent.GENERAL)
+
+    assert stream["success"] is True
+    assert stream["first_text"] == ""
+    assert [text async for text in stream["deltas"]] == []
+    assert breaker.failure_count == 0
+    assert breaker.total_failures == 0
+
+
+@pytest.mark.asyncio
+async def test_backend_stream_is_stepped_and_closed_from_one_task(monkeypatch):
+    from circuit_breaker import CircuitBreaker, CircuitBreakerConfig
+
+    router = _build_router()
+    router.circuit_breakers = {"llama": CircuitBreaker("llama-stream-task", CircuitBreakerConfig())}
+    tasks = []
+
+    async def recording_deltas():
+        try:
+            for text in ("a", "b", "c"):
+                tasks.append(asyncio.current_task())
+                yield text
+        finally:
+            tasks.append(asyncio.current_task())
+
+    monkeypatch.setattr(router, "_iter_model_stream", lambda model, payload: recording_deltas())
+
+    stream = await router._try_model_stream(model_id="llama", prompt="p", intent=Intent.GENERAL)
+    rest = [text async for text in stream["deltas"]]
+    await stream["deltas"].aclose()
+
+    assert stream["first_text"] + "".join(rest) == "abc"
+    assert len(tasks) == 4
+    assert len(set(tasks)) == 1
@@ -0,0 +1,151 @@
+# Needs: python-package:prometheus-client
+
+import asyncio
+import threading
+import time
+from contextvars import ContextVar
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import pytest
+
+from backend_executor import BackendExecutor, BackendExecutorConfig
+
+
+def _executor(**limits) -> BackendExecutor:
+    return BackendExecutor(config=BackendExecutorConfig(max_workers=8, backend_limits=limits))
+
+
+@pytest.mark.asyncio
+async def test_run_executes_off_the_event_loop_thread() -> None:
+    executor = _executor(rag=2)
+    loop_thread = threading.get_ident()
+
+    result = await executor.run("rag", lambda value: (value, threading.get_ident()), "ok")
+
+    assert result[0] == "ok"
+    assert result[1] != loop_thread
+    executor.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_event_loop_keeps_ticking_while_backend_is_slow() -> None:
+    executor = _executor(rag=4)
+    ticks = []
+
+    async def ticker():
+        for _ in range(10):
+            ticks.append(time.perf_counter())
+            await asyncio.sleep(0.01)
+
+    await asyncio.gather(
+        executor.run("rag", time.sleep, 0.2),
+        executor.run("rag", time.sleep, 0.2),
+        ticker(),
+    )
+
+    max_gap = max(later - earlier for earlier, later in zip(ticks, ticks[1:]))
+    assert max_gap < 0.1
+    executor.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_per_backend_limit_caps_in_flight_calls() -> None:
+    executor = _executor(graph=2, memory=4)
+    active = {"now": 0, "peak": 0}
+    lock = threading.Lock()
+
+    def slow_call():
+        with lock:
+            active["now"] += 1
+            active["peak"] = max(active["peak"], active["now"])
+        time.sleep(0.05)
+        with lock:
+            active["now"] -= 1
+
+    await asyncio.gather(*(executor.run("graph", slow_call) for _ in range(6)))
+
+    stats = executor.get_stats()["backends"]["graph"]
+    assert active["peak"] == 2
+    assert stats["limit"] == 2
+    assert stats["completed"] == 6
+    assert stats["in_flight"] == 0
+    assert stats["waiting"] == 0
+    executor.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_cancelled_caller_keeps_slot_until_thread_finishes() -> None:
+    executor = _executor(memory=1)
+    release = threading.Event()
+
+    with pytest.raises(asyncio.TimeoutError):
+        await asyncio.wait_for(executor.run("memory", release.wait, 5), timeout=0.05)
+
+    assert executor.get_stats()["backends"]["memory"]["in_flight"] == 1
+    release.set()
+    assert await executor.run("memory", lambda: "next") == "next"
+    executor.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_errors_and_context_variables_propagate() -> None:
+    executor = _executor(rag=1)
+    workspace: ContextVar[str] = ContextVar("workspace", default="none")
+    workspace.set("ws-a")
+
+    assert await executor.run("rag", workspace.get) == "ws-a"
+
+    def failing():
+        raise ValueError("qdrant down")
+
+    with pytest.raises(ValueError, match="qdrant down"):
+        await executor.run("rag", failing)
+
+    await asyncio.sleep(0)
+    assert executor.get_stats()["backends"]["rag"]["failed"] == 1
+    executor.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_queue_metrics_are_published_per_backend() -> None:
+    exporter = MagicMock()
+    executor = BackendExecutor(
+        config=BackendExecutorConfig(max_workers=2, backend_limits={"rag": 1}),
+        metrics_exporter=exporter,
+    )
+
+    await executor.run("rag", lambda: None)
+    await asyncio.sleep(0)
+
+    exporter.record_queue_wait.assert_called_once()
+    assert exporter.record_queue_wait.call_args.args[0] == "backend_rag"
+    assert exporter.update_queue_depth.call_args.args == ("backend_rag", 0)
+    executor.shutdown()
+
+
+def test_config_reads_environment(monkeypatch) -> None:
+    monkeypatch.setenv("BACKEND_EXECUTOR_MAX_WORKERS", "12")
+    monkeypatch.setenv("BACKEND_CONCURRENCY_GRAPH", "3")
+
+    config = BackendExecutorConfig.from_env()
+
+    assert config.max_workers == 12
+    assert config.limit_for("graph") == 3
+    assert config.limit_for("rag") == 16
+    assert config.limit_for("unknown") == config.default_limit
+
+
+def test_api_server_runs_backend_calls_on_executor() -> None:
+    source = Path("api_server.py").read_text(encoding="utf-8")
+
+    assert "backend_executor = BackendExecutor(metrics_exporter=performance_metrics)" in source
+    for call in (
+        '"memory",\n                        service.search_memory,',
+        '"rag",\n                service.search_documents,',
+        '"graph",\n            service.get_neighbors,',
+        '"graph",\n            service.query_graph,',
+    ):
+        assert call in source
+    assert "backend_executor.shutdown(wait=True)" in source
+    assert '"backend_executor": backend_executor.get_stats()' in source
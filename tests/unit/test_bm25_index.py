@@ -0,0 +1,268 @@
+# Needs: python-package:numpy
+# Needs: python-package:qdrant-client
+"""Unit tests for the per-workspace BM25 inverted index."""
+
+import math
+import time
+from unittest.mock import Mock
+
+from bm25_index import BM25Index, BM25IndexManager, analyze, matches_filters
+from rag_service import QdrantStorage, RAGIngestionService
+
+
+CORPUS = {
+    "p1": ("Connection reset by peer raises ERR_CONN_RESET in the gateway", {"document_id": "d1", "lang": "md"}),
+    "p2": ("The gateway retries failed connections with exponential backoff", {"document_id": "d2", "lang": "md"}),
+    "p3": ("def resolve_workspace_id(config): return config['workspace_id']", {"document_id": "d3", "lang": "python"}),
+    "p4": ("Quarterly roadmap and planning notes", {"document_id": "d4", "lang": "md"}),
+}
+
+
+def _index(path=None) -> BM25Index:
+    index = BM25Index(path)
+    for point_id, (text, metadata) in CORPUS.items():
+        index.add(point_id, text, metadata)
+    return index
+
+
+def _reference_bm25(query: str, corpus, k1=1.2, b=0.75):
+    docs = {point_id: analyze(text) for point_id, (text, _) in corpus.items()}
+    avgdl = sum(len(tokens) for tokens in docs.values()) / len(docs)
+    scores = {}
+    for point_id, tokens in docs.items():
+        score = 0.0
+        for term in dict.fromkeys(analyze(query)):
+            df = sum(1 for other in docs.values() if term in other)
+            tf = tokens.count(term)
+            if tf:
+                idf = math.log1p((len(docs) - df + 0.5) / (df + 0.5))
+                score += idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * len(tokens) / avgdl))
+        if score:
+            scores[point_id] = score
+    return scores
+
+
+def test_scores_match_reference_bm25() -> None:
+    index = _index()
+    hits = dict(index.search("gateway connection reset", limit=10))
+    expected = _reference_bm25("gateway connection reset", CORPUS)
+
+    assert hits.keys() == expected.keys()
+    for point_id, score in expected.items():
+        assert math.isclose(hits[point_id], score, rel_tol=1e-5)
+
+
+def test_exact_identifiers_are_indexed_whole() -> None:
+    index = _index()
+
+    assert "err_conn_reset" in analyze("ERR_CONN_RESET")
+    assert index.search("ERR_CONN_RESET", limit=1)[0][0] == "p1"
+    assert index.search("resolve_workspace_id", limit=1)[0][0] == "p3"
+
+
+def test_updates_deletes_and_filters() -> None:
+    index = _index()
+
+    index.add("p4", "gateway migration plan", {"document_id": "d4", "lang": "md"})
+    assert "p4" in dict(index.search("gateway", limit=10))
+    assert index.delete_where("document_id", "d1") == 1
+    assert "p1" not in dict(index.search("reset", limit=10))
+    assert index.remove("p2") is True
+    assert [hit[0] for hit in index.search("gateway", limit=10, filters={"lang": {"any": ["md"]}})] == ["p4"]
+    assert index.doc_count == 2
+
+
+def test_flush_persists_a_memory_mapped_segment(tmp_path) -> None:
+    path = tmp_path / "ws.bm25"
+    index = _index(path)
+    before = index.search("gateway connection", limit=10)
+
+    assert index.flush() is True
+    reopened = BM25Index(path)
+    assert reopened.doc_count == 4
+    after = reopened.search("gateway connection", limit=10)
+    assert [hit[0] for hit in after] == [hit[0] for hit in before]
+    assert all(math.isclose(a[1], b[1], rel_tol=1e-5) for a, b in zip(after, before))
+
+    reopened.delete_where("document_id", "d2")
+    reopened.add("p5", "new gateway runbook", {"document_id": "d5"})
+    reopened.flush()
+    assert {hit[0] for hit in BM25Index(path).search("gateway", limit=10)} == {"p1", "p5"}
+
+
+def test_flush_merges_changes_from_another_process(tmp_path) -> None:
+    path = tmp_path / "ws.bm25"
+    _index(path).flush()
+    api_process = BM25Index(path, reload_interval_seconds=0)
+    worker_process = BM25Index(path, reload_interval_seconds=0)
+
+    worker_process.add("p5", "worker ingested gateway doc", {"document_id": "d5"})
+    worker_process.flush()
+    api_process.delete_where("document_id", "d1")
+    api_process.flush()
+
+    merged = {hit[0] for hit in BM25Index(path).search("gateway", limit=10)}
+    assert merged == {"p2", "p5"}
+    assert "p5" in {hit[0] for hit in worker_process.search("gateway", limit=10)}
+
+
+def test_flush_writes_only_the_change_and_merges_segments_by_size(tmp_path) -> None:
+    path = tmp_path / "ws.bm25"
+    index = BM25Index(path, merge_ratio=1.0)
+    for number in range(500):
+        index.add(f"base-{number}", f"gateway handler {number} retries", {"document_id": f"d{number}"})
+    index.flush()
+    base_name = index._segments[0].name
+    base_size = (tmp_path / base_name).stat().st_size
+
+    index.add("p-new", "freshly ingested gateway runbook", {"document_id": "new"})
+    index.flush()
+
+    assert [segment.name for segment in index._segments][0] == base_name
+    assert (tmp_path / index._segments[-1].name).stat().st_size < base_size / 20
+    for number in range(3):
+        index.add(f"tail-{number}", "tail gateway note", {"document_id": f"t{number}"})
+        index.flush()
+    # Small segments merge with each other, the large base is left alone
+    assert index._segments[0].name == base_name
+    assert len(index._segments) <= 3
+    assert BM25Index(path).doc_count == 504
+
+
+def test_tombstones_survive_reopen_and_merges(tmp_path) -> None:
+    path = tmp_path / "ws.bm25"
+    _index(path).flush()
+    index = BM25Index(path)
+
+    index.delete_where("document_id", "d1")
+    index.add("p2", "gateway replaced text", {"document_id": "d2", "lang": "md"})
+    index.flush()
+
+    reopened = BM25Index(path)
+    assert reopened.doc_count == 3
+    assert "p1" not in dict(reopened.search("reset gateway", limit=10))
+    assert reopened.search("replaced", limit=10)[0][0] == "p2"
+    assert [hit[0] for hit in reopened.search("exponential backoff", limit=10)] == []
+
+
+def test_segments_keep_only_filter_fields(tmp_path) -> None:
+    path = tmp_path / "ws.bm25"
+    index = BM25Index(path)
+    index.add("p1", "gateway", {"document_id": "d1", "repo": "org/app", "path": "a.py", "lang": "python",
+                                "body": "x" * 50_000, "tags": ["a"]})
+    index.flush()
+
+    segment = BM25Index(path)._segments[0]
+    assert segment.payload(0) == {"document_id": "d1", "repo": "org/app", "path": "a.py", "lang": "python"}
+    assert (tmp_path / segment.name).stat().st_size < 1_000
+    assert BM25Index(path).search("gateway", filters={"repo": "org/app", "lang": {"any": ["python"]}})[0][0] == "p1"
+    assert BM25Index(path).search("gateway", filters={"repo": "other"}) == []
+
+
+def test_manager_isolates_workspaces_and_flushes_on_threshold(tmp_path) -> None:
+    manager = BM25IndexManager(str(tmp_path), collection_name="documents", flush_every=2, flush_in_background=False)
+
+    manager.add_points("ws-a", ["a1", "a2"], ["alpha gateway", "alpha notes"], [{}, {}])
+    manager.add_points("ws-b", ["b1"], ["beta gateway"], [{}])
+
+    assert [hit[0] for hit in manager.search("ws-a", "gateway")] == ["a1"]
+    assert [hit[0] for hit in manager.search("ws-b", "gateway")] == ["b1"]
+    assert manager.get_stats()["workspaces"]["ws-a"]["pending_changes"] == 0
+    assert manager.get_stats()["workspaces"]["ws-b"]["pending_changes"] == 1
+
+
+def test_manager_flushes_in_the_background_on_count_and_age(tmp_path) -> None:
+    manager = BM25IndexManager(str(tmp_path), flush_every=2, flush_interval_seconds=0.05)
+    try:
+        manager.add_points("ws-a", ["a1", "a2"], ["alpha gateway", "alpha notes"], [{}, {}])
+        manager.add_points("ws-b", ["b1"], ["beta gateway"], [{}])
+
+        deadline = time.monotonic() + 5
+        while time.monotonic() < deadline and any(
+            stats["pending_changes"] for stats in manager.get_stats()["workspaces"].values()
+        ):
+            time.sleep(0.01)
+        assert all(stats["pending_changes"] == 0 for stats in manager.get_stats()["workspaces"].values())
+        assert BM25IndexManager(str(tmp_path)).get_index("ws-b").doc_count == 1
+    finally:
+        manager.close()
+
+
+def test_rebuild_marks_the_index_complete_and_keeps_local_changes(tmp_path) -> None:
+    path = tmp_path / "ws.bm25"
+    index = BM25Index(path)
+    index.add("p9", "fresh gateway upsert", {"document_id": "d9"})
+    assert index.complete is False
+
+    assert index.rebuild((point_id, text, metadata) for point_id, (text, metadata) in CORPUS.items()) == 4
+
+    assert index.complete is True
+    assert {hit[0] for hit in index.search("gateway", limit=10)} == {"p1", "p2", "p9"}
+    index.flush()
+    reopened = BM25Index(path)
+    assert reopened.complete is True
+    assert reopened.doc_count == 5
+
+
+def test_lexical_search_falls_back_until_the_index_is_rebuilt() -> None:
+    storage = QdrantStorage.__new__(QdrantStorage)
+    storage.collection_name = "documents"
+    storage.lexical_index = BM25IndexManager(None)
+    storage.client = Mock()
+    records = [
+        Mock(id=point_id, payload={"workspace_id": "ws", "text": text, "metadata": {**metadata, "workspace_id": "ws"}})
+        for point_id, (text, metadata) in CORPUS.items()
+    ]
+    storage.client.scroll.side_effect = [(records[:2], "next"), (records[2:], None)]
+    storage.client.retrieve.side_effect = lambda collection_name, ids, **kwargs: [
+        record for record in records if record.id in ids
+    ]
+    storage.lexical_index.add_points("ws", ["p9"], ["new gateway doc"], [{"workspace_id": "ws"}])
+
+    assert storage.lexical_search("gateway", "ws") is None
+    assert storage.rebuild_lexical_index("ws", batch_size=2) == 4
+    assert storage.client.scroll.call_count == 2
+    assert [result["id"] for result in storage.lexical_search("ERR_CONN_RESET", "ws")] == ["p1"]
+
+
+def test_lexical_search_checks_unindexed_filters_on_qdrant_payloads() -> None:
+    storage = QdrantStorage.__new__(QdrantStorage)
+    storage.collection_name = "documents"
+    storage.lexical_index = BM25IndexManager(None)
+    storage.client = Mock()
+    records = {
+        "p1": Mock(id="p1", payload={"workspace_id": "ws", "text": "gateway", "metadata": {"team": "core"}}),
+        "p2": Mock(id="p2", payload={"workspace_id": "ws", "text": "gateway gateway", "metadata": {"team": "ops"}}),
+    }
+    storage.client.scroll.return_value = (list(records.values()), None)
+    storage.client.retrieve.side_effect = lambda collection_name, ids, **kwargs: [records[i] for i in ids]
+    storage.rebuild_lexical_index("ws")
+
+    results = storage.lexical_search("gateway", "ws", limit=1, filter_conditions={"team": "core"})
+
+    assert [result["id"] for result in results] == ["p1"]
+
+
+def test_matches_filters_mirrors_qdrant_semantics() -> None:
+    assert matches_filters({"lang": "md"}, {"lang": "md", "workspace_id": "ignored"})
+    assert matches_filters({"tags": ["a", "b"]}, {"tags": "b"})
+    assert not matches_filters({"lang": "python"}, {"lang": {"any": ["md", "txt"]}})
+
+
+def test_search_documents_fuses_lexical_only_hits() -> None:
+    service = RAGIngestionService.__new__(RAGIngestionService)
+    service.default_workspace_id = "default"
+    service._embed_query = lambda query: [0.1]
+    service.storage = Mock()
+    service.storage.collection_name = "documents"
+    service.storage.search.return_value = [
+        {"id": "v1", "score": 0.9, "text": "vector hit", "metadata": {"workspace_id": "default"}},
+    ]
+    service.storage.lexical_search.return_value = [
+        {"id": "l1", "bm25_score": 7.5, "text": "ERR_CONN_RESET", "metadata": {"workspace_id": "default"}},
+    ]
+
+    results = service.search_documents("ERR_CONN_RESET", limit=5)
+
+    assert {result["id"] for result in results} == {"v1", "l1"}
+    service.storage.lexical_search.assert_called_once()
@@ -22,7 +22,8 @@ def test_memory_options_model_and_top_k_bounds_exist():
 def test_memory_retrieval_branch_and_system_injection_exist():
     """Memory-enabled branch should retrieve memories and inject a system message."""
     assert "if request.memory and request.memory.enabled:" in API_SERVER_SOURCE
-    assert "memory_results = service.search_memory(" in API_SERVER_SOURCE
+    assert "memory_results = memory_outcome.value" in API_SERVER_SOURCE
+    assert "service.search_memory," in API_SERVER_SOURCE
     assert "messages_for_generation = prepend_context_system_message(" in API_SERVER_SOURCE
     assert "Remembered context:" in API_SERVER_SOURCE
 
@@ -53,7 +54,8 @@ def test_auto_store_guard_exists_and_calls_add_memory():
         r"if request\.memory and request\.memory\.enabled and request\.memory\.auto_store:"
     )
     assert re.search(guard_pattern, API_SERVER_SOURCE)
-    assert "store_result = memory_service_instance.add_memory(" in API_SERVER_SOURCE
+    assert "store_result = await backend_executor.run(" in API_SERVER_SOURCE
+    assert "memory_service_instance.add_memory," in API_SERVER_SOURCE
 
 
 
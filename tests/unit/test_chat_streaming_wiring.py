@@ -0,0 +1,31 @@
+# Needs: python-package:pytest>=9.0.2
+
+"""Static wiring checks for token-by-token chat completion streaming."""
+
+from pathlib import Path
+
+
+API_SERVER_SOURCE = Path("api_server.py").read_text(encoding="utf-8")
+ROUTER_SOURCE = Path("agent_router.py").read_text(encoding="utf-8")
+
+
+def test_router_streams_backend_deltas_with_first_token_fallback() -> None:
+    assert "async def generate_stream(" in ROUTER_SOURCE
+    assert "first_text = await circuit_breaker.call(deltas.first)" in ROUTER_SOURCE
+    assert "client.stream('POST', generate_url, json=payload, timeout=timeout)" in ROUTER_SOURCE
+    assert "payload['stream'] = True" in ROUTER_SOURCE
+
+
+def test_chat_completions_streams_router_tokens_instead_of_buffered_answer() -> None:
+    assert "routing_metadata, router_events = await start_router_stream(" in API_SERVER_SOURCE
+    assert "router.generate_stream(" in API_SERVER_SOURCE
+    assert "content=generated_text," not in API_SERVER_SOURCE
+    assert "router_events=router_events," in API_SERVER_SOURCE
+
+
+def test_streamed_output_is_guarded_incrementally_and_citations_trail() -> None:
+    assert "class StreamingOutputGuard:" in API_SERVER_SOURCE
+    assert "content = output_guard.feed(event[\"text\"])" in API_SERVER_SOURCE
+    assert "trailing_text = await finalize(output_guard.text, routing_metadata)" in API_SERVER_SOURCE
+    assert "answer_with_citations = append_rag_citations_and_guidance(" in API_SERVER_SOURCE
+    assert '"x-routing-metadata": routing_metadata,' in API_SERVER_SOURCE
@@ -0,0 +1,100 @@
+import types
+
+from chunking_engine import StructuredChunker, approximate_token_count, build_token_counter
+
+
+def _texts(chunks):
+    return [chunk["text"] for chunk in chunks]
+
+
+def test_chunks_respect_token_budget_and_cover_the_document() -> None:
+    text = " ".join(f"Sentence number {index} ends here." for index in range(200))
+    chunker = StructuredChunker(max_tokens=40, overlap_tokens=0)
+
+    chunks = chunker.chunk_text(text, {"document_id": "d1"})
+
+    assert len(chunks) > 1
+    assert all(chunk["metadata"]["chunk_tokens"] <= 40 for chunk in chunks)
+    assert all(approximate_token_count(chunk["text"]) <= 40 for chunk in chunks)
+    assert "".join(_texts(chunks)) == text
+    assert [chunk["metadata"]["chunk_index"] for chunk in chunks] == list(range(len(chunks)))
+    assert all(chunk["metadata"]["document_id"] == "d1" for chunk in chunks)
+
+
+def test_markdown_sections_start_new_chunks_and_keep_code_fences_whole() -> None:
+    intro = "Intro paragraph with enough words to fill half of the budget here. " * 2
+    text = (
+        "# Install\n\n" + intro + "\n\n"
+        "```bash\npip install brainego\n\nbrainego serve\n```\n\n"
+        "# Usage\n\nRun the gateway.\n"
+    )
+    chunker = StructuredChunker(max_tokens=60, overlap_tokens=0)
+
+    chunks = chunker.chunk_text(text, {"lang": "markdown"})
+
+    assert chunks[-1]["text"].startswith("# Usage")
+    assert chunks[-1]["metadata"]["section"] == "Usage"
+    assert sum("```bash" in chunk and "brainego serve\n```" in chunk for chunk in _texts(chunks)) == 1
+
+
+def test_python_definitions_are_not_split_and_keep_decorators() -> None:
+    body = "".join(f"    value_{index} = compute({index})\n" for index in range(6))
+    text = (
+        "import os\n\n\n"
+        "@cached\ndef first():\n" + body + "\n\n"
+        "class Second:\n    def method(self):\n" + body
+    )
+    chunker = StructuredChunker(max_tokens=70, overlap_tokens=0)
+
+    chunks = chunker.chunk_text(text, {"lang": "python"})
+
+    assert any("@cached\ndef first():\n" + body in chunk for chunk in _texts(chunks))
+    assert _texts(chunks)[-1].startswith("class Second:")
+
+
+def test_overlap_repeats_the_tail_of_the_previous_chunk() -> None:
+    text = "\n".join(f"line {index} of the log output" for index in range(40))
+    chunker = StructuredChunker(max_tokens=30, overlap_tokens=8)
+
+    chunks = chunker.chunk_text(text)
+
+    for previous, current in zip(chunks, chunks[1:]):
+        assert current["metadata"]["chunk_start"] < previous["metadata"]["chunk_end"]
+        assert previous["text"].endswith(text[current["metadata"]["chunk_start"]:previous["metadata"]["chunk_end"]])
+        assert current["metadata"]["chunk_tokens"] <= 30
+
+
+def test_chunks_are_streamed_lazily() -> None:
+    counted = []
+
+    def counter(text):
+        counted.append(text)
+        return approximate_token_count(text)
+
+    text = "\n\n".join(f"Paragraph {index} body text." for index in range(1000))
+    chunker = StructuredChunker(max_tokens=20, overlap_tokens=0, token_counter=counter)
+
+    first = next(chunker.iter_chunks(text))
+
+    assert first["metadata"]["chunk_index"] == 0
+    assert len(counted) < 10
+
+
+def test_token_counter_prefers_the_embedder_tokenizer() -> None:
+    tokenizer = types.SimpleNamespace(encode=lambda text, add_special_tokens=False: list(text))
+    embedder = types.SimpleNamespace(model=types.SimpleNamespace(tokenizer=tokenizer))
+
+    assert build_token_counter(embedder)("abcd") == 4
+    assert build_token_counter(object()) is approximate_token_count
+
+
+def test_whitespace_free_runs_are_hard_split_within_the_budget() -> None:
+    # One token per character, so a long run cannot fit as a single word
+    text = "intro words " + "a" * 95 + " tail words"
+    chunker = StructuredChunker(max_tokens=10, overlap_tokens=0, token_counter=len)
+
+    chunks = chunker.chunk_text(text)
+
+    assert all(len(chunk["text"]) <= 10 for chunk in chunks)
+    assert all(chunk["metadata"]["chunk_tokens"] <= 10 for chunk in chunks)
+    assert "".join(_texts(chunks)) == text
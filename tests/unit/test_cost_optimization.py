@@ -82,7 +82,7 @@ class TestQdrantArchival(unittest.TestCase):
         sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../..', 'scripts', 'observability'))
         
         # Mock dependencies
-        with patch('qdrant_archival_service.QdrantClient'):
+        with patch('qdrant_archival_service.create_qdrant_client'):
             with patch('qdrant_archival_service.Minio'):
                 from qdrant_archival_service import QdrantArchivalService
                 
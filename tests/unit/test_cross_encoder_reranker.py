@@ -0,0 +1,161 @@
+"""Unit tests for the cross-encoder reranking stage."""
+
+import threading
+import time
+from unittest.mock import Mock
+
+import pytest
+
+from cross_encoder_reranker import CrossEncoderReranker
+
+
+class FakeCrossEncoder:
+    def __init__(self, release=None):
+        self.calls = []
+        self.release = release
+
+    def predict(self, pairs, batch_size=32):
+        if self.release is not None:
+            self.release.wait(5)
+        self.calls.append((list(pairs), batch_size))
+        # Logit grows with the number of query words found in the chunk
+        return [float(sum(word in text for word in query.split()) * 2 - 1) for query, text in pairs]
+
+
+def _rows():
+    return [
+        {"id": "a", "text": "unrelated text", "score": 0.9, "metadata": {"chunk_hash": "h-a"}},
+        {"id": "b", "text": "retention policy internal", "score": 0.7, "metadata": {"chunk_hash": "h-b"}},
+        {"id": "c", "text": "policy only", "score": 0.8, "metadata": {}},
+    ]
+
+
+def test_rerank_scores_missing_pairs_in_one_batch_and_reorders() -> None:
+    model = FakeCrossEncoder()
+    reranker = CrossEncoderReranker(batch_size=8, latency_budget_ms=0, model=model)
+
+    out = reranker.rerank("retention policy", _rows(), alpha=0.2, top_k=2)
+
+    assert len(model.calls) == 1
+    assert len(model.calls[0][0]) == 3
+    assert model.calls[0][1] == 8
+    assert [row["id"] for row in out] == ["b", "c"]
+    assert out[0]["ranking_stage"] == "cross_encoder_reranked"
+    assert 0.0 <= out[0]["rerank_score"] <= 1.0
+
+
+def test_cache_is_keyed_on_query_and_chunk_hash() -> None:
+    model = FakeCrossEncoder()
+    reranker = CrossEncoderReranker(latency_budget_ms=0, model=model)
+    reranker.rerank("retention policy", _rows(), top_k=3)
+
+    moved = _rows()
+    moved[1]["id"] = "b-reindexed"  # same chunk_hash, different point id
+    reranker.rerank("  retention   policy ", moved, top_k=3)
+    assert len(model.calls) == 1
+
+    reranker.rerank("other question", _rows(), top_k=3)
+    assert len(model.calls) == 2
+    stats = reranker.get_stats()
+    assert stats["cache_hits"] == 3
+    assert stats["cache_entries"] == 6
+
+
+def test_cache_evicts_least_recently_used_scores() -> None:
+    reranker = CrossEncoderReranker(latency_budget_ms=0, cache_size=2, model=FakeCrossEncoder())
+    reranker.rerank("retention policy", _rows(), top_k=3)
+    assert reranker.get_stats()["cache_entries"] == 2
+
+
+def test_budget_exceeded_falls_back_to_cheap_reranker_and_warms_cache() -> None:
+    release = threading.Event()
+    model = FakeCrossEncoder(release=release)
+    reranker = CrossEncoderReranker(latency_budget_ms=20, model=model)
+
+    out = reranker.rerank("retention policy", _rows(), top_k=2)
+
+    assert out[0]["id"] == "b"
+    assert out[0]["ranking_stage"] == "reranked"
+    assert reranker.get_stats()["fallbacks"] == 1
+
+    release.set()
+    deadline = time.monotonic() + 5
+    while reranker.get_stats()["cache_entries"] < 3 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    out = reranker.rerank("retention policy", _rows(), top_k=2)
+    assert out[0]["ranking_stage"] == "cross_encoder_reranked"
+    assert len(model.calls) == 1
+
+
+def test_model_errors_fall_back_to_cheap_reranker() -> None:
+    class BrokenModel:
+        def predict(self, pairs, batch_size=32):
+            raise RuntimeError("onnx session closed")
+
+    reranker = CrossEncoderReranker(latency_budget_ms=0, model=BrokenModel())
+    out = reranker.rerank("retention policy", _rows(), top_k=2)
+
+    assert out[0]["id"] == "b"
+    assert reranker.get_stats()["errors"] == 1
+
+
+def test_pending_batch_for_query_is_not_resubmitted() -> None:
+    release = threading.Event()
+    model = FakeCrossEncoder(release=release)
+    reranker = CrossEncoderReranker(latency_budget_ms=20, model=model)
+
+    reranker.rerank("retention policy", _rows(), top_k=2)
+    out = reranker.rerank("retention policy", _rows(), top_k=2)
+
+    assert out[0]["ranking_stage"] == "reranked"
+    stats = reranker.get_stats()
+    assert stats["shed"] == 1
+    assert stats["pending_batches"] == 1
+    release.set()
+    reranker.shutdown()
+
+
+def test_queued_batch_is_cancelled_on_timeout() -> None:
+    release = threading.Event()
+    model = FakeCrossEncoder(release=release)
+    reranker = CrossEncoderReranker(latency_budget_ms=20, max_workers=1, max_pending=2, model=model)
+
+    reranker.rerank("first question", _rows(), top_k=2)  # occupies the only worker
+    reranker.rerank("second question", _rows(), top_k=2)  # queued behind it
+    stats = reranker.get_stats()
+    assert stats["cancelled"] == 1
+    assert stats["pending_batches"] == 1
+
+    release.set()
+    reranker.shutdown()
+    reranker._executor.shutdown(wait=True)
+    assert [pairs[0][0] for pairs, _ in model.calls] == ["first question"]
+
+
+def test_full_queue_sheds_to_cheap_reranker() -> None:
+    release = threading.Event()
+    model = FakeCrossEncoder(release=release)
+    reranker = CrossEncoderReranker(latency_budget_ms=20, max_pending=1, model=model)
+
+    reranker.rerank("first question", _rows(), top_k=2)
+    out = reranker.rerank("retention policy", _rows(), top_k=2)
+
+    assert out[0]["id"] == "b"
+    assert reranker.get_stats()["shed"] == 1
+    release.set()
+    reranker.shutdown()
+
+
+def test_startup_warm_up_follows_workspace_overrides(monkeypatch) -> None:
+    rag_service = pytest.importorskip("rag_service")
+    reranker = Mock()
+    monkeypatch.setattr(rag_service, "get_cross_encoder_reranker", lambda: reranker)
+    monkeypatch.setattr(rag_service, "RERANKER", "cheap")
+
+    monkeypatch.setattr(rag_service, "RERANKER_BY_WORKSPACE", '{"ws-a": "cheap"}')
+    rag_service.warm_up_reranker()
+    reranker.warm_up.assert_not_called()
+
+    monkeypatch.setattr(rag_service, "RERANKER_BY_WORKSPACE", '{"ws-a": "cheap", "ws-b": "cross_encoder"}')
+    rag_service.warm_up_reranker()
+    reranker.warm_up.assert_called_once_with()
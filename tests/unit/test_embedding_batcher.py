@@ -0,0 +1,125 @@
+import asyncio
+import threading
+from pathlib import Path
+
+import pytest
+
+from embedding_batcher import BatcherConfig, EmbeddingBatcher, EmbeddingQueueFullError
+
+
+class RecordingEncoder:
+    def __init__(self):
+        self.calls = []
+        self.release = threading.Event()
+        self.release.set()
+
+    def __call__(self, texts):
+        self.release.wait(5)
+        self.calls.append(list(texts))
+        return [[float(len(text)), float(index)] for index, text in enumerate(texts)]
+
+
+def _config(**overrides) -> BatcherConfig:
+    values = {"max_wait_ms": 20.0, "max_batch_tokens": 1000, "max_batch_size": 64, "max_queue_inputs": 100}
+    values.update(overrides)
+    return BatcherConfig(**values)
+
+
+@pytest.mark.asyncio
+async def test_concurrent_requests_are_coalesced_into_one_encode() -> None:
+    encoder = RecordingEncoder()
+    batcher = EmbeddingBatcher(encoder, config=_config())
+
+    results = await asyncio.gather(
+        batcher.submit(["a"]),
+        batcher.submit(["bb", "ccc"]),
+        batcher.submit(["dddd"]),
+    )
+
+    assert encoder.calls == [["a", "bb", "ccc", "dddd"]]
+    assert results[0] == [[1.0, 0.0]]
+    assert results[1] == [[2.0, 1.0], [3.0, 2.0]]
+    assert results[2] == [[4.0, 3.0]]
+    stats = batcher.get_stats()
+    assert stats["batches"] == 1
+    assert stats["requests"] == 3
+    assert stats["avg_batch_inputs"] == 4
+    await batcher.stop()
+
+
+@pytest.mark.asyncio
+async def test_batches_close_at_token_budget_without_splitting_requests() -> None:
+    encoder = RecordingEncoder()
+    batcher = EmbeddingBatcher(encoder, config=_config(max_batch_tokens=2), token_estimator=lambda text: 1)
+
+    await asyncio.gather(
+        batcher.submit(["a", "b"]),
+        batcher.submit(["c"]),
+        batcher.submit(["d", "e", "f"]),
+    )
+
+    assert encoder.calls == [["a", "b"], ["c"], ["d", "e", "f"]]
+    await batcher.stop()
+
+
+@pytest.mark.asyncio
+async def test_full_queue_rejects_new_requests() -> None:
+    encoder = RecordingEncoder()
+    encoder.release.clear()
+    batcher = EmbeddingBatcher(encoder, config=_config(max_wait_ms=0.0, max_queue_inputs=2))
+
+    first = asyncio.ensure_future(batcher.submit(["a"]))
+    await asyncio.sleep(0.05)  # first batch is now encoding and holds the worker
+    queued = asyncio.ensure_future(batcher.submit(["b", "c"]))
+    await asyncio.sleep(0)
+
+    with pytest.raises(EmbeddingQueueFullError):
+        await batcher.submit(["d"])
+
+    encoder.release.set()
+    assert await first == [[1.0, 0.0]]
+    assert len(await queued) == 2
+    assert batcher.get_stats()["rejected"] == 1
+    await batcher.stop()
+
+
+@pytest.mark.asyncio
+async def test_encode_errors_reach_every_caller_and_worker_keeps_running() -> None:
+    failures = {"remaining": 1}
+
+    def flaky(texts):
+        if failures["remaining"]:
+            failures["remaining"] -= 1
+            raise RuntimeError("model crashed")
+        return [[0.0] for _ in texts]
+
+    batcher = EmbeddingBatcher(flaky, config=_config())
+    results = await asyncio.gather(
+        batcher.submit(["a"]),
+        batcher.submit(["b"]),
+        return_exceptions=True,
+    )
+
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert await batcher.submit(["c"]) == [[0.0]]
+    await batcher.stop()
+
+
+def test_config_reads_environment(monkeypatch) -> None:
+    monkeypatch.setenv("EMBEDDING_BATCH_MAX_WAIT_MS", "2.5")
+    monkeypatch.setenv("EMBEDDING_BATCH_MAX_TOKENS", "4096")
+    monkeypatch.setenv("EMBEDDING_QUEUE_MAX_INPUTS", "10")
+
+    config = BatcherConfig.from_env()
+
+    assert config.max_wait_ms == 2.5
+    assert config.max_batch_tokens == 4096
+    assert config.max_queue_inputs == 10
+
+
+def test_embedding_service_routes_requests_through_batcher() -> None:
+    source = Path("embedding_service.py").read_text(encoding="utf-8")
+
+    assert "async def create_embeddings(request: EmbeddingRequest" in source
+    assert "vectors = await _get_batcher().submit(inputs)" in source
+    assert "status_code=429" in source
@@ -0,0 +1,106 @@
+from array import array
+from pathlib import Path
+from unittest.mock import MagicMock
+
+from embedding_cache import EmbeddingCache, normalize_embedding_text
+
+
+class FakeRedis:
+    def __init__(self):
+        self.store = {}
+        self.ttls = {}
+
+    def get(self, key):
+        return self.store.get(key)
+
+    def setex(self, key, ttl, value):
+        self.store[key] = value
+        self.ttls[key] = ttl
+
+
+def test_keys_use_model_and_normalized_text() -> None:
+    assert normalize_embedding_text("  what   is\tRAG?\n") == "what is RAG?"
+    assert EmbeddingCache.make_key("m", "what is  RAG?") == EmbeddingCache.make_key("m", " what is RAG? ")
+    assert EmbeddingCache.make_key("m", "what is RAG?") != EmbeddingCache.make_key("other", "what is RAG?")
+
+
+def test_get_or_compute_embeds_once_per_normalized_query() -> None:
+    cache = EmbeddingCache()
+    compute = MagicMock(return_value=[0.5, 0.25, -1.0])
+
+    first = cache.get_or_compute("nomic", "deploy steps", compute)
+    second = cache.get_or_compute("nomic", "deploy   steps ", compute)
+
+    compute.assert_called_once_with("deploy steps")
+    assert first == second == [0.5, 0.25, -1.0]
+    stats = cache.get_stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["hit_rate"] == 0.5
+
+
+def test_lru_evicts_least_recent_entries_within_byte_budget() -> None:
+    vector = [0.0] * 64
+    entry_bytes = EmbeddingCache._entry_size(EmbeddingCache.make_key("m", "a"), array("f", vector))
+    cache = EmbeddingCache(max_bytes=entry_bytes * 2)
+
+    cache.put("m", "a", vector)
+    cache.put("m", "b", vector)
+    assert cache.get("m", "a") is not None  # "a" becomes most recent
+    cache.put("m", "c", vector)
+
+    assert cache.get("m", "b") is None
+    assert cache.get("m", "a") is not None
+    assert cache.get("m", "c") is not None
+    stats = cache.get_stats()
+    assert stats["evictions"] == 1
+    assert stats["bytes"] <= stats["max_bytes"]
+
+
+def test_redis_tier_serves_misses_and_refills_local_tier() -> None:
+    redis_client = FakeRedis()
+    writer = EmbeddingCache(redis_client=redis_client, redis_ttl_seconds=60)
+    writer.put("nomic", "shared query", [1.0, 2.0])
+    assert list(redis_client.ttls.values()) == [60]
+
+    reader = EmbeddingCache(redis_client=redis_client)
+    assert reader.get("nomic", "shared query") == [1.0, 2.0]
+    assert reader.get("nomic", "shared query") == [1.0, 2.0]
+
+    stats = reader.get_stats()
+    assert stats["redis_hits"] == 1
+    assert stats["hits"] == 1
+
+
+def test_redis_errors_are_treated_as_misses() -> None:
+    redis_client = MagicMock()
+    redis_client.get.side_effect = ConnectionError("redis down")
+    redis_client.setex.side_effect = ConnectionError("redis down")
+    cache = EmbeddingCache(redis_client=redis_client)
+
+    assert cache.get_or_compute("m", "q", lambda text: [0.5]) == [0.5]
+    assert cache.get("m", "q") == [0.5]
+    assert cache.get_stats()["redis_errors"] == 2
+
+
+def test_hits_and_misses_are_reported_to_metrics_exporter() -> None:
+    exporter = MagicMock()
+    cache = EmbeddingCache(metrics_exporter=exporter)
+
+    cache.get_or_compute("m", "q", lambda text: [0.5])
+    cache.get_or_compute("m", "q", lambda text: [0.5])
+
+    exporter.record_cache_miss.assert_called_once_with("embedding")
+    exporter.record_cache_hit.assert_called_once_with("embedding")
+
+
+def test_services_embed_queries_through_shared_cache() -> None:
+    rag_source = Path("rag_service.py").read_text(encoding="utf-8")
+    memory_source = Path("memory_service.py").read_text(encoding="utf-8")
+    api_source = Path("api_server.py").read_text(encoding="utf-8")
+
+    assert "self.embedder.embed_text(query)" not in rag_source
+    assert "query_embedding = self._embed_query(query)" in rag_source
+    assert "query_embedding = self.embedding_cache.get_or_compute(" in memory_source
+    assert "set_embedding_cache(embedding_cache)" in api_source
+    assert api_source.count("embedding_cache=embedding_cache") == 2
@@ -0,0 +1,115 @@
+# Needs: python-package:numpy
+# Needs: python-package:qdrant-client
+"""Unit tests for the compact embedding wire formats."""
+
+from pathlib import Path
+from unittest.mock import Mock, patch
+
+import numpy as np
+import pytest
+
+from embedding_wire import (
+    DTYPE_HEADER,
+    OCTET_STREAM,
+    SHAPE_HEADER,
+    decode_base64_vector,
+    decode_matrix,
+    encode_base64_vector,
+    encode_matrix,
+)
+from rag_service import HTTPEmbeddingServiceClient
+
+
+def _health_response(dimension: int) -> Mock:
+    response = Mock()
+    response.json.return_value = {"dimension": dimension}
+    response.raise_for_status.return_value = None
+    return response
+
+
+def test_matrix_roundtrip_is_a_view_over_the_body() -> None:
+    vectors = [np.array([0.5, -1.0, 2.0]), np.array([0.0, 0.25, 3.5])]
+
+    body, headers = encode_matrix(vectors)
+    decoded = decode_matrix(body, headers[SHAPE_HEADER], headers[DTYPE_HEADER])
+
+    assert headers[SHAPE_HEADER] == "2,3"
+    assert len(body) == 2 * 3 * 4
+    assert decoded.shape == (2, 3)
+    assert not decoded.flags.owndata
+    np.testing.assert_array_equal(decoded, np.asarray(vectors, dtype=np.float32))
+
+
+def test_float16_halves_the_payload() -> None:
+    vectors = [np.linspace(-1, 1, 768)]
+
+    body32, _ = encode_matrix(vectors, dtype="float32")
+    body16, headers = encode_matrix(vectors, dtype="float16")
+
+    assert len(body16) * 2 == len(body32)
+    decoded = decode_matrix(body16, headers[SHAPE_HEADER], "float16")
+    np.testing.assert_allclose(decoded[0], vectors[0], atol=1e-3)
+
+
+def test_base64_vector_roundtrip() -> None:
+    encoded = encode_base64_vector([1.0, -2.0, 0.5])
+
+    np.testing.assert_array_equal(decode_base64_vector(encoded), [1.0, -2.0, 0.5])
+
+
+def test_decode_rejects_mismatched_shape_and_unknown_dtype() -> None:
+    body, _ = encode_matrix([[1.0, 2.0]])
+
+    with pytest.raises(ValueError):
+        decode_matrix(body, "2,2")
+    with pytest.raises(ValueError):
+        decode_matrix(body, "not-a-shape")
+    with pytest.raises(ValueError):
+        encode_matrix([[1.0]], dtype="float64")
+
+
+def test_client_requests_and_decodes_binary_responses() -> None:
+    body, headers = encode_matrix([[0.1, 0.2], [0.3, 0.4]])
+    embed_response = Mock()
+    embed_response.headers = {"content-type": OCTET_STREAM, **headers}
+    embed_response.content = body
+    embed_response.raise_for_status.return_value = None
+
+    with patch("embedding_providers.httpx.get", return_value=_health_response(2)), patch(
+        "embedding_providers.httpx.post", return_value=embed_response
+    ) as post:
+        client = HTTPEmbeddingServiceClient("http://embedding-service:8003", wire_format="binary")
+        matrix = client.embed_batch_array(["a", "b"])
+        result = client.embed_batch(["a", "b"])
+
+    assert post.call_args.kwargs["headers"] == {"Accept": OCTET_STREAM}
+    assert matrix.shape == (2, 2)
+    np.testing.assert_allclose(result, [[0.1, 0.2], [0.3, 0.4]], rtol=1e-6)
+    assert isinstance(result[0][0], float)
+
+
+def test_client_decodes_base64_and_falls_back_to_json() -> None:
+    base64_response = Mock()
+    base64_response.headers = {"content-type": "application/json"}
+    base64_response.json.return_value = {
+        "data": [{"index": 0, "embedding": encode_base64_vector([1.0, 2.0])}]
+    }
+    base64_response.raise_for_status.return_value = None
+
+    with patch("embedding_providers.httpx.get", return_value=_health_response(2)), patch(
+        "embedding_providers.httpx.post", return_value=base64_response
+    ) as post:
+        client = HTTPEmbeddingServiceClient("http://embedding-service:8003", wire_format="base64")
+        result = client.embed_batch(["a"])
+
+    assert post.call_args.kwargs["json"]["encoding_format"] == "base64"
+    assert result == [[1.0, 2.0]]
+
+
+def test_embedding_service_negotiates_wire_format() -> None:
+    source = Path("embedding_service.py").read_text(encoding="utf-8")
+
+    assert 'OCTET_STREAM in raw_request.headers.get("accept", "")' in source
+    assert 'request.encoding_format == "base64"' in source
+    for dockerfile in ("Dockerfile.api", "Dockerfile.test"):
+        assert "COPY embedding_wire.py ." in Path(dockerfile).read_text(encoding="utf-8")
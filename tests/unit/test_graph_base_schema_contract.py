@@ -32,4 +32,4 @@ def test_api_server_exposes_simple_cypher_query_endpoint():
 
     assert '@app.post("/graph/query"' in api_server
     assert "Execute Cypher query on knowledge graph" in api_server
-    assert "service.query_graph(" in api_server
+    assert "service.query_graph," in api_server
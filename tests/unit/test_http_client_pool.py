@@ -0,0 +1,95 @@
+# Needs: python-package:httpx
+# Needs: python-package:prometheus-client
+
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import pytest
+
+from http_client_pool import HTTPClientPool, HTTPPoolConfig
+
+
+def test_pool_reuses_one_client_per_endpoint() -> None:
+    pool = HTTPClientPool("test", config=HTTPPoolConfig())
+
+    first = pool.get_client("http://max-serve-llama:8080/")
+    second = pool.get_client("http://max-serve-llama:8080")
+    other = pool.get_client("http://max-serve-qwen:8081")
+
+    assert first is second
+    assert other is not first
+    assert pool.get_stats()["clients"] == 2
+
+
+def test_pool_config_reads_environment(monkeypatch) -> None:
+    monkeypatch.setenv("HTTP_POOL_MAX_CONNECTIONS", "7")
+    monkeypatch.setenv("HTTP_POOL_MAX_KEEPALIVE_CONNECTIONS", "3")
+    monkeypatch.setenv("HTTP_POOL_KEEPALIVE_EXPIRY_SECONDS", "12.5")
+    monkeypatch.setenv("HTTP_POOL_HTTP2", "true")
+
+    config = HTTPPoolConfig.from_env()
+
+    assert config.max_connections == 7
+    assert config.max_keepalive_connections == 3
+    assert config.keepalive_expiry_seconds == 12.5
+    assert config.http2 is True
+
+
+@pytest.mark.asyncio
+async def test_aclose_closes_clients_and_resets_exported_gauges() -> None:
+    exporter = MagicMock()
+    pool = HTTPClientPool("test", config=HTTPPoolConfig(), metrics_exporter=exporter)
+    pool.register("http://max-serve-llama:8080", None)
+    client = pool.get_client("http://max-serve-llama:8080")
+
+    await pool.aclose()
+
+    assert client.is_closed
+    assert pool.get_stats()["clients"] == 0
+    exporter.update_http_pool_stats.assert_called_with(
+        pool="test",
+        clients=0,
+        connections={"http://max-serve-llama:8080": {"active": 0, "idle": 0}},
+    )
+    assert pool.get_client("http://max-serve-llama:8080") is not client
+
+
+def test_router_fallback_chain_and_api_use_shared_pool() -> None:
+    root = Path(__file__).resolve().parents[2]
+    router_source = (root / "agent_router.py").read_text(encoding="utf-8")
+    fallback_source = (root / "fallback_chain.py").read_text(encoding="utf-8")
+    api_source = (root / "api_server.py").read_text(encoding="utf-8")
+
+    assert "httpx.AsyncClient(" not in router_source
+    assert "httpx.AsyncClient(" not in fallback_source
+    assert "client = self.http_pool.get_client(model.endpoint)" in router_source
+    assert "client = self.http_pool.get_client(self.max_gpu_endpoint)" in fallback_source
+    assert 'AgentRouter(config_path=AGENT_ROUTER_CONFIG, http_pool=model_http_pool)' in api_source
+    assert "await agent_router.aclose()" in api_source
+
+
+def test_pool_gauges_are_exposed_through_a_parent_registry() -> None:
+    from prometheus_client import CollectorRegistry
+
+    from metrics_exporter import MetricsExporter
+
+    exporter = MetricsExporter("api-server", registry=CollectorRegistry())
+    parent = CollectorRegistry()
+    exporter.expose_in(parent, prefixes=("http_client_pool",))
+    pool = HTTPClientPool("model_backends", config=HTTPPoolConfig(), metrics_exporter=exporter)
+
+    pool.register("http://max-serve-llama:8080")
+
+    families = {family.name for family in parent.collect()}
+    assert {"http_client_pool_clients", "http_client_pool_connections"} <= families
+    assert all(name.startswith("http_client_pool") for name in families)
+    assert parent.get_sample_value("http_client_pool_clients", {"pool": "model_backends"}) == 1
+
+
+def test_api_server_publishes_model_pool_gauges_on_default_registry() -> None:
+    api_server = pytest.importorskip("api_server")
+
+    api_server.model_http_pool.publish_metrics()
+
+    families = {family.name for family in api_server.REGISTRY.collect()}
+    assert {"http_client_pool_clients", "http_client_pool_connections"} <= families
@@ -38,3 +38,37 @@ def test_rrf_fusion_combines_vector_and_bm25_ranks() -> None:
     fused = MODULE.fuse_rrf(vector, bm25, rrf_k=60, top_k=2)
     assert len(fused) == 2
     assert all("rrf_score" in item for item in fused)
+
+
+def test_overlap_scores_match_per_text_scores() -> None:
+    texts = ["internal retention policy document", "unrelated source code", ""]
+    scores = MODULE.overlap_scores("Retention policy", texts)
+    assert scores == [MODULE.bm25_lite_score("Retention policy", text) for text in texts]
+    assert scores[0] == 1.0
+    assert scores[2] == 0.0
+
+
+def test_candidate_texts_are_tokenized_once_across_stages(monkeypatch) -> None:
+    tokenized = []
+    tokenize = MODULE.tokenize
+    monkeypatch.setattr(MODULE, "tokenize", lambda text: tokenized.append(text) or tokenize(text))
+    rows = [{"id": str(i), "text": f"chunk {i} about retention policy"} for i in range(20)]
+    term_sets = {}
+
+    MODULE.rank_bm25_lite("retention policy", rows, term_sets=term_sets)
+    MODULE.rank_bm25_lite("retention policy", rows, term_sets=term_sets)
+
+    assert len(tokenized) == len(rows) + 1
+    assert len(term_sets) == len(rows) + 1
+
+
+def test_term_sets_do_not_outlive_the_request(monkeypatch) -> None:
+    tokenized = []
+    tokenize = MODULE.tokenize
+    monkeypatch.setattr(MODULE, "tokenize", lambda text: tokenized.append(text) or tokenize(text))
+    rows = [{"id": "1", "text": "retention policy"}]
+
+    MODULE.rank_bm25_lite("retention policy", rows)
+    MODULE.rank_bm25_lite("retention policy", rows)
+
+    assert len(tokenized) == 4
@@ -0,0 +1,144 @@
+"""Unit tests for batched document ingestion jobs."""
+
+from __future__ import annotations
+
+import sys
+import types
+
+import pytest
+
+from data_collectors import ingestion_worker
+
+
+def test_process_document_batch_ingests_all_documents_in_one_call(fake_rag_module, make_document) -> None:
+    result = ingestion_worker.process_document_batch([make_document("alpha"), make_document("beta")])
+
+    assert result["status"] == "success"
+    assert result["processed"] == 2
+    assert result["total_chunks"] == 4
+    assert len(fake_rag_module.instances[0].batches) == 1
+    assert [doc["status"] for doc in result["documents"]] == ["success", "success"]
+
+
+def test_process_document_batch_reports_per_document_failures(fake_rag_module, monkeypatch, make_document) -> None:
+    normalizer = ingestion_worker.get_format_normalizer()
+    original = normalizer.normalize_document
+
+    def normalize(document):
+        if document["text"] == "malformed":
+            raise ValueError("cannot normalize")
+        return original(document)
+
+    monkeypatch.setattr(normalizer, "normalize_document", normalize)
+
+    result = ingestion_worker.process_document_batch(
+        [make_document("alpha"), make_document("malformed"), make_document("please fail")]
+    )
+
+    assert result["status"] == "partial"
+    assert result["processed"] == 1
+    assert result["failed"] == 2
+    statuses = result["documents"]
+    assert [doc["index"] for doc in statuses] == [0, 1, 2]
+    assert statuses[0]["status"] == "success"
+    assert statuses[1]["error"] == "cannot normalize"
+    assert statuses[2]["error"] == "embedding failed"
+    assert len(fake_rag_module.instances[0].batches[0]) == 2
+
+
+def test_process_document_batch_marks_every_document_failed_when_ingestion_raises(fake_rag_module, make_document) -> None:
+    service = ingestion_worker.get_rag_ingestion_service()
+
+    def boom(documents, workspace_id=None):
+        raise ConnectionError("qdrant down")
+
+    service.ingest_documents_batch = boom
+    result = ingestion_worker.process_document_batch([make_document("alpha"), make_document("beta")])
+
+    assert result["status"] == "error"
+    assert all(doc["error"] == "qdrant down" for doc in result["documents"])
+
+
+def test_bad_document_in_a_job_does_not_fail_its_healthy_neighbours(monkeypatch, make_document) -> None:
+    rag_service = pytest.importorskip("rag_service")
+    from semantic_response_cache import SemanticCacheConfig, SemanticResponseCache
+
+    class PoisonEmbedder:
+        def embed_batch(self, texts):
+            if any("poison" in text for text in texts):
+                raise RuntimeError("embedding failed")
+            return [[1.0] for _ in texts]
+
+    class StoredPoints:
+        def __init__(self):
+            self.stored = []
+
+        def upsert_points(self, texts, embeddings, metadatas, workspace_id, wait=True):
+            self.stored.extend(metadata["title"] for metadata in metadatas)
+            return [f"point-{len(self.stored)}-{i}" for i in range(len(texts))]
+
+    class WorkerRAGIngestionService(rag_service.RAGIngestionService):
+        def __init__(self, **kwargs):
+            self.chunker = rag_service.DocumentChunker(chunk_size=200, overlap=0)
+            self.embedder = PoisonEmbedder()
+            self.storage = StoredPoints()
+            self.default_workspace_id = "default"
+            self.response_cache = SemanticResponseCache(SemanticCacheConfig())
+
+    module = types.ModuleType("rag_service")
+    module.RAGIngestionService = WorkerRAGIngestionService
+    monkeypatch.setitem(sys.modules, "rag_service", module)
+    ingestion_worker.reset_service_cache()
+    documents = [make_document(text) for text in ("alpha notes", "poison notes", "beta notes")]
+
+    try:
+        result = ingestion_worker.process_document_batch(documents)
+        service = ingestion_worker.get_rag_ingestion_service()
+    finally:
+        ingestion_worker.reset_service_cache()
+
+    assert result["status"] == "partial"
+    assert [doc["status"] for doc in result["documents"]] == ["success", "error", "success"]
+    assert result["documents"][1]["error"] == "embedding failed"
+    assert sorted(set(service.storage.stored)) == ["alpha notes", "beta notes"]
+
+
+def test_batch_documents_respects_count_and_character_limits() -> None:
+    ingestion_queue = pytest.importorskip("data_collectors.ingestion_queue")
+    documents = [{"text": "x" * size} for size in (40, 40, 40, 200, 10, 10, 10)]
+
+    batches = ingestion_queue.batch_documents(documents, max_documents=3, max_chars=100)
+
+    assert [[len(doc["text"]) for doc in batch] for batch in batches] == [
+        [40, 40],
+        [40],
+        [200],
+        [10, 10, 10],
+    ]
+
+
+def test_batch_job_status_exposes_per_document_results() -> None:
+    ingestion_queue = pytest.importorskip("data_collectors.ingestion_queue")
+    from unittest.mock import MagicMock, patch
+
+    job = MagicMock()
+    job.id = "job-1"
+    job.get_status.return_value = "finished"
+    job.meta = {"mode": "batch", "document_count": 2}
+    job.result = {
+        "status": "partial",
+        "documents": [
+            {"index": 0, "status": "success", "document_id": "doc-0"},
+            {"index": 1, "status": "error", "error": "boom"},
+        ],
+    }
+    queue = ingestion_queue.IngestionQueue.__new__(ingestion_queue.IngestionQueue)
+    queue.redis_conn = MagicMock()
+
+    with patch.object(ingestion_queue.Job, "fetch", return_value=job):
+        status = queue.get_job_status("job-1")
+
+    assert status["document_count"] == 2
+    assert status["documents_succeeded"] == 1
+    assert status["documents_failed"] == 1
+    assert status["documents"][1]["error"] == "boom"
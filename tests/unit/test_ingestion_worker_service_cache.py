@@ -0,0 +1,88 @@
+"""Unit tests for per-process service reuse in the ingestion worker."""
+
+from __future__ import annotations
+
+import types
+
+from data_collectors import ingestion_worker
+
+
+def test_process_document_reuses_one_service_per_process(fake_rag_module, make_document) -> None:
+    first = ingestion_worker.process_document(make_document("alpha"))
+    second = ingestion_worker.process_document(make_document("beta"))
+
+    assert first["status"] == second["status"] == "success"
+    assert len(fake_rag_module.instances) == 1
+    assert fake_rag_module.instances[0].ingested == ["alpha", "beta"]
+    assert ingestion_worker.get_format_normalizer() is ingestion_worker.get_format_normalizer()
+
+
+def test_config_change_creates_a_separate_service(fake_rag_module, monkeypatch) -> None:
+    default_service = ingestion_worker.get_rag_ingestion_service()
+    monkeypatch.setenv("QDRANT_HOST", "qdrant-replica")
+
+    replica_service = ingestion_worker.get_rag_ingestion_service()
+
+    assert replica_service is not default_service
+    assert replica_service.kwargs["qdrant_host"] == "qdrant-replica"
+
+
+def test_cached_service_is_health_checked_at_most_once_per_interval(fake_rag_module, monkeypatch) -> None:
+    monkeypatch.setattr(ingestion_worker, "RAG_WORKER_HEALTHCHECK_INTERVAL_SECONDS", 0.0)
+    service = ingestion_worker.get_rag_ingestion_service()
+    ingestion_worker.get_rag_ingestion_service()
+    ingestion_worker.get_rag_ingestion_service()
+    assert service.storage.probes == 2
+
+    monkeypatch.setattr(ingestion_worker, "RAG_WORKER_HEALTHCHECK_INTERVAL_SECONDS", 3600.0)
+    ingestion_worker.get_rag_ingestion_service()
+    assert service.storage.probes == 2
+
+
+def test_unreachable_qdrant_fails_the_job_and_is_probed_again(fake_rag_module, monkeypatch, make_document) -> None:
+    monkeypatch.setattr(ingestion_worker, "RAG_WORKER_HEALTHCHECK_INTERVAL_SECONDS", 0.0)
+    service = ingestion_worker.get_rag_ingestion_service()
+
+    def unreachable():
+        service.storage.probes += 1
+        raise ConnectionError("qdrant down")
+
+    service.storage.ensure_connected = unreachable
+    result = ingestion_worker.process_document(make_document("gamma"))
+
+    assert result["status"] == "error"
+    assert "qdrant down" in result["error"]
+    assert len(fake_rag_module.instances) == 1
+
+    del service.storage.ensure_connected
+    assert ingestion_worker.process_document(make_document("gamma"))["status"] == "success"
+
+
+def test_in_process_jobs_leave_lexical_index_flushes_to_the_index_thresholds(fake_rag_module, monkeypatch, make_document) -> None:
+    monkeypatch.setattr(ingestion_worker, "INGESTION_WORKER_FORK", False)
+    service = ingestion_worker.get_rag_ingestion_service()
+    service.storage.lexical_index = types.SimpleNamespace(flushes=0)
+    service.storage.lexical_index.flush_all = lambda: setattr(
+        service.storage.lexical_index, "flushes", service.storage.lexical_index.flushes + 1
+    )
+
+    ingestion_worker.process_document(make_document("alpha"))
+    ingestion_worker.process_document_batch([make_document("beta")])
+    assert service.storage.lexical_index.flushes == 0
+
+    ingestion_worker.flush_lexical_indexes()
+    assert service.storage.lexical_index.flushes == 1
+
+
+def test_forked_jobs_flush_the_lexical_index_before_exiting(fake_rag_module, monkeypatch, make_document) -> None:
+    monkeypatch.setattr(ingestion_worker, "INGESTION_WORKER_FORK", True)
+    service = ingestion_worker.get_rag_ingestion_service()
+    service.storage.lexical_index = types.SimpleNamespace(flushes=0)
+    service.storage.lexical_index.flush_all = lambda: setattr(
+        service.storage.lexical_index, "flushes", service.storage.lexical_index.flushes + 1
+    )
+
+    ingestion_worker.process_document(make_document("alpha"))
+    ingestion_worker.process_document_batch([make_document("beta")])
+
+    assert service.storage.lexical_index.flushes == 2
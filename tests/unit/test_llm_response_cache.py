@@ -0,0 +1,179 @@
+# Needs: python-package:pyyaml
+# Needs: python-package:httpx
+# Needs: python-package:prometheus-client
+
+import asyncio
+import importlib.util
+import json
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import pytest
+
+from llm_response_cache import LLMResponseCache, LLMResponseCacheConfig
+
+
+_SPEC = importlib.util.spec_from_file_location("agent_router", Path(__file__).resolve().parents[2] / "agent_router.py")
+agent_router = importlib.util.module_from_spec(_SPEC)
+assert _SPEC and _SPEC.loader
+_SPEC.loader.exec_module(agent_router)
+Intent = agent_router.Intent
+
+
+class FakeRedis:
+    def __init__(self):
+        self.store = {}
+
+    def get(self, key):
+        return self.store.get(key)
+
+    def setex(self, key, ttl, value):
+        self.store[key] = value
+
+
+def _cache(**overrides) -> LLMResponseCache:
+    return LLMResponseCache(LLMResponseCacheConfig(**{"enabled": True, **overrides}))
+
+
+def _build_router(cache: LLMResponseCache):
+    router = object.__new__(agent_router.AgentRouter)
+    router.metrics = MagicMock()
+    router.models = {
+        "llama": agent_router.ModelConfig(
+            name="llama-model",
+            endpoint="http://llama:8080",
+            description="llama",
+            capabilities=[],
+            max_tokens=128,
+            temperature=0.7,
+            aliases=[],
+            health_status=True,
+        )
+    }
+    router.routing_config = agent_router.RoutingConfig(
+        primary_model={"general": "llama"},
+        fallback_chains={"llama": []},
+        timeouts={"request": 30, "health_check": 5},
+        retry={"max_attempts": 1, "backoff_factor": 1.0},
+    )
+    router.circuit_breakers = {}
+    router.model_aliases = {}
+    router._routing_attempts = {}
+    router._routing_fallbacks = {}
+    router.classify_intent = lambda _: (Intent.GENERAL, 0.9)
+    router.response_cache = cache
+    return router
+
+
+def test_cache_applies_to_deterministic_or_hinted_requests_only() -> None:
+    cache = _cache()
+
+    assert cache.applies_to(0.0) is True
+    assert cache.applies_to(0.7) is False
+    assert cache.applies_to(0.7, cache_hint=True) is True
+    assert cache.applies_to(0.0, cache_hint=False) is False
+    assert LLMResponseCache(LLMResponseCacheConfig(enabled=False)).applies_to(0.0) is False
+
+
+def test_key_covers_full_prompt_model_and_sampling_params() -> None:
+    base = {"prompt": "x" * 2000 + "a", "max_tokens": 64, "temperature": 0, "top_p": 0.9, "stop": ["</s>"]}
+
+    key = LLMResponseCache.make_key("llama", base)
+
+    assert key == LLMResponseCache.make_key("llama", dict(base))
+    assert key != LLMResponseCache.make_key("llama", {**base, "prompt": "x" * 2000 + "b"})
+    assert key != LLMResponseCache.make_key("qwen-coder", base)
+    assert key != LLMResponseCache.make_key("llama", {**base, "max_tokens": 65})
+
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_requests_share_one_backend_call() -> None:
+    cache = _cache()
+    release = asyncio.Event()
+    calls = 0
+
+    async def generate():
+        nonlocal calls
+        calls += 1
+        await release.wait()
+        return {"success": True, "text": "42", "model_id": "llama"}
+
+    waiters = [asyncio.create_task(cache.get_or_generate("k", generate)) for _ in range(5)]
+    await asyncio.sleep(0)
+    release.set()
+    outcomes = await asyncio.gather(*waiters)
+
+    assert calls == 1
+    assert sorted(outcome for _, outcome in outcomes) == ["coalesced"] * 4 + ["miss"]
+    assert all(result["text"] == "42" for result, _ in outcomes)
+    assert (await cache.get_or_generate("k", generate))[1] == "hit"
+
+
+@pytest.mark.asyncio
+async def test_failures_are_not_cached_and_redis_serves_other_replicas() -> None:
+    redis_client = FakeRedis()
+    first = LLMResponseCache(LLMResponseCacheConfig(enabled=True), redis_client=redis_client)
+
+    async def fail():
+        return {"success": False, "error": "boom"}
+
+    async def succeed():
+        return {"success": True, "text": "ok", "model_id": "llama"}
+
+    assert (await first.get_or_generate("k", fail))[0]["success"] is False
+    assert first.get_stats()["entries"] == 0
+    await first.get_or_generate("k", succeed)
+    assert json.loads(redis_client.store["llm_response:k"]) == {"text": "ok", "model_id": "llama"}
+
+    second = LLMResponseCache(LLMResponseCacheConfig(enabled=True), redis_client=redis_client)
+    result, outcome = await second.get_or_generate("k", fail)
+    assert outcome == "redis_hit"
+    assert result == {"success": True, "text": "ok", "model_id": "llama"}
+
+
+@pytest.mark.asyncio
+async def test_router_serves_repeated_deterministic_prompts_from_cache(monkeypatch) -> None:
+    router = _build_router(_cache())
+    calls = []
+
+    async def try_model(**kwargs):
+        calls.append(kwargs)
+        return {"success": True, "text": "answer", "model_id": kwargs["model_id"]}
+
+    monkeypatch.setattr(router, "_try_model", try_model)
+    messages = [{"role": "user", "content": "hi"}]
+
+    first = await router.generate(messages=messages, prompt="p", temperature=0.0)
+    second = await router.generate(messages=messages, prompt="p", temperature=0.0)
+    sampled = await router.generate(messages=messages, prompt="p")
+
+    assert len(calls) == 2
+    assert first["metadata"]["cache"] == "miss"
+    assert second["metadata"]["cache"] == "hit"
+    assert second["text"] == "answer"
+    assert sampled["metadata"]["cache"] == "bypass"
+
+
+@pytest.mark.asyncio
+async def test_cancelled_leader_does_not_cancel_coalesced_waiters() -> None:
+    cache = _cache()
+    release = asyncio.Event()
+
+    async def generate():
+        await release.wait()
+        return {"success": True, "text": "42", "model_id": "llama"}
+
+    leader = asyncio.create_task(cache.get_or_generate("k", generate))
+    await asyncio.sleep(0)
+    follower = asyncio.create_task(cache.get_or_generate("k", generate))
+    await asyncio.sleep(0)
+
+    leader.cancel()
+    await asyncio.sleep(0)
+    release.set()
+    result, outcome = await follower
+
+    assert leader.cancelled()
+    assert (result["text"], outcome) == ("42", "coalesced")
+    assert cache.get_stats()["in_flight"] == 0
+    assert (await cache.get_or_generate("k", generate))[1] == "hit"
@@ -0,0 +1,75 @@
+import time
+from pathlib import Path
+
+from maintained_stats import MaintainedStats
+
+
+class Counter:
+    def __init__(self, **values):
+        self.values = values
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return {key: (dict(value) if isinstance(value, dict) else value) for key, value in self.values.items()}
+
+
+def test_first_read_counts_then_writes_keep_counters_current() -> None:
+    count = Counter(total_nodes=10, nodes_by_type={"Person": 4})
+    stats = MaintainedStats("graph", count)
+
+    stats.increment("total_nodes")
+    assert stats.get()["total_nodes"] == 10
+
+    stats.increment("total_nodes", delta=2)
+    stats.increment("nodes_by_type", "Person", delta=2)
+    stats.increment("nodes_by_type", "Lesson")
+    snapshot = stats.get()
+
+    assert count.calls == 1
+    assert snapshot["total_nodes"] == 12
+    assert snapshot["nodes_by_type"] == {"Person": 6, "Lesson": 1}
+    assert snapshot["stats_reconciled_at"] is not None
+    assert snapshot["stats_age_seconds"] >= 0
+
+
+def test_reconcile_is_due_after_interval_or_when_marked_stale() -> None:
+    count = Counter(redis_memories=3)
+    stats = MaintainedStats("memory", count, reconcile_interval_seconds=0.05)
+
+    stats.get()
+    assert stats.needs_reconcile() is False
+    stats.mark_stale()
+    assert stats.needs_reconcile() is True
+
+    count.values["redis_memories"] = 5
+    assert stats.reconcile()["redis_memories"] == 5
+    assert stats.needs_reconcile() is False
+    time.sleep(0.06)
+    assert stats.needs_reconcile() is True
+
+
+def test_only_one_reconciliation_runs_at_a_time() -> None:
+    stats = MaintainedStats("rag", Counter(points_count=1))
+
+    assert stats.try_begin_reconcile() is True
+    assert stats.try_begin_reconcile() is False
+    stats.reconcile(claimed=True)
+    assert stats.try_begin_reconcile() is True
+
+
+def test_backend_errors_leave_the_stats_due() -> None:
+    stats = MaintainedStats("rag", lambda: {"error": "qdrant down"})
+
+    assert stats.get()["error"] == "qdrant down"
+    assert stats.needs_reconcile() is True
+
+
+def test_stats_endpoints_serve_maintained_counters() -> None:
+    memory_source = Path("memory_service.py").read_text(encoding="utf-8")
+    api_source = Path("api_server.py").read_text(encoding="utf-8")
+
+    assert ".keys(" not in memory_source
+    assert "scan_iter(" in memory_source
+    for backend in ("rag", "memory", "graph"):
+        assert f'schedule_stats_reconcile(service.stats, "{backend}")' in api_source
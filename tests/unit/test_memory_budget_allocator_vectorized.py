@@ -0,0 +1,104 @@
+# Needs: python-package:numpy
+
+import random
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+from memory_budget_allocator import MemoryBudgetAllocator, MemoryItem, MemoryTier, WorkspaceConfig
+
+
+NOW = datetime.now(timezone.utc)
+
+
+def _memories(count: int, seed: int):
+    rng = random.Random(seed)
+    tiers = list(MemoryTier)
+    return [
+        MemoryItem(
+            memory_id=f"m{index}",
+            text="x" * rng.randint(0, 400),
+            tier=rng.choice(tiers),
+            timestamp=NOW - timedelta(hours=rng.randint(0, 2000)) if index % 7 else None,
+            # Coarse scores so many items tie
+            relevance_score=rng.choice([0.2, 0.5, 0.9]),
+            importance_score=rng.choice([0.3, 0.7]),
+            token_count=rng.choice([0, 0, 5, 40, 300]),
+        )
+        for index in range(count)
+    ]
+
+
+def _per_item_selection(allocator, items, config, budget):
+    """Reference: score each item, sort the tier, greedily fill."""
+    for item in items:
+        if item.token_count == 0:
+            item.token_count = allocator.estimate_token_count(item.text, config)
+        allocator.calculate_memory_score(item, config, NOW)
+    selected, tokens_used = [], 0
+    for item in sorted(items, key=lambda x: x.combined_score, reverse=True):
+        if tokens_used + item.token_count <= budget:
+            selected.append(item.memory_id)
+            tokens_used += item.token_count
+    return selected
+
+
+def test_batch_scores_match_per_item_scoring() -> None:
+    allocator = MemoryBudgetAllocator(log_allocations=False)
+    config = WorkspaceConfig(workspace_id="default")
+    batch_items = _memories(200, seed=1)
+    reference_items = _memories(200, seed=1)
+
+    columns = allocator.score_memories_batch(batch_items, config, NOW)
+    for item in reference_items:
+        allocator.calculate_memory_score(item, config, NOW)
+
+    assert np.allclose(columns["combined"], [item.combined_score for item in reference_items])
+    assert np.allclose([item.freshness_score for item in batch_items], [item.freshness_score for item in reference_items])
+    assert [item.token_count for item in batch_items] == columns["token_count"].tolist()
+    assert all(item.token_count > 0 or not item.text for item in batch_items)
+
+
+def test_top_k_selection_matches_sorting_the_whole_tier() -> None:
+    allocator = MemoryBudgetAllocator(log_allocations=False)
+    config = WorkspaceConfig(workspace_id="default")
+
+    for budget in (0, 7, 120, 2500, 100000):
+        items = _memories(500, seed=budget)
+        columns = allocator.score_memories_batch(items, config, NOW)
+        positions, tokens_used = allocator._select_within_budget(
+            columns["combined"], columns["token_count"], budget
+        )
+
+        expected = _per_item_selection(allocator, _memories(500, seed=budget), config, budget)
+        assert [items[i].memory_id for i in positions] == expected
+        assert tokens_used == sum(items[i].token_count for i in positions) <= budget
+
+
+def test_allocation_selects_per_tier_and_tracks_access() -> None:
+    allocator = MemoryBudgetAllocator(log_allocations=False)
+    items = _memories(300, seed=3)
+
+    result = allocator.allocate_memory_budget("short query", items)
+
+    selected_ids = set()
+    for tier in MemoryTier:
+        tier_result = result["tiers"][tier.value]
+        assert tier_result["memories_available"] == sum(item.tier == tier for item in items)
+        assert tier_result["tokens_used"] <= tier_result["budget_tokens"]
+        selected_ids.update(memory["memory_id"] for memory in tier_result["selected_memories"])
+    assert len(selected_ids) == result["total_memories_selected"]
+    assert all((item.access_count == 1) == (item.memory_id in selected_ids) for item in items)
+
+
+def test_allocation_history_is_a_bounded_ring_buffer() -> None:
+    allocator = MemoryBudgetAllocator(log_allocations=False, history_size=3)
+    items = _memories(10, seed=4)
+
+    for index in range(5):
+        allocator.allocate_memory_budget(f"query {index}", items)
+
+    assert [entry["query"] for entry in allocator.allocation_history] == ["query 2", "query 3", "query 4"]
+    stats = allocator.get_allocation_statistics()
+    assert stats["total_allocations"] == 3
+    assert stats["history_limit"] == 3
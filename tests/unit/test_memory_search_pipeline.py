@@ -0,0 +1,206 @@
+# Needs: python-package:mem0ai
+# Needs: python-package:redis
+# Needs: python-package:qdrant-client
+# Needs: python-package:numpy
+# Needs: python-package:httpx
+# Needs: python-package:sentence-transformers
+
+import json
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import pytest
+
+from memory_service import MEMORY_TTL_SECONDS, MEMORY_WRITE_CLAIM_LEASE_SECONDS, MemoryService
+
+
+class FakePipeline:
+    def __init__(self, redis_client):
+        self.redis_client = redis_client
+        self.commands = []
+
+    def hmget(self, key, fields):
+        self.commands.append((key, list(fields)))
+
+    def execute(self):
+        self.redis_client.round_trips += 1
+        return [
+            [self.redis_client.hashes.get(key, {}).get(field) for field in fields]
+            for key, fields in self.commands
+        ]
+
+
+class FakeRedis:
+    def __init__(self, hashes):
+        self.hashes = hashes
+        self.round_trips = 0
+        self.hgetall = MagicMock(side_effect=AssertionError("per-hit hgetall"))
+        self.hset = MagicMock()
+        self.expire = MagicMock()
+        self.claims = set()
+        self.claim_ttls = {}
+
+    def set(self, key, value, nx=False, ex=None):
+        if nx and key in self.claims:
+            return None
+        self.claims.add(key)
+        self.claim_ttls[key] = ex
+        return True
+
+    def delete(self, *keys):
+        removed = len(self.claims.intersection(keys))
+        self.claims.difference_update(keys)
+        return removed
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+
+def _service(mem0_results, hashes):
+    service = object.__new__(MemoryService)
+    service.memory = MagicMock()
+    service.memory.search.return_value = mem0_results
+    service.redis_client = FakeRedis(hashes)
+    service.temporal_decay_factor = 0.1
+    service.cosine_weight = 0.7
+    service.temporal_weight = 0.3
+    return service
+
+
+def _hash(index, **metadata):
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "user_id": "u1",
+        "metadata": json.dumps(metadata),
+        "messages": json.dumps([{"role": "user", "content": f"message {index}"}]),
+    }
+
+
+def test_search_reads_all_hits_in_one_redis_round_trip() -> None:
+    hits = [{"id": f"m{index}", "memory": f"fact {index}", "score": 0.9 - index / 100} for index in range(20)]
+    service = _service(hits, {f"memory:m{index}": _hash(index) for index in range(20)})
+
+    results = service._search_memory("q", "u1", 10, None, True)
+
+    assert len(results) == 10
+    assert service.redis_client.round_trips == 1
+    assert results[0]["messages"] == [{"role": "user", "content": "message 0"}]
+    assert results[0]["user_id"] == "u1"
+
+
+def test_payload_ranking_fields_are_used_and_stripped_from_metadata() -> None:
+    timestamp = datetime.now(timezone.utc).isoformat()
+    hits = [
+        {"id": "mem0-a", "memory": "kept", "score": 0.8, "user_id": "u1",
+         "metadata": {"memory_id": "a", "timestamp": timestamp, "project": "x"}},
+        {"id": "mem0-b", "memory": "filtered", "score": 0.9, "user_id": "u1",
+         "metadata": {"memory_id": "b", "timestamp": timestamp, "project": "y"}},
+    ]
+    service = _service(hits, {"memory:a": _hash(0, project="stale"), "memory:b": _hash(1, project="y")})
+
+    results = service._search_memory("q", "u1", 10, {"project": "x"}, True)
+
+    assert [result["memory_id"] for result in results] == ["a"]
+    assert results[0]["metadata"] == {"project": "x"}
+    assert results[0]["timestamp"] == timestamp
+    assert results[0]["messages"] == [{"role": "user", "content": "message 0"}]
+
+
+def test_forgotten_memory_is_not_returned() -> None:
+    timestamp = datetime.now(timezone.utc).isoformat()
+    kept, forgotten = str(uuid.uuid4()), str(uuid.uuid4())
+    hits = [
+        {"id": f"mem0-{memory_id}", "memory": f"fact {memory_id}", "score": 0.9,
+         "metadata": {"memory_id": memory_id, "timestamp": timestamp}}
+        for memory_id in (kept, forgotten)
+    ]
+    service = _service(hits, {f"memory:{kept}": _hash(0), f"memory:{forgotten}": _hash(1)})
+    service.qdrant_client = MagicMock()
+    service.memory_collection = "memories"
+    service.redis_client.delete = lambda key: service.redis_client.hashes.pop(key, None) is not None
+    service.stats = None
+
+    service.forget_memory(forgotten)
+    results = service._search_memory("q", "u1", 10, None, True)
+
+    assert [result["memory_id"] for result in results] == [kept]
+    selector = service.qdrant_client.delete.call_args.kwargs["points_selector"]
+    assert {condition.key for condition in selector.filter.should if hasattr(condition, "key")} == {"memory_id"}
+
+
+def test_fallbacks_reuse_the_preloaded_embedder() -> None:
+    service = _service([], {})
+    service.embedder = MagicMock()
+    service.embedder.embed_text.return_value = [0.1, 0.2]
+    service.embedding_model = "minilm"
+    service.embedding_cache = MagicMock()
+    service.embedding_cache.get_or_compute.side_effect = lambda model, text, compute: compute(text)
+    service.memory_collection = "memories"
+    service.qdrant_client = MagicMock()
+    service.qdrant_client.search.return_value = []
+
+    service._search_memory_fallback("q", None, 5, None, True)
+    service._add_memory_fallback("m1", [{"role": "user", "content": "hi"}], "u1", None, "2024-01-01T00:00:00+00:00")
+
+    assert service.embedder.embed_text.call_count == 2
+    assert "SentenceTransformer(" not in Path("memory_service.py").read_text(encoding="utf-8")
+
+
+def test_embedder_dimension_mismatch_fails_fast() -> None:
+    service = _service([], {})
+    service.embedder = MagicMock(dimension=768)
+    service.embedding_model = "sentence-transformers/all-MiniLM-L6-v2"
+    service.memory_collection = "memories"
+    service.qdrant_client = MagicMock()
+    service.qdrant_client.get_collection.return_value.config.params.vectors.size = 384
+    service.memory.embedding_model.config.embedding_dims = 384
+
+    with pytest.raises(ValueError, match="collection 'memories': 384"):
+        service._check_embedding_dimension()
+
+    service.embedder.dimension = 384
+    service._check_embedding_dimension()
+    assert "from rag_service" not in Path("memory_service.py").read_text(encoding="utf-8")
+
+
+def test_replayed_memory_id_does_not_add_mem0_facts_again() -> None:
+    service = _service([], {})
+    service.stats = None
+    service.memory.add.return_value = [{"id": "fact-1"}]
+    messages = [{"role": "user", "content": "deploy with helm"}]
+
+    first = service.add_memory(messages, user_id="u1", memory_id="m1")
+    replay = service.add_memory(messages, user_id="u1", memory_id="m1")
+
+    assert service.memory.add.call_count == 1
+    assert first["status"] == replay["status"] == "success"
+    assert replay["duplicate"] is True
+
+
+def test_failed_write_releases_its_memory_id_claim() -> None:
+    service = _service([], {})
+    service.stats = None
+    service.memory.add.side_effect = RuntimeError("mem0 down")
+    service._add_memory_fallback = MagicMock(side_effect=RuntimeError("qdrant down"))
+
+    with pytest.raises(RuntimeError):
+        service.add_memory([{"role": "user", "content": "hi"}], memory_id="m1")
+
+    assert service.redis_client.claims == set()
+
+
+def test_write_claim_is_leased_until_the_record_is_stored() -> None:
+    service = _service([], {})
+    service.stats = None
+    # The claim is only extended after Mem0 has stored the facts
+    service.memory.add.side_effect = lambda **kwargs: (
+        service.redis_client.expire.assert_not_called() or [{"id": "fact-1"}]
+    )
+
+    service.add_memory([{"role": "user", "content": "hi"}], memory_id="m1")
+
+    assert service.redis_client.claim_ttls["memory_write:m1"] == MEMORY_WRITE_CLAIM_LEASE_SECONDS
+    assert MEMORY_WRITE_CLAIM_LEASE_SECONDS < MEMORY_TTL_SECONDS
+    service.redis_client.expire.assert_any_call("memory_write:m1", MEMORY_TTL_SECONDS)
@@ -0,0 +1,116 @@
+import asyncio
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import pytest
+
+from memory_write_queue import MemoryWriteQueue, MemoryWriteQueueConfig
+
+
+MESSAGES = [{"role": "user", "content": "deploy?"}, {"role": "assistant", "content": "use helm"}]
+
+
+def _queue(write_batch, **overrides) -> MemoryWriteQueue:
+    config = MemoryWriteQueueConfig(**{"workers": 1, "batch_size": 8, **overrides})
+    return MemoryWriteQueue(write_batch, config=config, metrics_exporter=MagicMock())
+
+
+@pytest.mark.asyncio
+async def test_jobs_are_written_in_batches_in_the_background() -> None:
+    batches = []
+
+    async def write_batch(items):
+        batches.append(items)
+        return [{"status": "success", "memory_id": item["memory_id"]} for item in items]
+
+    queue = _queue(write_batch)
+    jobs = [queue.make_job([{"role": "user", "content": f"q{index}"}], user_id="u1") for index in range(5)]
+
+    assert [queue.enqueue(job) for job in jobs] == ["queued"] * 5
+    assert batches == []
+    assert await queue.drain() == 0
+
+    assert len(batches) == 1
+    assert [item["memory_id"] for item in batches[0]] == [job.memory_id for job in jobs]
+    assert queue.get_stats()["written"] == 5
+    assert queue.enqueue(jobs[0]) == "dropped"
+
+
+@pytest.mark.asyncio
+async def test_idempotency_key_dedupes_turns_and_fixes_the_memory_id() -> None:
+    async def write_batch(items):
+        return [{"status": "success"} for _ in items]
+
+    queue = _queue(write_batch)
+    first = queue.make_job(MESSAGES, user_id="u1", metadata={"workspace_id": "ws"})
+    replay = queue.make_job(MESSAGES, user_id="u1", metadata={"workspace_id": "ws"})
+    other_workspace = queue.make_job(MESSAGES, user_id="u1", metadata={"workspace_id": "other"})
+
+    assert replay.memory_id == first.memory_id
+    assert other_workspace.memory_id != first.memory_id
+    assert queue.enqueue(first) == "queued"
+    assert queue.enqueue(replay) == "duplicate"
+    assert queue.enqueue(other_workspace) == "queued"
+    await queue.drain()
+
+
+@pytest.mark.asyncio
+async def test_same_turn_in_another_request_is_not_deduplicated() -> None:
+    async def write_batch(items):
+        return [{"status": "success"} for _ in items]
+
+    queue = _queue(write_batch)
+    first = queue.make_job(MESSAGES, user_id="u1", metadata={"workspace_id": "ws"}, request_id="req-1")
+    retry = queue.make_job(MESSAGES, user_id="u1", metadata={"workspace_id": "ws"}, request_id="req-1")
+    asked_again = queue.make_job(MESSAGES, user_id="u1", metadata={"workspace_id": "ws"}, request_id="req-2")
+
+    assert retry.memory_id == first.memory_id
+    assert asked_again.memory_id != first.memory_id
+    assert [queue.enqueue(job) for job in (first, retry, asked_again)] == ["queued", "duplicate", "queued"]
+    await queue.drain()
+
+
+@pytest.mark.asyncio
+async def test_full_queue_applies_overflow_policy_and_reports_backpressure() -> None:
+    release = asyncio.Event()
+
+    async def write_batch(items):
+        await release.wait()
+        return [{"status": "success"} for _ in items]
+
+    queue = _queue(write_batch, max_queue_size=1, batch_size=1)
+    queue.enqueue(queue.make_job(MESSAGES, user_id="a"))
+    await asyncio.sleep(0)
+    queue.enqueue(queue.make_job(MESSAGES, user_id="b"))
+
+    assert queue.enqueue(queue.make_job(MESSAGES, user_id="c")) == "overflow"
+    queue.config.overflow = "drop"
+    assert queue.enqueue(queue.make_job(MESSAGES, user_id="d")) == "dropped"
+    queue.metrics_exporter.record_memory_write.assert_any_call("overflow", 1)
+    queue.metrics_exporter.update_queue_depth.assert_called_with("memory_write", 1)
+
+    release.set()
+    assert await queue.drain() == 0
+
+
+@pytest.mark.asyncio
+async def test_failed_writes_are_counted_and_can_be_resubmitted() -> None:
+    async def write_batch(items):
+        return [{"status": "error", "error": "qdrant down"} for _ in items]
+
+    queue = _queue(write_batch)
+    job = queue.make_job(MESSAGES, user_id="u1")
+    queue.enqueue(job)
+    await queue._queue.join()
+
+    assert queue.get_stats()["failed"] == 1
+    assert queue.enqueue(job) == "queued"
+    await queue.drain()
+
+
+def test_chat_auto_store_enqueues_and_shutdown_drains() -> None:
+    source = Path("api_server.py").read_text(encoding="utf-8")
+
+    assert "outcome = memory_write_queue.enqueue(job)" in source
+    assert "await memory_write_queue.drain()" in source
+    assert source.index("await memory_write_queue.drain()") < source.index("backend_executor.shutdown(wait=True)")
@@ -0,0 +1,52 @@
+# Needs: python-package:qdrant-client>=1.7.1
+"""Unit tests for the shared Qdrant client factory."""
+
+from pathlib import Path
+
+import qdrant_client_factory
+from qdrant_client_factory import QdrantConnectionConfig, create_qdrant_client
+
+
+class RecordingClient:
+    def __init__(self, **kwargs):
+        self.kwargs = kwargs
+
+
+def test_config_reads_environment(monkeypatch) -> None:
+    monkeypatch.setenv("QDRANT_HOST", "qdrant")
+    monkeypatch.setenv("QDRANT_GRPC_PORT", "7334")
+    monkeypatch.setenv("QDRANT_PREFER_GRPC", "true")
+    monkeypatch.setenv("QDRANT_TIMEOUT_SECONDS", "3")
+
+    config = QdrantConnectionConfig.from_env()
+
+    assert config.host == "qdrant"
+    assert config.grpc_port == 7334
+    assert config.prefer_grpc is True
+    assert config.timeout_seconds == 3
+    assert config.api_key is None
+
+
+def test_factory_applies_shared_settings_and_overrides(monkeypatch) -> None:
+    monkeypatch.setattr(qdrant_client_factory, "QdrantClient", RecordingClient)
+    config = QdrantConnectionConfig(host="qdrant", prefer_grpc=True, timeout_seconds=10)
+
+    client = create_qdrant_client(host="qdrant-eu", port=7333, config=config, timeout_seconds=5)
+
+    assert client.kwargs["host"] == "qdrant-eu"
+    assert client.kwargs["port"] == 7333
+    assert client.kwargs["grpc_port"] == 6334
+    assert client.kwargs["prefer_grpc"] is True
+    assert client.kwargs["timeout"] == 5
+
+
+def test_services_build_clients_through_the_factory() -> None:
+    for path in (
+        "rag_service.py",
+        "memory_service.py",
+        "backup_service.py",
+        "scripts/observability/qdrant_archival_service.py",
+    ):
+        source = Path(path).read_text(encoding="utf-8")
+        assert "create_qdrant_client(" in source, path
+        assert "QdrantClient(host=" not in source, path
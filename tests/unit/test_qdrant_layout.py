@@ -0,0 +1,132 @@
+# Needs: python-package:qdrant-client>=1.11.0
+"""Unit tests for the Qdrant storage layout manager."""
+
+from types import SimpleNamespace
+from unittest.mock import Mock
+
+from qdrant_client import models
+
+from qdrant_layout import (
+    PAYLOAD_INDEX_FIELDS,
+    CollectionLayoutConfig,
+    QdrantLayoutManager,
+    dedicated_collection_name,
+)
+
+
+def _client(collections=(), payload_schema=None, hnsw=None, quantization=None):
+    client = Mock()
+    client.get_collections.return_value = SimpleNamespace(
+        collections=[SimpleNamespace(name=name) for name in collections]
+    )
+    client.get_collection.return_value = SimpleNamespace(
+        payload_schema=payload_schema or {},
+        config=SimpleNamespace(
+            hnsw_config=hnsw or SimpleNamespace(m=16, payload_m=None, ef_construct=100, on_disk=False),
+            params=SimpleNamespace(vectors=SimpleNamespace(on_disk=None), on_disk_payload=True),
+            quantization_config=quantization,
+        ),
+    )
+    return client
+
+
+def test_new_collection_is_tenant_partitioned_with_payload_indexes() -> None:
+    client = _client()
+    manager = QdrantLayoutManager(client, CollectionLayoutConfig(quantization="scalar"))
+
+    manager.ensure_layout("documents", 768)
+
+    kwargs = client.create_collection.call_args.kwargs
+    assert kwargs["collection_name"] == "documents"
+    assert kwargs["hnsw_config"].m == 0
+    assert kwargs["hnsw_config"].payload_m == 16
+    assert kwargs["quantization_config"].scalar.type == models.ScalarType.INT8
+    indexed = {call.kwargs["field_name"]: call.kwargs["field_schema"] for call in client.create_payload_index.call_args_list}
+    assert list(indexed) == list(PAYLOAD_INDEX_FIELDS)
+    assert indexed["workspace_id"].is_tenant is True
+    assert indexed["metadata.path"] == models.PayloadSchemaType.KEYWORD
+
+
+def test_dedicated_workspaces_get_their_own_collection_with_a_global_graph() -> None:
+    client = _client(collections=["documents"], payload_schema={name: None for name in PAYLOAD_INDEX_FIELDS})
+    manager = QdrantLayoutManager(client, CollectionLayoutConfig(dedicated_workspaces=("acme corp",)))
+
+    assert manager.collection_for("documents", "acme corp") == "documents__acme_corp"
+    assert manager.collection_for("documents", "small") == "documents"
+
+    manager.ensure_layout("documents", 768)
+
+    kwargs = client.create_collection.call_args.kwargs
+    assert kwargs["collection_name"] == dedicated_collection_name("documents", "acme corp")
+    assert kwargs["hnsw_config"].m == 16
+    assert kwargs["hnsw_config"].payload_m is None
+
+
+def test_migration_plan_is_a_dry_run_until_applied() -> None:
+    client = _client(collections=["documents"], payload_schema={"workspace_id": None})
+    manager = QdrantLayoutManager(client, CollectionLayoutConfig())
+
+    plan = manager.migrate("documents")
+
+    assert plan["applied"] is False
+    assert plan["missing_payload_indexes"] == list(PAYLOAD_INDEX_FIELDS[1:])
+    assert plan["changes"]["hnsw.m"] == {"current": 16, "wanted": 0}
+    client.create_payload_index.assert_not_called()
+    client.update_collection.assert_not_called()
+
+    plan = manager.migrate("documents", apply=True)
+
+    assert plan["applied"] is True
+    assert client.create_payload_index.call_count == len(PAYLOAD_INDEX_FIELDS) - 1
+    update = client.update_collection.call_args.kwargs
+    assert update["hnsw_config"].payload_m == 16
+    assert "quantization_config" not in update
+
+
+def test_move_workspace_points_copies_then_deletes() -> None:
+    client = _client(collections=["documents"])
+    records = [SimpleNamespace(id=index, vector=[0.1], payload={"workspace_id": "acme"}) for index in range(3)]
+    client.scroll.side_effect = [(records[:2], 2), (records[2:], None)]
+    manager = QdrantLayoutManager(client, CollectionLayoutConfig(dedicated_workspaces=("acme",)))
+
+    moved = manager.move_workspace_points("documents", "acme", batch_size=2, apply=True)
+
+    assert moved == 3
+    assert [call.kwargs["collection_name"] for call in client.upsert.call_args_list] == ["documents__acme"] * 2
+    assert client.delete.call_args.kwargs["collection_name"] == "documents"
+
+
+def test_config_reads_environment(monkeypatch) -> None:
+    monkeypatch.setenv("QDRANT_DEDICATED_WORKSPACES", "acme, globex ,")
+    monkeypatch.setenv("QDRANT_HNSW_M", "32")
+    monkeypatch.setenv("QDRANT_VECTORS_ON_DISK", "true")
+    monkeypatch.setenv("QDRANT_QUANTIZATION", "binary")
+
+    config = CollectionLayoutConfig.from_env()
+
+    assert config.dedicated_workspaces == ("acme", "globex")
+    assert config.hnsw_m == 32
+    assert config.vectors_on_disk is True
+    assert config.quantization == "binary"
+
+
+def test_quantized_search_oversamples_and_rescores() -> None:
+    manager = QdrantLayoutManager(_client(), CollectionLayoutConfig(quantization="binary", quantization_oversampling=3.0))
+
+    params = manager.search_params()
+
+    assert params.quantization.rescore is True
+    assert params.quantization.oversampling == 3.0
+    assert params.quantization.ignore is False
+    assert manager.search_params(exact=True).quantization.ignore is True
+    assert QdrantLayoutManager(_client(), CollectionLayoutConfig()).search_params() is None
+
+
+def test_quantization_keeps_originals_on_disk_by_default(monkeypatch) -> None:
+    monkeypatch.setenv("QDRANT_QUANTIZATION", "scalar")
+    monkeypatch.delenv("QDRANT_VECTORS_ON_DISK", raising=False)
+
+    config = CollectionLayoutConfig.from_env()
+
+    assert config.vectors_on_disk is True
+    assert config.quantization_rescore is True
@@ -0,0 +1,262 @@
+# Needs: python-package:numpy
+# Needs: python-package:qdrant-client
+"""Unit tests for batched embedding and upserts in RAGIngestionService."""
+
+import threading
+
+import rag_service
+from rag_service import DocumentChunker, RAGIngestionService
+from semantic_response_cache import SemanticCacheConfig, SemanticResponseCache
+
+
+class RecordingEmbedder:
+    def __init__(self, fail_on=None):
+        self.calls = []
+        self.fail_on = fail_on
+
+    def embed_batch(self, texts):
+        self.calls.append(list(texts))
+        if self.fail_on and any(self.fail_on in text for text in texts):
+            raise RuntimeError("embedding failed")
+        return [[float(len(text))] for text in texts]
+
+
+class RecordingStorage:
+    def __init__(self):
+        self.upserts = []
+        self.deleted = []
+
+    def upsert_points(self, texts, embeddings, metadatas, workspace_id, wait=True):
+        self.upserts.append({"count": len(texts), "workspace_id": workspace_id, "wait": wait})
+        return [f"{workspace_id}:{len(self.upserts)}:{i}" for i in range(len(texts))]
+
+    def delete_points(self, point_ids, workspace_id):
+        self.deleted.extend(point_ids)
+
+
+def _service(embedder=None) -> RAGIngestionService:
+    service = RAGIngestionService.__new__(RAGIngestionService)
+    service.chunker = DocumentChunker(chunk_size=10, overlap=0)
+    service.embedder = embedder or RecordingEmbedder()
+    service.storage = RecordingStorage()
+    service.default_workspace_id = "default"
+    return service
+
+
+def test_batch_embeds_and_upserts_across_documents() -> None:
+    service = _service()
+    documents = [{"text": f"document number {i} body", "metadata": {"document_id": f"d{i}"}} for i in range(5)]
+
+    result = service.ingest_documents_batch(documents, embed_batch_size=4, upsert_batch_size=100)
+
+    total_chunks = result["total_chunks"]
+    assert total_chunks > len(documents)
+    assert result["upsert_calls"] == 1
+    assert service.storage.upserts == [{"count": total_chunks, "workspace_id": "default", "wait": True}]
+    assert result["embed_calls"] == len(service.embedder.calls) == -(-total_chunks // 4)
+    assert [r["document_id"] for r in result["results"]] == [f"d{i}" for i in range(5)]
+    assert sum(r["points_stored"] for r in result["results"]) == total_chunks
+
+
+def test_only_the_final_upsert_waits_and_workspaces_are_not_mixed() -> None:
+    service = _service()
+    documents = [
+        {"text": "alpha beta gamma delta", "metadata": {"workspace_id": "ws-a"}},
+        {"text": "epsilon zeta eta theta", "metadata": {"workspace_id": "ws-b"}},
+    ]
+
+    service.ingest_documents_batch(documents, upsert_batch_size=2)
+
+    assert {upsert["workspace_id"] for upsert in service.storage.upserts} == {"ws-a", "ws-b"}
+    assert [upsert["wait"] for upsert in service.storage.upserts][-1] is True
+    assert not any(upsert["wait"] for upsert in service.storage.upserts[:-1])
+
+
+def test_last_submitted_upsert_waits_when_the_final_batch_fails_to_embed() -> None:
+    for pipeline in (True, False):
+        service = _service(RecordingEmbedder(fail_on="poison"))
+        documents = [
+            {"text": "healthy doc", "metadata": {"document_id": "good"}},
+            {"text": "poison pill", "metadata": {"document_id": "bad"}},
+        ]
+
+        result = service.ingest_documents_batch(documents, upsert_batch_size=2, pipeline=pipeline)
+
+        assert [r["status"] for r in result["results"]] == ["success", "error"]
+        assert [upsert["wait"] for upsert in service.storage.upserts] == [True]
+
+
+def test_failures_are_reported_per_document() -> None:
+    service = _service(RecordingEmbedder(fail_on="poison"))
+    documents = [
+        {"text": "", "metadata": {"document_id": "empty"}},
+        {"text": "poison pill", "metadata": {"document_id": "bad"}},
+        {"text": "healthy doc", "metadata": {"document_id": "good"}},
+    ]
+
+    result = service.ingest_documents_batch(documents, upsert_batch_size=2)
+
+    statuses = [r["status"] for r in result["results"]]
+    assert statuses == ["error", "error", "success"]
+    assert result["documents_failed"] == 2
+    assert result["results"][2]["document_id"] == "good"
+
+
+def test_embed_failure_only_fails_the_poisoned_document_in_a_shared_group() -> None:
+    for pipeline in (True, False):
+        service = _service(RecordingEmbedder(fail_on="poison"))
+        documents = [
+            {"text": "healthy a", "metadata": {"document_id": "a"}},
+            {"text": "poison pill", "metadata": {"document_id": "bad"}},
+            {"text": "healthy b", "metadata": {"document_id": "b"}},
+        ]
+
+        # Default sizes: every chunk lands in one embed call and one upsert group
+        result = service.ingest_documents_batch(documents, pipeline=pipeline)
+
+        assert [r["status"] for r in result["results"]] == ["success", "error", "success"]
+        assert result["results"][1]["error"] == "embedding failed"
+        assert result["documents_failed"] == 1
+        assert result["total_points"] == result["results"][0]["points_stored"] + result["results"][2]["points_stored"]
+        assert service.storage.deleted == []
+
+
+def test_upsert_failure_only_fails_the_rejected_document_in_a_shared_group() -> None:
+    class RejectingStorage(RecordingStorage):
+        def upsert_points(self, texts, embeddings, metadatas, workspace_id, wait=True):
+            if any(metadata["document_id"] == "bad" for metadata in metadatas):
+                raise ValueError("payload rejected")
+            return super().upsert_points(texts, embeddings, metadatas, workspace_id, wait=wait)
+
+    for pipeline in (True, False):
+        service = _service()
+        service.storage = RejectingStorage()
+        documents = [{"text": f"doc {name}", "metadata": {"document_id": name}} for name in ("a", "bad", "b", "c")]
+
+        result = service.ingest_documents_batch(documents, pipeline=pipeline)
+
+        assert [r["status"] for r in result["results"]] == ["success", "error", "success", "success"]
+        assert result["results"][1]["error"] == "payload rejected"
+        # One shared upsert, then one retry per document
+        assert result["upsert_calls"] == 5
+        assert sum(upsert["count"] for upsert in service.storage.upserts) == result["total_points"]
+
+
+def test_document_spanning_groups_is_rolled_back_when_a_later_group_fails() -> None:
+    class SecondGroupFails(RecordingStorage):
+        def upsert_points(self, texts, embeddings, metadatas, workspace_id, wait=True):
+            if len(self.upserts) == 1:
+                self.upserts.append({"count": 0, "workspace_id": workspace_id, "wait": wait})
+                raise ConnectionError("qdrant unavailable")
+            return super().upsert_points(texts, embeddings, metadatas, workspace_id, wait=wait)
+
+    service = _service()
+    service.storage = SecondGroupFails()
+    documents = [{"text": "alpha beta gamma delta epsilon", "metadata": {"document_id": "long"}}]
+
+    result = service.ingest_documents_batch(documents, upsert_batch_size=2)
+
+    first_group_ids = ["default:1:0", "default:1:1"]
+    assert result["results"][0]["status"] == "error"
+    assert result["results"][0]["error"] == "qdrant unavailable"
+    assert service.storage.deleted == first_group_ids
+    assert result["total_points"] == 0
+
+
+def test_failed_rollback_reports_the_document_as_partial() -> None:
+    class UndeletableStorage(RecordingStorage):
+        def upsert_points(self, texts, embeddings, metadatas, workspace_id, wait=True):
+            if len(self.upserts) == 1:
+                self.upserts.append({"count": 0, "workspace_id": workspace_id, "wait": wait})
+                raise ConnectionError("qdrant unavailable")
+            return super().upsert_points(texts, embeddings, metadatas, workspace_id, wait=wait)
+
+        def delete_points(self, point_ids, workspace_id):
+            raise ConnectionError("still unavailable")
+
+    service = _service()
+    service.storage = UndeletableStorage()
+    documents = [{"text": "alpha beta gamma delta epsilon", "metadata": {"document_id": "long"}}]
+
+    result = service.ingest_documents_batch(documents, upsert_batch_size=2)
+
+    assert result["results"][0]["status"] == "partial"
+    assert result["results"][0]["point_ids"] == ["default:1:0", "default:1:1"]
+    assert result["documents_failed"] == 1
+
+
+def test_next_batch_is_embedded_while_previous_upsert_runs() -> None:
+    second_embed_started = threading.Event()
+    overlapped = []
+
+    class SignallingEmbedder(RecordingEmbedder):
+        def embed_batch(self, texts):
+            if self.calls:
+                second_embed_started.set()
+            return super().embed_batch(texts)
+
+    class SlowStorage(RecordingStorage):
+        def upsert_points(self, texts, embeddings, metadatas, workspace_id, wait=True):
+            if not self.upserts:
+                overlapped.append(second_embed_started.wait(timeout=2))
+            return super().upsert_points(texts, embeddings, metadatas, workspace_id, wait=wait)
+
+    service = _service(SignallingEmbedder())
+    service.storage = SlowStorage()
+    documents = [{"text": f"doc {i} text", "metadata": {"document_id": f"d{i}"}} for i in range(4)]
+
+    result = service.ingest_documents_batch(documents, embed_batch_size=2, upsert_batch_size=2, pipeline=True)
+
+    assert overlapped == [True]
+    assert result["documents_failed"] == 0
+    assert [r["document_id"] for r in result["results"]] == ["d0", "d1", "d2", "d3"]
+
+
+def test_upsert_failures_stay_isolated_to_their_batch() -> None:
+    class FlakyStorage(RecordingStorage):
+        def upsert_points(self, texts, embeddings, metadatas, workspace_id, wait=True):
+            if not self.upserts:
+                self.upserts.append({"count": 0, "workspace_id": workspace_id, "wait": wait})
+                raise ConnectionError("qdrant unavailable")
+            return super().upsert_points(texts, embeddings, metadatas, workspace_id, wait=wait)
+
+    for pipeline in (True, False):
+        service = _service()
+        service.storage = FlakyStorage()
+        documents = [{"text": f"doc {i}", "metadata": {"document_id": f"d{i}"}} for i in range(2)]
+
+        result = service.ingest_documents_batch(documents, upsert_batch_size=1, pipeline=pipeline)
+
+        assert [r["status"] for r in result["results"]] == ["error", "success"]
+        assert result["results"][0]["error"] == "qdrant unavailable"
+
+
+def test_single_document_ingestion_streams_chunks_in_embedding_batches(monkeypatch) -> None:
+    pulled = []
+
+    class CountingChunker(DocumentChunker):
+        def iter_chunks(self, text, metadata=None):
+            for chunk in super().iter_chunks(text, metadata):
+                pulled.append(chunk)
+                yield chunk
+
+    class PullTrackingEmbedder(RecordingEmbedder):
+        def embed_batch(self, texts):
+            self.pulled_before.append(len(pulled))
+            return super().embed_batch(texts)
+
+    monkeypatch.setattr(rag_service, "RAG_INGEST_EMBED_BATCH_SIZE", 3)
+    embedder = PullTrackingEmbedder()
+    embedder.pulled_before = []
+    service = _service(embedder)
+    service.chunker = CountingChunker(chunk_size=10, overlap=0)
+    service.stats = None
+    service.response_cache = SemanticResponseCache(SemanticCacheConfig())
+
+    result = service.ingest_document(" ".join(f"word{i}" for i in range(40)), {"document_id": "big"})
+
+    assert result["chunks_created"] == len(pulled) > 6
+    assert [len(call) for call in embedder.calls][:-1] == [3] * (len(embedder.calls) - 1)
+    # Each batch is embedded before the next one is pulled from the chunker
+    assert embedder.pulled_before == [min(3 * (n + 1), len(pulled)) for n in range(len(embedder.calls))]
+    assert [upsert["count"] for upsert in service.storage.upserts] == [len(call) for call in embedder.calls]
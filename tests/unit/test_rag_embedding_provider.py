@@ -1,27 +1,8 @@
+# Needs: python-package:qdrant-client
 """Unit tests for RAG embedding provider selection."""
 
-import sys
-import types
 from unittest.mock import Mock, patch
 
-# Stub heavy optional dependencies before importing rag_service
-sentence_transformers_stub = types.ModuleType("sentence_transformers")
-sentence_transformers_stub.SentenceTransformer = Mock
-sys.modules.setdefault("sentence_transformers", sentence_transformers_stub)
-
-qdrant_client_stub = types.ModuleType("qdrant_client")
-qdrant_client_stub.QdrantClient = Mock
-sys.modules.setdefault("qdrant_client", qdrant_client_stub)
-
-qdrant_models_stub = types.ModuleType("qdrant_client.models")
-qdrant_models_stub.Distance = Mock
-qdrant_models_stub.VectorParams = Mock
-qdrant_models_stub.PointStruct = Mock
-qdrant_models_stub.Filter = Mock
-qdrant_models_stub.FieldCondition = Mock
-qdrant_models_stub.MatchValue = Mock
-sys.modules.setdefault("qdrant_client.models", qdrant_models_stub)
-
 from rag_service import HTTPEmbeddingServiceClient, RAGIngestionService
 
 
@@ -40,8 +21,8 @@ def test_http_embedding_service_client_embed_batch() -> None:
     }
     embed_response.raise_for_status.return_value = None
 
-    with patch("rag_service.httpx.get", return_value=health_response), patch(
-        "rag_service.httpx.post", return_value=embed_response
+    with patch("embedding_providers.httpx.get", return_value=health_response), patch(
+        "embedding_providers.httpx.post", return_value=embed_response
     ):
         client = HTTPEmbeddingServiceClient("http://embedding-service:8003")
         result = client.embed_batch(["a", "b"])
@@ -52,7 +33,7 @@ def test_http_embedding_service_client_embed_batch() -> None:
 
 def test_rag_service_uses_service_provider() -> None:
     """RAG service should instantiate HTTP embedding client when provider=service."""
-    with patch("rag_service.HTTPEmbeddingServiceClient") as mock_client, patch(
+    with patch("embedding_providers.HTTPEmbeddingServiceClient") as mock_client, patch(
         "rag_service.QdrantStorage"
     ) as mock_storage:
         mock_client.return_value.dimension = 768
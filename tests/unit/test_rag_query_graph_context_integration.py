@@ -23,7 +23,8 @@ def test_rag_query_response_exposes_graph_context_fields() -> None:
 def test_rag_query_endpoint_uses_graph_enrichment_when_available() -> None:
     """rag_query should call graph enrichment and include graph stats in retrieval metadata."""
     assert "should_enrich_with_graph = bool(" in API_SERVER_SOURCE
-    assert "enriched_results = service.search_with_graph_enrichment(" in API_SERVER_SOURCE
+    assert "enriched_results = service.enrich_results_with_graph(" in API_SERVER_SOURCE
+    assert "service.collect_graph_context(" in API_SERVER_SOURCE
     assert '"relationships_found": relationships_found' in API_SERVER_SOURCE
     assert '"entities_in_graph": entities_in_graph' in API_SERVER_SOURCE
     assert "graph_context=graph_context if request.include_context else None" in API_SERVER_SOURCE
@@ -8,7 +8,7 @@ SOURCE = Path("rag_service.py").read_text(encoding="utf-8")
 
 def test_search_documents_uses_hybrid_rrf_and_workspace_assertion() -> None:
     assert "HYBRID_RETRIEVAL_ENABLED" in SOURCE
-    assert "rank_bm25_lite(query, vector_results)" in SOURCE
+    assert "rank_bm25_lite(query, vector_results, term_sets=term_sets)" in SOURCE
     assert "fuse_rrf(" in SOURCE
     assert "Cross-workspace retrieval leakage detected" in SOURCE
 
@@ -24,3 +24,9 @@ def test_reranker_is_wired_and_configurable() -> None:
     assert "RERANK_ALPHA_BY_WORKSPACE" in SOURCE
     assert "rerank_results(" in SOURCE
     assert "_resolve_rerank_alpha(" in SOURCE
+
+
+def test_cross_encoder_reranker_is_selectable_per_workspace() -> None:
+    assert "RERANKER_BY_WORKSPACE" in SOURCE
+    assert "_resolve_reranker_name(workspace_id)" in SOURCE
+    assert "get_cross_encoder_reranker().rerank(" in SOURCE
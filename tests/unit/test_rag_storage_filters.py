@@ -1,3 +1,4 @@
+# Needs: python-package:qdrant-client
 """Unit tests for Qdrant filter construction in RAG storage."""
 
 import sys
@@ -9,83 +10,6 @@ import pytest
 # Make repository root importable.
 sys.path.append(str(Path(__file__).resolve().parents[2]))
 
-# Stub optional heavy dependencies so importing rag_service stays offline/lightweight.
-sentence_transformers_stub = types.ModuleType("sentence_transformers")
-
-
-class _SentenceTransformerStub:
-    def __init__(self, *args, **kwargs):
-        pass
-
-    def get_sentence_embedding_dimension(self):
-        return 768
-
-
-sentence_transformers_stub.SentenceTransformer = _SentenceTransformerStub
-sys.modules.setdefault("sentence_transformers", sentence_transformers_stub)
-
-qdrant_client_stub = types.ModuleType("qdrant_client")
-qdrant_models_stub = types.ModuleType("qdrant_client.models")
-
-
-class Filter:
-    def __init__(self, must=None, should=None, must_not=None):
-        self.must = must or []
-        self.should = should or []
-        self.must_not = must_not or []
-
-
-class FieldCondition:
-    def __init__(self, key, match=None):
-        self.key = key
-        self.match = match
-
-
-class MatchValue:
-    def __init__(self, value):
-        self.value = value
-
-
-class MatchAny:
-    def __init__(self, any):
-        self.any = any
-
-
-class Distance:
-    COSINE = "cosine"
-
-
-class VectorParams:
-    def __init__(self, size, distance):
-        self.size = size
-        self.distance = distance
-
-
-class PointStruct:
-    def __init__(self, id, vector, payload):
-        self.id = id
-        self.vector = vector
-        self.payload = payload
-
-
-class QdrantClient:
-    def __init__(self, *args, **kwargs):
-        pass
-
-
-qdrant_models_stub.Filter = Filter
-qdrant_models_stub.FieldCondition = FieldCondition
-qdrant_models_stub.MatchValue = MatchValue
-qdrant_models_stub.MatchAny = MatchAny
-qdrant_models_stub.Distance = Distance
-qdrant_models_stub.VectorParams = VectorParams
-qdrant_models_stub.PointStruct = PointStruct
-
-qdrant_client_stub.QdrantClient = QdrantClient
-
-sys.modules.setdefault("qdrant_client", qdrant_client_stub)
-sys.modules.setdefault("qdrant_client.models", qdrant_models_stub)
-
 from rag_service import QdrantStorage
 
 
@@ -182,3 +106,19 @@ def test_search_builds_repo_path_lang_filters():
     assert condition_by_key["metadata.repo"].match.value == "acme/repo"
     assert condition_by_key["metadata.path"].match.any == ["src/api.py", "src/rag.py"]
     assert condition_by_key["metadata.lang"].match.value == "python"
+
+
+def test_search_passes_quantization_search_params_from_layout():
+    """Quantized layouts oversample and rescore through search_params."""
+    storage = QdrantStorage.__new__(QdrantStorage)
+    storage.client = DummyClient()
+    storage.collection_name = "documents"
+    storage.layout = types.SimpleNamespace(
+        search_params=lambda: "rescore-params",
+        collection_for=lambda base, workspace_id: base,
+    )
+
+    storage.search(query_vector=[0.1], workspace_id="workspace-alpha", limit=2)
+
+    assert storage.client.last_kwargs["search_params"] == "rescore-params"
+    assert storage.client.last_kwargs["collection_name"] == "documents"
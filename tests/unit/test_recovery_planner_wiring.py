@@ -13,6 +13,6 @@ def test_recovery_metrics_and_config_present() -> None:
 
 
 def test_rag_query_uses_recovery_planner() -> None:
-    assert "run_recovery_attempts(" in SOURCE
+    assert "run_recovery_attempts," in SOURCE
     assert '"grounded_after_recovery"' in SOURCE
     assert '"recovery_succeeded"' in SOURCE
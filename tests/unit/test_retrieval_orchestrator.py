@@ -0,0 +1,108 @@
+import asyncio
+import time
+from pathlib import Path
+
+import pytest
+
+from retrieval_orchestrator import (
+    STAGE_ERROR,
+    STAGE_OK,
+    STAGE_TIMEOUT,
+    RetrievalDeadlines,
+    RetrievalStage,
+    fan_out_retrieval,
+    retrieval_timing_metadata,
+)
+
+
+def _stage(name, value, delay, deadline=None):
+    async def run():
+        await asyncio.sleep(delay)
+        return value
+
+    return RetrievalStage(name, run, deadline)
+
+
+@pytest.mark.asyncio
+async def test_stages_run_concurrently_so_latency_is_the_slowest_stage() -> None:
+    start = time.perf_counter()
+    results = await fan_out_retrieval(
+        _stage("memory", ["m"], 0.1),
+        _stage("rag", ["r"], 0.1),
+        _stage("graph", {"g": 1}, 0.1),
+    )
+    elapsed = time.perf_counter() - start
+
+    assert elapsed < 0.25
+    assert results["memory"].value == ["m"]
+    assert results["rag"].value == ["r"]
+    assert all(result.status == STAGE_OK for result in results.values())
+
+
+@pytest.mark.asyncio
+async def test_stage_missing_its_deadline_yields_partial_results() -> None:
+    results = await fan_out_retrieval(
+        _stage("memory", ["m"], 0.5, deadline=0.05),
+        _stage("rag", ["r"], 0.01, deadline=1.0),
+    )
+
+    assert results["memory"].status == STAGE_TIMEOUT
+    assert results["memory"].value is None
+    assert results["memory"].elapsed_ms < 400
+    assert results["rag"].ok
+    assert results["rag"].value == ["r"]
+
+
+@pytest.mark.asyncio
+async def test_stage_errors_are_captured_not_raised() -> None:
+    async def failing():
+        raise ConnectionError("redis unavailable")
+
+    results = await fan_out_retrieval(
+        RetrievalStage("memory", failing, 1.0),
+        _stage("rag", ["r"], 0.0),
+    )
+
+    assert results["memory"].status == STAGE_ERROR
+    assert isinstance(results["memory"].error, ConnectionError)
+    assert results["rag"].ok
+
+
+@pytest.mark.asyncio
+async def test_timing_metadata_reports_stages_and_partial_flag() -> None:
+    results = await fan_out_retrieval(
+        _stage("memory", [], 0.2, deadline=0.02),
+        _stage("rag", [], 0.02),
+    )
+
+    timing = retrieval_timing_metadata(results, total_ms=25.0)
+
+    assert timing["concurrent"] is True
+    assert timing["partial"] is True
+    assert timing["total_ms"] == 25.0
+    assert timing["stages"]["memory"]["status"] == STAGE_TIMEOUT
+    assert timing["stages"]["memory"]["deadline_ms"] == 20.0
+    assert timing["stages"]["rag"]["status"] == STAGE_OK
+    assert timing["sum_of_stages_ms"] >= timing["stages"]["rag"]["elapsed_ms"]
+
+
+def test_deadlines_read_environment(monkeypatch) -> None:
+    monkeypatch.setenv("RETRIEVAL_MEMORY_DEADLINE_MS", "250")
+    monkeypatch.setenv("RETRIEVAL_GRAPH_DEADLINE_MS", "0")
+
+    deadlines = RetrievalDeadlines.from_env()
+
+    assert deadlines.memory_seconds == 0.25
+    assert deadlines.rag_seconds == 5.0
+    assert deadlines.graph_seconds is None
+
+
+def test_chat_and_rag_query_fan_out_retrieval() -> None:
+    source = Path("api_server.py").read_text(encoding="utf-8")
+
+    assert 'RetrievalStage("memory", search_chat_memory, retrieval_deadlines.memory_seconds)' in source
+    assert 'RetrievalStage("rag", search_chat_documents, retrieval_deadlines.rag_seconds)' in source
+    assert 'RetrievalStage("graph", search_query_graph, retrieval_deadlines.graph_seconds)' in source
+    assert "retrieval_outcomes = await fan_out_retrieval(*retrieval_stages)" in source
+    assert 'routing_metadata["retrieval"] = retrieval_timing' in source
+    assert 'retrieval_stats["retrieval"] = retrieval_timing' in source
@@ -0,0 +1,138 @@
+# Needs: python-package:numpy
+"""Unit tests for the workspace-scoped semantic response cache."""
+
+from pathlib import Path
+
+import pytest
+
+from semantic_response_cache import SemanticCacheConfig, SemanticResponseCache, cache_scope
+
+
+def _results(*pairs):
+    return [{"metadata": {"document_id": doc, "chunk_hash": chunk}} for doc, chunk in pairs]
+
+
+def _cache(**overrides) -> SemanticResponseCache:
+    return SemanticResponseCache(SemanticCacheConfig(**{"similarity_threshold": 0.95, **overrides}))
+
+
+def test_near_duplicate_query_hits_within_scope_and_workspace() -> None:
+    cache = _cache()
+    scope = cache_scope(endpoint="/v1/rag/query", k=5)
+    cache.store("ws-a", scope, "how do I deploy?", [1.0, 0.0, 0.0], {"response": "run make deploy"}, _results(("doc-1", "h1")))
+
+    hit = cache.lookup("ws-a", scope, [0.99, 0.05, 0.0])
+
+    assert hit["response"] == {"response": "run make deploy"}
+    assert hit["similarity"] >= 0.95
+    assert cache.lookup("ws-a", scope, [0.0, 1.0, 0.0]) is None
+    assert cache.lookup("ws-b", scope, [1.0, 0.0, 0.0]) is None
+    assert cache.lookup("ws-a", cache_scope(endpoint="/v1/rag/query", k=10), [1.0, 0.0, 0.0]) is None
+    assert cache.get_stats()["hit_rate"] == 0.25
+
+
+def test_reingesting_or_deleting_a_cited_document_invalidates_answers() -> None:
+    cache = _cache()
+    scope = cache_scope(endpoint="/v1/rag/query")
+    cache.store("ws", scope, "q1", [1.0, 0.0], {"response": "a1"}, _results(("doc-1", "h1")))
+    cache.store("ws", scope, "q2", [0.0, 1.0], {"response": "a2"}, _results(("doc-2", "h2")))
+
+    assert cache.invalidate("ws", document_ids=["doc-1"]) == 1
+    assert cache.lookup("ws", scope, [1.0, 0.0]) is None
+    assert cache.lookup("ws", scope, [0.0, 1.0]) is not None
+
+    assert cache.invalidate("ws", chunk_hashes=["h2"]) == 1
+    assert cache.get_stats()["entries"] == 0
+
+
+def test_ungrounded_answers_are_not_cached_and_entries_expire() -> None:
+    cache = _cache(ttl_seconds=0)
+    scope = cache_scope(endpoint="/v1/rag/query")
+
+    assert cache.store("ws", scope, "q", [1.0, 0.0], {"response": "a"}, [{"metadata": {}}]) is None
+
+    cache.store("ws", scope, "q", [1.0, 0.0], {"response": "a"}, _results(("doc-1", "h1")))
+    assert cache.lookup("ws", scope, [1.0, 0.0]) is None
+    assert cache.get_stats()["expirations"] == 1
+
+
+def test_workspace_capacity_evicts_least_recently_used() -> None:
+    cache = _cache(max_entries_per_workspace=2)
+    scope = cache_scope(endpoint="/v1/rag/query")
+    for index, vector in enumerate(([1.0, 0.0, 0.0], [0.0, 1.0, 0.0], [0.0, 0.0, 1.0])):
+        cache.store("ws", scope, f"q{index}", vector, {"response": index}, _results((f"doc-{index}", f"h{index}")))
+
+    assert cache.lookup("ws", scope, [1.0, 0.0, 0.0]) is None
+    assert cache.lookup("ws", scope, [0.0, 0.0, 1.0])["response"] == {"response": 2}
+    assert cache.get_stats()["evictions"] == 1
+
+
+class FakeRedis:
+    def __init__(self):
+        self.values = {}
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def incr(self, key):
+        self.values[key] = int(self.values.get(key, 0)) + 1
+        return self.values[key]
+
+
+def test_invalidation_in_another_process_evicts_the_workspace() -> None:
+    redis_client = FakeRedis()
+    api_cache = SemanticResponseCache(SemanticCacheConfig(), redis_client=redis_client)
+    worker_cache = SemanticResponseCache(SemanticCacheConfig(), redis_client=redis_client)
+    scope = cache_scope(endpoint="/v1/rag/query")
+    api_cache.store("ws", scope, "q1", [1.0, 0.0], {"response": "a1"}, _results(("doc-1", "h1")))
+    api_cache.store("other", scope, "q1", [1.0, 0.0], {"response": "a1"}, _results(("doc-1", "h1")))
+
+    assert worker_cache.invalidate("ws", document_ids=["doc-1"]) == 0
+
+    assert api_cache.lookup("ws", scope, [1.0, 0.0]) is None
+    assert api_cache.lookup("other", scope, [1.0, 0.0]) is not None
+    assert api_cache.get_stats()["remote_invalidations"] == 1
+
+
+def test_local_invalidation_stays_precise_with_redis() -> None:
+    cache = SemanticResponseCache(SemanticCacheConfig(), redis_client=FakeRedis())
+    scope = cache_scope(endpoint="/v1/rag/query")
+    cache.store("ws", scope, "q1", [1.0, 0.0], {"response": "a1"}, _results(("doc-1", "h1")))
+    cache.store("ws", scope, "q2", [0.0, 1.0], {"response": "a2"}, _results(("doc-2", "h2")))
+
+    assert cache.invalidate("ws", document_ids=["doc-1"]) == 1
+
+    assert cache.lookup("ws", scope, [0.0, 1.0]) is not None
+    assert cache.get_stats()["remote_invalidations"] == 0
+
+
+def test_answers_without_sources_are_not_cacheable() -> None:
+    api_server = pytest.importorskip("api_server")
+    gates = {"ess_score": 1.0, "context_insufficient": False, "response_mode": None}
+
+    assert api_server.answer_is_cacheable(**gates, sources=[{"document_id": "doc-1"}])
+    assert not api_server.answer_is_cacheable(**gates, sources=[])
+
+
+def test_chat_answers_are_scoped_to_the_question_when_rag_query_differs() -> None:
+    api_server = pytest.importorskip("api_server")
+
+    assert api_server.semantic_cache_question_key(None, "How do I rotate keys?") is None
+    assert api_server.semantic_cache_question_key("How do I rotate keys?", "How do I rotate keys?") is None
+    first = api_server.semantic_cache_question_key("key rotation runbook", "How do I rotate keys?")
+    second = api_server.semantic_cache_question_key("key rotation runbook", "Who owns key rotation?")
+    assert first and second and first != second
+
+
+def test_api_server_gates_and_invalidation_are_wired() -> None:
+    api_source = Path("api_server.py").read_text(encoding="utf-8")
+    rag_source = Path("rag_service.py").read_text(encoding="utf-8")
+
+    assert "def answer_is_cacheable(" in api_source
+    assert "ess_score >= ESS_THRESHOLD_HIGH" in api_source
+    assert "not (request.memory and request.memory.enabled)" in api_source
+    assert '"semantic_cache": semantic_cache' in api_source
+    assert "question=semantic_cache_question_key(request.rag.query, latest_user_message)" in api_source
+    assert api_source.count("temperature=request.temperature,\n") >= 2
+    assert api_source.count("top_p=request.top_p,\n") >= 2
+    assert "self._invalidate_cached_answers(resolved_workspace_id, [document_id])" in rag_source
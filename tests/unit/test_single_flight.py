@@ -0,0 +1,141 @@
+import threading
+import time
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import pytest
+
+from single_flight import SingleFlight
+
+
+def _run_concurrently(count, target):
+    results = [None] * count
+    errors = [None] * count
+
+    def worker(index):
+        try:
+            results[index] = target()
+        except Exception as exc:
+            errors[index] = exc
+
+    threads = [threading.Thread(target=worker, args=(index,)) for index in range(count)]
+    for thread in threads:
+        thread.start()
+    return threads, results, errors
+
+
+def test_concurrent_identical_calls_share_one_execution() -> None:
+    exporter = MagicMock()
+    flight = SingleFlight("rag_search", result_ttl_seconds=0, metrics_exporter=exporter)
+    release = threading.Event()
+    calls = []
+
+    def search():
+        calls.append(1)
+        release.wait(5)
+        return [{"id": "p1", "score": 0.9}]
+
+    key = SingleFlight.make_key("ws", "how to deploy", limit=5)
+    threads, results, _ = _run_concurrently(8, lambda: flight.do(key, search))
+    while flight.get_stats()["calls"] < 8:
+        time.sleep(0.001)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert all(result == [{"id": "p1", "score": 0.9}] for result in results)
+    results[0][0]["score"] = 0.0
+    assert results[1][0]["score"] == 0.9
+    assert flight.get_stats()["coalesced_in_flight"] == 7
+    exporter.record_coalesced_call.assert_called_with("rag_search", "in_flight")
+
+
+def test_finished_result_is_reused_only_within_ttl() -> None:
+    flight = SingleFlight("memory_search", result_ttl_seconds=0.05)
+    search = MagicMock(return_value=["m1"])
+
+    flight.do("k", search)
+    flight.do("k", search)
+    time.sleep(0.06)
+    flight.do("k", search)
+
+    assert search.call_count == 2
+    assert flight.get_stats()["coalesced_recent"] == 1
+
+
+def test_errors_reach_every_waiter_and_are_not_remembered() -> None:
+    flight = SingleFlight("rag_search", result_ttl_seconds=10)
+    release = threading.Event()
+
+    def failing():
+        release.wait(5)
+        raise RuntimeError("qdrant down")
+
+    threads, _, errors = _run_concurrently(3, lambda: flight.do("k", failing))
+    while flight.get_stats()["calls"] < 3:
+        time.sleep(0.001)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert all(isinstance(error, RuntimeError) for error in errors)
+    assert flight.do("k", lambda: ["recovered"]) == ["recovered"]
+
+
+def test_waiters_give_up_after_the_wait_timeout() -> None:
+    flight = SingleFlight("memory_search", result_ttl_seconds=0, wait_timeout_seconds=0.05)
+    release = threading.Event()
+
+    def stuck():
+        release.wait(5)
+        return ["late"]
+
+    threads, results, _ = _run_concurrently(1, lambda: flight.do("k", stuck))
+    while flight.get_stats()["in_flight"] < 1:
+        time.sleep(0.001)
+
+    started = time.monotonic()
+    with pytest.raises(TimeoutError):
+        flight.do("k", stuck)
+    assert time.monotonic() - started < 1
+
+    release.set()
+    threads[0].join()
+    assert results[0] == ["late"]
+    assert flight.get_stats()["wait_timeouts"] == 1
+
+
+def test_wait_timeout_comes_from_the_stage_deadline_or_environment(monkeypatch) -> None:
+    monkeypatch.setenv("SINGLE_FLIGHT_WAIT_TIMEOUT_MS", "250")
+
+    assert SingleFlight.from_env("rag_search").wait_timeout_seconds == 0.25
+    assert SingleFlight.from_env("rag_search", wait_timeout_seconds=5.0).wait_timeout_seconds == 5.0
+    monkeypatch.setenv("SINGLE_FLIGHT_WAIT_TIMEOUT_MS", "0")
+    assert SingleFlight.from_env("rag_search").wait_timeout_seconds is None
+
+
+def test_keys_normalize_query_whitespace_but_keep_scope() -> None:
+    key = SingleFlight.make_key("ws", "how  to deploy ", limit=5, filters={"repo": "a"})
+
+    assert key == SingleFlight.make_key("ws", "how to deploy", limit=5, filters={"repo": "a"})
+    assert key != SingleFlight.make_key("other", "how to deploy", limit=5, filters={"repo": "a"})
+    assert key != SingleFlight.make_key("ws", "how to deploy", limit=10, filters={"repo": "a"})
+
+
+def test_disabled_group_runs_every_call() -> None:
+    flight = SingleFlight("rag_search", enabled=False)
+    search = MagicMock(return_value=[])
+
+    flight.do("k", search)
+    flight.do("k", search)
+
+    assert search.call_count == 2
+
+
+@pytest.mark.parametrize("path", ["rag_service.py", "memory_service.py"])
+def test_searches_are_routed_through_single_flight(path) -> None:
+    source = Path(path).read_text(encoding="utf-8")
+
+    assert "self.search_flight.do(" in source
+    assert "SingleFlight.make_key(" in source
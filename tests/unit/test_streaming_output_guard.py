@@ -0,0 +1,93 @@
+"""Unit tests for incremental output guarding of streamed chat completions."""
+
+import asyncio
+
+import pytest
+
+api_server = pytest.importorskip("api_server")
+
+
+def _stream(guard, text, step):
+    released = [guard.feed(text[index:index + step]) for index in range(0, len(text), step)]
+    released.append(guard.flush())
+    return "".join(released)
+
+
+@pytest.mark.parametrize("step", [1, 3, 7, 40])
+def test_secret_context_split_across_the_cut_is_redacted(step) -> None:
+    text = "Sure. " + "password: hunter2secret was rotated yesterday, see the runbook. " * 3
+    guard = api_server.StreamingOutputGuard(holdback_chars=10)
+
+    released = _stream(guard, text, step)
+
+    assert "hunter2secret" not in released
+    assert released.count("[REDACTED_SECRET]") == 3
+    assert guard.redaction_stats["secret_redactions"] == 3
+
+
+def test_whitespace_free_output_is_released_within_the_pending_cap() -> None:
+    guard = api_server.StreamingOutputGuard(holdback_chars=16, max_pending_chars=64)
+
+    for _ in range(100):
+        guard.feed("x" * 5)
+        assert len(guard._pending) <= 64
+
+    assert guard.text + guard.flush() == "x" * 500
+
+
+def test_oversized_secret_run_is_redacted_and_its_tail_dropped() -> None:
+    guard = api_server.StreamingOutputGuard(holdback_chars=16, max_pending_chars=64)
+
+    released = _stream(guard, "EAA" + "b" * 300 + " done", 10)
+
+    assert "bbbb" not in released
+    assert released == "[REDACTED_SECRET] done"
+
+
+async def _router_events(*texts):
+    for text in texts:
+        yield {"type": "delta", "text": text}
+
+
+def _chat_stream(events, recorded):
+    async def finalize(streamed_text, metadata):
+        return " [1]"
+
+    async def record(final_text, metadata):
+        recorded.append((final_text, dict(metadata)))
+
+    return api_server.stream_chat_completion_response(
+        completion_id="chatcmpl-test",
+        created=0,
+        model="test-model",
+        router_events=events,
+        routing_metadata={},
+        output_guard=api_server.StreamingOutputGuard(holdback_chars=0),
+        finalize=finalize,
+        record=record,
+    )
+
+
+async def test_completed_stream_records_the_answer_with_trailing_content() -> None:
+    recorded = []
+
+    chunks = [chunk async for chunk in _chat_stream(_router_events("Deploy ", "with make."), recorded)]
+    await asyncio.gather(*api_server.stream_record_tasks)
+
+    assert chunks[-1] == "data: [DONE]\n\n"
+    assert recorded == [("Deploy with make. [1]", {})]
+
+
+async def test_client_disconnect_still_records_what_was_streamed() -> None:
+    recorded = []
+    stream = _chat_stream(_router_events("Deploy ", "with make.", " Then verify."), recorded)
+
+    await stream.__anext__()
+    await stream.__anext__()
+    await stream.aclose()
+    await asyncio.gather(*api_server.stream_record_tasks)
+
+    assert len(recorded) == 1
+    final_text, metadata = recorded[0]
+    assert final_text and "Then verify" not in final_text
+    assert metadata["stream_interrupted"] is True
@@ -14,7 +14,7 @@ from datetime import datetime
 import httpx
 import psycopg2
 from neo4j import GraphDatabase
-from qdrant_client import QdrantClient
+from qdrant_client_factory import create_qdrant_client
 
 
 # Configure logging
@@ -65,7 +65,7 @@ class DataIntegrityValidator:
         }
         
         try:
-            client = QdrantClient(host=self.qdrant_host, port=self.qdrant_port)
+            client = create_qdrant_client(host=self.qdrant_host, port=self.qdrant_port)
             
             # Check health
             try:
@@ -315,7 +315,7 @@ class DataIntegrityValidator:
         
         try:
             # Connect to all databases
-            qdrant_client = QdrantClient(host=self.qdrant_host, port=self.qdrant_port)
+            qdrant_client = create_qdrant_client(host=self.qdrant_host, port=self.qdrant_port)
             neo4j_driver = GraphDatabase.driver(
                 self.neo4j_uri,
                 auth=(self.neo4j_user, self.neo4j_password)
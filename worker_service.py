@@ -11,7 +11,8 @@ import sys
 from typing import List
 
 from rq import Worker
-from data_collectors.ingestion_queue import IngestionQueue
+from data_collectors.ingestion_queue import IngestionQueue, IngestionWorker
+from data_collectors.ingestion_worker import INGESTION_WORKER_FORK
 
 logging.basicConfig(
     level=logging.INFO,
@@ -35,6 +36,8 @@ def main():
     redis_port = int(os.getenv("REDIS_PORT", "6379"))
     redis_db = int(os.getenv("REDIS_DB", "0"))
     num_workers = int(os.getenv("NUM_WORKERS", "4"))
+    # Forking workers isolate each job but reload the embedding model every time
+    fork_per_job = INGESTION_WORKER_FORK
     
     logger.info(f"Starting {num_workers} ingestion workers")
     logger.info(f"Redis: {redis_host}:{redis_port}/{redis_db}")
@@ -45,7 +48,10 @@ def main():
         redis_db=redis_db
     )
     
-    workers = ingestion_queue.create_worker(num_workers=1)
+    workers = ingestion_queue.create_worker(
+        num_workers=1,
+        worker_class=Worker if fork_per_job else IngestionWorker
+    )
     
     if workers:
         worker = workers[0]